@@ -0,0 +1,150 @@
+"""Benchmark: threaded vs asyncio export engine against a local fake BookStack.
+
+Serves a synthetic instance (books of pages with markdown exports) from a local
+ThreadingHTTPServer that adds a fixed latency to every response, then times a full
+run.exporter() cycle (discovery + archive) per engine and worker count. Latency
+stands in for a real server's response time; with it, both engines are bound by
+how many requests they keep in flight, which is what the comparison measures.
+
+The asyncio rows need httpx (`pip install 'bookstack-file-exporter[async]'`) and
+are reported as skipped without it.
+
+    task bench:engines
+    uv run python benchmarks/export_engines.py --books 20 --pages 50 --workers 8 32 64
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from bookstack_file_exporter import run
+from bookstack_file_exporter.common import extras
+from bookstack_file_exporter.config_helper.config_helper import ConfigNode
+
+
+class FakeBookStack(ThreadingHTTPServer):
+    """books/N pages each; every response is delayed by latency seconds."""
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, books: int, pages: int, page_kib: int, latency: float):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.books = books
+        self.pages = pages
+        self.page_body = b"# page\n" + b"x" * (page_kib * 1024)
+        self.latency = latency
+        self.requests = 0
+
+    @property
+    def host(self) -> str:
+        """Base URL of the server."""
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def route(self, path: str, query: dict) -> bytes | dict | None:
+        """Response body for path, None for a 404."""
+        parts = path.strip("/").split("/")[1:]  # drop "api"
+        if parts == ["shelves"]:
+            return {"data": [], "total": 0}
+        if parts == ["books"]:
+            offset, count = int(query["offset"][0]), int(query["count"][0])
+            ids = range(1, self.books + 1)
+            return {"data": [{"id": i, "name": f"book-{i}"} for i in ids][offset:offset + count],
+                    "total": self.books}
+        if len(parts) == 2 and parts[0] == "books":
+            book = int(parts[1])
+            return {"id": book, "name": f"book-{book}", "slug": f"book-{book}",
+                    "contents": [{"id": book * 10000 + p, "type": "page", "name": f"p{p}",
+                                  "slug": f"p{p}"} for p in range(self.pages)]}
+        if len(parts) == 2 and parts[0] == "pages":
+            page = int(parts[1])
+            return {"id": page, "name": f"p{page}", "slug": f"p{page}"}
+        if len(parts) == 4 and parts[0] == "pages" and parts[2] == "export":
+            return self.page_body
+        return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serve one route after the configured latency."""
+        server: FakeBookStack = self.server
+        server.requests += 1
+        time.sleep(server.latency)
+        parsed = urlparse(self.path)
+        body = server.route(parsed.path, parse_qs(parsed.query))
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if isinstance(body, dict):
+            body = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+def time_export(server: FakeBookStack, work: str, engine: str, workers: int) -> float:
+    """Seconds for one full export cycle with the given engine and worker count."""
+    config_path = os.path.join(work, f"{engine}-{workers}.yml")
+    output_path = os.path.join(work, f"out-{engine}-{workers}")
+    with open(config_path, "w", encoding="utf-8") as config_file:
+        json.dump({"host": server.host, "formats": ["markdown"],
+                   "credentials": {"token_id": "bench", "token_secret": "bench"},
+                   "export_workers": workers, "engine": engine,
+                   "output_path": output_path, "compression": {"level": 1}}, config_file)
+    config = ConfigNode(argparse.Namespace(config_file=config_path, output_dir=None))
+    start = time.perf_counter()
+    result = run.exporter(config)
+    elapsed = time.perf_counter() - start
+    if result is None:
+        raise RuntimeError(f"{engine} export with {workers} workers produced no archive")
+    return elapsed
+
+
+def main():
+    """Run the benchmark and print one row per configuration."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=40, help="pages per book")
+    parser.add_argument("--page-kib", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    server = FakeBookStack(args.books, args.pages, args.page_kib, args.latency_ms / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    missing = extras.missing_dependency("async")
+    print(f"fake BookStack: {args.books} books x {args.pages} pages, "
+          f"{args.latency_ms:.0f} ms latency per request")
+    print(f"{'engine':<10}{'workers':>8}{'seconds':>10}{'requests':>10}{'req/s':>9}")
+    try:
+        with tempfile.TemporaryDirectory() as work:
+            for workers in args.workers:
+                for engine in ("threads", "asyncio"):
+                    if engine == "asyncio" and missing:
+                        print(f"{engine:<10}{workers:>8}   skipped (httpx not installed)")
+                        continue
+                    before = server.requests
+                    seconds = time_export(server, work, engine, workers)
+                    sent = server.requests - before
+                    print(f"{engine:<10}{workers:>8}{seconds:>10.2f}{sent:>10}"
+                          f"{sent / seconds:>9.0f}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
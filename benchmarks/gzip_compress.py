@@ -0,0 +1,96 @@
+"""Benchmark: single-stream gzip vs the parallel (pigz-style) gzip writer.
+
+Builds a synthetic tar shaped like an export (compressible markdown/html pages plus
+incompressible image bytes), then compresses it through archiver_util.compress_file
+with threads=1 (the single-stream gzip.GzipFile path) and with each requested
+thread count (ParallelGzipWriter).
+
+    task bench:gzip
+    uv run python benchmarks/gzip_compress.py --size-mb 256 --threads 2 4 8
+"""
+import argparse
+import gzip
+import io
+import os
+import random
+import tarfile
+import tempfile
+import time
+
+from bookstack_file_exporter.archiver import util as archiver_util
+
+_WORDS = ("bookstack page chapter shelf export markdown attachment image revision "
+          "the of and to in is for on with as by at from this that").split()
+
+
+def _page(rng: random.Random, size: int) -> bytes:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words).encode()[:size]
+
+
+def build_tar(path: str, size_mb: int, image_share: float = 0.3, seed: int = 0):
+    """Write a tar of ~size_mb MiB: 64 KiB text pages and 256 KiB random 'images'."""
+    rng = random.Random(seed)
+    target = size_mb * 1024 * 1024
+    written = 0
+    index = 0
+    with tarfile.open(path, "w") as tar:
+        while written < target:
+            if rng.random() < image_share:
+                name, data = f"export/images/img{index}.png", os.urandom(256 * 1024)
+            else:
+                name, data = f"export/book/page{index}.md", _page(rng, 64 * 1024)
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+            written += len(data)
+            index += 1
+
+
+def time_compress(tar_path: str, out_path: str, level: int, threads: int) -> float:
+    """Seconds to compress tar_path into out_path; validates the output reads back."""
+    start = time.perf_counter()
+    archiver_util.compress_file(tar_path, out_path, "gzip", level, threads, remove_old=False)
+    elapsed = time.perf_counter() - start
+    with gzip.open(out_path, "rb") as check:
+        while check.read(1024 * 1024):
+            pass
+    return elapsed
+
+
+def main():
+    """Run the benchmark and print one row per configuration."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=128)
+    parser.add_argument("--level", type=int, default=9)
+    parser.add_argument("--threads", type=int, nargs="+",
+                        default=sorted({2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--repeat", type=int, default=3, help="best-of-N timing")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work:
+        tar_path = os.path.join(work, "bench.tar")
+        out_path = os.path.join(work, "bench.tgz")
+        build_tar(tar_path, args.size_mb)
+        tar_size = os.path.getsize(tar_path)
+        print(f"input: {tar_size / 2**20:.0f} MiB tar, gzip level {args.level}, "
+              f"{os.cpu_count()} CPUs, best of {args.repeat}")
+        print(f"{'path':<22}{'threads':>8}{'seconds':>10}{'MiB/s':>9}{'ratio':>8}{'speedup':>9}")
+        baseline = None
+        for threads in [1] + [t for t in args.threads if t > 1]:
+            best = min(time_compress(tar_path, out_path, args.level, threads)
+                       for _ in range(args.repeat))
+            baseline = baseline or best
+            label = "gzip (single stream)" if threads == 1 else "parallel block gzip"
+            ratio = os.path.getsize(out_path) / tar_size
+            print(f"{label:<22}{threads:>8}{best:>10.2f}{tar_size / 2**20 / best:>9.1f}"
+                  f"{ratio:>8.3f}{baseline / best:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
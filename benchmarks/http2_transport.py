@@ -0,0 +1,232 @@
+"""Benchmark: HTTP/1.1 connection pool vs HTTP/2 transport (http_config.http2).
+
+Starts two local TLS servers with a self-signed certificate (made with the openssl
+CLI): an HTTP/1.1 ThreadingHTTPServer and an HTTP/2 server on the h2 library. Both
+add a fixed latency to every response and count the TLS connections they accept.
+Then it sends the same GETs through HttpHelper from a pool of worker threads, once
+per transport and worker count. Connections is the number of TLS handshakes the run
+cost: HTTP/1.1 opens one per concurrent worker, HTTP/2 multiplexes them over a few.
+--handshake-ms adds a delay to each accepted connection, standing in for the
+round trips of a real TLS handshake across a network.
+
+Needs httpx with h2 (`pip install 'bookstack-file-exporter[http2]'`); the HTTP/2
+rows are reported as skipped without it.
+
+    task bench:http2
+    uv run python benchmarks/http2_transport.py --requests 2000 --workers 8 32 64
+"""
+import argparse
+import asyncio
+import logging
+import os
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bookstack_file_exporter.common import extras
+from bookstack_file_exporter.common.util import HttpHelper
+from bookstack_file_exporter.config_helper.models import HttpConfig
+
+
+def make_certificate(work: str) -> tuple[str, str]:
+    """Self-signed certificate and key for 127.0.0.1."""
+    cert, key = os.path.join(work, "cert.pem"), os.path.join(work, "key.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+                    "-subj", "/CN=127.0.0.1", "-days", "1", "-keyout", key, "-out", cert],
+                   check=True, capture_output=True)
+    return cert, key
+
+
+def tls_context(cert: str, key: str, protocol: str) -> ssl.SSLContext:
+    """Server TLS context offering one ALPN protocol."""
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    context.set_alpn_protocols([protocol])
+    return context
+
+
+class Http1Server(ThreadingHTTPServer):
+    """HTTP/1.1 over TLS; every response is delayed by latency seconds."""
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, context: ssl.SSLContext, body: bytes, latency: float,
+                 handshake: float):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.context = context
+        self.body = body
+        self.latency = latency
+        self.handshake = handshake
+        self.connections = 0
+
+    @property
+    def host(self) -> str:
+        """Base URL of the server."""
+        return f"https://127.0.0.1:{self.server_address[1]}"
+
+    def get_request(self):
+        sock, address = super().get_request()
+        return self.context.wrap_socket(sock, server_side=True,
+                                        do_handshake_on_connect=False), address
+
+    def process_request_thread(self, request, client_address):
+        # the handshake runs on the connection's own thread, not the accept loop
+        time.sleep(self.handshake)
+        request.do_handshake()
+        self.connections += 1
+        super().process_request_thread(request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serve the body after the configured latency."""
+        server: Http1Server = self.server
+        time.sleep(server.latency)
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(server.body)))
+        self.end_headers()
+        self.wfile.write(server.body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class Http2Server:  # pylint: disable=too-few-public-methods
+    """HTTP/2 over TLS on an asyncio loop in a background thread."""
+    def __init__(self, context: ssl.SSLContext, body: bytes, latency: float,
+                 handshake: float):
+        self.context = context
+        self.body = body
+        self.latency = latency
+        self.handshake = handshake
+        self.connections = 0
+        self.port = 0
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        threading.Thread(target=self._serve, args=(ready,), daemon=True).start()
+        ready.wait()
+
+    def _serve(self, ready: threading.Event):
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(
+            asyncio.start_server(self._connection, "127.0.0.1", 0, ssl=self.context))
+        self.port = server.sockets[0].getsockname()[1]
+        ready.set()
+        self._loop.run_forever()
+
+    @property
+    def host(self) -> str:
+        """Base URL of the server."""
+        return f"https://127.0.0.1:{self.port}"
+
+    async def _connection(self, reader: asyncio.StreamReader,
+                          writer: asyncio.StreamWriter):
+        # pylint: disable=import-outside-toplevel,import-error
+        from h2.config import H2Configuration
+        from h2.connection import H2Connection
+        from h2.events import ConnectionTerminated, RequestReceived, WindowUpdated
+        # TLS is done by now; the delay holds the connection's first response
+        self.connections += 1
+        await asyncio.sleep(self.handshake)
+        conn = H2Connection(H2Configuration(client_side=False))
+        conn.initiate_connection()
+        writer.write(conn.data_to_send())
+        pending: dict[int, bytes] = {}
+
+        def flush():
+            for stream_id, body in list(pending.items()):
+                size = min(len(body), conn.local_flow_control_window(stream_id),
+                           conn.max_outbound_frame_size)
+                if size or not body:
+                    conn.send_data(stream_id, body[:size], end_stream=size == len(body))
+                    if size == len(body):
+                        del pending[stream_id]
+                    else:
+                        pending[stream_id] = body[size:]
+            writer.write(conn.data_to_send())
+
+        def respond(stream_id: int):
+            conn.send_headers(stream_id, [(":status", "200"),
+                                          ("content-length", str(len(self.body)))])
+            pending[stream_id] = self.body
+            flush()
+
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            for event in conn.receive_data(data):
+                if isinstance(event, RequestReceived):
+                    self._loop.call_later(self.latency, respond, event.stream_id)
+                elif isinstance(event, WindowUpdated):
+                    flush()
+                elif isinstance(event, ConnectionTerminated):
+                    writer.close()
+                    return
+            writer.write(conn.data_to_send())
+        writer.close()
+
+
+def time_requests(host: str, use_http2: bool, workers: int, count: int) -> float:
+    """Seconds to send count GETs from workers threads through one HttpHelper."""
+    config = HttpConfig(verify_ssl=False, http2=use_http2)
+    helper = HttpHelper({}, config, export_workers=workers)
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for response in executor.map(helper.http_get_request,
+                                         [f"{host}/api/pages/{i}" for i in range(count)]):
+                response.content  # pylint: disable=pointless-statement
+    finally:
+        helper.close()
+    return time.perf_counter() - start
+
+
+def main():
+    """Run the benchmark and print one row per configuration."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--body-kib", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--handshake-ms", type=float, default=30.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[8, 32])
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    body = b"x" * (args.body_kib * 1024)
+    timing = (args.latency_ms / 1000, args.handshake_ms / 1000)
+    with tempfile.TemporaryDirectory() as work:
+        cert, key = make_certificate(work)
+        h1 = Http1Server(tls_context(cert, key, "http/1.1"), body, *timing)
+        threading.Thread(target=h1.serve_forever, daemon=True).start()
+        h2 = (None if extras.missing_dependency("http2")
+              else Http2Server(tls_context(cert, key, "h2"), body, *timing))
+        print(f"{args.requests} GETs of {args.body_kib} KiB, {args.latency_ms:.0f} ms "
+              f"latency, {args.handshake_ms:.0f} ms per handshake")
+        print(f"{'transport':<10}{'workers':>8}{'seconds':>10}{'conns':>8}{'req/s':>9}")
+        try:
+            for workers in args.workers:
+                for name, server in (("http/1.1", h1), ("http/2", h2)):
+                    if server is None:
+                        print(f"{name:<10}{workers:>8}   skipped (httpx/h2 not installed)")
+                        continue
+                    before = server.connections
+                    seconds = time_requests(server.host, server is h2, workers,
+                                            args.requests)
+                    print(f"{name:<10}{workers:>8}{seconds:>10.2f}"
+                          f"{server.connections - before:>8}"
+                          f"{args.requests / seconds:>9.0f}")
+        finally:
+            # the HTTP/2 loop thread is a daemon and ends with the process
+            h1.shutdown()
+
+
+if __name__ == "__main__":
+    main()
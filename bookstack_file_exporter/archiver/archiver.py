@@ -1,22 +1,28 @@
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import glob
 import logging
 import os
+from typing import Iterable
 
 from bookstack_file_exporter.exporter.node import Node
 from bookstack_file_exporter.archiver import util
+from bookstack_file_exporter.archiver import codecs, manifest, seek_index
 from bookstack_file_exporter.archiver.node_archiver import (
     NodeArchiver,
     BookArchiver,
     ChapterArchiver,
     PageArchiver,
+    archiver_options,
 )
 from bookstack_file_exporter.archiver.s3_archiver import S3CompatibleArchiver
+from bookstack_file_exporter.archiver.sink import SinkStats
 from bookstack_file_exporter.config_helper.remote import S3ProviderConfig
 from bookstack_file_exporter.notify.models import ExportStatus, UploadOutcome
 from bookstack_file_exporter.config_helper.config_helper import ConfigNode
 from bookstack_file_exporter.common import util as common_util
 from bookstack_file_exporter.common.util import HttpHelper
+from bookstack_file_exporter.common.async_http import AsyncHttpHelper
 
 log = logging.getLogger(__name__)
 
@@ -41,49 +47,39 @@ class Archiver:
     Args:
         :config: <ConfigNode> = Configuration with user inputs and general options.
         :http_client: <HttpHelper> = http helper functions with config from user inputs
+        :async_http: <AsyncHttpHelper | None> = asyncio engine client (engine: asyncio);
+            None => the thread engine
 
     Returns:
         Archiver instance with attributes that are accessible
         for use for handling bookstack exports and remote uploads.
     """
     def __init__(self, config: ConfigNode, http_client: HttpHelper,
-                 node_archiver=None, s3_archiver_cls=S3CompatibleArchiver):
+                 node_archiver=None, s3_archiver_cls=S3CompatibleArchiver,
+                 async_http: AsyncHttpHelper | None = None):
         self.config = config
         # for convenience
         self.base_dir = self._level_base_dir(config.base_dir_name,
                                              config.user_inputs.export_level)
         self.archive_dir = self._generate_root_folder(self.base_dir)
         self._archiver: NodeArchiver = (
-            node_archiver if node_archiver is not None else self._build_archiver(http_client)
+            node_archiver if node_archiver is not None
+            else self._build_archiver(http_client, async_http)
         )
         self._s3_archiver_cls = s3_archiver_cls
 
-    def _build_archiver(self, http_client: HttpHelper) -> NodeArchiver:
+    def _build_archiver(self, http_client: HttpHelper,
+                        async_http: AsyncHttpHelper | None = None) -> NodeArchiver:
         """Return the appropriate archiver based on the configured export level."""
-        export_level = self.config.user_inputs.export_level
-        export_meta: bool = self.config.user_inputs.assets.export_meta
-        if export_level == "books":
-            return BookArchiver(
-                archive_dir=self.archive_dir,
-                api_urls=self.config.urls,
-                export_formats=self.config.user_inputs.formats,
-                http_client=http_client,
-                export_meta=export_meta,
-                asset_config=self.config.user_inputs.assets,
-                export_workers=self.config.user_inputs.export_workers,
-            )
-        if export_level == "chapters":
-            return ChapterArchiver(
-                archive_dir=self.archive_dir,
-                api_urls=self.config.urls,
-                export_formats=self.config.user_inputs.formats,
-                http_client=http_client,
-                export_meta=export_meta,
-                asset_config=self.config.user_inputs.assets,
-                export_workers=self.config.user_inputs.export_workers,
-            )
+        level_archivers = {"books": BookArchiver, "chapters": ChapterArchiver}
+        archiver_cls = level_archivers.get(self.config.user_inputs.export_level)
+        if archiver_cls is not None:
+            return archiver_cls(archive_dir=self.archive_dir, http_client=http_client,
+                                output_dir=self.base_dir, async_http=async_http,
+                                **archiver_options(self.config))
         # default: "pages"
-        return PageArchiver(self.archive_dir, self.config, http_client)
+        return PageArchiver(self.archive_dir, self.config, http_client,
+                            output_dir=self.base_dir, async_http=async_http)
 
     def create_export_dir(self):
         """create directory for archiving"""
@@ -109,21 +105,28 @@ class Archiver:
         """
         self._archiver._stop = stop  # pylint: disable=protected-access
 
+    def _in_progress_files(self) -> list[str]:
+        """This run's intermediate tar, archive .partial and volume .partials (any may
+        not exist)."""
+        volumes = glob.glob(f"{glob.escape(self.archive_dir)}.part*{codecs.PARTIAL_SUFFIX}")
+        return [self._archiver.tar_file,
+                f"{self._archiver.archive_file}{codecs.PARTIAL_SUFFIX}", *volumes]
+
     def discard_partial(self):
-        """Remove this run's intermediate tar and any .tgz.partial; never the final .tgz.
+        """Remove this run's intermediate tar and any .partial; never the final archive.
 
         Idempotent and missing-file tolerant: an all-empty cycle writes no tar, and
         a successful run has already consumed the tar and renamed the .partial away,
-        so this is a no-op on the success path.
+        so this is a no-op on the success path. With compression.streaming (or codec
+        'none') the sink writes straight into the .partial, which is removed the same way.
         """
-        partial = f"{self._archiver.archive_file}.partial"
-        for path in (self._archiver.tar_file, partial):
+        for path in self._in_progress_files():
             if os.path.exists(path):
                 log.info("Cleaning up partial archive: %s", path)
                 util.remove_file(path)
 
     def sweep_orphans(self):
-        """Delete prior-run .tar / .tgz.partial orphans (SIGKILL backstop).
+        """Delete prior-run .partial orphans of every codec (SIGKILL backstop).
 
         Run at the start of a cycle, BEFORE this run writes any tar or .partial.
         Safety comes from that ordering, not the glob: scan_archives globs
@@ -136,30 +139,47 @@ class Archiver:
         level, so `bkps_*` clears partials stranded by prior runs at any level. The
         `bkps_` prefix still anchors the scan so unrelated files are never touched.
         (keep_last retention deliberately stays level-scoped — those are deliverables.)
-        Also retro-cleans .tar orphans from past failed cycles.
+        Only *.partial names are matched: a bare .tar is a finished archive under
+        codec 'none', so intermediates carry the .partial suffix too.
         """
-        tgz_ext = self._archiver.file_extension_map['tgz']
-        for ext in (self._archiver.file_extension_map['tar'], f"{tgz_ext}.partial"):
-            for path in util.scan_archives(self.config.base_dir_name, ext):
-                util.remove_file(path)
+        for path in util.scan_archives(self.config.base_dir_name, codecs.PARTIAL_SUFFIX):
+            util.remove_file(path)
 
     def get_bookstack_exports(self, nodes: dict[int, Node]):
         """export all node content (polymorphic: pages, books, or chapters)"""
         log.info("Exporting all bookstack contents")
         self._archiver.archive(nodes)
 
+    def stream_bookstack_exports(self, page_nodes: Iterable[Node]):
+        """export pages as they are discovered (pipeline, export_level pages)"""
+        log.info("Exporting bookstack pages as they are discovered")
+        self._archiver.archive_stream(page_nodes)
+
     @property
     def has_exported_content(self) -> bool:
-        """True if the intermediate tar exists, i.e. at least one file was written.
+        """True if the intermediate tar (or, when streaming, the .partial) exists,
+        i.e. at least one file was written.
 
-        Checked against the tar on disk (ground truth) rather than a flag threaded
+        Checked against the file on disk (ground truth) rather than a flag threaded
         up from the archivers, so it cannot drift from what was actually archived.
+        The sink creates its file lazily on the first member, so an all-empty run
+        leaves neither behind. output_mode "directory" writes into a tree that outlives
+        the run, so there the sink's member count is the evidence instead.
         """
-        return os.path.exists(self._archiver.tar_file)
+        if self.config.user_inputs.output_mode == "directory":
+            stats = self._archiver.write_stats
+            return bool(stats and stats.members)
+        return any(os.path.exists(path) for path in self._in_progress_files())
+
+    @property
+    def write_stats(self) -> SinkStats | None:
+        """Archive-writer counters (members, bytes, writer busy / producer wait
+        seconds) from the last export, or None if nothing was exported yet."""
+        return self._archiver.write_stats
 
     def create_archive(self):
-        """create tgz archive"""
-        self._archiver.gzip_archive()
+        """compress the tar into the configured codec's archive"""
+        self._archiver.compress_archive()
 
     # send to remote systems
     def archive_remote(self) -> list[UploadOutcome]:
@@ -190,7 +210,7 @@ class Archiver:
         label = provider_config.name
         try:
             archiver = self._s3_archiver_cls(provider_config)
-            dest = archiver.upload_backup(self._archiver.archive_file)
+            dest = self._upload_files(archiver)
         except Exception as err:  # pylint: disable=broad-except
             # attempt-all: record and continue so other targets still run
             log.error("Upload to target '%s' failed: %s", label, err)
@@ -198,13 +218,22 @@ class Archiver:
         # Upload landed. A retention-prune failure is housekeeping, not a backup failure:
         # keep dest (never flip to failed) but flag a warning so the run is degraded.
         try:
-            archiver.clean_up(self._archiver.file_extension_map['tgz'])
+            archiver.clean_up(codecs.ARCHIVE_EXTENSIONS)
         except Exception as err:  # pylint: disable=broad-except
             log.error("Remote retention cleanup for target '%s' failed (upload OK): %s",
                       label, err)
             return UploadOutcome(label=label, dest=dest, error=None, warning=str(err))
         return UploadOutcome(label=label, dest=dest, error=None)
 
+    def _upload_files(self, archiver: S3CompatibleArchiver) -> str:
+        """Upload the backup to one target; volumes go up concurrently. Returns the
+        dest of the (first) file."""
+        files = self._archiver.archive_files
+        if len(files) <= 1:
+            return archiver.upload_backup(self._archiver.archive_file)
+        dests = archiver.upload_backups(files, _MAX_UPLOAD_WORKERS)
+        return f"{dests[0]} (+{len(dests) - 1} more volumes)"
+
     def resolve_remote_status(self, outcomes: list[UploadOutcome]) -> ExportStatus:
         """Derive run status from upload outcomes. Raise AggregateUploadError only when
         NO durable copy survives: every upload failed AND keep_last<0 deletes the local.
@@ -235,14 +264,21 @@ class Archiver:
 
     @property
     def archive_file(self) -> str:
-        """full path to the produced .tgz archive"""
+        """full path to the produced archive (.tgz, .tar.zst, ..., .zip)"""
         return self._archiver.archive_file
 
+    @property
+    def archive_files(self) -> list[str]:
+        """every file of the produced backup: its volumes with max_volume_size, else
+        just archive_file"""
+        return self._archiver.archive_files
+
     def _get_stale_archives(self) -> list[str]:
         # if user is uploading to object storage
-        # delete the local .tgz archive since we have it there already
-        archive_list: list[str] = util.scan_archives(self.base_dir,
-                                                     self._archiver.file_extension_map['tgz'])
+        # delete the local archive since we have it there already. Every codec's
+        # extension is scanned so switching codecs never strands older archives
+        # outside keep_last.
+        archive_list: list[str] = util.scan_archives(self.base_dir, codecs.ARCHIVE_EXTENSIONS)
         if not archive_list:
             log.debug("No archive files found to clean up")
             return []
@@ -251,9 +287,10 @@ class Archiver:
         if self.config.user_inputs.keep_last < 0:
             log.debug("Local archive files will be deleted, keep_last: -1")
             return archive_list
-        # keep_last > 0 condition
+        # keep_last > 0 condition; the volumes of one backup count once
         to_delete = []
-        if len(archive_list) > self.config.user_inputs.keep_last:
+        backups = common_util.group_backup_sets(archive_list, os.path.basename)
+        if len(backups) > self.config.user_inputs.keep_last:
             log.debug("Number of archives is greater than 'keep_last'")
             log.debug("Running clean up of local archives")
             to_delete = self._filter_archives(archive_list)
@@ -261,8 +298,9 @@ class Archiver:
 
     def _filter_archives(self, file_list: list[str]) -> list[str]:
         """get older archives based on keep number"""
-        files_to_clean = common_util.oldest_beyond_keep(
+        files_to_clean = common_util.oldest_sets_beyond_keep(
             file_list,
+            name=os.path.basename,
             key=lambda f: os.stat(f).st_ctime,
             keep_last=self.config.user_inputs.keep_last,
         )
@@ -272,6 +310,12 @@ class Archiver:
     def _delete_files(self, file_list: list[str]):
         for file in file_list:
             util.remove_file(file)
+            # sidecars live and die with their archive; a volume set's manifest
+            # sidecar is named after the set
+            backup = common_util.backup_set_name(file)
+            for sidecar in (manifest.sidecar_path(backup), seek_index.sidecar_path(file)):
+                if os.path.exists(sidecar):
+                    util.remove_file(sidecar)
 
     @staticmethod
     def _level_base_dir(base_dir: str, export_level: str) -> str:
@@ -6,11 +6,11 @@ import base64
 from typing import Literal
 
 from markdown_it import MarkdownIt
-# pylint: disable=import-error
-from requests import Response
 from bs4 import BeautifulSoup, SoupStrainer
 
 from bookstack_file_exporter.common.util import HttpHelper
+from bookstack_file_exporter.archiver.budget import ByteBudget, fetch
+from bookstack_file_exporter.archiver.spool import Spool, fetch_body
 
 # Module-level singleton avoids reconstructing the parser on every call.
 _md = MarkdownIt()
@@ -38,6 +38,7 @@ class AssetNode:
     def __init__(self, meta_data: dict[str, int | str | bool]):
         self.id_: int = meta_data['id']
         self.page_id: int = meta_data['uploaded_to']
+        self.updated_at: str | None = meta_data.get('updated_at')
         self.download_url: str = ""
         self.page_url: str = ""
         self.name: str = ""
@@ -268,24 +269,46 @@ class AssetArchiver:
             'attachments': self._create_attachment_map
         }
         self.http_client = http_client
+        # in-flight byte budget (max_inflight_bytes); set by the node archiver for the
+        # duration of an export, None => asset bodies are not counted
+        self.budget: ByteBudget | None = None
+        # spool_threshold: image bodies larger than this are streamed to a temp file;
+        # set by the node archiver, None => read into memory
+        self.spool_threshold: int | None = None
 
     def get_asset_nodes(self, asset_type: str) -> dict[int, list[ImageNode | AttachmentNode]]:
         """Get image or attachment helpers for a page (paginated to cover all assets)."""
         asset_json = self.http_client.http_get_all(self.api_urls[asset_type])
         return self._asset_map[asset_type](asset_json)
 
+    def asset_data_url(self, asset_type: str, meta_data: AttachmentNode | ImageNode) -> str:
+        """API url of an asset's detail JSON (content/links used for link rewriting)"""
+        return f"{self.api_urls[asset_type]}/{meta_data.id_}"
+
     def get_asset_data(self, asset_type: str,
             meta_data: AttachmentNode | ImageNode) -> dict[str, str | bool | int | dict]:
         """Get asset data based on type"""
-        data_url = f"{self.api_urls[asset_type]}/{meta_data.id_}"
-        asset_data_response: Response = self.http_client.http_get_request(
-            data_url)
-        return asset_data_response.json()
-
-    def get_asset_bytes(self, asset_type: str, url: str) -> bytes:
-        """Get raw asset data"""
-        asset_response: Response = self.http_client.http_get_request(
-            url)
+        return self.http_client.http_get_json(self.asset_data_url(asset_type, meta_data))
+
+    def get_asset_bytes(self, asset_type: str, url: str) -> bytes | Spool:
+        """Get raw asset data. With spool_threshold, a large image comes back as a
+        Spool; attachments arrive base64-encoded inside JSON and are always bytes.
+
+        Concurrent downloads of the same asset share one request and its decoded bytes
+        (single flight). Spooled images are not shared: a Spool is one temp file,
+        closed once the sink has written it.
+        """
+        if asset_type == "images" and self.spool_threshold is not None:
+            return fetch_body(self.http_client, url, self.budget, self.spool_threshold)
+        # keyed apart from http_get_json's flights: an attachment's detail JSON and
+        # its download share a url but not a result
+        return self.http_client.single_flight.do(
+            f"{asset_type}:{url}",
+            lambda: self.decode_asset(asset_type, fetch(self.http_client, url, self.budget)))
+
+    def decode_asset(self, asset_type: str, asset_response) -> bytes:
+        """Raw asset bytes from a download response: the body for images, the
+        base64-decoded JSON content for attachments."""
         match asset_type:
             case "images":
                 asset_data = asset_response.content
@@ -295,21 +318,37 @@ class AssetArchiver:
                 raise ValueError(f"unsupported asset type: {asset_type}")
         return asset_data
 
+    @staticmethod
+    def needs_asset_data(kind: Literal["markdown", "html"],
+                         asset_node: ImageNode | AttachmentNode) -> bool:
+        """Whether rewriting `kind` links needs the asset's detail JSON. In HTML mode,
+        ImageNode.page_url is the only useful URL (see _build_url_map)."""
+        return not (kind == "html" and isinstance(asset_node, ImageNode))
+
     def update_asset_links(self, asset_type: str, page_name: str, page_data: bytes,
-            asset_nodes: list[ImageNode | AttachmentNode]) -> bytes:
-        """Update markdown links in page data using literal bytes.replace."""
-        url_map = self._build_url_map(asset_type, page_name, asset_nodes, kind="markdown")
+            asset_nodes: list[ImageNode | AttachmentNode],
+            asset_data: dict[int, dict] | None = None) -> bytes:
+        """Update markdown links in page data using literal bytes.replace.
+
+        asset_data maps asset id to detail JSON already fetched by the caller; None
+        fetches each one here."""
+        url_map = self._build_url_map(asset_type, page_name, asset_nodes, kind="markdown",
+                                      asset_data=asset_data)
         return self._apply_url_substitutions(page_data, url_map)
 
+    # pylint: disable=too-many-locals
     def update_asset_links_html(self, asset_type: str, page_name: str, page_data: bytes,
-            asset_nodes: list[ImageNode | AttachmentNode]) -> bytes:
+            asset_nodes: list[ImageNode | AttachmentNode],
+            asset_data: dict[int, dict] | None = None) -> bytes:
         """Update HTML links in page data using bs4 URL discovery + bytes.replace.
 
-        Caller must guard on modify_links before invoking this method.
+        Caller must guard on modify_links before invoking this method. asset_data is
+        as for update_asset_links.
         """
         if not asset_nodes:
             return page_data
-        url_map = self._build_url_map(asset_type, page_name, asset_nodes, kind="html")
+        url_map = self._build_url_map(asset_type, page_name, asset_nodes, kind="html",
+                                      asset_data=asset_data)
         # Parse to find which URLs appear in HTML element attributes (img src, a href).
         # Do NOT remove this filter — passing url_map directly to _apply_url_substitutions
         # would let bytes.replace hit URLs inside <code>, <pre>, comments, and text nodes.
@@ -351,9 +390,10 @@ class AssetArchiver:
                 matched_urls[href] = url_map[href]
         return self._apply_url_substitutions(page_data, matched_urls)
 
-    def _build_url_map(self, asset_type: str, page_name: str,
+    def _build_url_map(self, asset_type: str, page_name: str,  # pylint: disable=too-many-arguments,too-many-positional-arguments
             asset_nodes: list[ImageNode | AttachmentNode],
-            kind: Literal["markdown", "html"]) -> dict[str, str]:
+            kind: Literal["markdown", "html"],
+            asset_data: dict[int, dict] | None = None) -> dict[str, str]:
         """Build a {remote_url: local_relative_path} map for all asset nodes.
 
         For each node we collect every URL variant that could appear in the
@@ -365,18 +405,23 @@ class AssetArchiver:
         For HTML exports, ImageNode.page_url already covers the anchor href
         that BookStack embeds in content.html (the img src is base64 and
         skipped by _get_html_url_strs). Skip the per-asset API call.
+
+        asset_data, when given, holds the detail JSON of every node that needs one
+        (prefetched by the asyncio engine) and no request is made here.
         """
         url_map: dict[str, str] = {}
         for asset_node in asset_nodes:
             # In HTML mode, ImageNode.page_url is the only useful URL —
             # content.html img src is base64 (filtered out) and the outer
             # anchor href equals page_url. Skip the redundant API call.
-            if kind == "html" and isinstance(asset_node, ImageNode):
-                asset_data: dict = {}
+            if not self.needs_asset_data(kind, asset_node):
+                node_data: dict = {}
+            elif asset_data is not None:
+                node_data = asset_data[asset_node.id_]
             else:
-                asset_data = self.get_asset_data(asset_type, asset_node)
+                node_data = self.get_asset_data(asset_type, asset_node)
             local_path = asset_node.get_relative_path(page_name)
-            for url in asset_node.all_urls(asset_data, kind):
+            for url in asset_node.all_urls(node_data, kind):
                 url_map[url] = local_path
         return url_map
 
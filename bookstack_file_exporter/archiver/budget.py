@@ -0,0 +1,143 @@
+"""In-flight byte budget between the fetch workers and the archive writer.
+
+Every export body and asset is fully buffered from the moment a worker reads it
+until the sink's writer thread has written it. The sink's queue bound caps how many
+such members wait, but not how large they are: sixteen workers each holding a
+200 MB book PDF is 3.2 GB no matter how short the queue. ByteBudget caps the sum.
+
+A worker reserves a response's announced size (Content-Length) before reading the
+body and blocks while the budget is exhausted. The reservation follows the bytes:
+write_data hands the worker's reservation to the sink together with the member, and
+the writer thread releases it once the member is on disk. A single response larger
+than the whole budget is admitted alone, once nothing else is in flight.
+
+Deadlock freedom rests on one invariant: a worker never waits for budget while it
+holds a reservation (every fetched body is handed to the sink before the next
+fetch), and the writer releases without ever needing budget itself.
+
+Sizes come from Content-Length. A body without one (chunked) or with a content
+encoding decodes to more than was announced; the difference is added once the body
+is read, without blocking, so those responses can overshoot by that amount.
+"""
+import threading
+import time
+
+from requests import Response
+
+from bookstack_file_exporter.common.util import HttpHelper
+
+
+class ByteBudget:
+    """
+    ByteBudget is a blocking counter of buffered response bytes.
+
+    Reservations are tracked per thread as well (held), so write_data can hand exactly
+    the calling worker's bytes to the sink without threading a token through every
+    fetch and archive call.
+
+    Args:
+        :limit: <int> = bytes that may be in flight at once.
+
+    Returns:
+        ByteBudget instance shared by the export workers of one run.
+    """
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        # high-water mark of in-flight bytes and total time workers blocked
+        self.peak = 0
+        self.wait_seconds = 0.0
+
+    @property
+    def held(self) -> int:
+        """Bytes reserved by the calling thread and not yet handed off."""
+        return getattr(self._local, "held", 0)
+
+    def _hold(self, size: int):
+        self._local.held = self.held + size
+
+    def reserve(self, size: int):
+        """Reserve size bytes for the calling thread; block while they do not fit.
+
+        Waits while anything else is in flight and in_use + size exceeds the limit, so
+        an oversized request is admitted once the budget is empty. A size of 0 (not
+        announced) still waits while the budget is exhausted.
+        """
+        needed = max(size, 1)
+        start = time.perf_counter()
+        with self._cond:
+            while self._in_use and self._in_use + needed > self.limit:
+                self._cond.wait()
+            self._in_use += size
+            self.peak = max(self.peak, self._in_use)
+            self.wait_seconds += time.perf_counter() - start
+        self._hold(size)
+
+    def settle(self, reserved: int, actual: int):
+        """Correct the calling thread's reservation to the body size actually read.
+
+        Growth never blocks: the bytes already exist, and a worker waiting while it
+        holds a reservation could deadlock the budget.
+        """
+        with self._cond:
+            self._in_use += actual - reserved
+            self.peak = max(self.peak, self._in_use)
+            if actual < reserved:
+                self._cond.notify_all()
+        self._hold(actual - reserved)
+
+    def hand_off(self) -> int:
+        """Return the calling thread's held bytes and clear them; the caller (or
+        whoever it passes the count to) now owes the release."""
+        held = self.held
+        self._local.held = 0
+        return held
+
+    def release(self, size: int):
+        """Return size bytes to the budget and wake waiting workers."""
+        if not size:
+            return
+        with self._cond:
+            self._in_use -= size
+            self._cond.notify_all()
+
+    @property
+    def in_use(self) -> int:
+        """Bytes currently reserved."""
+        with self._cond:
+            return self._in_use
+
+
+def announced_size(response: Response) -> int:
+    """Content-Length of a streamed response, or 0 when absent or malformed."""
+    try:
+        return max(int(response.headers.get("Content-Length", 0)), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def fetch(http_client: HttpHelper, url: str, budget: ByteBudget | None) -> Response:
+    """GET url with its body read; with a budget, reserve the body size first.
+
+    The returned response's content is already buffered (and counted in the calling
+    thread's held bytes), so .content and .json() do not touch the network again.
+    """
+    if budget is None:
+        return http_client.http_get_request(url)
+    # a worker holds nothing between fetches (each body is handed to the sink), so
+    # anything still held was dropped unwritten; free it before waiting for more
+    budget.release(budget.hand_off())
+    response = http_client.http_get_request(url, stream=True)
+    expected = announced_size(response)
+    budget.reserve(expected)
+    try:
+        body = response.content
+    except BaseException:
+        budget.settle(expected, 0)
+        raise
+    finally:
+        response.close()
+    budget.settle(expected, len(body))
+    return response
@@ -0,0 +1,209 @@
+"""Archive compression codecs: one registry shared by the writer, retention and config.
+
+Every codec produces a plain tar wrapped in one compression stream, so any archive the
+tool writes can be opened with stock tooling (`tar -xf`, `zstd -d`, `xz -d`, `lz4 -d`).
+The registry is the single source of truth for codec extensions: local `keep_last`,
+the run-start orphan sweep and the S3 managed-object filter all match against
+ARCHIVE_EXTENSIONS (which also covers output_mode "zip"), so retention keeps
+recognizing older archives after the configured codec or output mode changes.
+
+zstd and lz4 are optional dependencies (`pip install bookstack-file-exporter[zstd]` /
+`[lz4]`). zstd prefers the stdlib `compression.zstd` module (Python 3.14+) and falls
+back to the `zstandard` package. Availability is checked at config load
+(common/extras.py) so a missing module fails before the export, not after it.
+"""
+import gzip
+import importlib
+import lzma
+import os
+from dataclasses import dataclass
+from typing import BinaryIO, Callable
+
+from bookstack_file_exporter.archiver.encryption import ENCRYPTED_SUFFIX, EncryptingWriter
+from bookstack_file_exporter.archiver.pgzip import (
+    BLOCK_SIZE, ParallelGzipWriter, RestartableGzipWriter)
+
+
+@dataclass(frozen=True)
+class Codec:
+    """Static description of one archive codec.
+
+    level_range is inclusive; None means the codec takes no level (uncompressed).
+    seekable codecs can carry a seek index (seek_index.py): gzip through restart
+    points, none because tar offsets are file offsets.
+    """
+    name: str
+    extension: str
+    default_level: int | None
+    level_range: tuple[int, int] | None
+    modules: tuple[str, ...] = ()
+    seekable: bool = False
+
+
+# Order matters only for docs/logging; lookups go through CODECS by name.
+_CODEC_LIST = (
+    # level 9 matches the previous hard-coded gzip.open() default, so `gzip` keeps
+    # its compression ratio for existing configs
+    Codec("gzip", ".tgz", 9, (0, 9), seekable=True),
+    Codec("zstd", ".tar.zst", 3, (1, 22), ("compression.zstd", "zstandard")),
+    Codec("xz", ".tar.xz", 6, (0, 9)),
+    Codec("lz4", ".tar.lz4", 0, (0, 16), ("lz4.frame",)),
+    Codec("none", ".tar", None, None, seekable=True),
+)
+
+CODECS: dict[str, Codec] = {codec.name: codec for codec in _CODEC_LIST}
+
+DEFAULT_CODEC = "gzip"
+
+# Extension of output_mode "zip" archives (ZipSink picks a codec per member).
+ZIP_EXTENSION = ".zip"
+
+# Every finished-archive extension the tool may have produced, for retention scans;
+# an encrypted archive adds ENCRYPTED_SUFFIX to its codec's extension.
+_PLAIN_EXTENSIONS = tuple(codec.extension for codec in _CODEC_LIST) + (ZIP_EXTENSION,)
+ARCHIVE_EXTENSIONS: tuple[str, ...] = _PLAIN_EXTENSIONS + tuple(
+    f"{extension}{ENCRYPTED_SUFFIX}" for extension in _PLAIN_EXTENSIONS
+    if extension != ZIP_EXTENSION)
+
+# Suffix for in-progress files (intermediate tar and compressed output alike).
+PARTIAL_SUFFIX = ".partial"
+
+
+def get_codec(name: str) -> Codec:
+    """Look up a codec by config name."""
+    return CODECS[name]
+
+
+def _find_module(codec: Codec):
+    """First importable backing module for codec, or None if none is installed."""
+    for module_name in codec.modules:
+        try:
+            return importlib.import_module(module_name)
+        except ImportError:
+            continue
+    return None
+
+
+def resolve_threads(threads: int | None) -> int:
+    """Worker threads for codecs that support them (gzip, zstd); None/0 => one per CPU."""
+    if not threads:
+        return os.cpu_count() or 1
+    return threads
+
+
+class CompressedWriter:
+    """Write-only binary stream: a codec wrapper over an owned raw file.
+
+    Closing flushes the codec trailer first and then closes the file, which the
+    codec wrappers do not all agree on doing themselves.
+    """
+    def __init__(self, raw: BinaryIO, stream: BinaryIO):
+        self._raw = raw
+        self._stream = stream
+
+    def write(self, data) -> int:
+        """Compress and write data."""
+        return self._stream.write(data)
+
+    def flush(self):
+        """Flush buffered codec output to the raw file."""
+        self._stream.flush()
+
+    @property
+    def restart_points(self) -> list[tuple[int, int]] | None:
+        """Seek-index restart points of the codec stream, if it records any."""
+        return getattr(self._stream, "restart_points", None)
+
+    def close(self):
+        """Finish the codec stream and close the file (idempotent)."""
+        if self._raw.closed:
+            return
+        try:
+            if self._stream is not self._raw:
+                self._stream.close()
+        finally:
+            self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+
+def _zstd_stream(module, raw: BinaryIO, level: int, threads: int) -> BinaryIO:
+    if module.__name__ == "compression.zstd":
+        options = {module.CompressionParameter.compression_level: level,
+                   module.CompressionParameter.nb_workers: threads}
+        return module.ZstdFile(raw, "wb", options=options)
+    compressor = module.ZstdCompressor(level=level, threads=threads)
+    return compressor.stream_writer(raw, closefd=False)
+
+
+def _gzip_stream(raw: BinaryIO, level: int, threads: int,
+                 restart_interval: int | None) -> BinaryIO:
+    # one thread keeps the classic single-stream writer; more fan blocks out
+    # pigz-style (different bytes, same content, any gzip reader)
+    if threads > 1:
+        # restart points fall on block boundaries
+        restart_every = max(1, restart_interval // BLOCK_SIZE) if restart_interval else 0
+        return ParallelGzipWriter(raw, level=level, threads=threads,
+                                  restart_every=restart_every)
+    if restart_interval:
+        return RestartableGzipWriter(raw, level=level, interval=restart_interval)
+    return gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=level)
+
+
+def _wrap(codec: Codec, raw: BinaryIO, level: int | None, threads: int,
+          restart_interval: int | None) -> BinaryIO:
+    if codec.name == "gzip":
+        return _gzip_stream(raw, level, threads, restart_interval)
+    if codec.name == "xz":
+        return lzma.LZMAFile(raw, "wb", preset=level)
+    if codec.name == "zstd":
+        return _zstd_stream(_find_module(codec), raw, level, threads)
+    if codec.name == "lz4":
+        return _find_module(codec).LZ4FrameFile(raw, "wb", compression_level=level)
+    return raw
+
+
+def open_writer(path: str, codec: str = DEFAULT_CODEC, level: int | None = None,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                threads: int | None = None, restart_interval: int | None = None,
+                key: bytes | None = None) -> CompressedWriter:
+    """Create `path` and return a stream that compresses everything written to it.
+
+    Args:
+        :path: <str> = file to create (truncated if it exists).
+        :codec: <str> = codec name from CODECS.
+        :level: <int | None> = compression level; None => the codec's default.
+        :threads: <int | None> = worker threads for gzip/zstd; None/0 => one per CPU.
+        :restart_interval: <int | None> = gzip only: uncompressed bytes between seek
+            index restart points; None => no restart points.
+        :key: <bytes | None> = AES-256 key: encrypt the compressed stream before it
+            reaches the file (see encryption.py); None => plaintext.
+
+    Returns:
+        CompressedWriter that must be closed to produce a complete file.
+    """
+    spec = get_codec(codec)
+    if level is None:
+        level = spec.default_level
+    raw = open(path, "wb")  # pylint: disable=consider-using-with
+    try:
+        if key is not None:
+            # the codec writes into the encryptor, which owns and closes the file
+            raw = EncryptingWriter(raw, key)
+        return CompressedWriter(raw, _wrap(spec, raw, level, resolve_threads(threads),
+                                           restart_interval))
+    except Exception:
+        raw.close()
+        raise
+
+
+def writer_factory(codec: str = DEFAULT_CODEC, level: int | None = None,
+                   threads: int | None = None, restart_interval: int | None = None,
+                   key: bytes | None = None) -> Callable[[str], CompressedWriter]:
+    """open_writer with codec settings bound, for callers that only know the path."""
+    def _open(path: str) -> CompressedWriter:
+        return open_writer(path, codec, level, threads, restart_interval, key)
+    return _open
@@ -0,0 +1,212 @@
+"""Streaming archive encryption: chunked AES-256-GCM between the codec and the file.
+
+The encryptor sits under the compression stream (see codecs.open_writer), so the
+archive is encrypted as it is written and ciphertext is all that ever reaches the
+.partial; there is no second pass over a plaintext archive. Encrypted archives get
+ENCRYPTED_SUFFIX after the codec extension (`.tgz.enc`).
+
+File layout (the STREAM construction for online authenticated encryption):
+
+    header   MAGIC | version (1 byte) | chunk size (4 bytes, BE) | nonce prefix (7 bytes)
+    chunk i  AES-256-GCM(plaintext[i]) + 16-byte tag
+
+Chunk i is sealed with nonce = prefix | i (4 bytes, BE) | last (1 byte) and the
+header as associated data. Every chunk is full-size except the last one, which
+carries the last flag, so reordered, dropped or truncated chunks fail to decrypt
+instead of yielding a silently shorter archive.
+
+The key is 32 random bytes, base64-encoded, read from the environment variable
+named by `encryption.key_env`. Generate one and decrypt an archive with:
+
+    python -m bookstack_file_exporter.archiver.encryption keygen
+    python -m bookstack_file_exporter.archiver.encryption decrypt <archive.tgz.enc> \\
+        --key-env NAME [-o archive.tgz]
+
+Needs the `cryptography` package (`pip install 'bookstack-file-exporter[encrypt]'`).
+"""
+import argparse
+import base64
+import binascii
+import importlib
+import io
+import os
+import struct
+import sys
+from typing import BinaryIO
+
+# appended to the codec extension of an encrypted archive
+ENCRYPTED_SUFFIX = ".enc"
+
+MAGIC = b"BSFXENC"
+
+FORMAT_VERSION = 1
+
+# plaintext bytes per sealed chunk; 64 KiB keeps tag overhead at 0.02%
+CHUNK_SIZE = 64 * 1024
+
+KEY_SIZE = 32
+
+_PREFIX_SIZE = 7
+_TAG_SIZE = 16
+_HEADER = struct.Struct(f">{len(MAGIC)}sBI{_PREFIX_SIZE}s")
+# 4-byte chunk counter in the nonce
+_MAX_CHUNKS = 2 ** 32
+
+_MODULE = "cryptography.hazmat.primitives.ciphers.aead"
+
+
+def _aesgcm(key: bytes):
+    return importlib.import_module(_MODULE).AESGCM(key)
+
+
+def load_key(key_env: str) -> bytes:
+    """Decode the base64 key held in environment variable key_env.
+
+    Raises ValueError if the variable is unset or does not hold a 32-byte key.
+    """
+    encoded = os.environ.get(key_env)
+    if not encoded:
+        raise ValueError(f"encryption key env var {key_env} is not set")
+    try:
+        key = base64.b64decode(encoded, validate=True)
+    except binascii.Error as err:
+        raise ValueError(f"encryption key in {key_env} is not valid base64") from err
+    if len(key) != KEY_SIZE:
+        raise ValueError(f"encryption key in {key_env} must decode to {KEY_SIZE} bytes, "
+                         f"got {len(key)}")
+    return key
+
+
+def generate_key() -> str:
+    """New random key, base64-encoded for an environment variable."""
+    return base64.b64encode(os.urandom(KEY_SIZE)).decode("ascii")
+
+
+def _nonce(prefix: bytes, counter: int, last: bool) -> bytes:
+    if counter >= _MAX_CHUNKS:
+        raise ValueError("archive exceeds the encrypted stream's chunk limit")
+    return prefix + struct.pack(">IB", counter, int(last))
+
+
+class EncryptingWriter(io.RawIOBase):
+    """Write-only stream that seals everything written to it into `fileobj`.
+
+    Owns fileobj: close() seals the last chunk and then closes it. At least one
+    byte is held back until close, because only then is the last chunk known.
+
+    Args:
+        :fileobj: <BinaryIO> = file to write ciphertext to.
+        :key: <bytes> = 32-byte AES-256 key.
+        :chunk_size: <int> = plaintext bytes per chunk.
+
+    Returns:
+        EncryptingWriter instance to hand to a codec as its output file.
+    """
+    def __init__(self, fileobj: BinaryIO, key: bytes, chunk_size: int = CHUNK_SIZE):
+        super().__init__()
+        self._fileobj = fileobj
+        self._aead = _aesgcm(key)
+        self._chunk_size = chunk_size
+        self._header = _HEADER.pack(MAGIC, FORMAT_VERSION, chunk_size,
+                                    os.urandom(_PREFIX_SIZE))
+        self._prefix = self._header[-_PREFIX_SIZE:]
+        self._counter = 0
+        self._buffer = bytearray()
+        fileobj.write(self._header)
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        """Buffer data and seal every chunk that is known not to be the last."""
+        self._buffer += data
+        size = self._chunk_size
+        if len(self._buffer) > size:
+            # keep the tail (1..chunk_size bytes) for a later write or close
+            full = (len(self._buffer) - 1) // size * size
+            view = memoryview(self._buffer)
+            for start in range(0, full, size):
+                self._seal(view[start:start + size], last=False)
+            view.release()
+            del self._buffer[:full]
+        return len(data)
+
+    def _seal(self, chunk, last: bool):
+        nonce = _nonce(self._prefix, self._counter, last)
+        self._fileobj.write(self._aead.encrypt(nonce, bytes(chunk), self._header))
+        self._counter += 1
+
+    def close(self):
+        """Seal the final chunk and close the file (idempotent)."""
+        if self.closed:
+            return
+        try:
+            self._seal(self._buffer, last=True)
+            self._buffer.clear()
+        finally:
+            try:
+                self._fileobj.close()
+            finally:
+                super().close()
+
+
+def decrypt_stream(src: BinaryIO, dst: BinaryIO, key: bytes):
+    """Decrypt an encrypted archive from src into dst.
+
+    Raises ValueError on a foreign or truncated file; cryptography's InvalidTag if a
+    chunk was altered or the key is wrong.
+    """
+    header = src.read(_HEADER.size)
+    if len(header) != _HEADER.size:
+        raise ValueError("not an encrypted archive: file too short")
+    magic, version, chunk_size, prefix = _HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("not an encrypted archive: bad magic")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"unsupported encrypted archive version {version}")
+    aead = _aesgcm(key)
+    sealed_size = chunk_size + _TAG_SIZE
+    counter = 0
+    chunk = src.read(sealed_size)
+    while True:
+        following = src.read(sealed_size)
+        last = not following
+        if not last and len(chunk) != sealed_size:
+            raise ValueError("encrypted archive is corrupt: short chunk")
+        dst.write(aead.decrypt(_nonce(prefix, counter, last), chunk, header))
+        if last:
+            return
+        chunk = following
+        counter += 1
+
+
+def main(argv=None) -> int:
+    """Generate a key or decrypt an archive to a file or stdout."""
+    parser = argparse.ArgumentParser(description="Archive encryption helpers")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("keygen", help="print a new base64 key for encryption.key_env")
+    decrypt = commands.add_parser("decrypt", help="decrypt an archive (.tgz.enc, ...)")
+    decrypt.add_argument("archive", help="encrypted archive path")
+    decrypt.add_argument("--key-env", required=True,
+                         help="environment variable holding the base64 key")
+    decrypt.add_argument("-o", "--output", help="write here instead of stdout")
+    args = parser.parse_args(argv)
+    if args.command == "keygen":
+        print(generate_key())
+        return 0
+    try:
+        key = load_key(args.key_env)
+    except ValueError as err:
+        print(err, file=sys.stderr)
+        return 1
+    with open(args.archive, "rb") as src:
+        if args.output:
+            with open(args.output, "wb") as dst:
+                decrypt_stream(src, dst, key)
+        else:
+            decrypt_stream(src, sys.stdout.buffer, key)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
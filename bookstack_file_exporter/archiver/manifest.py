@@ -0,0 +1,74 @@
+"""Content manifest built while the archive is written.
+
+The sink's writer thread already sees every member's bytes, so hashing them there
+costs no extra read of the archive. At close the sink adds MANIFEST.json as the last
+member, and the node archiver writes the same bytes to a sidecar next to the finished
+archive (`<archive>.manifest.json`), so a backup can be checked or diffed against
+BookStack without decompressing it.
+
+Entries are sorted by path and carry no run timestamp: two runs over unchanged
+content produce an identical manifest whatever order export workers finished in.
+"""
+import json
+from dataclasses import asdict, dataclass
+
+from bookstack_file_exporter.archiver import util
+
+# member name inside the archive, under the archive's top-level folder
+MANIFEST_NAME = "MANIFEST.json"
+
+# sidecar written next to the finished archive
+SIDECAR_SUFFIX = ".manifest.json"
+
+MANIFEST_VERSION = 1
+
+
+@dataclass(frozen=True)
+class MemberSource:
+    """BookStack origin of one archive member.
+
+    resource is the API resource the id belongs to: pages, books or chapters for
+    exports and meta files, images or attachments for assets.
+    """
+    resource: str
+    node_id: int
+    updated_at: str | None = None
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    """One archive member as recorded in MANIFEST.json."""
+    path: str
+    size: int
+    sha256: str
+    resource: str | None = None
+    node_id: int | None = None
+    updated_at: str | None = None
+
+
+def build_entry(path: str, size: int, digest: bytes,
+                source: MemberSource | None) -> ManifestEntry:
+    """ManifestEntry for one member; source None leaves the BookStack fields empty."""
+    if source is None:
+        return ManifestEntry(path, size, digest.hex())
+    return ManifestEntry(path, size, digest.hex(), source.resource, source.node_id,
+                         source.updated_at)
+
+
+def manifest_bytes(entries: list[ManifestEntry]) -> bytes:
+    """Serialize entries (sorted by path) as the MANIFEST.json document."""
+    files = [asdict(entry) for entry in sorted(entries, key=lambda entry: entry.path)]
+    document = {"version": MANIFEST_VERSION, "algorithm": "sha256", "files": files}
+    return json.dumps(document, indent=2).encode("utf-8")
+
+
+def sidecar_path(archive_file: str) -> str:
+    """Sidecar manifest path for a finished archive."""
+    return f"{archive_file}{SIDECAR_SUFFIX}"
+
+
+def write_sidecar(archive_file: str, data: bytes) -> str:
+    """Write the sidecar atomically (.partial then rename); return its path."""
+    path = sidecar_path(archive_file)
+    util.write_file_atomic(path, data)
+    return path
@@ -1,19 +1,30 @@
+import asyncio
 import logging
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import functools
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from typing import Iterable
 # pylint: disable=import-error
 from requests.exceptions import HTTPError, RetryError
 from bookstack_file_exporter.exporter.node import Node
 from bookstack_file_exporter.archiver import util as archiver_util
+from bookstack_file_exporter.archiver import codecs
+from bookstack_file_exporter.archiver import seek_index
+from bookstack_file_exporter.archiver.budget import ByteBudget
+from bookstack_file_exporter.archiver.encryption import ENCRYPTED_SUFFIX, load_key
+from bookstack_file_exporter.archiver.manifest import MANIFEST_NAME, MemberSource, write_sidecar
+from bookstack_file_exporter.archiver.spool import Spool
+from bookstack_file_exporter.archiver.sink import (
+    ArchiveSink, DirectorySink, TarSink, VolumeTarSink, ZipSink, SinkStats, prune_tree)
 from bookstack_file_exporter.archiver.asset_archiver import AssetArchiver, ImageNode, AttachmentNode
 from bookstack_file_exporter.config_helper.config_helper import ConfigNode
+from bookstack_file_exporter.config_helper.models import Compression, Encryption
 from bookstack_file_exporter.common.util import HttpHelper
+from bookstack_file_exporter.common.async_http import AsyncHttpHelper, gather_all
 
 log = logging.getLogger(__name__)
 
 _META_FILE_SUFFIX = "_meta.json"
-_TAR_SUFFIX = ".tar"
-_TAR_GZ_SUFFIX = ".tgz"
 
 _FILE_EXTENSION_MAP = {
     "markdown": ".md",
@@ -22,8 +33,6 @@ _FILE_EXTENSION_MAP = {
     "plaintext": ".txt",
     "zip": ".zip",
     "meta": _META_FILE_SUFFIX,
-    "tar": _TAR_SUFFIX,
-    "tgz": _TAR_GZ_SUFFIX
 }
 
 _REWRITABLE_FORMATS = {"markdown", "html"}
@@ -37,13 +46,47 @@ _REWRITABLE_FORMATS = {"markdown", "html"}
 # NOTE: README's "Parallel Export" section mirrors this 16 in prose; keep in sync.
 _EXPORT_WORKERS_SOFT_MAX = 16
 
+# Members that may queue for the tar writer per export worker before workers block.
+# Small on purpose: every queued member is a fully buffered export render or asset,
+# so the bound is what keeps memory ~= workers x fattest-node when the writer lags.
+_SINK_PENDING_PER_WORKER = 2
+
+# Nodes submitted to the export pool ahead of a free worker, per worker. Keeps the
+# pool busy when one node is slow, while a node stream (pipeline) is only drawn
+# from this far ahead of the exports.
+_POOL_PENDING_PER_WORKER = 4
+
+
+def archiver_options(config: ConfigNode) -> dict:
+    """NodeArchiver keyword arguments taken from the user inputs, shared by every
+    export level; callers add archive_dir, http_client and the run-scoped options."""
+    user_inputs = config.user_inputs
+    return {
+        "api_urls": config.urls,
+        "export_formats": user_inputs.formats,
+        "export_meta": user_inputs.assets.export_meta,
+        "asset_config": user_inputs.assets,
+        "export_workers": user_inputs.export_workers,
+        "compression": user_inputs.compression,
+        "output_mode": user_inputs.output_mode,
+        "archive_tree": user_inputs.directory.archive,
+        "prune": user_inputs.directory.prune,
+        "dedup": user_inputs.dedup,
+        "manifest": user_inputs.manifest,
+        "index": user_inputs.index,
+        "max_volume_size": user_inputs.max_volume_size,
+        "encryption": user_inputs.encryption,
+        "max_inflight_bytes": user_inputs.max_inflight_bytes,
+        "spool_threshold": user_inputs.spool_threshold,
+    }
+
 
 # pylint: disable=too-many-instance-attributes
 class NodeArchiver:
     """
     NodeArchiver is the base class for all level-specific archivers.
 
-    Holds level-agnostic primitives: tar/gzip helpers, a generic export loop,
+    Holds level-agnostic primitives: tar/compression helpers, a generic export loop,
     and shared file-path/extension logic. Subclasses add level-specific
     state (e.g. asset handling for pages) and implement ``archive``.
 
@@ -54,20 +97,79 @@ class NodeArchiver:
         :http_client: <HttpHelper> = http helper for API requests.
         :export_meta: <bool> = whether to write metadata JSON alongside exports.
         :asset_config: optional asset configuration; None => asset features disabled.
+        :compression: optional compression configuration; None => defaults.
+        :output_mode: <str> = "tar" (default), "zip" or "directory".
+        :output_dir: <str | None> = persistent tree root for output_mode "directory".
+        :archive_tree: <bool> = with output_mode "directory", also pack the tree into
+            archive_file after the export.
+        :prune: <bool> = with output_mode "directory", delete the files of the tree
+            the export no longer wrote, after an export without skipped nodes.
+        :dedup: <bool> = with output_mode "tar", store repeated member content as tar
+            hardlinks to its first occurrence.
+        :manifest: <bool> = add a SHA-256 MANIFEST.json to the output and write it as a
+            sidecar next to the finished archive.
+        :index: <bool> = write a seek index sidecar (member offsets plus gzip restart
+            points) next to the finished archive.
+        :max_volume_size: <int | None> = with output_mode "tar", split the archive
+            into independently extractable volumes of at most this many bytes.
+        :encryption: optional encryption configuration; None => plaintext archive.
+        :max_inflight_bytes: <int | None> = cap on fetched bytes held between the
+            export workers and the archive writer; None => bounded by the queue only.
+        :async_http: <AsyncHttpHelper | None> = run the export on the asyncio engine
+            through this client; None => thread engine (export_workers threads).
+        :spool_threshold: <int | None> = stream exports and images larger than this
+            many bytes to a temp file instead of memory; None => always in memory.
     """
-    def __init__(self, archive_dir: str, api_urls: dict[str, str],  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def __init__(self, archive_dir: str, api_urls: dict[str, str],  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
                  export_formats: list[str], http_client: HttpHelper,
                  export_meta: bool, asset_config=None, asset_archiver=None,
-                 export_workers: int = 1) -> None:
+                 export_workers: int = 1, compression: Compression | None = None,
+                 output_mode: str = "tar", output_dir: str | None = None,
+                 archive_tree: bool = False, prune: bool = False, dedup: bool = False,
+                 manifest: bool = False, index: bool = False,
+                 max_volume_size: int | None = None,
+                 encryption: Encryption | None = None,
+                 max_inflight_bytes: int | None = None,
+                 async_http: AsyncHttpHelper | None = None,
+                 spool_threshold: int | None = None) -> None:
         self.api_urls = api_urls
         self.export_formats = export_formats
         self.http_client = http_client
         self.export_meta = export_meta
-        # full path with .tgz extension
-        self.archive_file = f"{archive_dir}{_FILE_EXTENSION_MAP['tgz']}"
-        # intermediate tar before gzip
-        self.tar_file = f"{archive_dir}{_FILE_EXTENSION_MAP['tar']}"
-        # base folder name inside the tgz archive
+        self.compression = compression or Compression()
+        self.codec = codecs.get_codec(self.compression.codec)
+        self.output_mode = output_mode
+        self.output_dir = output_dir
+        self.archive_tree = archive_tree
+        self.prune = prune
+        # directory tree files written or kept by the last export (output_mode
+        # "directory"); what compress_archive keeps when pruning
+        self._tree_members: set[str] | None = None
+        self.dedup = dedup
+        self.manifest = manifest
+        # MANIFEST.json bytes of the last export (None if disabled or nothing written)
+        self.manifest_data: bytes | None = None
+        self.index = index
+        # seek index inputs from the last export: member offsets (from the sink) and
+        # restart points (from whichever pass compressed the tar)
+        self._member_index: dict[str, dict] | None = None
+        self._restart_points: list[tuple[int, int]] | None = None
+        self.max_volume_size = max_volume_size
+        # .partial volume files of the last export (volume mode only)
+        self._volumes: list[str] = []
+        # AES-256 key; loaded once here so a bad key fails before the export
+        self._key: bytes | None = load_key(encryption.key_env) if encryption else None
+        # full path with the codec's extension (.tgz, .tar.zst, ...) or .zip, plus .enc
+        # when encrypted; a directory export without an archive reports its tree instead
+        extension = codecs.ZIP_EXTENSION if output_mode == "zip" else self._extension
+        self.archive_file = f"{archive_dir}{extension}"
+        if output_mode == "directory" and not archive_tree:
+            self.archive_file = output_dir
+        # intermediate tar before compression; .partial so the run-start sweep treats a
+        # stranded one as junk without ever matching a finished uncompressed .tar
+        self.tar_file = f"{archive_dir}.tar{codecs.PARTIAL_SUFFIX}"
+        self._archive_dir = archive_dir
+        # base folder name inside the archive
         self.archive_base_path = os.path.basename(archive_dir)
         # asset handling (shared by page/book/chapter); None => disabled
         self.asset_config = asset_config
@@ -76,6 +178,11 @@ class NodeArchiver:
             else self._default_asset_archiver(api_urls, http_client)
         )
         self.modify_links: bool = self._check_links_modify()
+        # bodies above this size go to a temp file (spool.py); exports that get their
+        # links rewritten are always read into memory
+        self.spool_threshold = spool_threshold
+        if self.asset_archiver is not None:
+            self.asset_archiver.spool_threshold = spool_threshold
         # Cooperative-shutdown flag, injected by Archiver.set_stop() in scheduled
         # mode (stays None in one-shot mode). Polled at export checkpoints below;
         # the signal handler only SETS this flag (it cannot safely raise across
@@ -83,6 +190,19 @@ class NodeArchiver:
         self._stop = None
         # Opt-in node-level fetch parallelism (default 1 = serial, today's behavior).
         self.export_workers = export_workers
+        # Run-scoped archive writer; open only while _export_nodes runs (see write_data).
+        self._sink: ArchiveSink | None = None
+        # Counters from the last closed sink; None until an export has run.
+        self.write_stats: SinkStats | None = None
+        # False once the last export skipped a node, format or asset on an error; a
+        # pruned directory tree then keeps the files of the previous run
+        self.export_complete = True
+        self.max_inflight_bytes = max_inflight_bytes
+        # Byte budget shared by the workers; like the sink, only set while
+        # _export_nodes runs.
+        self._budget: ByteBudget | None = None
+        # asyncio engine client; None => nodes run on the thread pool (or serially)
+        self.async_http = async_http
         if self.export_workers > _EXPORT_WORKERS_SOFT_MAX:
             log.warning(
                 "export_workers=%d is high. The speedup is bound by how fast your "
@@ -169,11 +289,13 @@ class NodeArchiver:
                     asset_type, asset_node.download_url)
             except (HTTPError, RetryError):
                 failed_assets.add(asset_node.id_)
+                self.export_complete = False
                 log.error("Failed to get image or attachment data "
                           "for asset located at: %s - skipping", asset_node.download_url)
                 continue
             asset_path = f"{node_base_path}/{asset_node.get_relative_path(page_name)}"
-            self.write_data(asset_path, asset_data)
+            self.write_data(asset_path, asset_data,
+                            source=MemberSource(asset_type, asset_node.id_, asset_node.updated_at))
         return failed_assets
 
     def _get_image_meta(self) -> dict[int, list]:
@@ -186,8 +308,16 @@ class NodeArchiver:
             return {}
         return self.asset_archiver.get_asset_nodes('attachments')
 
-    def _get_node_data(self, url: str) -> bytes:
-        return archiver_util.get_byte_response(url=url, http_client=self.http_client)
+    def _get_node_data(self, url: str, fmt: str) -> bytes | Spool:
+        # an export whose links get rewritten is needed whole in memory
+        threshold = None if self._rewrites(fmt) else self.spool_threshold
+        return archiver_util.get_byte_response(url=url, http_client=self.http_client,
+                                               budget=self._budget,
+                                               spool_threshold=threshold)
+
+    def _rewrites(self, fmt: str) -> bool:
+        """Whether _rewrite_format changes exports of fmt."""
+        return self.modify_links and fmt in _REWRITABLE_FORMATS
 
     def _asset_page_map(self, node: Node) -> dict[int, str]:
         """Map {page_id: page_name} of pages whose assets attach to this node."""
@@ -201,20 +331,22 @@ class NodeArchiver:
         """Path fragment (relative to archive_base_path, no extension) for export/meta files."""
         return f"{node.file_path}/{node.name}"
 
-    def _archive_node(self, node: Node, export_format: str, data: bytes):
+    def _archive_node(self, node: Node, export_format: str, data: bytes,
+                      source: MemberSource | None = None):
         file_name = (
             f"{self.archive_base_path}/"
             f"{self._node_output_path(node)}{_FILE_EXTENSION_MAP[export_format]}"
         )
-        self.write_data(file_name, data)
+        self.write_data(file_name, data, source=source)
 
-    def _archive_node_meta(self, node: Node, meta_data: dict):
+    def _archive_node_meta(self, node: Node, meta_data: dict,
+                           source: MemberSource | None = None):
         meta_file_name = (
             f"{self.archive_base_path}/"
             f"{self._node_output_path(node)}{_FILE_EXTENSION_MAP['meta']}"
         )
         bytes_meta = archiver_util.get_json_bytes(meta_data)
-        self.write_data(meta_file_name, bytes_meta)
+        self.write_data(meta_file_name, bytes_meta, source=source)
 
     def _archive_level(self, nodes: dict[int, Node],
                        resource_type: str, label: str):
@@ -235,39 +367,120 @@ class NodeArchiver:
         attachment_map = self._get_attachment_meta()
         self._export_nodes(non_empty, resource_type, image_map, attachment_map)
 
-    def _export_nodes(self, nodes: dict[int, Node], resource_type: str,
+    def _export_nodes(self, nodes: dict[int, Node] | Iterable[Node], resource_type: str,
                       image_map: dict[int, list],
                       attachment_map: dict[int, list]):
         """Fetch and archive each node in every requested format.
 
-        The only caller (_archive_level) always passes real maps (empty when
-        modify_links is off), so no None-defaulting is needed. export_workers==1
-        runs serially (byte-identical to pre-parallel behavior); >1 fans node
-        fetches across a thread pool.
+        nodes is either a dict of id -> node (_archive_level, PageArchiver.archive),
+        whose values are exported, or an iterable of nodes (archive_stream: pages
+        still being discovered), consumed once, in order. The pool and the asyncio
+        engine draw from it only as earlier nodes finish. Every caller passes real
+        image and attachment maps, which are empty when the assets are not exported,
+        so no None-defaulting is needed. export_workers==1 runs serially
+        (byte-identical to pre-parallel behavior); >1 fans node fetches across a
+        thread pool.
         """
+        if isinstance(nodes, dict):
+            nodes = nodes.values()
         if (self.export_images or self.export_attachments) and not self.modify_links:
             log.info("Assets downloaded but links not rewritten (modify_links disabled)")
-        if self.export_workers == 1:
-            self._export_nodes_serial(nodes, resource_type, image_map, attachment_map)
-        else:
-            self._export_nodes_parallel(nodes, resource_type, image_map, attachment_map)
-
-    def _export_nodes_serial(self, nodes: dict[int, Node], resource_type: str,
+        sink = self._open_sink()
+        self._sink = sink
+        self.export_complete = True
+        self._set_budget(ByteBudget(self.max_inflight_bytes)
+                         if self.max_inflight_bytes else None)
+        budget = self._budget
+        try:
+            with sink:
+                if self.async_http is not None:
+                    self._export_nodes_async(nodes, resource_type, image_map, attachment_map)
+                elif self.export_workers == 1:
+                    self._export_nodes_serial(nodes, resource_type, image_map, attachment_map)
+                else:
+                    self._export_nodes_parallel(nodes, resource_type, image_map,
+                                                attachment_map)
+        finally:
+            self._sink = None
+            self._set_budget(None)
+            self.write_stats = sink.stats
+            self.manifest_data = sink.manifest
+            if isinstance(sink, DirectorySink):
+                self._tree_members = sink.members
+            if self.max_volume_size:
+                self._volumes = sink.volumes
+            if self.index:
+                self._member_index = sink.member_index
+                self._restart_points = sink.restart_points
+            self._log_write_stats()
+            if budget is not None:
+                log.info("In-flight budget: peak %d of %d bytes; workers waited %.2fs "
+                         "for budget", budget.peak, budget.limit, budget.wait_seconds)
+            if self.async_http is not None:
+                log.info("Asyncio engine: %d requests, peak %d of %d in flight",
+                         self.async_http.requests, self.async_http.peak_in_flight,
+                         self.async_http.concurrency)
+
+    def _set_budget(self, budget: ByteBudget | None):
+        """Share the run's byte budget with the asset fetches (or clear it)."""
+        self._budget = budget
+        if self.asset_archiver is not None:
+            self.asset_archiver.budget = budget
+
+    def _open_sink(self) -> ArchiveSink:
+        max_pending = _SINK_PENDING_PER_WORKER * self.export_workers
+        manifest_name = (f"{self.archive_base_path}/{MANIFEST_NAME}"
+                         if self.manifest else None)
+        if self.output_mode == "directory":
+            # the tree is stable across runs: drop the timestamped top-level folder
+            return DirectorySink(self.output_dir, max_pending=max_pending,
+                                 strip_prefix=self.archive_base_path,
+                                 manifest_name=manifest_name)
+        if self.output_mode == "zip":
+            return ZipSink(self.staging_file, max_pending=max_pending,
+                           level=self.compression.level, manifest_name=manifest_name)
+        if self.max_volume_size:
+            return VolumeTarSink(self._volume_partial, self.max_volume_size,
+                                 max_pending=max_pending, opener=self._codec_writer(),
+                                 dedup=self.dedup, manifest_name=manifest_name)
+        return TarSink(self.staging_file, max_pending=max_pending,
+                       opener=self._codec_writer() if self._writes_final_stream else None,
+                       dedup=self.dedup, manifest_name=manifest_name, index=self.index)
+
+    def _log_write_stats(self):
+        stats = self.write_stats
+        if not stats.members:
+            return
+        log.info("Archive writer: %d files (%d bytes); writer busy %.2fs, "
+                 "workers waited %.2fs for the writer",
+                 stats.members, stats.bytes_written, stats.write_seconds, stats.wait_seconds)
+        if self.output_mode == "directory":
+            log.info("Directory output: %d files rewritten, %d unchanged",
+                     stats.members - stats.unchanged, stats.unchanged)
+        if self.dedup:
+            log.info("Archive dedup: %d duplicate files (%d bytes) stored as hardlinks; "
+                     "dedup ratio %.2f", stats.duplicates, stats.duplicate_bytes,
+                     stats.dedup_ratio)
+
+    def _export_nodes_serial(self, nodes: Iterable[Node], resource_type: str,
                              image_map: dict[int, list],
                              attachment_map: dict[int, list]):
         """Today's exact serial path: one node at a time, stop at node boundary."""
-        for _, node in nodes.items():
+        for node in nodes:
             if self._stop_requested():
                 return
             self._export_node(node, resource_type, image_map, attachment_map)
 
-    def _export_nodes_parallel(self, nodes: dict[int, Node], resource_type: str,
+    def _export_nodes_parallel(self, nodes: Iterable[Node], resource_type: str,
                                image_map: dict[int, list],
                                attachment_map: dict[int, list]):
-        """Fan node fetches across a thread pool; writes serialize in write_tar.
+        """Fan node fetches across a thread pool; writes serialize on the sink's writer thread.
 
         Memory stays ~= export_workers x fattest-node: only max_workers tasks run
         at once, and _export_node returns None so completed futures hold nothing.
+        At most _POOL_PENDING_PER_WORKER x export_workers nodes are submitted and
+        not yet done; the next node is drawn from nodes once one of them finishes,
+        so a node stream is consumed no faster than the pool exports it.
 
         Cancellation is cooperative, NOT a hard kill. On stop:
           - queued (not-yet-started) futures are dropped by shutdown(cancel_futures=True);
@@ -289,28 +502,38 @@ class NodeArchiver:
         # executor.shutdown(wait=True), so we always join every worker before
         # returning, even on an exception.
         with ThreadPoolExecutor(max_workers=self.export_workers) as executor:
-            futures = []
-            for _, node in nodes.items():
+            pending: set[Future] = set()
+            for node in nodes:
                 if self._stop_requested():
                     break
+                if len(pending) >= _POOL_PENDING_PER_WORKER * self.export_workers:
+                    # wait() returns once any of them is done: (done, not done)
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._log_node_failure(future)
                 # submit() schedules the call on a pool thread and returns
                 # immediately with a Future handle (a promise of the result).
-                futures.append(executor.submit(
+                pending.add(executor.submit(
                     self._export_node, node, resource_type, image_map, attachment_map))
             # as_completed yields each future the moment it finishes, in
             # completion order (NOT submission order) — so we react to whichever
             # node returns first.
-            for future in as_completed(futures):
+            for future in as_completed(pending):
                 if self._stop_requested():
                     executor.shutdown(cancel_futures=True)
                     break
-                # future.result() re-raises, in THIS thread, any exception the
-                # worker thread raised. We catch broadly so one bad node is logged
-                # and skipped rather than aborting every other node's export.
-                try:
-                    future.result()
-                except Exception as exc:  # pylint: disable=broad-exception-caught
-                    log.error("Node export worker failed, skipping node: %s", exc)
+                self._log_node_failure(future)
+
+    def _log_node_failure(self, future: Future):
+        """Log and skip a finished pool node that raised."""
+        # future.result() re-raises, in THIS thread, any exception the worker thread
+        # raised. We catch broadly so one bad node is logged and skipped rather than
+        # aborting every other node's export.
+        try:
+            future.result()
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            self.export_complete = False
+            log.error("Node export worker failed, skipping node: %s", exc)
 
     def _export_node(self, node: Node, resource_type: str,
                      image_map: dict[int, list],
@@ -319,10 +542,11 @@ class NodeArchiver:
 
         Self-contained per node (no shared mutable state): safe to run in a
         worker thread when export_workers > 1. Writes go through write_data ->
-        write_tar, which serializes appends under a module lock. Returns None so
+        TarSink.write, which queues them for the single writer thread. Returns None so
         completed pool futures retain no payload (peak RAM ~= workers x fattest-node).
         """
         assets_by_page = self._download_node_assets(node, image_map, attachment_map)
+        source = MemberSource(resource_type, node.id_, node.meta.get("updated_at"))
         for fmt in self.export_formats:
             # Per-format checkpoint: a single book/chapter export call can be slow
             # (server-side render); stop between formats instead of after all of them.
@@ -330,18 +554,16 @@ class NodeArchiver:
                 return
             url = f"{self.api_urls[resource_type]}/{node.id_}/export/{fmt}"
             try:
-                data = self._get_node_data(url)
+                data = self._get_node_data(url, fmt)
             except (HTTPError, RetryError):
+                self.export_complete = False
                 log.error("Failed to get %s data for node id=%d format=%s - skipping",
                           resource_type, node.id_, fmt)
                 continue
-            if fmt == "markdown" and self.modify_links:
-                data = self._rewrite_combined_markdown(data, assets_by_page)
-            elif fmt == "html" and self.modify_links:
-                data = self._rewrite_combined_html(data, assets_by_page)
-            self._archive_node(node, fmt, data)
+            data = self._rewrite_format(fmt, data, assets_by_page)
+            self._archive_node(node, fmt, data, source=source)
         if self.export_meta:
-            self._archive_node_meta(node, node.meta)
+            self._archive_node_meta(node, node.meta, source=source)
 
     def _download_node_assets(self, node: Node, image_map: dict[int, list],
                               attachment_map: dict[int, list]) -> dict:
@@ -364,44 +586,317 @@ class NodeArchiver:
                     grouped[asset_type][page_name] = survivors
         return grouped
 
-    def _rewrite_combined(self, data: bytes, assets_by_page: dict, rewriter) -> bytes:
-        """Run the shared guard and double loop, delegating each page to rewriter."""
+    def _rewrite_format(self, fmt: str, data: bytes, assets_by_page: dict,
+                        asset_data: dict | None = None) -> bytes:
+        """Localize asset links in a markdown/html export when modify_links is on."""
+        if fmt == "markdown" and self.modify_links:
+            return self._rewrite_combined_markdown(data, assets_by_page, asset_data)
+        if fmt == "html" and self.modify_links:
+            return self._rewrite_combined_html(data, assets_by_page, asset_data)
+        return data
+
+    def _rewrite_combined(self, data: bytes, assets_by_page: dict, rewriter,
+                          asset_data: dict | None = None) -> bytes:
+        """Run the shared guard and double loop, delegating each page to rewriter.
+
+        asset_data ({asset_type: {asset_id: detail JSON}}) is the asyncio engine's
+        prefetch; None lets the rewriter fetch what it needs itself."""
         if not assets_by_page or self.asset_archiver is None:
             return data
         for asset_type, by_page in assets_by_page.items():
+            prefetched = {} if asset_data is None else {"asset_data": asset_data[asset_type]}
             for page_name, assets in by_page.items():
-                data = rewriter(asset_type, page_name, data, assets)
+                data = rewriter(asset_type, page_name, data, assets, **prefetched)
         return data
 
-    def _rewrite_combined_markdown(self, data: bytes, assets_by_page: dict) -> bytes:
+    def _rewrite_combined_markdown(self, data: bytes, assets_by_page: dict,
+                                   asset_data: dict | None = None) -> bytes:
         """Rewrite asset URLs in combined markdown, reusing the per-page rewriter."""
         return self._rewrite_combined(data, assets_by_page,
-                                      self.asset_archiver.update_asset_links)
+                                      self.asset_archiver.update_asset_links, asset_data)
 
-    def _rewrite_combined_html(self, data: bytes, assets_by_page: dict) -> bytes:
+    def _rewrite_combined_html(self, data: bytes, assets_by_page: dict,
+                               asset_data: dict | None = None) -> bytes:
         """Rewrite asset URLs in combined html, reusing the per-page html rewriter."""
         return self._rewrite_combined(data, assets_by_page,
-                                      self.asset_archiver.update_asset_links_html)
+                                      self.asset_archiver.update_asset_links_html,
+                                      asset_data)
+
+    def _export_nodes_async(self, nodes: Iterable[Node], resource_type: str,
+                            image_map: dict[int, list],
+                            attachment_map: dict[int, list]):
+        """Export every node as a task on the asyncio engine's loop.
+
+        Where the pool runs export_workers whole nodes at once, each fetching its
+        assets and formats one after another, here every asset and format of every
+        node is a task and async_http's slots (export_workers wide) cap the requests
+        in flight. A task keeps its slot until its body is queued on the sink, so
+        buffered bodies stay bounded by the same number plus the queue.
+
+        As in the pool, at most _POOL_PENDING_PER_WORKER x export_workers node tasks
+        are alive at once; the next node is drawn from nodes once one of them is
+        done. nodes is drawn on the loop, so it must not block (pipeline, whose
+        stream fetches as it goes, is for the thread engine only).
+
+        Cancellation is cooperative, as in the pool: once stop is set, no further
+        node is drawn, tasks that have not started their request return at that
+        checkpoint and requests already in flight finish. A node failing with a
+        non-HTTP error is logged and skipped.
+        """
+        async def export(node: Node):
+            try:
+                await self._aexport_node(node, resource_type, image_map, attachment_map)
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                self.export_complete = False
+                log.error("Node export worker failed, skipping node: %s", exc)
+
+        async def export_all():
+            pending: set[asyncio.Task] = set()
+            try:
+                for node in nodes:
+                    if self._stop_requested():
+                        break
+                    if len(pending) >= _POOL_PENDING_PER_WORKER * self.export_workers:
+                        _, pending = await asyncio.wait(
+                            pending, return_when=asyncio.FIRST_COMPLETED)
+                    pending.add(asyncio.ensure_future(export(node)))
+                if pending:
+                    await asyncio.wait(pending)
+            except BaseException:
+                for task in pending:
+                    task.cancel()
+                raise
+        self.async_http.run(export_all())
+
+    async def _aexport_node(self, node: Node, resource_type: str,
+                            image_map: dict[int, list],
+                            attachment_map: dict[int, list]):
+        """Async twin of _export_node: assets first (the link rewrite needs the
+        survivors), then all formats at once."""
+        if self._stop_requested():
+            return
+        assets_by_page = await self._adownload_node_assets(node, image_map, attachment_map)
+        asset_data = await self._aprefetch_asset_data(assets_by_page)
+        source = MemberSource(resource_type, node.id_, node.meta.get("updated_at"))
+        await gather_all([
+            self._aexport_format(node, resource_type, fmt, assets_by_page, asset_data, source)
+            for fmt in self.export_formats])
+        if self.export_meta and not self._stop_requested():
+            await asyncio.to_thread(self._archive_node_meta, node, node.meta, source)
+
+    async def _aexport_format(self, node: Node, resource_type: str, fmt: str,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                              assets_by_page: dict, asset_data: dict | None,
+                              source: MemberSource):
+        url = f"{self.api_urls[resource_type]}/{node.id_}/export/{fmt}"
+        async with self.async_http.slot():
+            if self._stop_requested():
+                return
+            try:
+                data = (await self.async_http.request(url)).content
+            except (HTTPError, RetryError):
+                self.export_complete = False
+                log.error("Failed to get %s data for node id=%d format=%s - skipping",
+                          resource_type, node.id_, fmt)
+                return
+            # the rewrite parses html with bs4 and the write may wait for the writer:
+            # both stay off the event loop
+            data = await asyncio.to_thread(self._rewrite_format, fmt, data,
+                                           assets_by_page, asset_data)
+            await asyncio.to_thread(self._archive_node, node, fmt, data, source)
+
+    async def _adownload_node_assets(self, node: Node, image_map: dict[int, list],
+                                     attachment_map: dict[int, list]) -> dict:
+        """Async twin of _download_node_assets: all of the node's assets at once."""
+        if not (image_map or attachment_map):
+            return {}
+        parent_path = self._asset_parent_path(node)
+        jobs = [(asset_type, page_name, asset)
+                for asset_type, amap in (("images", image_map), ("attachments", attachment_map))
+                for page_id, page_name in self._asset_page_map(node).items()
+                for asset in amap.get(page_id) or ()]
+        written = await gather_all([
+            self._aarchive_asset(asset_type, parent_path, page_name, asset)
+            for asset_type, page_name, asset in jobs])
+        grouped = {"images": {}, "attachments": {}}
+        for (asset_type, page_name, asset), ok in zip(jobs, written):
+            if ok:
+                grouped[asset_type].setdefault(page_name, []).append(asset)
+        return grouped
+
+    async def _aarchive_asset(self, asset_type: str, parent_path: str, page_name: str,
+                              asset_node: ImageNode | AttachmentNode) -> bool:
+        """Download and write one asset; False if skipped (failed or stopped)."""
+        async with self.async_http.slot():
+            if self._stop_requested():
+                return False
+            try:
+                # concurrent downloads of one asset share the request (single flight)
+                response = await self.async_http.single_flight.do(
+                    f"{asset_type}:{asset_node.download_url}",
+                    lambda: self.async_http.request(asset_node.download_url))
+            except (HTTPError, RetryError):
+                self.export_complete = False
+                log.error("Failed to get image or attachment data "
+                          "for asset located at: %s - skipping", asset_node.download_url)
+                return False
+            asset_data = self.asset_archiver.decode_asset(asset_type, response)
+            asset_path = (f"{self.archive_base_path}/{parent_path}/"
+                          f"{asset_node.get_relative_path(page_name)}")
+            await asyncio.to_thread(
+                self.write_data, asset_path, asset_data,
+                MemberSource(asset_type, asset_node.id_, asset_node.updated_at))
+        return True
 
-    def write_data(self, file_path: str, data: bytes):
-        """Write data to a tar file.
+    async def _aprefetch_asset_data(self, assets_by_page: dict) -> dict | None:
+        """Detail JSON the link rewrite needs, per asset type and id, fetched up front
+        and concurrently so the rewriters never block on a request. Fetched once per
+        asset for all formats (the thread engine fetches it per format). None when no
+        link is rewritten."""
+        kinds = [fmt for fmt in self.export_formats if fmt in _REWRITABLE_FORMATS]
+        if not (self.modify_links and assets_by_page and kinds):
+            return None
+        wanted = {(asset_type, asset.id_): asset
+                  for asset_type, by_page in assets_by_page.items()
+                  for assets in by_page.values() for asset in assets
+                  if any(self.asset_archiver.needs_asset_data(kind, asset) for kind in kinds)}
+        details = await gather_all([
+            self.async_http.get_json(self.asset_archiver.asset_data_url(asset_type, asset))
+            for (asset_type, _), asset in wanted.items()])
+        asset_data = {asset_type: {} for asset_type in assets_by_page}
+        for (asset_type, asset_id), detail in zip(wanted, details):
+            asset_data[asset_type][asset_id] = detail
+        return asset_data
+
+    def write_data(self, file_path: str, data: bytes | Spool,
+                   source: MemberSource | None = None):
+        """Write data to the run's tar file via the open sink.
+
+        Only valid while _export_nodes is running (the sink's lifetime).
 
         Args:
             :file_path: <str> path of file relative to tar file inner directory
-            :data: <bytes> data to write to that file_path within the tar
+            :data: <bytes | Spool> data to write to that file_path within the tar
+            :source: <MemberSource | None> BookStack node the data came from, for the
+                manifest
         """
-        archiver_util.write_tar(self.tar_file, file_path, data)
+        # the worker's reservation for these bytes travels with them; the writer
+        # releases it once they are on disk
+        reserved = self._budget.hand_off() if self._budget is not None else 0
+        done = functools.partial(self._budget.release, reserved) if reserved else None
+        self._sink.write(file_path, data, source=source, done=done)
+
+    @property
+    def partial_file(self) -> str:
+        """In-progress archive path; renamed to archive_file once complete."""
+        return f"{self.archive_file}{codecs.PARTIAL_SUFFIX}"
+
+    @property
+    def _writes_final_stream(self) -> bool:
+        """True when the sink writes the finished archive format directly: with
+        compression.streaming, codec 'none' where there is nothing to compress, or zip
+        where every member is compressed as it is added. Volumes are always streamed:
+        each one is cut by size while it is written. So are encrypted archives, which
+        keeps a plaintext intermediate tar off the disk."""
+        return (self.compression.streaming or self.codec.name == "none"
+                or self.output_mode == "zip" or bool(self.max_volume_size)
+                or self._key is not None)
 
-    def gzip_archive(self):
-        """Gzip the tar atomically: write to a .partial then rename to the final .tgz.
+    @property
+    def staging_file(self) -> str:
+        """File the sink writes members into: the intermediate tar, or the .partial
+        archive directly when no separate compression pass is needed."""
+        return self.partial_file if self._writes_final_stream else self.tar_file
+
+    @property
+    def _extension(self) -> str:
+        """Tar archive extension: the codec's, plus .enc when encrypted."""
+        if self._key is None:
+            return self.codec.extension
+        return f"{self.codec.extension}{ENCRYPTED_SUFFIX}"
+
+    def volume_file(self, number: int) -> str:
+        """Final path of volume `number` (1-based): `<archive_dir>.part001<ext>`."""
+        return f"{self._archive_dir}.part{number:03d}{self._extension}"
+
+    def _volume_partial(self, number: int) -> str:
+        return f"{self.volume_file(number)}{codecs.PARTIAL_SUFFIX}"
+
+    @property
+    def archive_files(self) -> list[str]:
+        """Files that make up the finished backup: its volumes in order when
+        max_volume_size split it, otherwise just archive_file."""
+        if self.max_volume_size:
+            return [self.volume_file(number) for number in range(1, len(self._volumes) + 1)]
+        return [self.archive_file]
+
+    @property
+    def _restart_interval(self) -> int | None:
+        return seek_index.RESTART_INTERVAL if self.index else None
+
+    def _codec_writer(self):
+        return codecs.writer_factory(self.compression.codec, self.compression.level,
+                                     self.compression.threads, self._restart_interval,
+                                     self._key)
+
+    def compress_archive(self):
+        """Compress the tar atomically: write to a .partial then rename to archive_file.
 
         Same-filesystem os.rename is atomic, so a consumer or the next run never
-        observes a half-written .tgz (a SIGKILL/crash mid-gzip leaves only the
-        .partial, which the run-start sweep removes).
+        observes a half-written archive (a SIGKILL/crash mid-compress leaves only the
+        .partial, which the run-start sweep removes). When the sink already wrote the
+        final format into the .partial (streaming, codec 'none' or zip), only the
+        rename is left.
+
+        output_mode "directory" already wrote its tree; with prune it first deletes the
+        files the export no longer wrote, and it only packs an archive from it when
+        archive_tree is set.
+
+        With manifest or index enabled, their sidecars are written (atomically) once
+        the archive has its final name. Volumes are renamed in order; the manifest
+        (inside the last volume) gets one sidecar named after archive_file, which
+        covers the whole set.
+        """
+        if self.max_volume_size:
+            for partial, final in zip(self._volumes, self.archive_files):
+                os.rename(partial, final)
+            if self.manifest_data is not None:
+                write_sidecar(self.archive_file, self.manifest_data)
+            return
+        if self.output_mode == "directory":
+            self._prune_tree()
+            if not self.archive_tree:
+                return
+            archiver_util.archive_tree(self.output_dir, self.partial_file,
+                                       self.archive_base_path, self.compression.codec,
+                                       self.compression.level, self.compression.threads,
+                                       key=self._key)
+        elif not self._writes_final_stream:
+            restart_points = archiver_util.compress_file(
+                self.tar_file, self.partial_file, self.compression.codec,
+                self.compression.level, self.compression.threads,
+                restart_interval=self._restart_interval)
+            if self.index:
+                self._restart_points = restart_points
+        os.rename(self.partial_file, self.archive_file)
+        if self.manifest_data is not None:
+            write_sidecar(self.archive_file, self.manifest_data)
+        if self._member_index:
+            seek_index.write_sidecar(self.archive_file, seek_index.index_bytes(
+                self.codec.name, self._member_index, self._restart_points))
+
+    def _prune_tree(self):
+        """Delete the tree files the last export did not write (directory.prune).
+
+        Only after a complete export: a skipped node or asset, or a stop (shutdown or
+        run guard) leaves files unwritten that are still in BookStack.
         """
-        partial = f"{self.archive_file}.partial"
-        archiver_util.create_gzip(self.tar_file, partial)
-        os.rename(partial, self.archive_file)
+        if not self.prune or self._tree_members is None:
+            return
+        if not self.export_complete or self._stop_requested():
+            log.warning("Export incomplete; not pruning %s this run", self.output_dir)
+            return
+        removed = prune_tree(self.output_dir, self._tree_members)
+        log.info("Directory output: %d files no longer exported removed", removed)
 
     @property
     def file_extension_map(self) -> dict[str, str]:
@@ -434,21 +929,22 @@ class PageArchiver(NodeArchiver):
         :archive_dir: <str> = directory where data will be put into.
         :config: <ConfigNode> = Configuration with user inputs and general options.
         :http_client: <HttpHelper> = http helper functions with config from user inputs
+        :async_http: <AsyncHttpHelper | None> = asyncio engine client; None => threads
 
     Returns:
         :PageArchiver: instance with methods to help collect page content from a Bookstack instance.
     """
+    # pylint: disable=too-many-arguments
     def __init__(self, archive_dir: str, config: ConfigNode, http_client: HttpHelper,
-                 *, asset_archiver=None) -> None:
+                 *, asset_archiver=None, output_dir: str | None = None,
+                 async_http: AsyncHttpHelper | None = None) -> None:
         super().__init__(
             archive_dir=archive_dir,
-            api_urls=config.urls,
-            export_formats=config.user_inputs.formats,
             http_client=http_client,
-            export_meta=config.user_inputs.assets.export_meta,
-            asset_config=config.user_inputs.assets,
             asset_archiver=asset_archiver,
-            export_workers=config.user_inputs.export_workers,
+            output_dir=output_dir,
+            async_http=async_http,
+            **archiver_options(config),
         )
 
     def _asset_page_map(self, node: Node) -> dict[int, str]:
@@ -465,3 +961,10 @@ class PageArchiver(NodeArchiver):
         image_map = self._get_image_meta()
         attachment_map = self._get_attachment_meta()
         self._export_nodes(page_nodes, "pages", image_map, attachment_map)
+
+    def archive_stream(self, page_nodes: Iterable[Node]):
+        """archive() for pages still being discovered (pipeline): each page is exported
+        once it comes out of page_nodes. The asset lists are fetched first."""
+        image_map = self._get_image_meta()
+        attachment_map = self._get_attachment_meta()
+        self._export_nodes(page_nodes, "pages", image_map, attachment_map)
@@ -0,0 +1,233 @@
+"""Gzip writers: parallel (pigz-style block compression) and restartable.
+
+A single gzip.GzipFile deflates on one core. ParallelGzipWriter instead cuts the
+input into fixed-size blocks and deflates them on a thread pool — zlib releases the
+GIL while compressing, so blocks really do compress on separate cores — then writes
+the results back in input order as ONE ordinary gzip member:
+
+- each block is a raw deflate segment ending in a sync flush (byte-aligned, not
+  final), so the segments concatenate into one valid deflate stream;
+- each block is primed with the 32 KiB of input before it as a preset dictionary,
+  so matches across block boundaries still compress (same trick as pigz) and the
+  ratio stays within a fraction of a percent of single-stream gzip;
+- a final empty block carries the end-of-stream marker, followed by the usual
+  CRC-32 / size trailer.
+
+The output is a standard .tgz: `tar xzf`, `gzip -t` and Python's gzip module read it
+unchanged. The bytes differ from single-threaded gzip, the content does not.
+
+With restart_every=n, every n-th block is compressed WITHOUT the preset dictionary.
+Such a block does not reference earlier input, and it starts byte-aligned after the
+previous block's sync flush, so raw inflate can begin right there. Those offsets are
+collected in restart_points for the seek index (see seek_index.py).
+RestartableGzipWriter does the same for single-threaded output with zlib full flushes.
+"""
+import gzip
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO
+
+# Input bytes per compression task. pigz's default: large enough that per-task
+# overhead is noise next to deflate time, small enough to keep every core busy.
+BLOCK_SIZE = 128 * 1024
+
+# deflate's maximum back-reference distance; the preset dictionary size.
+_WINDOW_SIZE = 32 * 1024
+
+# Finished-but-unwritten blocks allowed per thread before write() waits. Bounds
+# memory to about threads x _PENDING_PER_THREAD x BLOCK_SIZE.
+_PENDING_PER_THREAD = 2
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_OS_UNKNOWN = 255
+
+
+def _deflate_block(block: bytes, level: int, zdict: bytes) -> bytes:
+    compressor = (zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=zdict)
+                  if zdict else zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS))
+    return compressor.compress(block) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def _final_block(level: int) -> bytes:
+    return zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS).flush(zlib.Z_FINISH)
+
+
+def _gzip_header(level: int) -> bytes:
+    # XFL: 2 = max compression, 4 = fastest (RFC 1952), matching gzip.GzipFile
+    xfl = 2 if level == zlib.Z_BEST_COMPRESSION else 4 if level == zlib.Z_BEST_SPEED else 0
+    return (_GZIP_MAGIC + bytes([zlib.DEFLATED, 0])
+            + struct.pack("<L", int(time.time())) + bytes([xfl, _OS_UNKNOWN]))
+
+
+# pylint: disable=too-many-instance-attributes
+class ParallelGzipWriter:
+    """
+    Write-only binary stream producing one gzip member, deflated on a thread pool.
+
+    Does not own fileobj: close() writes the trailer and flushes, the caller closes
+    the file (same contract as gzip.GzipFile(fileobj=...)).
+
+    Args:
+        :fileobj: <BinaryIO> = destination opened for binary writing.
+        :level: <int> = zlib compression level 0-9.
+        :threads: <int> = compression threads.
+        :block_size: <int> = uncompressed bytes per compression task.
+        :restart_every: <int> = make every n-th block a restart point; 0 => none.
+
+    Returns:
+        ParallelGzipWriter instance accepting write() calls of any size.
+    """
+    def __init__(self, fileobj: BinaryIO, level: int = 9, threads: int = 2,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                 block_size: int = BLOCK_SIZE, restart_every: int = 0):
+        self._fileobj = fileobj
+        self._level = level
+        self._block_size = block_size
+        self._executor = ThreadPoolExecutor(max_workers=threads,
+                                            thread_name_prefix="pgzip")
+        self._max_pending = threads * _PENDING_PER_THREAD
+        # (future, restart offset or None) per block, in input order
+        self._pending: deque[tuple[Future, int | None]] = deque()
+        self._buffer = bytearray()
+        # dictionary for the next block: the last 32 KiB of input before it
+        self._window = b""
+        self._crc = 0
+        self._size = 0
+        self.closed = False
+        self._restart_every = restart_every
+        self._blocks = 0
+        # uncompressed bytes handed to the pool / compressed bytes written out
+        self._submitted = 0
+        self._compressed = 0
+        # (uncompressed offset, compressed offset) pairs where raw inflate can start
+        self.restart_points: list[tuple[int, int]] | None = [] if restart_every else None
+        self._emit(_gzip_header(level))
+
+    def write(self, data) -> int:
+        """Buffer data and dispatch every full block to the pool."""
+        if self.closed:
+            raise ValueError("write to closed ParallelGzipWriter")
+        view = memoryview(data)
+        self._buffer += view
+        # CRC and size cover the uncompressed stream; crc32 is fast enough to run
+        # inline (and releases the GIL on large buffers)
+        self._crc = zlib.crc32(view, self._crc)
+        self._size += len(view)
+        while len(self._buffer) >= self._block_size:
+            block = bytes(self._buffer[:self._block_size])
+            del self._buffer[:self._block_size]
+            self._submit(block)
+        return len(view)
+
+    def flush(self):
+        """No-op beyond the destination flush: partial blocks wait for close() so
+        block boundaries stay fixed-size."""
+        self._fileobj.flush()
+
+    def close(self):
+        """Compress the remainder, write the end-of-stream block and trailer."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            if self._buffer:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            while self._pending:
+                self._write_block()
+            self._emit(_final_block(self._level))
+            self._emit(struct.pack("<LL", self._crc, self._size & 0xFFFFFFFF))
+            self._fileobj.flush()
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def _emit(self, data: bytes):
+        self._fileobj.write(data)
+        self._compressed += len(data)
+
+    def _write_block(self):
+        future, restart = self._pending.popleft()
+        if restart is not None:
+            self.restart_points.append((restart, self._compressed))
+        self._emit(future.result())
+
+    def _submit(self, block: bytes):
+        restart = (self._submitted if self._restart_every
+                   and self._blocks % self._restart_every == 0 else None)
+        zdict = b"" if restart is not None else self._window
+        self._pending.append(
+            (self._executor.submit(_deflate_block, block, self._level, zdict), restart))
+        self._window = (self._window + block)[-_WINDOW_SIZE:]
+        self._blocks += 1
+        self._submitted += len(block)
+        # write finished blocks in order; wait on the oldest once too many are queued
+        while self._pending and (self._pending[0][0].done()
+                                 or len(self._pending) > self._max_pending):
+            self._write_block()
+
+
+class RestartableGzipWriter:
+    """
+    Single-threaded gzip stream with a full flush every `interval` input bytes.
+
+    Does not own fileobj (same contract as gzip.GzipFile(fileobj=...)); fileobj must
+    support tell().
+
+    Args:
+        :fileobj: <BinaryIO> = destination opened for binary writing.
+        :interval: <int> = uncompressed bytes between restart points.
+        :level: <int> = zlib compression level 0-9.
+
+    Returns:
+        RestartableGzipWriter instance; restart_points lists (uncompressed offset,
+        compressed offset) pairs once written.
+    """
+    def __init__(self, fileobj: BinaryIO, interval: int, level: int = 9):
+        self._fileobj = fileobj
+        self._gzip = gzip.GzipFile(fileobj=fileobj, mode="wb", compresslevel=level)
+        self._interval = interval
+        self._position = 0
+        # the header is written by GzipFile's constructor; the first deflate block
+        # starts right after it
+        self.restart_points: list[tuple[int, int]] = [(0, fileobj.tell())]
+
+    @property
+    def closed(self) -> bool:
+        """True once close() has run."""
+        return self._gzip.closed
+
+    def write(self, data) -> int:
+        """Compress data, full-flushing at every interval boundary it crosses."""
+        view = memoryview(data).cast("B")
+        total = len(view)
+        while view:
+            room = self._interval - self._position % self._interval
+            chunk, view = view[:room], view[room:]
+            self._gzip.write(chunk)
+            self._position += len(chunk)
+            if self._position % self._interval == 0:
+                self._gzip.flush(zlib.Z_FULL_FLUSH)
+                self.restart_points.append((self._position, self._fileobj.tell()))
+        return total
+
+    def flush(self):
+        """Flush buffered output without adding a restart point."""
+        self._gzip.flush()
+
+    def close(self):
+        """Finish the gzip member (trailer included)."""
+        self._gzip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
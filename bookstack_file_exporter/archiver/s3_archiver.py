@@ -1,5 +1,6 @@
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 # pylint: disable=import-error
 import boto3
@@ -86,15 +87,29 @@ class S3CompatibleArchiver:
         log.info("Uploaded object: %s to bucket: %s", object_path, self.bucket)
         return f"{self.bucket}/{object_path}"
 
-    def clean_up(self, file_extension: str):
-        """delete objects based on 'keep_last' number"""
+    def upload_backups(self, local_file_paths: list[str], max_workers: int) -> list[str]:
+        """upload the volumes of one backup concurrently; return their dests in order.
+
+        boto3 clients are thread-safe, so the volumes share this target's client. The
+        first failure is raised after every started upload has finished."""
+        workers = max(1, min(len(local_file_paths), max_workers))
+        with ThreadPoolExecutor(max_workers=workers,
+                                thread_name_prefix="s3-volume") as executor:
+            return list(executor.map(self.upload_backup, local_file_paths))
+
+    def clean_up(self, file_extension: str | tuple[str, ...]):
+        """delete objects based on 'keep_last' number
+
+        Pass every archive extension (codecs.ARCHIVE_EXTENSIONS) so objects uploaded
+        under a previously configured codec still count toward keep_last. The volumes
+        of one backup (`.part001`, `.part002`, ...) count once and are deleted together."""
         if not self.keep_last:  # captures keep_last == 0
             return
         to_delete = self._get_stale_objects(file_extension)
         if to_delete:
             self._delete_objects(to_delete)
 
-    def _scan_objects(self, file_extension: str) -> list[dict]:
+    def _scan_objects(self, file_extension: str | tuple[str, ...]) -> list[dict]:
         """List managed objects directly under the prefix (top-level only).
 
         Delimiter='/' scopes the listing to one level — same as the v2 minio-py
@@ -110,7 +125,7 @@ class S3CompatibleArchiver:
                            and obj["Key"].removeprefix(prefix).startswith(_MANAGED_FILTER))
         return matched
 
-    def _get_stale_objects(self, file_extension: str) -> list[dict]:
+    def _get_stale_objects(self, file_extension: str | tuple[str, ...]) -> list[dict]:
         objects = self._scan_objects(file_extension)
         if not objects:
             log.debug("No objects found to clean up")
@@ -120,14 +135,19 @@ class S3CompatibleArchiver:
                 "'keep_last' for bucket %s is negative (%s); skipping retention "
                 "— no objects deleted", self.bucket, self.keep_last)
             return []
-        if len(objects) > self.keep_last:
-            log.debug("Number of objects is greater than 'keep_last'; running clean up")
+        if len(common_util.group_backup_sets(objects, self._object_name)) > self.keep_last:
+            log.debug("Number of backups is greater than 'keep_last'; running clean up")
             return self._filter_objects(objects)
         return []
 
+    @staticmethod
+    def _object_name(obj: dict) -> str:
+        return obj["Key"]
+
     def _filter_objects(self, objects: list[dict]) -> list[dict]:
-        objects_to_clean = common_util.oldest_beyond_keep(
-            objects, key=lambda d: d["LastModified"], keep_last=self.keep_last)
+        objects_to_clean = common_util.oldest_sets_beyond_keep(
+            objects, name=self._object_name, key=lambda d: d["LastModified"],
+            keep_last=self.keep_last)
         log.debug("%d objects will be cleaned up", len(objects_to_clean))
         return objects_to_clean
 
@@ -0,0 +1,139 @@
+"""Seekable archive index: restore one member without decompressing what precedes it.
+
+A gzip stream normally has to be inflated from the start, because every deflate
+block may refer back up to 32 KiB. The writer therefore inserts restart points: a
+gzip full flush (single-threaded) or a dictionary-less block (ParallelGzipWriter)
+every RESTART_INTERVAL bytes of tar. Nothing after a restart point refers to data
+before it, so raw inflate can begin at its compressed offset.
+
+The sidecar `<archive>.index.json` records those points together with every tar
+member's data offset and size, both captured while the archive is written (TarSink
+tracks tar offsets, the codec writer tracks restart points; no extra pass). To read
+a member, seek to the last restart point at or before it, inflate from there and
+skip at most RESTART_INTERVAL bytes up to the member. An uncompressed tar (codec 'none') needs
+no restart points: the data offset is a file offset.
+
+Restore from the command line:
+
+    python -m bookstack_file_exporter.archiver.seek_index <archive> <member> [-o FILE]
+"""
+import argparse
+import bisect
+import json
+import sys
+import zlib
+from typing import BinaryIO
+
+from bookstack_file_exporter.archiver import util
+
+# sidecar written next to the finished archive
+SIDECAR_SUFFIX = ".index.json"
+
+INDEX_VERSION = 1
+
+# Uncompressed tar bytes between restart points. At most this much is inflated and
+# thrown away per restore; the ratio cost of losing the dictionary once per MiB is
+# a small fraction of a percent.
+RESTART_INTERVAL = 1024 * 1024
+
+_READ_CHUNK = 64 * 1024
+
+
+def sidecar_path(archive_file: str) -> str:
+    """Index sidecar path for a finished archive."""
+    return f"{archive_file}{SIDECAR_SUFFIX}"
+
+
+def index_bytes(codec: str, members: dict[str, dict],
+                restart_points: list[tuple[int, int]] | None) -> bytes:
+    """Serialize the index document.
+
+    members maps member name to {"offset", "size"} (data offset in the uncompressed
+    tar) or {"link": name} for a dedup hardlink.
+    """
+    document = {"version": INDEX_VERSION, "codec": codec,
+                "restart_points": [list(point) for point in restart_points or ()],
+                "members": members}
+    return json.dumps(document, separators=(",", ":")).encode("utf-8")
+
+
+def write_sidecar(archive_file: str, data: bytes) -> str:
+    """Write the index sidecar atomically (.partial then rename); return its path."""
+    path = sidecar_path(archive_file)
+    util.write_file_atomic(path, data)
+    return path
+
+
+def load_index(archive_file: str) -> dict:
+    """Read the index sidecar of archive_file."""
+    with open(sidecar_path(archive_file), "rb") as sidecar:
+        return json.load(sidecar)
+
+
+def _inflate_range(archive: BinaryIO, start: tuple[int, int], offset: int,
+                   size: int) -> bytes:
+    """Raw-inflate from restart point `start` and return [offset, offset+size)."""
+    uncompressed, compressed = start
+    archive.seek(compressed)
+    inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+    skip = offset - uncompressed
+    out = bytearray()
+    while len(out) < size:
+        chunk = archive.read(_READ_CHUNK)
+        if not chunk:
+            raise ValueError("archive ends before the indexed member")
+        data = inflater.decompress(chunk)
+        if skip:
+            dropped = min(skip, len(data))
+            data = data[dropped:]
+            skip -= dropped
+        out += data
+        if inflater.eof:
+            break
+    if len(out) < size:
+        raise ValueError("archive ends before the indexed member")
+    return bytes(out[:size])
+
+
+def read_member(archive_file: str, name: str, index: dict | None = None) -> bytes:
+    """Return one member's content using the index sidecar (loaded if not given).
+
+    Raises KeyError if the member is not in the index.
+    """
+    index = index if index is not None else load_index(archive_file)
+    entry = index["members"][name]
+    if "link" in entry:
+        entry = index["members"][entry["link"]]
+    offset, size = entry["offset"], entry["size"]
+    with open(archive_file, "rb") as archive:
+        if index["codec"] == "none":
+            archive.seek(offset)
+            return archive.read(size)
+        points = index["restart_points"]
+        position = bisect.bisect_right([point[0] for point in points], offset) - 1
+        return _inflate_range(archive, tuple(points[position]), offset, size)
+
+
+def main(argv=None) -> int:
+    """Extract one member from an indexed archive to a file or stdout."""
+    parser = argparse.ArgumentParser(
+        description="Restore one file from an archive using its .index.json sidecar")
+    parser.add_argument("archive", help="archive path (.tgz or .tar)")
+    parser.add_argument("member", help="member path inside the archive")
+    parser.add_argument("-o", "--output", help="write here instead of stdout")
+    args = parser.parse_args(argv)
+    try:
+        data = read_member(args.archive, args.member)
+    except KeyError:
+        print(f"member not in index: {args.member}", file=sys.stderr)
+        return 1
+    if args.output:
+        with open(args.output, "wb") as out:
+            out.write(data)
+    else:
+        sys.stdout.buffer.write(data)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
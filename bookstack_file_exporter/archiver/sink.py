@@ -0,0 +1,588 @@
+"""Run-scoped archive writer: one dedicated writer thread fed through a bounded queue.
+
+Replaces the old per-file `tarfile.open(path, "a")` append. Append mode rescans every
+existing member header on open, so a run with n members cost O(n^2) header reads,
+all serialized under one global lock. The sink opens the archive ONCE and keeps it
+open for the whole run; export workers only enqueue (path, bytes) pairs.
+
+Single-writer safety is structural: only the writer thread ever touches the archive
+handle, so no lock is needed around the archive itself. The queue bound caps how
+many finished-but-unwritten members can pile up in memory when the writer falls
+behind (workers block in put() instead — that blocked time is what wait_seconds
+measures).
+
+ArchiveSink holds the queue/thread/error machinery; TarSink, ZipSink and
+DirectorySink only know how to open their container and add one member to it.
+Because one thread sees every member, it is also the natural place to hash them:
+for the optional MANIFEST.json (see manifest.py) and for TarSink's content-addressed
+dedup, where a repeat of earlier content becomes a tar hardlink entry.
+
+A member's data is bytes, or a Spool (see spool.py) for a large download kept in a
+temp file; the writer copies a Spool into the archive in chunks and then closes it.
+"""
+import hashlib
+import logging
+import os
+import queue
+import shutil
+import sys
+import tarfile
+import threading
+import time
+import zipfile
+from dataclasses import dataclass, replace
+from typing import BinaryIO, Callable
+
+from bookstack_file_exporter.archiver import manifest
+from bookstack_file_exporter.archiver.manifest import ManifestEntry, MemberSource
+from bookstack_file_exporter.archiver.spool import (CHUNK_SIZE, Spool, body_digest,
+                                                    body_reader, body_size, close_body)
+
+log = logging.getLogger(__name__)
+
+# a ZipInfo carries its own deflate level (compress_level) from Python 3.13; before
+# that, only writestr() can set a member's level
+_ZIPINFO_LEVEL = sys.version_info >= (3, 13)
+
+# queue sentinel: tells the writer thread to flush and close
+_CLOSE = object()
+
+# _add_member outcomes: bytes stored, identical file already on disk, or stored as a
+# hardlink to an earlier member with identical content
+WRITTEN = "written"
+UNCHANGED = "unchanged"
+LINKED = "linked"
+
+# Member extensions whose content is already compressed: ZipSink stores them as-is
+# instead of spending CPU on a deflate pass that gains ~0%. The export formats pdf and
+# zip plus the image and attachment types BookStack commonly holds.
+STORED_EXTENSIONS = frozenset({
+    ".pdf", ".zip", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif",
+    ".gz", ".tgz", ".bz2", ".xz", ".zst", ".7z", ".rar",
+    ".docx", ".xlsx", ".pptx", ".odt", ".ods", ".odp",
+    ".mp3", ".mp4", ".m4a", ".mov", ".webm",
+})
+
+
+@dataclass
+class SinkStats:
+    """Counters for one sink's lifetime.
+
+    wait_seconds is the total time producers spent blocked handing a member to the
+    writer (what used to show up as lock contention on the shared tar). write_seconds is
+    writer-thread time spent inside the archive library. When wait_seconds grows
+    toward the run's wall clock with a high export_workers, the writer — not
+    BookStack — is the bottleneck.
+    """
+    members: int = 0
+    bytes_written: int = 0
+    wait_seconds: float = 0.0
+    write_seconds: float = 0.0
+    # members whose identical content was already on disk (DirectorySink only); they
+    # count toward members but not bytes_written
+    unchanged: int = 0
+    # members stored as hardlinks to an earlier identical member (TarSink with dedup)
+    # and the content bytes that did not have to be stored again
+    duplicates: int = 0
+    duplicate_bytes: int = 0
+
+    @property
+    def dedup_ratio(self) -> float:
+        """Member content bytes per stored byte; 1.0 when nothing was deduplicated."""
+        if not self.bytes_written:
+            return 1.0
+        return (self.bytes_written + self.duplicate_bytes) / self.bytes_written
+
+
+def _open_plain(path: str) -> BinaryIO:
+    return open(path, "wb")  # pylint: disable=consider-using-with
+
+
+# pylint: disable=too-many-instance-attributes
+class ArchiveSink:
+    """
+    ArchiveSink owns the run's archive file and the single thread that writes it.
+
+    The archive is created lazily on the first member, so a run that writes nothing
+    leaves nothing on disk (Archiver.has_exported_content relies on that).
+    Use as a context manager: entering starts the writer thread, exiting drains
+    the queue, closes the archive and re-raises any error the writer hit.
+    Subclasses implement _open, _add_member and _handles.
+
+    Args:
+        :path: <str> = path of the archive file to create.
+        :max_pending: <int> = members that may wait in the queue before producers block.
+        :manifest_name: <str | None> = when set, hash every member and add a manifest
+            under this member name as the last member; None => no manifest.
+
+    Returns:
+        ArchiveSink instance that serializes member writes onto one thread.
+    """
+    _thread_name = "archive-sink"
+
+    def __init__(self, path: str, max_pending: int = 2, manifest_name: str | None = None):
+        self.path = path
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_pending))
+        self._thread = threading.Thread(target=self._run, name=self._thread_name,
+                                        daemon=True)
+        self._opened = False
+        # First writer-side failure (e.g. ENOSPC). Once set the writer keeps draining
+        # the queue without writing so blocked producers never deadlock; write() and
+        # close() surface it to the export threads.
+        self._error: Exception | None = None
+        self._stats = SinkStats()
+        # producers add to wait_seconds concurrently; the writer-owned counters are
+        # only mutated on the writer thread but read under the same lock for a
+        # consistent snapshot
+        self._stats_lock = threading.Lock()
+        self._manifest_name = manifest_name
+        # writer thread only; the serialized document is kept for the sidecar
+        self._entries: list[ManifestEntry] | None = [] if manifest_name else None
+        self.manifest: bytes | None = None
+
+    @property
+    def _needs_digest(self) -> bool:
+        """Whether _add hashes each member before handing it to _add_member."""
+        return self._entries is not None
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close(raise_error=exc_type is None)
+
+    def write(self, file_path: str, data: bytes | Spool,
+              source: MemberSource | None = None, done: Callable[[], None] | None = None):
+        """Hand one member to the writer thread; blocks while the queue is full.
+
+        source is the member's BookStack origin, recorded in the manifest if any.
+        done is called once the sink no longer holds data: after the writer handled
+        it (written, or dropped after a writer error), or right away if write raises.
+        A Spool is closed at the same point.
+        """
+        if self._error is not None:
+            close_body(data)
+            if done is not None:
+                done()
+            raise self._error
+        start = time.perf_counter()
+        self._queue.put((file_path, data, source, done))
+        waited = time.perf_counter() - start
+        with self._stats_lock:
+            self._stats.wait_seconds += waited
+
+    def close(self, raise_error: bool = True):
+        """Drain pending members, close the archive and join the writer thread.
+
+        Idempotent. raise_error=False is used while another exception is already
+        propagating, so a secondary writer error never masks the original one.
+        """
+        if self._thread.is_alive():
+            self._queue.put(_CLOSE)
+            self._thread.join()
+        if raise_error and self._error is not None:
+            raise self._error
+
+    @property
+    def stats(self) -> SinkStats:
+        """Snapshot of the sink counters."""
+        with self._stats_lock:
+            return replace(self._stats)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _CLOSE:
+                break
+            file_path, data, source, done = item
+            try:
+                if self._error is None:
+                    self._add(file_path, data, source)
+            except Exception as err:  # pylint: disable=broad-except
+                log.error("Archive writer failed on %s: %s", file_path, err)
+                self._error = err
+            finally:
+                close_body(data)
+                if done is not None:
+                    done()
+        if self._entries is not None and self._opened and self._error is None:
+            try:
+                self._add_manifest()
+            except Exception as err:  # pylint: disable=broad-except
+                log.error("Archive writer failed on %s: %s", self._manifest_name, err)
+                self._error = err
+        for handle in self._handles():
+            if handle is None:
+                continue
+            try:
+                handle.close()
+            except Exception as err:  # pylint: disable=broad-except
+                log.error("Archive writer failed to close %s: %s", self.path, err)
+                self._error = self._error or err
+
+    def _add(self, file_path: str, data: bytes | Spool, source: MemberSource | None):
+        start = time.perf_counter()
+        if not self._opened:
+            self._opened = True
+            self._open()
+        size = body_size(data)
+        log.debug("Adding file: %s with size: %d bytes to archive", file_path, size)
+        # one hash serves the manifest, tar dedup and the directory comparison
+        digest = body_digest(data) if self._needs_digest else None
+        outcome = self._add_member(file_path, data, digest)
+        if self._entries is not None:
+            self._entries.append(manifest.build_entry(
+                self._entry_path(file_path), size, digest, source))
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self._stats.members += 1
+            if outcome == WRITTEN:
+                self._stats.bytes_written += size
+            elif outcome == LINKED:
+                self._stats.duplicates += 1
+                self._stats.duplicate_bytes += size
+            else:
+                self._stats.unchanged += 1
+            self._stats.write_seconds += elapsed
+
+    def _add_manifest(self):
+        """Add the manifest of every member so far as the final member. It is not
+        counted in the stats: it describes the export, it is not part of it."""
+        self.manifest = manifest.manifest_bytes(self._entries)
+        self._add_member(self._manifest_name, self.manifest,
+                         hashlib.sha256(self.manifest).digest())
+
+    def _entry_path(self, file_path: str) -> str:
+        """Member path as recorded in the manifest."""
+        return file_path
+
+    def _open(self):
+        """Create the archive; called on the writer thread before the first member."""
+        raise NotImplementedError
+
+    def _add_member(self, file_path: str, data: bytes | Spool,
+                    digest: bytes | None) -> str:
+        """Append one member to the open archive; return WRITTEN, UNCHANGED or LINKED.
+
+        digest is the SHA-256 of data when _needs_digest, else None.
+        """
+        raise NotImplementedError
+
+    def _handles(self) -> tuple:
+        """Handles to close when the writer stops, container before file."""
+        raise NotImplementedError
+
+
+class TarSink(ArchiveSink):
+    """
+    TarSink writes the run's members into one tar, optionally through a codec stream.
+
+    Args:
+        :tar_path: <str> = path of the tar file to create.
+        :max_pending: <int> = members that may wait in the queue before producers block.
+        :opener: <Callable[[str], BinaryIO]> = creates the output stream for tar_path;
+            a codecs.writer_factory() compresses members as they are written.
+            Default: plain uncompressed file.
+        :dedup: <bool> = store a member whose content (SHA-256) was already written
+            as a hardlink entry to the first member instead of repeating the bytes.
+        :manifest_name: <str | None> = see ArchiveSink.
+        :index: <bool> = record each member's data offset and size in the
+            uncompressed tar (member_index) for the seek index.
+
+    Returns:
+        TarSink instance that serializes member writes onto one thread.
+    """
+    _thread_name = "tar-sink"
+
+    def __init__(self, tar_path: str, max_pending: int = 2,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                 opener: Callable[[str], BinaryIO] | None = None, dedup: bool = False,
+                 manifest_name: str | None = None, index: bool = False):
+        super().__init__(tar_path, max_pending, manifest_name)
+        self._opener = opener or _open_plain
+        self._tar: tarfile.TarFile | None = None
+        self._stream: BinaryIO | None = None
+        # content digest -> name of the first member that stored it; writer thread only
+        self._seen: dict[bytes, str] | None = {} if dedup else None
+        # member name -> {"offset", "size"} or {"link"}; filled on the writer thread
+        self.member_index: dict[str, dict] | None = {} if index else None
+
+    @property
+    def _needs_digest(self) -> bool:
+        return self._seen is not None or super()._needs_digest
+
+    @property
+    def tar_path(self) -> str:
+        """Path of the tar being written."""
+        return self.path
+
+    @property
+    def restart_points(self) -> list[tuple[int, int]] | None:
+        """Restart points recorded by the output stream (a codec writer with a
+        restart interval), else None."""
+        return getattr(self._stream, "restart_points", None)
+
+    def _open(self):
+        # tar closes before the stream (see _handles) so the codec trailer lands last;
+        # "w|" is tarfile's stream mode, which never seeks the output
+        self._stream = self._opener(self.path)
+        self._tar = tarfile.open(fileobj=self._stream, mode="w|")  # pylint: disable=consider-using-with
+
+    def _add_member(self, file_path: str, data: bytes | Spool,
+                    digest: bytes | None) -> str:
+        tar_info = tarfile.TarInfo(name=file_path)
+        size = body_size(data)
+        # an empty member is a bare header either way, a link saves nothing
+        if self._seen is not None and size:
+            first = self._seen.get(digest)
+            if first is not None:
+                # tar extracts LNKTYPE as a hard link to the earlier member's file
+                tar_info.type = tarfile.LNKTYPE
+                tar_info.linkname = first
+                self._tar.addfile(tar_info)
+                if self.member_index is not None:
+                    self.member_index[file_path] = {"link": first}
+                return LINKED
+            self._seen[digest] = file_path
+        tar_info.size = size
+        self._tar.addfile(tar_info, fileobj=body_reader(data))
+        if self.member_index is not None:
+            # tarfile's running offset sits past the member's zero-padded data; the
+            # header length varies (long names add extension headers), the padding not
+            padded = -(-size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+            self.member_index[file_path] = {"offset": self._tar.offset - padded,
+                                            "size": size}
+        return WRITTEN
+
+    def _handles(self) -> tuple:
+        return self._tar, self._stream
+
+
+class VolumeTarSink(TarSink):
+    """
+    VolumeTarSink splits the run's members across numbered tar volumes.
+
+    A new volume starts before a member that would push the current one past
+    max_volume_size, measured on the uncompressed tar including its end-of-archive
+    padding, so a compressed volume stays within the limit too (up to codec framing
+    on incompressible data). Volumes are cut between members and each is a complete
+    tar, so every volume extracts on its own. A single member larger than the limit
+    gets a volume of its own. Dedup hardlinks never point into an earlier volume.
+
+    Args:
+        :volume_path: <Callable[[int], str]> = path of volume n (1-based).
+        :max_volume_size: <int> = uncompressed bytes per volume.
+        :max_pending, opener, dedup, manifest_name: see TarSink.
+
+    Returns:
+        VolumeTarSink instance; volumes lists the files written, in order.
+    """
+    _thread_name = "tar-volume-sink"
+
+    def __init__(self, volume_path: Callable[[int], str], max_volume_size: int,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                 max_pending: int = 2, opener: Callable[[str], BinaryIO] | None = None,
+                 dedup: bool = False, manifest_name: str | None = None):
+        super().__init__(volume_path(1), max_pending, opener=opener, dedup=dedup,
+                         manifest_name=manifest_name)
+        self._volume_path = volume_path
+        self._max_volume_size = max_volume_size
+        self.volumes: list[str] = []
+
+    def _open(self):
+        super()._open()
+        self.volumes.append(self.path)
+
+    def _projected_size(self, tar_info: tarfile.TarInfo, size: int) -> int:
+        """Uncompressed volume size once this member and the tar trailer are added."""
+        header = len(tar_info.tobuf(self._tar.format, self._tar.encoding, self._tar.errors))
+        padded = -(-size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+        end = self._tar.offset + header + padded + 2 * tarfile.BLOCKSIZE
+        return -(-end // tarfile.RECORDSIZE) * tarfile.RECORDSIZE
+
+    def _add_member(self, file_path: str, data: bytes | Spool,
+                    digest: bytes | None) -> str:
+        tar_info = tarfile.TarInfo(name=file_path)
+        tar_info.size = size = body_size(data)
+        if self._projected_size(tar_info, size) > self._max_volume_size:
+            if self._tar.offset:
+                self._next_volume()
+            if self._projected_size(tar_info, size) > self._max_volume_size:
+                log.warning("%s (%d bytes) exceeds max_volume_size on its own; "
+                            "writing it to an oversized volume", file_path, size)
+        return super()._add_member(file_path, data, digest)
+
+    def _next_volume(self):
+        for handle in self._handles():
+            handle.close()
+        self.path = self._volume_path(len(self.volumes) + 1)
+        if self._seen is not None:
+            # a hardlink into an earlier volume would not extract on its own
+            self._seen.clear()
+        self._open()
+
+
+class ZipSink(ArchiveSink):
+    """
+    ZipSink writes the run's members into one ZIP64 archive, choosing a codec per member.
+
+    Members with an extension in STORED_EXTENSIONS are stored uncompressed; everything
+    else (md/html/txt/meta json) is deflated. The central directory at the end of the
+    file lets a restore extract one member without reading the rest.
+
+    Args:
+        :zip_path: <str> = path of the zip file to create.
+        :max_pending: <int> = members that may wait in the queue before producers block.
+        :level: <int | None> = deflate level 0-9 for compressible members; None => zlib's 6.
+            Before Python 3.13, spooled members are deflated at zlib's 6.
+        :manifest_name: <str | None> = see ArchiveSink.
+
+    Returns:
+        ZipSink instance that serializes member writes onto one thread.
+    """
+    _thread_name = "zip-sink"
+
+    def __init__(self, zip_path: str, max_pending: int = 2, level: int | None = None,
+                 manifest_name: str | None = None):
+        super().__init__(zip_path, max_pending, manifest_name)
+        self._level = level
+        self._zip: zipfile.ZipFile | None = None
+        # one timestamp for every member of the run, like the archive name
+        self._date_time = time.localtime()[:6]
+
+    def _open(self):
+        self._zip = zipfile.ZipFile(  # pylint: disable=consider-using-with
+            self.path, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True,
+            compresslevel=self._level)
+
+    def _add_member(self, file_path: str, data: bytes | Spool,
+                    digest: bytes | None) -> str:
+        info = zipfile.ZipInfo(file_path, date_time=self._date_time)
+        # regular file, rw-r--r-- (the TarInfo default)
+        info.external_attr = 0o100644 << 16
+        if os.path.splitext(file_path)[1].lower() in STORED_EXTENSIONS:
+            compress_type, level = zipfile.ZIP_STORED, None
+        else:
+            compress_type, level = zipfile.ZIP_DEFLATED, self._level
+        if not isinstance(data, Spool):
+            self._zip.writestr(info, data, compress_type=compress_type,
+                               compresslevel=level)
+            return WRITTEN
+        # what writestr sets from its arguments; open() reads them from info, and
+        # file_size decides whether the member needs ZIP64 fields
+        info.compress_type = compress_type
+        if _ZIPINFO_LEVEL:
+            info.compress_level = level
+        info.file_size = data.size
+        with self._zip.open(info, "w") as out:
+            shutil.copyfileobj(data.reader(), out, CHUNK_SIZE)
+        return WRITTEN
+
+    def _handles(self) -> tuple:
+        return (self._zip,)
+
+
+def _file_sha256(path: str) -> bytes | None:
+    """SHA-256 digest of a file's content, or None if it does not exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as existing:
+            for chunk in iter(lambda: existing.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.digest()
+
+
+class DirectorySink(ArchiveSink):
+    """
+    DirectorySink writes the run's members as plain files under a persistent directory.
+
+    A file is rewritten only when its content differs from what is already on disk
+    (size first, then SHA-256), so unchanged pages keep their bytes and mtime and
+    rsync/restic-style tools see only what actually changed. Changed files are
+    written to a sibling .partial and os.replace'd, so a reader never sees a torn file.
+    Every member path is recorded in members, so files no longer exported (pages
+    deleted or renamed in BookStack) can be removed afterwards with prune_tree.
+
+    Args:
+        :root: <str> = directory the tree is written into (created on first member).
+        :max_pending: <int> = members that may wait in the queue before producers block.
+        :strip_prefix: <str> = leading member-path component to drop, e.g. the
+            timestamped archive folder name, so the tree stays stable across runs.
+        :manifest_name: <str | None> = see ArchiveSink; written into the tree like
+            any other member.
+
+    Returns:
+        DirectorySink instance that serializes file writes onto one thread.
+    """
+    _thread_name = "dir-sink"
+
+    def __init__(self, root: str, max_pending: int = 2, strip_prefix: str = "",
+                 manifest_name: str | None = None):
+        super().__init__(root, max_pending, manifest_name)
+        self._strip_prefix = f"{strip_prefix.rstrip('/')}/" if strip_prefix else ""
+        # files this run wrote or found unchanged (writer thread; read after close)
+        self.members: set[str] = set()
+
+    @property
+    def _needs_digest(self) -> bool:
+        # skip-unchanged compares content hashes
+        return True
+
+    def _entry_path(self, file_path: str) -> str:
+        # manifest paths are relative to the tree root, like the files
+        return file_path.removeprefix(self._strip_prefix)
+
+    def _open(self):
+        os.makedirs(self.path, exist_ok=True)
+
+    def _target(self, file_path: str) -> str:
+        relative = self._entry_path(file_path)
+        target = os.path.normpath(os.path.join(self.path, relative))
+        # member names come from BookStack slugs; never let one escape the root
+        if os.path.commonpath([self.path, target]) != os.path.normpath(self.path):
+            raise ValueError(f"member path escapes output directory: {file_path}")
+        return target
+
+    def _add_member(self, file_path: str, data: bytes | Spool,
+                    digest: bytes | None) -> str:
+        target = self._target(file_path)
+        self.members.add(target)
+        try:
+            same_size = os.path.getsize(target) == body_size(data)
+        except FileNotFoundError:
+            same_size = False
+        if same_size and _file_sha256(target) == digest:
+            return UNCHANGED
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        partial = f"{target}.partial"
+        try:
+            with open(partial, "wb") as out:
+                shutil.copyfileobj(body_reader(data), out, CHUNK_SIZE)
+            os.replace(partial, target)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        return WRITTEN
+
+    def _handles(self) -> tuple:
+        return ()
+
+
+def prune_tree(root: str, keep: set[str]) -> int:
+    """Delete every file under root that is not in keep (normalized paths under the
+    same root, see DirectorySink.members), then the directories left empty; root itself stays.
+    Returns the number of files deleted."""
+    root = os.path.normpath(root)
+    removed = 0
+    for dir_path, _dirs, files in os.walk(root, topdown=False):
+        for name in files:
+            path = os.path.join(dir_path, name)
+            if path not in keep:
+                log.debug("Pruning file no longer exported: %s", path)
+                os.remove(path)
+                removed += 1
+        if dir_path != root and not os.listdir(dir_path):
+            os.rmdir(dir_path)
+    return removed
@@ -0,0 +1,141 @@
+"""Large fetched bodies kept in a temp file instead of memory (spool_threshold).
+
+A fetched export or image is normally read whole into bytes, handed to the archive
+writer and copied into the archive from there. A 300 MB book PDF then sits in memory
+whole until the writer is done with it, and export_workers of them can at once.
+
+With spool_threshold set, those downloads are streamed (stream=True, iter_content)
+in chunks. A body larger than the threshold is written to an anonymous temp file
+(a Spool) as it arrives, and the writer thread copies it from there into the
+archive, chunk by chunk. A body with Content-Length above the threshold goes
+straight to the file. A body without Content-Length is buffered up to the
+threshold and rolls over to a file when it outgrows it. Memory per worker stays
+near the threshold however large the document is.
+
+Bodies are spooled rather than piped from the socket into the archive: the single
+writer thread would otherwise wait on the network, and every other worker's member
+with it.
+
+A Spool travels through the sink like bytes (body_size, body_digest, body_reader)
+and is closed, deleting its file, once the writer is done with it.
+"""
+import hashlib
+import tempfile
+from io import BytesIO
+from typing import BinaryIO, Iterator
+
+from bookstack_file_exporter.archiver.budget import ByteBudget, announced_size, fetch
+from bookstack_file_exporter.common.util import HttpHelper
+
+# read size for network streams and file copies
+CHUNK_SIZE = 1024 * 1024
+
+
+class Spool:
+    """
+    Spool is a fetched body in an anonymous temp file, deleted on close.
+
+    Returns:
+        Spool instance to write the body into, then read back with reader().
+    """
+    def __init__(self):
+        # pylint: disable=consider-using-with
+        self._file = tempfile.TemporaryFile(prefix="bookstack-spool-")
+        self.size = 0
+
+    def write(self, chunk: bytes):
+        """Append a chunk of the body."""
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def reader(self) -> BinaryIO:
+        """The file, rewound to the start of the body."""
+        self._file.seek(0)
+        return self._file
+
+    def close(self):
+        """Close and delete the file (idempotent)."""
+        self._file.close()
+
+
+def body_size(body: bytes | Spool) -> int:
+    """Length of a member body in bytes."""
+    return body.size if isinstance(body, Spool) else len(body)
+
+
+def body_reader(body: bytes | Spool) -> BinaryIO:
+    """A file object positioned at the start of the body."""
+    return body.reader() if isinstance(body, Spool) else BytesIO(body)
+
+
+def body_digest(body: bytes | Spool) -> bytes:
+    """SHA-256 digest of a member body, read in chunks when spooled."""
+    if not isinstance(body, Spool):
+        return hashlib.sha256(body).digest()
+    digest = hashlib.sha256()
+    reader = body.reader()
+    for chunk in iter(lambda: reader.read(CHUNK_SIZE), b""):
+        digest.update(chunk)
+    return digest.digest()
+
+
+def close_body(body: bytes | Spool):
+    """Release a body's temp file, if it has one."""
+    if isinstance(body, Spool):
+        body.close()
+
+
+def _spool(head: bytes, chunks: Iterator[bytes]) -> Spool:
+    """Spool head and the rest of chunks into a temp file."""
+    spool = Spool()
+    try:
+        spool.write(head)
+        for chunk in chunks:
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+def _read(chunks: Iterator[bytes], threshold: int) -> bytes | Spool:
+    """The body as bytes, or a Spool once it outgrows threshold."""
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        if len(buffer) > threshold:
+            return _spool(bytes(buffer), chunks)
+    return bytes(buffer)
+
+
+def fetch_body(http_client: HttpHelper, url: str, budget: ByteBudget | None,
+               threshold: int | None) -> bytes | Spool:
+    """GET url's body: bytes up to threshold, a Spool above it.
+
+    threshold None reads the whole body into bytes (budget.fetch). Only bytes count
+    against the budget; a spooled body holds none of it.
+    """
+    if threshold is None:
+        return fetch(http_client, url, budget).content
+    if budget is not None:
+        # as in fetch(): anything still held was dropped unwritten
+        budget.release(budget.hand_off())
+    response = http_client.http_get_request(url, stream=True)
+    try:
+        expected = announced_size(response)
+        chunks = response.iter_content(CHUNK_SIZE)
+        if expected > threshold:
+            return _spool(b"", chunks)
+        if budget is not None:
+            budget.reserve(expected)
+        try:
+            body = _read(chunks, threshold)
+        except BaseException:
+            if budget is not None:
+                budget.settle(expected, 0)
+            raise
+        if budget is not None:
+            budget.settle(expected, len(body) if isinstance(body, bytes) else 0)
+        return body
+    finally:
+        response.close()
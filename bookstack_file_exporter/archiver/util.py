@@ -1,43 +1,24 @@
 import json
 import os
 import logging
-import tarfile
-import threading
 import shutil
-from io import BytesIO
-import gzip
 import glob
+import tarfile
 from pathlib import Path
 
+from bookstack_file_exporter.archiver import codecs
+from bookstack_file_exporter.archiver.budget import ByteBudget
+from bookstack_file_exporter.archiver.spool import Spool, fetch_body
 from bookstack_file_exporter.common.util import HttpHelper
 
 log = logging.getLogger(__name__)
 
-# Serializes tar appends across threads. write_tar opens the archive in append
-# mode ("a") per call; two concurrent opens both seek to EOF and corrupt it.
-# The lock lives HERE (inside the writer) so single-writer safety is structural,
-# not a convention every caller must remember. Used by the export_workers pool.
-# threading.Lock is a plain non-reentrant mutex; `with _tar_write_lock:` acquires
-# on entry and releases on block exit (even if the body raises) — so only one
-# thread is ever inside the append below at a time.
-_tar_write_lock = threading.Lock()
-
-def get_byte_response(url: str, http_client: HttpHelper) -> bytes:
-    """get byte response from http request"""
-    response = http_client.http_get_request(url=url)
-    return response.content
-
-# append to a tar file instead of creating files locally and then tar'ing after
-def write_tar(base_tar_dir: str, file_path: str, data: bytes):
-    """append byte data to tar file (thread-safe via _tar_write_lock)"""
-    with _tar_write_lock:
-        with tarfile.open(base_tar_dir, "a") as tar:
-            data_obj = BytesIO(data)
-            tar_info = tarfile.TarInfo(name=file_path)
-            tar_info.size = data_obj.getbuffer().nbytes
-            log.debug("Adding file: %s with size: %d bytes to tar file",
-                      tar_info.name, tar_info.size)
-            tar.addfile(tar_info, fileobj=data_obj)
+def get_byte_response(url: str, http_client: HttpHelper,
+                      budget: ByteBudget | None = None,
+                      spool_threshold: int | None = None) -> bytes | Spool:
+    """get byte response from http request, reserving its size in budget if given;
+    with spool_threshold, a larger body is streamed into a Spool instead"""
+    return fetch_body(http_client, url, budget, spool_threshold)
 
 def get_json_bytes(data: dict[str, str | int]) -> bytes:
     """dump dict to json file"""
@@ -48,18 +29,45 @@ def remove_file(file_path: str):
     """remove a file"""
     os.remove(file_path)
 
-def create_gzip(file_path: str, gzip_file: str, remove_old: bool = True):
-    """create a gzip of an existing file/dir and remove it"""
+def compress_file(file_path: str, out_file: str,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                  codec: str = codecs.DEFAULT_CODEC, level: int | None = None,
+                  threads: int | None = None, remove_old: bool = True,
+                  restart_interval: int | None = None) -> list[tuple[int, int]] | None:
+    """compress an existing file with the given codec and remove it; return the
+    writer's seek-index restart points (None unless restart_interval is set)"""
     with open(file_path, 'rb') as f_in:
-        with gzip.open(gzip_file, 'wb') as f_out:
+        with codecs.open_writer(out_file, codec, level, threads, restart_interval) as f_out:
             shutil.copyfileobj(f_in, f_out)
     if remove_old:
         remove_file(file_path)
+    return f_out.restart_points
+
+def archive_tree(tree_dir: str, out_file: str, arcname: str,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                 codec: str = codecs.DEFAULT_CODEC, level: int | None = None,
+                 threads: int | None = None, key: bytes | None = None):
+    """pack a directory tree into a compressed (and, with key, encrypted) tar, rooted
+    at arcname"""
+    def _skip_partials(info: tarfile.TarInfo):
+        return None if info.name.endswith(codecs.PARTIAL_SUFFIX) else info
+    with codecs.open_writer(out_file, codec, level, threads, key=key) as f_out:
+        with tarfile.open(fileobj=f_out, mode="w|") as tar:
+            tar.add(tree_dir, arcname=arcname, filter=_skip_partials)
+
+def write_file_atomic(path: str, data: bytes):
+    """write data to path via a .partial and a rename, so readers never see a torn file"""
+    partial = f"{path}{codecs.PARTIAL_SUFFIX}"
+    with open(partial, "wb") as out:
+        out.write(data)
+    os.rename(partial, path)
 
-def scan_archives(base_dir: str, extension: str) -> str:
-    """scan export directory for archives"""
-    file_pattern = f"{base_dir}_*{extension}"
-    return glob.glob(file_pattern)
+def scan_archives(base_dir: str, extension: str | tuple[str, ...]) -> list[str]:
+    """scan export directory for archives with any of the given extension(s)"""
+    extensions = (extension,) if isinstance(extension, str) else extension
+    found = []
+    for ext in extensions:
+        found.extend(glob.glob(f"{base_dir}_*{ext}"))
+    # dedupe (order-preserving) in case a caller passes overlapping extensions
+    return list(dict.fromkeys(found))
 
 def create_dir(dir_path: str):
     """create a directory if not exists"""
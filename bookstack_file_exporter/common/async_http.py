@@ -0,0 +1,364 @@
+"""Asyncio HTTP transport for the opt-in asyncio export engine (engine: asyncio).
+
+The threaded engine spends one OS thread per in-flight request on the shared
+requests.Session, which gets costly past a few dozen workers. The asyncio engine runs
+discovery, export renders and asset downloads as tasks on one event loop instead, over
+an httpx.AsyncClient that behaves like HttpHelper: same headers, timeout, TLS
+verification, HTTP/2 option, retry codes and backoff (Retry-After honored), no cookies, and the same
+exceptions (requests' HTTPError / RetryError / ConnectionError) so callers keep one
+set of except clauses.
+
+Every request takes a slot of one semaphore, export_workers wide, so the API sees at
+most that many concurrent requests however many tasks are alive. Callers that buffer
+the body can hold the slot (slot() + request()) until the body is handed on, which
+bounds buffered bodies by the same number.
+
+The client lives on a private event loop in a background thread, so the sync
+pipeline drives coroutines with run() and one client (and its connection pool) serves
+the whole run.
+
+Needs httpx (`pip install 'bookstack-file-exporter[async]'`).
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import importlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import TYPE_CHECKING, Any, Awaitable, Coroutine, Mapping, TypeVar
+
+# pylint: disable=import-error
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import HTTPError, RetryError
+from urllib3.util.retry import Retry
+
+from bookstack_file_exporter.common.pagination import PageWalk, add_page, page_url
+from bookstack_file_exporter.common.rate_limit import RateLimiter
+from bookstack_file_exporter.common.concurrency import AdaptiveConcurrency
+from bookstack_file_exporter.common.http_cache import HttpCache
+from bookstack_file_exporter.common.http_metrics import HttpMetrics
+from bookstack_file_exporter.common.run_guard import RunGuard
+from bookstack_file_exporter.common.single_flight import AsyncSingleFlight
+
+if TYPE_CHECKING:
+    from bookstack_file_exporter.config_helper.models import HttpConfig
+
+T = TypeVar("T")
+
+log = logging.getLogger(__name__)
+
+_MODULE = "httpx"
+
+
+@dataclass
+class AsyncResponse:
+    """Buffered response: the parts of requests.Response the export code reads."""
+    url: str
+    status_code: int
+    headers: Mapping[str, str]
+    content: bytes
+
+    def json(self) -> Any:
+        """Decode the body as JSON."""
+        return json.loads(self.content)
+
+
+async def gather_all(aws: list[Awaitable[T]]) -> list[T]:
+    """asyncio.gather that cancels the remaining awaitables when one fails, so a
+    failed node or discovery level does not leave its siblings running on the loop."""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+# pylint: disable=too-many-instance-attributes
+class AsyncHttpHelper:
+    """
+    AsyncHttpHelper provides HttpHelper's GET behavior over an asyncio client.
+
+    Args:
+        :headers: <dict[str, str]> = all headers to use for http requests
+        :config: <HttpConfig> = Configuration with user inputs for http requests
+        :concurrency: <int> = requests in flight at once (export_workers)
+        :client_factory: optional callable returning the async client; None => httpx
+        :rate_limiter: optional RateLimiter shared with HttpHelper; None => unpaced
+        :adaptive: optional AdaptiveConcurrency shared with HttpHelper; its limit caps
+            the slots in use below concurrency. None => all concurrency slots
+        :cache: optional HttpCache shared with HttpHelper; None => no response cache
+        :metrics: optional HttpMetrics shared with HttpHelper; None => a new one
+        :guard: optional RunGuard shared with HttpHelper; None => no deadline or breaker
+
+    Returns:
+        AsyncHttpHelper instance; close() it when the run is over, or start_run() it
+        to reuse it for the next one.
+    """
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def __init__(self, headers: dict[str, str], config: HttpConfig,
+                 concurrency: int = 1, client_factory=None,
+                 rate_limiter: RateLimiter | None = None,
+                 adaptive: AdaptiveConcurrency | None = None,
+                 cache: HttpCache | None = None, metrics: HttpMetrics | None = None,
+                 guard: RunGuard | None = None):
+        self.backoff_factor = config.backoff_factor
+        self.retry_codes = set(config.retry_codes)
+        self.retry_count = config.retry_count
+        self.http_timeout = config.timeout
+        self.verify_ssl = config.verify_ssl
+        self.http2 = config.http2
+        self.concurrency = concurrency
+        self._headers = headers
+        self.rate_limiter = rate_limiter
+        self.adaptive = adaptive
+        self.cache = cache
+        self.metrics = metrics if metrics is not None else HttpMetrics()
+        self.guard = guard
+        # concurrent get_json calls for one URL share a request
+        self.single_flight = AsyncSingleFlight()
+        self._client_factory = client_factory or self._build_client
+        self._client = None
+        # connection-level failures worth a retry; httpx's once its client is built
+        self._retry_errors: tuple[type[BaseException], ...] = (OSError,)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._adaptive_cond: asyncio.Condition | None = None
+        # requests sent (retries included) and the most in flight at once
+        self.requests = 0
+        self.peak_in_flight = 0
+        self._in_flight = 0
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever,
+                                        name="async-http", daemon=True)
+        self._thread.start()
+
+    def _build_client(self):
+        httpx = importlib.import_module(_MODULE)
+        self._retry_errors = (httpx.TransportError,)
+        # API token auth is stateless; echoing BookStack's session cookie back makes it
+        # answer with intermittent 403s (see HttpHelper._build_session)
+        cookies = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+        limits = httpx.Limits(max_connections=self.concurrency,
+                              max_keepalive_connections=self.concurrency)
+        return httpx.AsyncClient(headers=self._headers, verify=self.verify_ssl,
+                                 timeout=self.http_timeout, limits=limits,
+                                 cookies=cookies, follow_redirects=True, http2=self.http2)
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Run coro on the helper's loop and wait for its result.
+
+        If the waiting thread is interrupted (one-shot mode raises KeyboardInterrupt
+        from its signal handler), the coroutine is cancelled before re-raising.
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """Hold one of the concurrency slots (one of adaptive.limit, if set)."""
+        async with self._semaphore:
+            if self.adaptive is not None:
+                if self._adaptive_cond is None:
+                    self._adaptive_cond = asyncio.Condition()
+                async with self._adaptive_cond:
+                    await self._adaptive_cond.wait_for(
+                        lambda: self._in_flight < self.adaptive.limit)
+            self._in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+            try:
+                yield
+            finally:
+                self._in_flight -= 1
+                if self._adaptive_cond is not None:
+                    async with self._adaptive_cond:
+                        self._adaptive_cond.notify_all()
+
+    async def get(self, url: str) -> AsyncResponse:
+        """GET url within a slot of its own."""
+        async with self.slot():
+            return await self.request(url)
+
+    async def request(self, url: str,
+                      headers: Mapping[str, str] | None = None) -> AsyncResponse:
+        """GET url with retries; the caller must hold a slot. headers are sent on top
+        of the client's own.
+
+        Raises requests' RetryError once retry_codes responses exhaust retry_count,
+        ConnectionError once connection failures do, and HTTPError on any other
+        status of 400 or above.
+        """
+        if self.guard is not None:
+            self.guard.check(url)
+        if self._client is None:
+            self._client = self._client_factory()
+        start = time.perf_counter()
+        try:
+            response = await self._attempts(url, headers)
+        except Exception:
+            self.metrics.observe(url, time.perf_counter() - start, None, 0)
+            raise
+        self.metrics.observe(url, time.perf_counter() - start, response.status_code,
+                             len(response.content))
+        if response.status_code >= 400:
+            log.error("Bookstack request failed with status code: %d on url: %s",
+                      response.status_code, url)
+            raise HTTPError(f"{response.status_code} error for url: {url}")
+        return AsyncResponse(url, response.status_code, response.headers, response.content)
+
+    async def _attempts(self, url: str, headers: Mapping[str, str] | None):
+        """Send until a response outside retry_codes, retrying with backoff; each
+        retried or exhausting attempt is counted in metrics and by the run guard."""
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                response = await self._send(url, headers)
+            except self._retry_errors as err:
+                retry = self._may_retry(attempt)
+                self.metrics.attempt(url, None, retry)
+                if not retry:
+                    log.error("Failed to make request for %s", url)
+                    raise RequestsConnectionError(f"{err} for url: {url}") from err
+            else:
+                if response.status_code not in self.retry_codes:
+                    if self.guard is not None:
+                        self.guard.record(response.status_code < 500)
+                    return response
+                retry = self._may_retry(attempt)
+                self.metrics.attempt(url, response.status_code, retry)
+                if not retry:
+                    log.error("Bookstack request failed with status code: %d on url: %s",
+                              response.status_code, url)
+                    raise RetryError(f"too many {response.status_code} error responses "
+                                     f"for url: {url}")
+                if response.status_code in Retry.RETRY_AFTER_STATUS_CODES:
+                    retry_after = _retry_after_seconds(response.headers)
+            attempt += 1
+            await asyncio.sleep(self._backoff(attempt) if retry_after is None
+                                else retry_after)
+
+    async def _send(self, url: str, headers: Mapping[str, str] | None):
+        """One GET attempt: paced by the rate limiter, reported to adaptive."""
+        if self.rate_limiter is not None:
+            await asyncio.sleep(self.rate_limiter.reserve())
+        self.requests += 1
+        ticket = self.adaptive.start() if self.adaptive is not None else None
+        try:
+            response = await self._client.get(url, headers=headers)
+        except self._retry_errors:
+            if ticket is not None:
+                self.adaptive.finish(ticket, None)
+            raise
+        if ticket is not None:
+            self.adaptive.finish(ticket, response.status_code)
+        if self.rate_limiter is not None:
+            self.rate_limiter.observe(response.status_code, response.headers)
+        return response
+
+    async def get_json(self, url: str, updated_at: str | None = None, stop=None) -> Any:
+        """GET a detail endpoint's JSON within a slot, through the response cache
+        like HttpHelper.http_get_json; a cache hit takes no slot. Concurrent calls for
+        the same url share one request and one parsed result.
+
+        Returns None, without a request, when stop (a threading.Event) is set by the
+        time the slot is free."""
+        return await self.single_flight.do(url, lambda: self._get_json(url, updated_at, stop))
+
+    async def _get_json(self, url: str, updated_at: str | None, stop) -> Any:
+        entry = None
+        if self.cache is not None:
+            entry = self.cache.lookup(url, updated_at)
+            if entry is not None and entry.fresh:
+                return json.loads(entry.body)
+        async with self.slot():
+            if stop is not None and stop.is_set():
+                return None
+            response = await self.request(url, headers=entry.validators if entry else None)
+        if self.cache is None:
+            return response.json()
+        return json.loads(self.cache.store(url, updated_at, response, entry))
+
+    def _may_retry(self, attempt: int) -> bool:
+        """Whether a failed attempt is retried: retries left and the guard not tripped.
+        The failure is counted by the guard first."""
+        if self.guard is not None:
+            self.guard.record(False)
+            if self.guard.tripped:
+                return False
+        return attempt < self.retry_count
+
+    def _backoff(self, attempt: int) -> float:
+        """urllib3's schedule: no wait before the first retry, then
+        backoff_factor * 2 ** (attempt - 1), capped like urllib3."""
+        if attempt <= 1:
+            return 0.0
+        return min(Retry.DEFAULT_BACKOFF_MAX, self.backoff_factor * 2 ** (attempt - 1))
+
+    async def get_all(self, url: str, count: int = 500) -> list[dict]:
+        """fetch all items from a paginated bookstack list endpoint
+
+        Same walk as HttpHelper.http_get_all: in turn for one slot, otherwise the
+        first page's total and then concurrent waves, reassembled in offset order.
+        """
+        if self.concurrency == 1:
+            all_data: list[dict] = []
+            offset = 0
+            while add_page(all_data, (await self.get(page_url(url, count, offset))).json()):
+                offset += count
+            return all_data
+        walk = PageWalk(await self._get_page(url, count, 0), self.concurrency)
+        wave = walk.next_wave()
+        while wave is not None:
+            size, offsets = wave
+            # gather() returns in argument (offset) order
+            walk.add_wave(await gather_all([self._get_page(url, size, off)
+                                            for off in offsets]))
+            wave = walk.next_wave()
+        return walk.items
+
+    async def _get_page(self, url: str, count: int, offset: int) -> tuple[dict, float, int]:
+        """One page's body with the seconds it took and its size in bytes."""
+        start = time.perf_counter()
+        response = await self.get(page_url(url, count, offset))
+        return response.json(), time.perf_counter() - start, len(response.content)
+
+    def start_run(self, metrics: HttpMetrics, guard: RunGuard | None,
+                  adaptive: AdaptiveConcurrency | None):
+        """Reset the helper for another run, sharing HttpHelper's per-run objects
+        after its start_run(). The loop and the client's connections stay;
+        coalescing and the request counters start over."""
+        self.metrics = metrics
+        self.guard = guard
+        self.adaptive = adaptive
+        self.single_flight = AsyncSingleFlight()
+        self.requests = 0
+        self.peak_in_flight = 0
+
+    def close(self):
+        """Close the client and stop the loop thread (idempotent)."""
+        if self._loop.is_closed():
+            return
+        if self._client is not None:
+            self.run(self._client.aclose())
+            self._client = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+def _retry_after_seconds(headers: Mapping[str, str]) -> float | None:
+    """Retry-After in seconds (delta form only), or None."""
+    try:
+        return max(float(headers.get("Retry-After", "")), 0.0)
+    except ValueError:
+        return None
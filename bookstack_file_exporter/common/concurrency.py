@@ -0,0 +1,164 @@
+"""Adaptive request concurrency (adaptive_workers).
+
+A fixed export_workers is tuned for one load: too timid when BookStack is idle at
+night, too aggressive while people are editing. With adaptive_workers the
+export_workers threads (or asyncio slots) stay as the ceiling, and
+AdaptiveConcurrency decides how many requests may actually be in flight, the way
+TCP sizes its congestion window (AIMD):
+
+- Every window of completed requests (at least the current limit, so roughly one
+  round trip of all workers) is judged once.
+- No 429/5xx/connection errors or retries, and p95 latency within
+  _STABLE_LATENCY of the baseline: the limit grows by one (additive increase).
+- Any of those errors or retries, or p95 past _CONGESTED_LATENCY of the
+  baseline: the limit halves (multiplicative decrease).
+- Anything in between holds the limit.
+
+The baseline is the lowest p95 seen, drifting up slowly so that a server that
+is slower all afternoon does not read as permanently congested. Only requests
+started under the current limit count toward a window, so the tail of a larger
+limit cannot cause a second decrease.
+
+The thread engine gates every request through acquire()/release(), a streamed
+download until its response is closed, so its body is part of the request; the
+asyncio engine gates its own slots on limit and reports through start()/finish().
+"""
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+log = logging.getLogger(__name__)
+
+# p95 within this factor of the baseline counts as stable (grow)
+_STABLE_LATENCY = 1.5
+# p95 beyond this factor of the baseline counts as congestion (shrink)
+_CONGESTED_LATENCY = 2.0
+# share of each stable window p95 that moves the baseline up
+_BASELINE_DRIFT = 0.1
+# smallest window judged, so one slow request at a low limit is not a verdict
+_MIN_WINDOW = 8
+
+
+@dataclass(frozen=True)
+class Ticket:
+    """A request in flight: the limit generation it started under and its start."""
+    epoch: int
+    started: float
+
+
+def _p95(samples: list[float]) -> float:
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)]
+
+
+# pylint: disable=too-many-instance-attributes
+class AdaptiveConcurrency:
+    """
+    AdaptiveConcurrency is an AIMD limit on requests in flight.
+
+    Args:
+        :ceiling: <int> = most requests in flight (export_workers).
+        :floor: <int> = fewest requests in flight.
+        :clock: optional monotonic clock; None => time.monotonic
+
+    Returns:
+        AdaptiveConcurrency instance shared by the http helpers of one run. Set
+        on_change to be told each new limit (the health endpoint does).
+    """
+    def __init__(self, ceiling: int, floor: int = 1, clock=None):
+        self.ceiling = ceiling
+        self.floor = min(floor, ceiling)
+        self.limit = self.floor
+        self.on_change: Callable[[int], None] | None = None
+        self._clock = clock or time.monotonic
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._epoch = 0
+        self._samples: list[float] = []
+        self._congested = 0
+        self._baseline: float | None = None
+        # limit changes over the run and the highest limit reached
+        self.increases = 0
+        self.decreases = 0
+        self.peak = self.limit
+
+    def acquire(self):
+        """Block until a request may go out under the current limit; start() it once
+        it does go out, and release() it when it is over."""
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, ticket: Ticket | None, status_code: int | None):
+        """End a request taken with acquire(); see finish(). ticket None (never
+        sent) frees the place without a sample."""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+        if ticket is not None:
+            self.finish(ticket, status_code)
+
+    def start(self) -> Ticket:
+        """Note a request going out (the caller does its own gating)."""
+        with self._cond:
+            return Ticket(self._epoch, self._clock())
+
+    def finish(self, ticket: Ticket, status_code: int | None):
+        """Record a finished request; status_code None is a connection failure."""
+        with self._cond:
+            if ticket.epoch != self._epoch:
+                return
+            if status_code is None or status_code == 429 or status_code >= 500:
+                self._congested += 1
+            self._samples.append(self._clock() - ticket.started)
+            if len(self._samples) >= max(self.limit, _MIN_WINDOW):
+                self._judge()
+
+    def congestion(self):
+        """Record a retried request (429/5xx or connection error) under the current
+        limit; it is counted when the window is judged."""
+        with self._cond:
+            self._congested += 1
+
+    def _judge(self):
+        p95 = _p95(self._samples)
+        if self._baseline is None or p95 < self._baseline:
+            self._baseline = p95
+        if self._congested:
+            self._set_limit(max(self.floor, self.limit // 2),
+                            f"{self._congested} throttled or failed requests")
+        elif p95 > self._baseline * _CONGESTED_LATENCY:
+            self._set_limit(max(self.floor, self.limit // 2),
+                            f"p95 latency {p95:.2f}s vs baseline {self._baseline:.2f}s")
+        else:
+            if p95 <= self._baseline * _STABLE_LATENCY and self.limit < self.ceiling:
+                self._set_limit(self.limit + 1, f"p95 latency {p95:.2f}s stable")
+            self._baseline += (p95 - self._baseline) * _BASELINE_DRIFT
+        self._epoch += 1
+        self._samples = []
+        self._congested = 0
+
+    def _set_limit(self, limit: int, reason: str):
+        if limit == self.limit:
+            return
+        if limit > self.limit:
+            self.increases += 1
+            self._cond.notify_all()
+        else:
+            self.decreases += 1
+        log.info("Adaptive concurrency: %d -> %d requests in flight (%s)",
+                 self.limit, limit, reason)
+        self.limit = limit
+        self.peak = max(self.peak, limit)
+        if self.on_change is not None:
+            self.on_change(limit)
+
+    def summary(self) -> str:
+        """One-line account of the run for the log."""
+        return (f"ended at {self.limit} of {self.ceiling} requests in flight "
+                f"(peak {self.peak}); {self.increases} increases, "
+                f"{self.decreases} decreases")
@@ -0,0 +1,37 @@
+"""Optional dependencies: which pip extra a feature needs, and whether it is installed.
+
+The config models check these at load time, so a missing module fails before the
+export rather than after it. Modules are located with importlib.util.find_spec,
+which does not import them, so checking an extra loads neither the optional package
+nor the archive and transport code that uses it.
+"""
+import importlib.util
+
+# pip extra -> the feature that needs it (for the install hint) and the modules it
+# provides; an inner tuple lists alternatives, any one of which will do
+_EXTRAS: dict[str, tuple[str, tuple[tuple[str, ...], ...]]] = {
+    # Python 3.14+ ships compression.zstd; older ones need the zstandard package
+    "zstd": ("compression codec 'zstd'", (("compression.zstd", "zstandard"),)),
+    "lz4": ("compression codec 'lz4'", (("lz4.frame",),)),
+    "encrypt": ("encryption", (("cryptography.hazmat.primitives.ciphers.aead",),)),
+    "async": ("engine 'asyncio'", (("httpx",),)),
+    "http2": ("http_config.http2", (("httpx",), ("h2",))),
+}
+
+
+def installed(module: str) -> bool:
+    """True if module can be found on the path (its parent packages are imported)."""
+    try:
+        return importlib.util.find_spec(module) is not None
+    except ImportError:
+        # a parent package is missing, e.g. lz4 for lz4.frame
+        return False
+
+
+def missing_dependency(extra: str) -> str | None:
+    """Install hint when a module of pip extra `extra` is not installed, else None."""
+    feature, modules = _EXTRAS[extra]
+    if all(any(installed(module) for module in alternatives) for alternatives in modules):
+        return None
+    return (f"{feature} needs an optional dependency: "
+            f"pip install 'bookstack-file-exporter[{extra}]'")
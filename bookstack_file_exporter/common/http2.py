@@ -0,0 +1,173 @@
+"""HTTP/2 transport for HttpHelper (http_config.http2).
+
+Every request goes to one BookStack host. Over HTTP/1.1, requests' connection pool
+opens one TCP+TLS connection per concurrent worker, so export_workers: 32 means 32
+handshakes and 32 connections held open at the load balancer. HTTP/2 multiplexes
+concurrent requests as streams over a few connections instead.
+
+Http2Adapter is a requests transport adapter over an httpx.Client with http2
+enabled. HttpHelper mounts it in place of HTTPAdapter, so the session, headers,
+redirects and every caller stay as they are. Retries keep HttpHelper's PacedRetry
+(backoff, Retry-After, rate limiter and adaptive signals). Failures are raised as
+the same requests exceptions (RetryError, ConnectionError, HTTPError via
+raise_for_status). The first request on a new client is sent alone, so the
+workers' requests after it share its connection instead of each opening one while
+the protocol is still unknown. HTTP/2 is negotiated over TLS (ALPN). A server that does not
+offer it, and any plain http:// host, is served over HTTP/1.1 by the same client.
+
+Needs httpx with h2 (`pip install 'bookstack-file-exporter[http2]'`).
+"""
+from __future__ import annotations
+
+import importlib
+import threading
+from dataclasses import dataclass
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any, Iterator, Mapping
+
+# pylint: disable=import-error
+import requests
+from requests.adapters import BaseAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import RetryError
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+
+@dataclass
+class _RetryView:
+    """What urllib3's Retry reads from a response: status, headers, redirect."""
+    status: int
+    headers: Mapping[str, str]
+
+    def get_redirect_location(self) -> bool:
+        """Redirects are followed by the session, never retried here."""
+        return False
+
+
+class _Raw:
+    """The part of a urllib3 response requests reads a body through: stream(),
+    close() and release_conn(). The body arrives already decoded (gzip etc.) from
+    httpx."""
+    def __init__(self, response):
+        self._response = response
+
+    def stream(self, chunk_size: int, decode_content: bool = True) -> Iterator[bytes]:
+        # pylint: disable=unused-argument
+        """Yield the body in chunks of up to chunk_size bytes."""
+        yield from self._response.iter_bytes(chunk_size)
+
+    def close(self):
+        """Release the stream back to the connection."""
+        self._response.close()
+
+    def release_conn(self):
+        """Called by requests once the body is consumed."""
+        self._response.close()
+
+
+class Http2Adapter(BaseAdapter):  # pylint: disable=too-many-instance-attributes
+    """
+    Http2Adapter sends a requests.Session's requests over one HTTP/2 httpx client.
+
+    Args:
+        :max_retries: <Retry> = retry policy, as for HTTPAdapter (PacedRetry)
+        :max_connections: <int> = connections the client may open; with HTTP/2 each
+            one carries many concurrent requests
+        :verify: <bool> = verify TLS certificates
+        :client_factory: optional callable returning the client; None => httpx
+
+    Returns:
+        Http2Adapter instance to mount on a session; closed with the session.
+    """
+    def __init__(self, max_retries: Retry, max_connections: int, verify: bool,
+                 client_factory=None):
+        super().__init__()
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        self.verify = verify
+        self._client_factory = client_factory or self._build_client
+        self._client = None
+        # connection-level failures worth a retry; httpx's once its client is built
+        self._retry_errors: tuple[type[BaseException], ...] = (OSError,)
+        # until one connection is up, httpx cannot know the server speaks HTTP/2 and
+        # opens a connection per concurrent request; the first request goes alone
+        self._first = threading.Lock()
+        self._connected = False
+
+    def _build_client(self):
+        httpx = importlib.import_module("httpx")
+        self._retry_errors = (httpx.TransportError,)
+        # cookies are blocked like the session's (see HttpHelper._build_session)
+        cookies = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+        limits = httpx.Limits(max_connections=self.max_connections,
+                              max_keepalive_connections=self.max_connections)
+        return httpx.Client(http2=True, verify=self.verify, limits=limits,
+                            cookies=cookies, follow_redirects=False)
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def send(self, request: requests.PreparedRequest, stream: bool = False,
+             timeout: Any = None, verify: Any = True, cert: Any = None,
+             proxies: Any = None) -> requests.Response:
+        """Send request with retries; the body is read by the session unless stream."""
+        if not self._connected:
+            with self._first:
+                if not self._connected:
+                    if self._client is None:
+                        self._client = self._client_factory()
+                    response = self._send(request, timeout)
+                    self._connected = True
+                    return response
+        return self._send(request, timeout)
+
+    def _send(self, request: requests.PreparedRequest, timeout: Any) -> requests.Response:
+        retries = self.max_retries
+        while True:
+            try:
+                response = self._client.send(
+                    self._client.build_request(request.method, request.url,
+                                               headers=dict(request.headers),
+                                               content=request.body, timeout=timeout),
+                    stream=True)
+            except self._retry_errors as err:
+                try:
+                    retries = retries.increment(request.method, request.url, error=err)
+                except MaxRetryError as exhausted:
+                    raise RequestsConnectionError(exhausted, request=request) from err
+                retries.sleep()
+                continue
+            view = _RetryView(response.status_code, response.headers)
+            if not retries.is_retry(request.method, response.status_code,
+                                    "Retry-After" in response.headers):
+                return self._build_response(request, response)
+            try:
+                retries = retries.increment(request.method, request.url, response=view)
+            except MaxRetryError as exhausted:
+                if retries.raise_on_status and isinstance(exhausted.reason, ResponseError):
+                    response.close()
+                    raise RetryError(exhausted, request=request) from exhausted
+                return self._build_response(request, response)
+            response.close()
+            retries.sleep(view)
+
+    @staticmethod
+    def _build_response(request: requests.PreparedRequest, response) -> requests.Response:
+        """requests.Response over an httpx response whose body is not read yet."""
+        built = requests.Response()
+        built.status_code = response.status_code
+        built.headers = CaseInsensitiveDict(response.headers)
+        built.encoding = get_encoding_from_headers(built.headers)
+        built.reason = response.reason_phrase
+        built.url = str(response.url)
+        built.request = request
+        built.raw = _Raw(response)
+        return built
+
+    def close(self):
+        """Close the client and its connections (idempotent)."""
+        with self._first:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+            self._connected = False
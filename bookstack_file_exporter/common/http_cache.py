@@ -0,0 +1,182 @@
+"""On-disk cache of API detail responses (http_config.cache).
+
+Between scheduled runs almost every api/pages/{id} detail (the page's html and
+markdown, the largest discovery responses by far) comes back unchanged. HttpCache
+keeps those bodies in one SQLite file, zlib-compressed, so the next run can serve
+them locally:
+
+- A page is fresh when the updated_at its parent just listed (book or chapter
+  contents, fetched live) matches the one it was stored with. It is served
+  without a request.
+- Any stored entry with an ETag is revalidated with If-None-Match, and a 304 serves
+  the stored body. BookStack itself sends no ETag on API responses, but a caching
+  proxy in front of it may.
+- Containers (shelves, books, chapters) are never trusted on updated_at: theirs does
+  not move when a child is added, moved or renamed, and their detail is the child
+  list discovery walks.
+
+The file is bounded by max_size: the least recently used entries are evicted
+once the stored (compressed) bodies outgrow it. It is a cache only: if it is
+unreadable it is recreated empty and the run fetches everything as usual.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any
+
+log = logging.getLogger(__name__)
+
+# bump when the table layout changes; an older file is recreated empty
+_SCHEMA_VERSION = 1
+# zlib level for stored bodies: JSON compresses well and this is on the fetch path
+_COMPRESS_LEVEL = 6
+
+
+@dataclass
+class CacheEntry:
+    """A stored response body and what validates it."""
+    body: bytes
+    updated_at: str | None
+    etag: str | None
+    # set by HttpCache.lookup when updated_at vouches for the body
+    fresh: bool = False
+
+    @property
+    def validators(self) -> dict[str, str]:
+        """Request headers that ask the server to confirm the body (If-None-Match)."""
+        return {"If-None-Match": self.etag} if self.etag else {}
+
+
+# pylint: disable=too-many-instance-attributes
+class HttpCache:
+    """
+    HttpCache is a size-bounded LRU store of response bodies keyed by URL.
+
+    Args:
+        :path: <str> = SQLite file; created with its directory when missing.
+        :max_size: <int> = most bytes of (compressed) bodies kept.
+
+    Returns:
+        HttpCache instance shared by the http helpers of one run; close() it when
+        the run is over.
+    """
+    def __init__(self, path: str, max_size: int):
+        self.path = path
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._db = self._open()
+        self._size = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        # detail GETs served without a request, confirmed by a 304, and fetched
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def _open(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            return self._connect()
+        except sqlite3.DatabaseError as err:
+            log.warning("HTTP cache %s is unreadable (%s); starting it empty", self.path, err)
+            os.remove(self.path)
+            return self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        # one connection for every worker thread, serialized by _lock; autocommit
+        # (isolation_level None) with WAL keeps each write cheap and durable
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            if db.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+                db.execute("DROP TABLE IF EXISTS entries")
+                db.execute(f"PRAGMA user_version={_SCHEMA_VERSION}")
+            db.execute("CREATE TABLE IF NOT EXISTS entries (url TEXT PRIMARY KEY, "
+                       "updated_at TEXT, etag TEXT, body BLOB NOT NULL, "
+                       "size INTEGER NOT NULL, last_used REAL NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_used)")
+        except sqlite3.DatabaseError:
+            db.close()
+            raise
+        return db
+
+    def lookup(self, url: str, updated_at: str | None) -> CacheEntry | None:
+        """The stored entry for url, or None. fresh is set (and counted as a hit)
+        when updated_at is given and matches the stored one."""
+        with self._lock:
+            row = self._db.execute("SELECT body, updated_at, etag FROM entries "
+                                   "WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            entry = CacheEntry(zlib.decompress(row[0]), row[1], row[2])
+            if updated_at is not None and entry.updated_at == updated_at:
+                entry.fresh = True
+                self.hits += 1
+                self._touch(url, updated_at)
+        return entry
+
+    def store(self, url: str, updated_at: str | None, response: Any,
+              entry: CacheEntry | None) -> bytes:
+        """Body for a response to a lookup() miss: the stored one on a 304 (entry is
+        what lookup returned), else the response's, kept when updated_at or an ETag
+        can validate it later."""
+        with self._lock:
+            if response.status_code == 304 and entry is not None:
+                self.revalidated += 1
+                self._touch(url, updated_at or entry.updated_at)
+                return entry.body
+            self.misses += 1
+            etag = response.headers.get("ETag")
+            if updated_at is None and not etag:
+                return response.content
+            blob = zlib.compress(response.content, _COMPRESS_LEVEL)
+            old = self._db.execute("SELECT size FROM entries WHERE url = ?",
+                                   (url,)).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                             (url, updated_at, etag, blob, len(blob), time.time()))
+            self._size += len(blob) - (old[0] if old else 0)
+            if self._size > self.max_size:
+                self._evict()
+        return response.content
+
+    def _touch(self, url: str, updated_at: str | None):
+        self._db.execute("UPDATE entries SET last_used = ?, updated_at = ? WHERE url = ?",
+                         (time.time(), updated_at, url))
+
+    def _evict(self):
+        """Drop least recently used entries until the bodies fit in max_size."""
+        rows = self._db.execute("SELECT url, size FROM entries "
+                                "ORDER BY last_used").fetchall()
+        doomed = []
+        for url, size in rows:
+            if self._size <= self.max_size:
+                break
+            doomed.append((url,))
+            self._size -= size
+        self._db.executemany("DELETE FROM entries WHERE url = ?", doomed)
+        self.evicted += len(doomed)
+
+    def reset_counts(self):
+        """Zero the counts reported by summary(); the stored responses are kept."""
+        with self._lock:
+            self.hits = self.revalidated = self.misses = self.evicted = 0
+
+    def summary(self) -> str:
+        """One-line account of the run for the log."""
+        return (f"{self.hits} served from cache, {self.revalidated} revalidated, "
+                f"{self.misses} fetched, {self.evicted} evicted; "
+                f"{self._size} of {self.max_size} bytes used")
+
+    def close(self):
+        """Close the database (idempotent)."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
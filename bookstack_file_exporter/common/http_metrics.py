@@ -0,0 +1,173 @@
+"""Per-endpoint request metrics for HttpHelper and the asyncio engine.
+
+A slow run can be slow in discovery (list and detail JSON), in export renders
+(BookStack renders a PDF before it sends the first byte) or in asset downloads.
+HttpMetrics sorts every request into a resource class by its URL and keeps, per
+class, the requests made, a latency histogram, response bytes, retries and the
+status codes seen:
+
+    list:<resource>     a page of a paginated list (/api/books?count=..&offset=..)
+    detail:<resource>   one shelf, book, chapter, page or image's JSON
+    export:<format>     a page, chapter or book export (pdf, html, markdown, ...)
+    attachment          an attachment, its content included (/api/attachments/<id>)
+    image               an image file, fetched from its own URL outside /api/
+    other               anything else under /api/
+
+Latency runs from the first attempt to the response being handed back, retries
+and their backoff included. That is the whole body for a buffered request and the
+headers for a streamed one (stream=True); a streamed body's bytes are taken from
+its Content-Length. Statuses count every attempt, retried ones included, and
+"error" the attempts that got no response (connection failures, timeouts).
+Responses served from the response cache, or shared with a request already in
+flight, send nothing and are not counted.
+
+The run logs summary_lines() at the end; snapshot() has the same numbers as a
+JSON-ready dict (the health endpoint's "requests").
+"""
+import math
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+# upper bounds in seconds of the latency histogram buckets; the last is open-ended
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+
+
+def endpoint_class(url: str) -> str:
+    """Resource class of a request URL (or path), as listed in the module docstring."""
+    parts = [part for part in urlsplit(url).path.split("/") if part]
+    if "api" not in parts:
+        return "image"
+    rest = parts[parts.index("api") + 1:]
+    if len(rest) == 1:
+        return f"list:{rest[0]}"
+    if len(rest) == 2:
+        return "attachment" if rest[0] == "attachments" else f"detail:{rest[0]}"
+    if len(rest) == 4 and rest[2] == "export":
+        return f"export:{rest[3]}"
+    return "other"
+
+
+def response_bytes(response, stream: bool) -> int:
+    """Body size of a response: its length once read, or while it is still streamed
+    its Content-Length (0 when absent or malformed)."""
+    if not stream:
+        return len(response.content)
+    try:
+        return max(int(response.headers.get("Content-Length", 0)), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _bucket_label(bound: float) -> str:
+    return "+Inf" if math.isinf(bound) else f"{bound:g}"
+
+
+@dataclass
+class EndpointStats:  # pylint: disable=too-many-instance-attributes
+    """Counters of one resource class."""
+    requests: int = 0
+    failures: int = 0
+    retries: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    buckets: list[int] = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS))
+    statuses: Counter = field(default_factory=Counter)
+
+    def quantile(self, q: float) -> float:
+        """Latency below which q of the requests finished: the upper bound of the
+        bucket holding that request, or the slowest request if it is lower."""
+        if not self.requests:
+            return 0.0
+        rank = max(1, math.ceil(q * self.requests))
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_seconds)
+        return self.max_seconds
+
+    def to_dict(self) -> dict:
+        """JSON-ready copy of the counters."""
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "retries": self.retries,
+            "bytes": self.bytes,
+            "seconds": round(self.seconds, 3),
+            "p50_seconds": round(self.quantile(0.5), 3),
+            "p95_seconds": round(self.quantile(0.95), 3),
+            "max_seconds": round(self.max_seconds, 3),
+            "latency_buckets": {_bucket_label(bound): count
+                                for bound, count in zip(LATENCY_BUCKETS, self.buckets)},
+            "statuses": dict(sorted(self.statuses.items())),
+        }
+
+
+class HttpMetrics:
+    """
+    HttpMetrics collects request counts, latency, bytes, retries and statuses per
+    resource class; thread-safe.
+
+    Returns:
+        HttpMetrics instance shared by every worker of a run (and the asyncio engine).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[str, EndpointStats] = {}
+
+    def _for(self, url: str) -> EndpointStats:
+        key = endpoint_class(url)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = EndpointStats()
+        return stats
+
+    def observe(self, url: str, seconds: float, status: int | None, size: int):
+        """One request as its caller saw it. status is the final response's, or None
+        when the request raised without one (its attempts are counted by attempt())."""
+        with self._lock:
+            stats = self._for(url)
+            stats.requests += 1
+            stats.bytes += size
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.buckets[next(i for i, bound in enumerate(LATENCY_BUCKETS)
+                               if seconds <= bound)] += 1
+            if status is not None:
+                stats.statuses[str(status)] += 1
+            if status is None or status >= 400:
+                stats.failures += 1
+
+    def attempt(self, url: str, status: int | None, retried: bool):
+        """An attempt the retry policy acted on: a retry_codes response, or a failure
+        without one (status None). retried is False when it exhausted the retries."""
+        with self._lock:
+            stats = self._for(url)
+            stats.statuses["error" if status is None else str(status)] += 1
+            if retried:
+                stats.retries += 1
+
+    def connection_errors(self) -> int:
+        """Attempts that got no response, across every resource class."""
+        with self._lock:
+            return sum(stats.statuses["error"] for stats in self._stats.values())
+
+    def snapshot(self) -> dict[str, dict]:
+        """Counters per resource class, JSON-ready, in class order."""
+        with self._lock:
+            return {key: self._stats[key].to_dict() for key in sorted(self._stats)}
+
+    def summary_lines(self) -> list[str]:
+        """One line per resource class for the run log, most total time first."""
+        with self._lock:
+            ranked = sorted(self._stats.items(), key=lambda item: -item[1].seconds)
+            return [f"{key}: {stats.requests} requests, {stats.bytes} bytes, "
+                    f"{stats.seconds:.2f}s total (p50 {stats.quantile(0.5):.2f}s, "
+                    f"p95 {stats.quantile(0.95):.2f}s, max {stats.max_seconds:.2f}s); "
+                    f"{stats.retries} retries, {stats.failures} failed; statuses "
+                    + (", ".join(f"{code} x{count}" for code, count
+                                 in sorted(stats.statuses.items())) or "none")
+                    for key, stats in ranked]
@@ -0,0 +1,95 @@
+"""Offset pagination of BookStack list endpoints (`?count=&offset=`), shared by the
+thread and asyncio HTTP helpers. No I/O: callers fetch each page themselves.
+
+With several workers the pages after the first are fetched concurrently, one wave
+of up to `workers` pages at a time. The first page tells the total; each wave's
+page size is then chosen from the pages seen so far (PageWalk):
+- never above the first page's length, which is the server's own cap
+  (BookStack's API_MAX_ITEM_COUNT) whatever count was asked for;
+- small enough that a page comes back in about _TARGET_PAGE_SECONDS and stays
+  under _TARGET_PAGE_BYTES, so one slow or heavy page does not hold up a wave;
+- small enough that the items left spread over every worker;
+- at least _MIN_PAGE items, since each page costs a round trip.
+"""
+import math
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+# a page should come back in about this long...
+_TARGET_PAGE_SECONDS = 2.0
+# ...and carry no more than this
+_TARGET_PAGE_BYTES = 4 * 1024 * 1024
+# smallest page worth its own round trip
+_MIN_PAGE = 50
+
+
+def page_url(url: str, count: int, offset: int) -> str:
+    """url with its count/offset query parameters set to one page."""
+    parsed = urlparse(url)
+    query = [(k, v) for k, v in parse_qsl(parsed.query) if k not in ('count', 'offset')]
+    query += [('count', count), ('offset', offset)]
+    return urlunparse(parsed._replace(query=urlencode(query)))
+
+
+def add_page(all_data: list[dict], body: dict) -> bool:
+    """Append one page's items to all_data; True while more pages remain."""
+    batch = body.get('data', [])
+    all_data.extend(batch)
+    return bool(batch) and len(all_data) < body.get('total', 0)
+
+
+class PageWalk:  # pylint: disable=too-many-instance-attributes
+    """
+    PageWalk plans the concurrent waves of one list walk, given the first page.
+
+    Args:
+        :first: <tuple[dict, float, int]> = first page's body, seconds and bytes.
+        :workers: <int> = pages fetched at once.
+
+    Returns:
+        PageWalk; fetch each next_wave() and hand the pages, in offset order, to
+        add_wave() until next_wave() returns None. items holds the result.
+    """
+    def __init__(self, first: tuple[dict, float, int], workers: int):
+        body, seconds, nbytes = first
+        self.items: list[dict] = list(body.get('data', []))
+        self.total = body.get('total', 0)
+        self.workers = workers
+        # the server's page cap, and the running per-item cost of the pages so far
+        self._max_size = max(len(self.items), 1)
+        self._fetched = len(self.items)
+        self._seconds = seconds
+        self._nbytes = nbytes
+        self._offset = len(self.items)
+        self._size = self._max_size
+        self._done = not self.items
+
+    def page_size(self) -> int:
+        """Items per page for the next wave."""
+        size = self._max_size
+        if self._seconds > 0:
+            size = min(size, int(_TARGET_PAGE_SECONDS * self._fetched / self._seconds))
+        if self._nbytes > 0:
+            size = min(size, int(_TARGET_PAGE_BYTES * self._fetched / self._nbytes))
+        size = min(size, math.ceil((self.total - self._offset) / self.workers))
+        return max(size, min(_MIN_PAGE, self._max_size))
+
+    def next_wave(self) -> tuple[int, list[int]] | None:
+        """(page size, offsets) of the next wave of up to workers pages; None when
+        the walk is over."""
+        if self._done or self._offset >= self.total:
+            return None
+        self._size = self.page_size()
+        return self._size, list(range(self._offset, self.total, self._size))[:self.workers]
+
+    def add_wave(self, pages: list[tuple[dict, float, int]]):
+        """Take a wave's pages (body, seconds, bytes), in offset order."""
+        batch: list[dict] = []
+        for body, seconds, nbytes in pages:
+            batch = body.get('data', [])
+            self.items.extend(batch)
+            self._fetched += len(batch)
+            self._seconds += seconds
+            self._nbytes += nbytes
+        # an empty last page: the list shrank while paging, nothing past this point
+        self._done = not batch
+        self._offset += len(pages) * self._size
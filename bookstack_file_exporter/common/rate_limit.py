@@ -0,0 +1,144 @@
+"""Client-side request pacing (http_config.requests_per_min).
+
+BookStack throttles API requests per user per minute (API_REQUESTS_PER_MIN) and
+answers with 429 once the window is spent. With several export workers the
+exporter reaches that ceiling quickly, and urllib3's Retry then backs every worker
+off on its own schedule: the workers retry in waves, trip the limit again and wait
+longer each time.
+
+RateLimiter is one token bucket shared by every request of a run, so the export
+workers together send at most requests_per_min. It refills continuously and
+holds at most one second's worth of tokens, which spreads requests evenly across
+the minute instead of spending the window in one burst.
+
+The bucket follows the server as it goes:
+- Retry-After (429/503) pauses every request until it has passed.
+- X-RateLimit-Limit below the configured rate lowers the rate to it.
+- X-RateLimit-Remaining caps the tokens left, and when it reaches 0,
+  X-RateLimit-Reset (epoch or seconds) pauses until the window resets.
+
+Tokens are reserved rather than waited for, so one bucket serves the thread
+engine (time.sleep) and the asyncio engine (asyncio.sleep) alike: reserve() takes
+the next token, even one that is not there yet, and returns how long to wait for it.
+"""
+import logging
+import threading
+import time
+from typing import Mapping
+
+log = logging.getLogger(__name__)
+
+# above this X-RateLimit-Reset is a unix timestamp, below it seconds from now
+_EPOCH_THRESHOLD = 1e9
+
+
+class RateLimiter:  # pylint: disable=too-many-instance-attributes
+    """
+    RateLimiter is a thread-safe token bucket paced in requests per minute.
+
+    Args:
+        :requests_per_min: <int> = requests allowed per minute across all workers.
+        :clock: optional monotonic clock; None => time.monotonic
+        :wall_clock: optional epoch clock for X-RateLimit-Reset; None => time.time
+
+    Returns:
+        RateLimiter instance shared by the http helpers of one run.
+    """
+    def __init__(self, requests_per_min: int, clock=None, wall_clock=None):
+        self.requests_per_min = requests_per_min
+        self._clock = clock or time.monotonic
+        self._wall_clock = wall_clock or time.time
+        self._lock = threading.Lock()
+        self._rate = requests_per_min / 60
+        self._capacity = max(1.0, self._rate)
+        self._tokens = self._capacity
+        # tokens are accounted as of this instant; a pause moves it into the future
+        self._stamp = self._clock()
+        # requests paced and the total time they were told to wait
+        self.requests = 0
+        self.wait_seconds = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Current pace in requests per minute (lowered by X-RateLimit-Limit)."""
+        return self._rate * 60
+
+    def _refill(self, now: float):
+        if now > self._stamp:
+            self._tokens = min(self._capacity,
+                               self._tokens + (now - self._stamp) * self._rate)
+            self._stamp = now
+
+    def reserve(self) -> float:
+        """Take the next token; seconds the caller must wait before sending."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens -= 1
+            ready = self._stamp + max(0.0, -self._tokens) / self._rate
+            wait = max(0.0, ready - now)
+            self.requests += 1
+            self.wait_seconds += wait
+        return wait
+
+    def acquire(self):
+        """Block the calling thread until its token is due."""
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+    def reset_counts(self):
+        """Zero the requests and wait counted for summary(); the bucket is kept."""
+        with self._lock:
+            self.requests = 0
+            self.wait_seconds = 0.0
+
+    def summary(self) -> str:
+        """One-line account of the pacing for the run log."""
+        return (f"{self.requests} requests paced at up to {self.rate:.0f}/min; "
+                f"waited {self.wait_seconds:.2f}s in total")
+
+    def pause(self, seconds: float):
+        """Send nothing for the next seconds; one request may go when they are up, and
+        the bucket refills from there."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            until = now + seconds
+            if until > self._stamp:
+                self._stamp = until
+                self._tokens = min(self._tokens, 1.0)
+
+    def observe(self, status_code: int, headers: Mapping[str, str]):
+        """Adjust the bucket from one response's rate-limit headers."""
+        retry_after = _header_float(headers, "Retry-After")
+        if retry_after is not None and status_code in (429, 503):
+            log.warning("Rate limited (%d): pausing requests for %.1fs",
+                        status_code, retry_after)
+            self.pause(retry_after)
+        limit = _header_float(headers, "X-RateLimit-Limit")
+        if limit and limit < self.rate:
+            with self._lock:
+                self._rate = limit / 60
+                self._capacity = max(1.0, self._rate)
+                self._tokens = min(self._tokens, self._capacity)
+            log.info("Server allows %d requests per minute; pacing to it", limit)
+        remaining = _header_float(headers, "X-RateLimit-Remaining")
+        if remaining is None:
+            return
+        reset = _header_float(headers, "X-RateLimit-Reset")
+        if remaining <= 0 and reset is not None:
+            if reset > _EPOCH_THRESHOLD:
+                reset -= self._wall_clock()
+            self.pause(max(reset, 0.0))
+            return
+        with self._lock:
+            self._tokens = min(self._tokens, remaining)
+
+
+def _header_float(headers: Mapping[str, str], name: str) -> float | None:
+    """Numeric header value, or None when absent or not a number."""
+    try:
+        return float(headers.get(name, ""))
+    except ValueError:
+        return None
@@ -0,0 +1,125 @@
+"""Run deadline and error-rate circuit breaker (http_config.deadline,
+http_config.circuit_breaker).
+
+Against a BookStack that is down or overloaded, every request walks the whole
+retry schedule: with the defaults (retry_count 5, backoff_factor 2.5) a request
+takes a minute and a half to give up, and every worker does that for every node.
+A nightly run can then take hours and overlap the next one.
+
+RunGuard is shared by every request of a run and trips once:
+- deadline: the run has been going for more than deadline seconds, or
+- circuit_breaker: at least error_rate of the last window attempts failed. An
+  attempt fails when it gets no response, a 5xx or a retry_codes status; any
+  other response counts as a success.
+
+Once tripped, no new request is sent (it raises RunAborted without touching the
+network) and a request already being retried gives up the next time it would retry.
+RunGuard also reads like a stop flag (is_set()), so the exporter and archiver stop
+at the same checkpoints as on a shutdown signal (see Halt). Unlike a shutdown, what
+was fetched before the trip is still archived and the run ends PARTIAL.
+
+The guard does not close again during the run; the next run starts with a fresh one.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+# pylint: disable=import-error
+from requests.exceptions import RetryError
+
+log = logging.getLogger(__name__)
+
+
+class RunAborted(RetryError):
+    """A request not sent, or not retried, because the run guard has tripped. A
+    RetryError, so callers that skip an item whose retries ran out skip it too."""
+
+
+class RunGuard:  # pylint: disable=too-many-instance-attributes
+    """
+    RunGuard trips on a run deadline or a failed-attempt rate; thread-safe.
+
+    Args:
+        :deadline: <int | None> = seconds from now after which the guard trips;
+            None => no deadline
+        :error_rate: <float | None> = failed share of the last window attempts that
+            trips the guard; None => no circuit breaker
+        :window: <int> = attempts the error rate is taken over
+        :clock: monotonic clock in seconds (injectable for tests)
+
+    Returns:
+        RunGuard instance shared by every request of one run.
+    """
+    def __init__(self, deadline: int | None = None, error_rate: float | None = None,
+                 window: int = 50, clock=time.monotonic):
+        self.deadline = deadline
+        self.error_rate = error_rate
+        self.window = window
+        self._clock = clock
+        self._cutoff = clock() + deadline if deadline else None
+        self._lock = threading.Lock()
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._failures = 0
+        # why the guard tripped; None while it has not
+        self.reason: str | None = None
+
+    @property
+    def tripped(self) -> bool:
+        """True once the deadline has passed or the breaker has opened."""
+        if self.reason is None and self._cutoff is not None and self._clock() >= self._cutoff:
+            self._trip(f"run deadline of {self.deadline}s reached")
+        return self.reason is not None
+
+    def is_set(self) -> bool:
+        """tripped, under the name of threading.Event's flag check."""
+        return self.tripped
+
+    def record(self, ok: bool):
+        """Count one attempt toward the error rate."""
+        if self.error_rate is None:
+            return
+        with self._lock:
+            if len(self._outcomes) == self.window and not self._outcomes[0]:
+                self._failures -= 1
+            self._outcomes.append(ok)
+            if not ok:
+                self._failures += 1
+            opened = (len(self._outcomes) == self.window
+                      and self._failures >= self.error_rate * self.window)
+            failures = self._failures
+        if opened:
+            self._trip(f"circuit breaker opened: {failures} of the last {self.window} "
+                       f"requests failed")
+
+    def check(self, url: str):
+        """Raise RunAborted for url if the guard has tripped."""
+        if self.tripped:
+            raise RunAborted(f"{self.reason}; not sending {url}")
+
+    def _trip(self, reason: str):
+        with self._lock:
+            if self.reason is not None:
+                return
+            self.reason = reason
+        log.warning("Run guard tripped (%s): remaining requests fail fast and the run "
+                    "ends partial", reason)
+
+
+class Halt:  # pylint: disable=too-few-public-methods
+    """
+    Halt is a stop flag that is set when any of its flags is: the shutdown Event and
+    the RunGuard, for the exporter and archiver checkpoints.
+
+    Args:
+        :flags: objects with is_set(), or None (ignored)
+
+    Returns:
+        Halt instance to pass where a stop Event is taken.
+    """
+    def __init__(self, *flags):
+        self._flags = [flag for flag in flags if flag is not None]
+
+    def is_set(self) -> bool:
+        """True when any flag is set."""
+        return any(flag.is_set() for flag in self._flags)
@@ -0,0 +1,119 @@
+"""Single-flight coalescing of identical GETs.
+
+Some URLs are wanted by several callers at once: a book on two shelves is fetched
+once per shelf, and with several workers the same asset detail can be requested by
+more than one rewriter, and the same image or attachment downloaded by more than
+one node. Without coalescing each caller sends its own request and parses its own
+copy. HttpHelper.http_get_json keys its flights by URL; asset downloads
+(AssetArchiver.get_asset_bytes and the asyncio engine's) by asset type and URL.
+
+A flight is keyed by URL. The first caller (the leader) makes the request; callers
+that ask for the same key while it is in flight wait for it and get the same parsed
+result, or the same exception. Once the flight lands the key is free again, so a
+later call fetches anew: this coalesces concurrent requests and caches nothing
+(the response cache does that, see common/http_cache.py).
+
+SingleFlight serves threads; AsyncSingleFlight serves tasks on one event loop.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+
+class _Coalescer:  # pylint: disable=too-few-public-methods
+    """Counts shared by both flavors: every do() call, and the ones that joined a
+    flight already in the air."""
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+
+    def summary(self) -> str:
+        """One-line account of the run for the log."""
+        return f"{self.shared} of {self.calls} requests shared one already in flight"
+
+
+class SingleFlight(_Coalescer):
+    """
+    SingleFlight coalesces concurrent calls with the same key across threads.
+
+    Returns:
+        SingleFlight instance shared by the worker threads of one helper.
+    """
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._flights: dict[str, Future] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """fn()'s result, shared with every concurrent do() of the same key."""
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Future()
+            else:
+                self.shared += 1
+        if not leader:
+            return flight.result()
+        try:
+            result = fn()
+        except BaseException as err:
+            self._land(key)
+            flight.set_exception(err)
+            raise
+        self._land(key)
+        flight.set_result(result)
+        return result
+
+    def _land(self, key: str):
+        with self._lock:
+            del self._flights[key]
+
+
+@dataclass
+class _Flight:
+    task: asyncio.Future
+    waiters: int = 0
+
+
+class AsyncSingleFlight(_Coalescer):
+    """
+    AsyncSingleFlight coalesces concurrent awaits with the same key on one loop.
+
+    The request runs as its own task, so a cancelled waiter (its gather failed)
+    does not cancel it for the others; it is cancelled once no one waits for it.
+
+    Returns:
+        AsyncSingleFlight instance for the tasks of one event loop.
+    """
+    def __init__(self):
+        super().__init__()
+        self._flights: dict[str, _Flight] = {}
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """await factory()'s result, shared with every concurrent do() of the key."""
+        self.calls += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight(asyncio.ensure_future(factory()))
+            flight.task.add_done_callback(lambda _task: self._land(key, flight))
+        else:
+            self.shared += 1
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1:
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _land(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
@@ -1,30 +1,99 @@
+import json
 import logging
 import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import repeat
 from http.cookiejar import DefaultCookiePolicy
 from typing import TypeVar
-from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
 import urllib3
 # pylint: disable=import-error
 import requests
 # pylint: disable=import-error
 from requests.adapters import HTTPAdapter, Retry, DEFAULT_POOLSIZE
+from urllib3.exceptions import MaxRetryError, ResponseError
 from croniter import croniter
 from pydantic import TypeAdapter, ValidationError
 
 from bookstack_file_exporter.config_helper.models import HttpConfig
+from bookstack_file_exporter.common.pagination import PageWalk, add_page, page_url
+from bookstack_file_exporter.common.rate_limit import RateLimiter
+from bookstack_file_exporter.common.concurrency import AdaptiveConcurrency
+from bookstack_file_exporter.common.http_cache import HttpCache
+from bookstack_file_exporter.common.http2 import Http2Adapter
+from bookstack_file_exporter.common.http_metrics import HttpMetrics, response_bytes
+from bookstack_file_exporter.common.run_guard import RunGuard
+from bookstack_file_exporter.common.single_flight import SingleFlight
 
 T = TypeVar("T")
 
 log = logging.getLogger(__name__)
 
-# Base name for everything the tool creates: the local export directory and .tgz
+# Base name for everything the tool creates: the local export directory and
 # archive stem (config_helper), and — with a trailing '_' — the anchored
 # managed-object filter for remote retention (s3_archiver). Single definition so
 # local naming and remote retention can never drift apart: retention only deletes
 # objects whose name it recognizes as tool-created.
 EXPORT_BASENAME = "bookstack_export"
 
+# `.part001`-style volume marker in an archive name (max_volume_size), followed by the
+# codec extension
+_VOLUME_RE = re.compile(r"\.part\d{3,}(?=\.)")
+
+class PacedRetry(Retry):
+    """urllib3 Retry whose retries also go through the rate limiter: the response
+    that triggered the retry adjusts the bucket (Retry-After pauses every worker,
+    not just this one), and the retried request takes a token like any other.
+    Each retry is also a congestion signal for adaptive concurrency, and each
+    attempt it acts on is counted in the request metrics and, as a failure, by the
+    run guard; once the guard has tripped the request is not retried."""
+    def __init__(self, *args, rate_limiter: RateLimiter | None = None,
+                 adaptive: AdaptiveConcurrency | None = None,
+                 metrics: HttpMetrics | None = None, guard: RunGuard | None = None,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rate_limiter = rate_limiter
+        self.adaptive = adaptive
+        self.metrics = metrics
+        self.guard = guard
+
+    def new(self, **kw) -> "PacedRetry":
+        retry = super().new(**kw)
+        retry.rate_limiter = self.rate_limiter
+        retry.adaptive = self.adaptive
+        retry.metrics = self.metrics
+        retry.guard = self.guard
+        return retry
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None,
+                  _stacktrace=None) -> "PacedRetry":
+        retried = False
+        if self.guard is not None:
+            self.guard.record(False)
+        try:
+            if self.guard is not None and self.guard.tripped:
+                # give up as an exhausted Retry would: RetryError or ConnectionError
+                raise MaxRetryError(_pool, url, error or ResponseError(self.guard.reason))
+            retry = super().increment(method, url, response, error, _pool, _stacktrace)
+            retried = True
+            return retry
+        finally:
+            if self.metrics is not None and url is not None:
+                self.metrics.attempt(url, response.status if response is not None
+                                     else None, retried)
+
+    def sleep(self, response=None):
+        if self.adaptive is not None:
+            self.adaptive.congestion()
+        if self.rate_limiter is not None and response is not None:
+            self.rate_limiter.observe(response.status, response.headers)
+        super().sleep(response)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
 # pylint: disable=too-many-instance-attributes
 class HttpHelper:
     """
@@ -33,17 +102,44 @@ class HttpHelper:
     Args:
         :headers: <Dict[str, str]> = all headers to use for http requests
         :config: <HttpConfig> = Configuration with user inputs for http requests
+        :export_workers: <int> = worker threads sharing this helper
+        :adaptive: <bool> = adapt requests in flight between 1 and export_workers
+
+    config.cache turns on the on-disk response cache and config.http2 the HTTP/2
+    transport (common/http2.py); close() the helper when the run is over, or
+    start_run() it to reuse it for the next one. Every request is counted in
+    metrics (common/http_metrics.py). config.deadline and config.circuit_breaker
+    set up guard (common/run_guard.py).
 
     Returns:
         :HttpHelper: instance with methods to help with http requests.
     """
     def __init__(self, headers: dict[str, str],
-                 config: HttpConfig, export_workers: int = 1):
+                 config: HttpConfig, export_workers: int = 1, adaptive: bool = False):
         self.backoff_factor = config.backoff_factor
         self.retry_codes = config.retry_codes
         self.retry_count = config.retry_count
         self.http_timeout = config.timeout
         self.verify_ssl = config.verify_ssl
+        self.http2 = config.http2
+        self._config = config
+        # one token bucket for every worker thread (and the asyncio engine, which
+        # takes it from here); None => unpaced
+        self.rate_limiter = (RateLimiter(config.requests_per_min)
+                             if config.requests_per_min else None)
+        # AIMD limit on requests in flight, export_workers being the ceiling (and the
+        # asyncio engine's too); None => every worker may have a request out
+        self.adaptive = AdaptiveConcurrency(export_workers) if adaptive else None
+        # on-disk detail response cache, shared with the asyncio engine; None => off
+        self.cache = (HttpCache(config.cache.path, config.cache.max_size)
+                      if config.cache else None)
+        # concurrent http_get_json calls for one URL share a request
+        self.single_flight = SingleFlight()
+        # per resource class request counters, shared with the asyncio engine
+        self.metrics = HttpMetrics()
+        # run deadline and error-rate breaker, shared with the asyncio engine;
+        # None => every request runs its full retry schedule
+        self.guard = self._build_guard(config)
         # Size the urllib3 connection pool so export_workers concurrent GETs do
         # not exhaust it. Floor at requests' own default (DEFAULT_POOLSIZE) so a low
         # worker count never shrinks the pool below stock behavior; we track that
@@ -55,6 +151,7 @@ class HttpHelper:
         # urllib3 connection pool is thread-safe, we never mutate the Session per
         # request (headers are passed per-call), and cookies are blocked in
         # _build_session — so there is no shared mutable per-request state to race.
+        self.export_workers = export_workers
         self._pool_maxsize = max(DEFAULT_POOLSIZE, export_workers)
         if not self.verify_ssl:
             urllib3.disable_warnings()
@@ -71,28 +168,107 @@ class HttpHelper:
         # mid-export. A fresh requests call (pre-Session) never persisted the cookie, so
         # this regressed when the shared Session was introduced.
         session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        # kept to point a reused session at the next run's metrics, guard and adaptive
+        # (new() copies them into every request's Retry)
         # {backoff factor} * (2 ** ({number of previous retries}))
         # {raise_on_status} if status falls in status_forcelist range
         #  and retries have been exhausted.
         # {status_force_list} 413, 429, 503 defaults are overwritten with additional ones
-        retries = Retry(total=self.retry_count,
-                        backoff_factor=self.backoff_factor,
-                        raise_on_status=True,
-                        status_forcelist=self.retry_codes)
-        adapter = HTTPAdapter(max_retries=retries, pool_maxsize=self._pool_maxsize)
+        retries = self._retries = PacedRetry(total=self.retry_count,
+                             backoff_factor=self.backoff_factor,
+                             raise_on_status=True,
+                             status_forcelist=self.retry_codes,
+                             rate_limiter=self.rate_limiter,
+                             adaptive=self.adaptive,
+                             metrics=self.metrics,
+                             guard=self.guard)
+        if self.http2:
+            # pool_maxsize caps the connections; HTTP/2 multiplexes the workers' requests
+            # over as few of them as the server's stream limit allows
+            adapter = Http2Adapter(retries, self._pool_maxsize, bool(self.verify_ssl))
+        else:
+            adapter = HTTPAdapter(max_retries=retries, pool_maxsize=self._pool_maxsize)
         session.mount("https://", adapter)
         session.mount("http://", adapter)
         return session
 
+    @staticmethod
+    def _build_guard(config: HttpConfig) -> RunGuard | None:
+        if config.deadline is None and config.circuit_breaker is None:
+            return None
+        breaker = config.circuit_breaker
+        return RunGuard(config.deadline,
+                        error_rate=breaker.error_rate if breaker else None,
+                        window=breaker.window if breaker else 1)
+
+    def start_run(self):
+        """Reset the helper for another run (scheduled mode keeps it between runs).
+
+        The session with its open connections, the rate limiter's bucket and the
+        response cache stay. Request metrics, the run guard (its deadline counts from
+        now), request coalescing and adaptive concurrency start over, and so do the
+        rate limiter's and cache's counters."""
+        self.metrics = HttpMetrics()
+        self.guard = self._build_guard(self._config)
+        self.single_flight = SingleFlight()
+        if self.adaptive is not None:
+            self.adaptive = AdaptiveConcurrency(self.export_workers)
+        self._retries.metrics = self.metrics
+        self._retries.guard = self.guard
+        self._retries.adaptive = self.adaptive
+        if self.rate_limiter is not None:
+            self.rate_limiter.reset_counts()
+        if self.cache is not None:
+            self.cache.reset_counts()
+
+    def close(self):
+        """Close the session's connections and the response cache, if any."""
+        self._session.close()
+        if self.cache is not None:
+            self.cache.close()
+
     # more details on options: https://urllib3.readthedocs.io/en/stable/reference/urllib3.util.html
-    def http_get_request(self, url: str) -> requests.Response:
-        """make http requests and return response object"""
+    def http_get_request(self, url: str, stream: bool = False,
+                         headers: dict[str, str] | None = None) -> requests.Response:
+        """make http requests and return response object
+
+        stream=True returns once the headers are in; the body is read on first access
+        to .content, and the caller must close the response. With adaptive_workers a
+        streamed request keeps its place under the limit until then, so the limit
+        bounds body transfers too and their latency sample covers the body. headers
+        are sent on top of the helper's own."""
+        if self.guard is not None:
+            self.guard.check(url)
+        if self.adaptive is not None:
+            self.adaptive.acquire()
+        ticket = None
+        status_code = None
+        response = None
+        start = time.perf_counter()
         try:
-            response = self._session.get(url, headers=self._headers,
-                                         verify=self.verify_ssl, timeout=self.http_timeout)
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            if self.adaptive is not None:
+                ticket = self.adaptive.start()
+            response = self._session.get(url, headers={**self._headers, **(headers or {})},
+                                         stream=stream, verify=self.verify_ssl,
+                                         timeout=self.http_timeout)
+            status_code = response.status_code
         except Exception as req_err:
             log.error("Failed to make request for %s", url)
+            self.metrics.observe(url, time.perf_counter() - start, None, 0)
             raise req_err
+        finally:
+            if self.adaptive is not None and (response is None or not stream):
+                self.adaptive.release(ticket, status_code)
+        if self.adaptive is not None and stream:
+            self._release_on_close(response, ticket)
+        self.metrics.observe(url, time.perf_counter() - start, status_code,
+                             response_bytes(response, stream))
+        if self.guard is not None:
+            self.guard.record(status_code < 500 and status_code not in self.retry_codes)
+        if self.rate_limiter is not None:
+            self.rate_limiter.observe(response.status_code, response.headers)
         try:
             #raise_for_status() throws an exception on codes 400-599
             response.raise_for_status()
@@ -101,28 +277,75 @@ class HttpHelper:
             # or it returned a 40X which is not expected
             log.error("Bookstack request failed with status code: %d on url: %s",
                       response.status_code, url)
+            if stream:
+                response.close()
             raise e
         return response
 
+    def _release_on_close(self, response: requests.Response, ticket):
+        """Free a streamed request's adaptive place when the response is closed
+        (once, however often close() is called)."""
+        close = response.close
+        adaptive = self.adaptive
+
+        def close_and_release():
+            nonlocal ticket
+            close()
+            if ticket is not None:
+                adaptive.release(ticket, response.status_code)
+                ticket = None
+        response.close = close_and_release
+
+    def http_get_json(self, url: str, updated_at: str | None = None):
+        """GET a detail endpoint's JSON, through the response cache when it is on.
+
+        updated_at is the node's updated_at as its parent lists it; a cached body
+        stored under the same value is served without a request (see
+        common/http_cache.py). Without the cache this is http_get_request().json().
+        Concurrent calls for the same url share one request and one parsed result
+        (see common/single_flight.py).
+        """
+        return self.single_flight.do(url, lambda: self._get_json(url, updated_at))
+
+    def _get_json(self, url: str, updated_at: str | None):
+        if self.cache is None:
+            return self.http_get_request(url).json()
+        entry = self.cache.lookup(url, updated_at)
+        if entry is not None and entry.fresh:
+            return json.loads(entry.body)
+        response = self.http_get_request(url, headers=entry.validators if entry else None)
+        return json.loads(self.cache.store(url, updated_at, response, entry))
+
     def http_get_all(self, url: str, count: int = 500) -> list[dict]:
-        """fetch all items from a paginated bookstack list endpoint"""
-        parsed = urlparse(url)
-        base_query = [(k, v) for k, v in parse_qsl(parsed.query)
-                      if k not in ('count', 'offset')]
-        all_data: list[dict] = []
-        offset = 0
-        while True:
-            query = urlencode(base_query + [('count', count), ('offset', offset)])
-            paginated_url = urlunparse(parsed._replace(query=query))
-            body = self.http_get_request(paginated_url).json()
-            batch = body.get('data', [])
-            if not batch:
-                break
-            all_data.extend(batch)
-            if len(all_data) >= body.get('total', 0):
-                break
-            offset += count
-        return all_data
+        """fetch all items from a paginated bookstack list endpoint
+
+        One worker walks the pages in turn. With export_workers > 1, the first page
+        gives the total and the rest are fetched in concurrent waves (see
+        common/pagination.py), then reassembled in offset order.
+        """
+        if self.export_workers == 1:
+            all_data: list[dict] = []
+            offset = 0
+            while add_page(all_data,
+                           self.http_get_request(page_url(url, count, offset)).json()):
+                offset += count
+            return all_data
+        walk = PageWalk(self._get_page(url, count, 0), self.export_workers)
+        with ThreadPoolExecutor(max_workers=self.export_workers) as executor:
+            wave = walk.next_wave()
+            while wave is not None:
+                size, offsets = wave
+                # map() yields in submission (offset) order, whatever finishes first
+                walk.add_wave(list(executor.map(self._get_page, repeat(url), repeat(size),
+                                                offsets)))
+                wave = walk.next_wave()
+        return walk.items
+
+    def _get_page(self, url: str, count: int, offset: int) -> tuple[dict, float, int]:
+        """One page's body with the seconds it took and its size in bytes."""
+        start = time.perf_counter()
+        response = self.http_get_request(page_url(url, count, offset))
+        return response.json(), time.perf_counter() - start, len(response.content)
 
 def oldest_beyond_keep(items: list[T], key, keep_last: int) -> list[T]:
     """Return the oldest items exceeding keep_last (sorted ascending by key).
@@ -133,6 +356,27 @@ def oldest_beyond_keep(items: list[T], key, keep_last: int) -> list[T]:
         return []
     return ordered[:to_delete]
 
+def backup_set_name(name: str) -> str:
+    """Name of the backup an archive file belongs to: a volume's name without its
+    `.partNNN` marker, any other name unchanged."""
+    return _VOLUME_RE.sub("", name, count=1)
+
+def group_backup_sets(items: list[T], name) -> dict[str, list[T]]:
+    """Group items by backup_set_name(name(item)), so every volume of one backup lands
+    in the same group."""
+    groups: dict[str, list[T]] = {}
+    for item in items:
+        groups.setdefault(backup_set_name(name(item)), []).append(item)
+    return groups
+
+def oldest_sets_beyond_keep(items: list[T], name, key, keep_last: int) -> list[T]:
+    """oldest_beyond_keep over whole backups: a volume set counts once toward keep_last
+    (aged by its oldest volume) and is returned all together or not at all."""
+    groups = list(group_backup_sets(items, name).values())
+    stale = oldest_beyond_keep(groups, key=lambda group: min(key(i) for i in group),
+                               keep_last=keep_last)
+    return [item for group in stale for item in group]
+
 
 def check_var(env_key: str, default_val: str, required: bool = True) -> str:
     """
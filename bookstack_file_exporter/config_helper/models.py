@@ -6,6 +6,9 @@ from typing import Literal
 from pydantic import BaseModel, Field, ConfigDict, field_validator, model_validator
 from croniter import croniter, CroniterError
 
+from bookstack_file_exporter.archiver import codecs, encryption
+from bookstack_file_exporter.common import extras
+
 log = logging.getLogger(__name__)
 
 def normalize_prefix(raw: str | None) -> str:
@@ -15,6 +18,21 @@ def normalize_prefix(raw: str | None) -> str:
     top-level "folder" in object keys; consumers join with '/' themselves."""
     return (raw or "").strip("/")
 
+_SIZE_RE = re.compile(r"^\s*(\d+)\s*(?:([KMGT])(?:I?B)?|B)?\s*$", re.IGNORECASE)
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+def _parse_size(value):
+    """'500M', '2GiB', '1024' -> bytes. Non-strings pass through for pydantic to type
+    check."""
+    if not isinstance(value, str):
+        return value
+    match = _SIZE_RE.match(value)
+    if not match:
+        raise ValueError(f"invalid size {value!r}; use bytes or a K/M/G/T suffix, "
+                         "e.g. '2GiB'")
+    return int(match.group(1)) * _SIZE_UNITS[(match.group(2) or "").upper()]
+
 # pylint: disable=too-few-public-methods
 class StrictModel(BaseModel):
     """Config base: reject unknown keys. pydantic's default extra='ignore' silently
@@ -160,6 +178,89 @@ class Assets(StrictModel):
                                "Upgrades' in the README.",
         })
 
+class Compression(StrictModel):
+    """YAML schema for archive compression settings"""
+    # Archive codec; picks the extension too (.tgz, .tar.zst, .tar.xz, .tar.lz4, .tar).
+    # zstd and lz4 need the matching pip extra (see archiver/codecs.py).
+    codec: Literal["gzip", "zstd", "xz", "lz4", "none"] = "gzip"
+    # None => the codec's default (gzip 9, zstd 3, xz 6, lz4 0).
+    level: int | None = None
+    # gzip/zstd worker threads; None or 0 => one per CPU. gzip with more than one thread
+    # deflates blocks in parallel (pigz-style); 1 keeps single-stream gzip. Ignored by
+    # xz, lz4 and none.
+    threads: int | None = Field(default=None, ge=0)
+    # Compress members straight into the .partial archive as they are produced, instead
+    # of building an intermediate .tar and compressing it in a second pass. Halves the
+    # disk I/O and drops the need for a second full-size copy on the output volume.
+    streaming: bool = False
+
+    @model_validator(mode="after")
+    def _check_codec(self):
+        """Reject out-of-range levels and missing optional codec modules at load time,
+        not after a full export has been fetched."""
+        codec = codecs.get_codec(self.codec)
+        if self.level is not None:
+            if codec.level_range is None:
+                raise ValueError(f"compression codec '{self.codec}' does not take a level")
+            low, high = codec.level_range
+            if not low <= self.level <= high:
+                raise ValueError(f"compression level for '{self.codec}' must be between "
+                                 f"{low} and {high}, got {self.level}")
+        hint = extras.missing_dependency(self.codec) if codec.modules else None
+        if hint:
+            raise ValueError(hint)
+        return self
+
+class Encryption(StrictModel):
+    """YAML schema for archive encryption settings"""
+    # Name of the environment variable holding the base64-encoded 32-byte AES-256 key
+    # (`python -m bookstack_file_exporter.archiver.encryption keygen` prints one).
+    # The key itself never goes in the config file.
+    key_env: str
+
+    @model_validator(mode="after")
+    def _check_key(self):
+        """Fail at load time on a missing cryptography module or an unusable key,
+        not after a full export has been fetched."""
+        hint = extras.missing_dependency("encrypt")
+        if hint:
+            raise ValueError(hint)
+        encryption.load_key(self.key_env)
+        return self
+
+class DirectoryOutput(StrictModel):
+    """YAML schema for output_mode 'directory' settings"""
+    # Also pack the tree into a timestamped archive (compression.codec) after each run.
+    # Required for object_storage uploads, which ship an archive.
+    archive: bool = False
+    # Delete files of the tree that the run did not write (pages deleted or renamed
+    # in BookStack), so the tree mirrors the source. Skipped after a run that skipped
+    # a node or asset on an error, or was stopped.
+    prune: bool = False
+
+class ResponseCache(StrictModel):
+    """YAML schema for http_config.cache (on-disk cache of API detail responses)"""
+    # SQLite file kept between runs; put it on a persistent volume in containers.
+    path: str
+    # Least recently used entries are evicted past this size of stored (compressed)
+    # bodies (bytes, or a string such as "256MiB").
+    max_size: int = Field(default=256 * 1024 ** 2, gt=0)
+
+    @field_validator("max_size", mode="before")
+    @classmethod
+    def _parse_max_size(cls, value):
+        """Accept a byte count or a K/M/G/T-suffixed string."""
+        return _parse_size(value)
+
+class CircuitBreaker(StrictModel):
+    """YAML schema for http_config.circuit_breaker (cut a run short against a failing
+    BookStack)"""
+    # share of the last `window` attempts that failed (no response, 5xx or a retry_codes
+    # status) at which the rest of the run fails fast
+    error_rate: float = Field(default=0.5, gt=0, le=1)
+    # attempts the error rate is taken over; it cannot trip before this many were made
+    window: int = Field(default=50, ge=1)
+
 class HttpConfig(StrictModel):
     """YAML schema for user provided http settings"""
     verify_ssl: bool | None = False
@@ -168,6 +269,34 @@ class HttpConfig(StrictModel):
     retry_codes: list[int] | None = [413, 429, 500, 502, 503, 504]
     retry_count: int | None = 5
     additional_headers: dict[str, str] | None = {}
+    # client-side pace across all workers; None => unpaced (server limit applies)
+    requests_per_min: int | None = None
+    # serve unchanged page details from disk between runs; None => every GET is sent
+    cache: ResponseCache | None = None
+    # multiplex concurrent requests over a few HTTP/2 connections instead of one
+    # HTTP/1.1 connection per worker (httpx + h2, `[http2]` extra)
+    http2: bool = False
+    # seconds into the run after which no new request is sent and the run ends partial
+    # with what was fetched; None => no limit
+    deadline: int | None = Field(default=None, gt=0)
+    # fail the rest of the run fast once too many requests fail; None => off
+    circuit_breaker: CircuitBreaker | None = None
+
+    @model_validator(mode="after")
+    def _check_requests_per_min(self):
+        """A pace of 0 would never send a request."""
+        if self.requests_per_min is not None and self.requests_per_min < 1:
+            raise ValueError("requests_per_min must be at least 1")
+        return self
+
+    @model_validator(mode="after")
+    def _check_http2(self):
+        """Fail at load time on a missing httpx/h2 rather than on the first request."""
+        if self.http2:
+            hint = extras.missing_dependency("http2")
+            if hint:
+                raise ValueError(hint)
+        return self
 
 class AppRiseNotifyConfig(StrictModel):
     """YAML schema for user provided app rise settings"""
@@ -241,6 +370,32 @@ class UserInput(StrictModel):
     # (html/pdf embed assets server-side and are not rewritten at these levels).
     export_level: Literal["pages", "books", "chapters"] = "pages"
     assets: Assets | None = Assets()
+    # Archive container: "tar" = tar compressed with compression.codec (default),
+    # "zip" = ZIP64 that stores already-compressed members (pdf/zip/images) and
+    # deflates text, with a central directory for single-member restores.
+    # "directory" = plain files in a persistent tree, rewritten only when changed.
+    output_mode: Literal["tar", "zip", "directory"] = "tar"
+    directory: DirectoryOutput = DirectoryOutput()
+    # Store a member whose content was already written in this archive (same gallery
+    # image on many pages, assets repeated per book/chapter) as a tar hardlink to the
+    # first copy. output_mode "tar" only.
+    dedup: bool = False
+    # Add MANIFEST.json (path, size, sha256, BookStack id/updated_at per file) to the
+    # output, hashed as members are written, plus a <archive>.manifest.json sidecar.
+    manifest: bool = False
+    # Write <archive>.index.json with each file's offset plus gzip restart points so a
+    # single page can be restored without decompressing the archive up to it.
+    # output_mode "tar" with codec gzip or none.
+    index: bool = False
+    # Split the tar into volumes of at most this size (bytes, or a string such as
+    # "2GiB" / "500M"): <archive>.part001.tgz, .part002.tgz, ... each extractable on
+    # its own. Uploads send a backup's volumes concurrently and keep_last counts the
+    # set once. output_mode "tar" only; not with index.
+    max_volume_size: int | None = Field(default=None, gt=0)
+    compression: Compression = Compression()
+    # Encrypt the archive as it is written (chunked AES-256-GCM under the codec), so
+    # only ciphertext reaches disk and object storage. Adds .enc to the extension.
+    encryption: Encryption | None = None
     object_storage: list[S3StorageConfig] | None = None
     keep_last: int | None = 0
     # Opt-in node-level parallel fetch. Default 1 = today's exact serial behavior.
@@ -250,6 +405,32 @@ class UserInput(StrictModel):
     # concurrent API requests; BookStack rate-limits (API_REQUESTS_PER_MIN, default
     # 180/min/user -> HTTP 429). If you raise it and see 429s, raise that .env value.
     export_workers: int = Field(default=1, ge=1)
+    # How export_workers concurrency is run. "threads" (default) = a thread pool of
+    # export_workers nodes over the shared requests.Session. "asyncio" = every
+    # discovery GET, export render and asset download is a task on one event loop
+    # (httpx, `[async]` extra) and export_workers caps the requests in flight, so it
+    # scales to higher values without one OS thread per request.
+    engine: Literal["threads", "asyncio"] = "threads"
+    # AIMD: export_workers becomes the ceiling, and the requests actually in flight
+    # start at 1, grow by one while p95 latency holds steady without 429/5xx, and
+    # halve on throttling, errors or a latency spike. Follows BookStack's load
+    # through the day instead of one fixed value.
+    adaptive_workers: bool = False
+    # export_level "pages": hand each page to the export workers as soon as its detail
+    # is fetched, instead of after the whole tree is discovered. Discovery then
+    # overlaps the downloads and only the pages in flight are held in memory.
+    pipeline: bool = False
+    # Cap on fetched export/asset bytes held in memory between the workers and the
+    # archive writer (bytes, or a string such as "512MiB"). A worker reserves a
+    # response's Content-Length before reading the body and waits while the budget
+    # is used up, so peak memory stays near this value however large single nodes
+    # are. Unset => only the writer queue length bounds it.
+    max_inflight_bytes: int | None = Field(default=None, gt=0)
+    # Export and image downloads larger than this (bytes, or a string such as
+    # "16MiB") are streamed to a temp file in chunks and copied into the archive from
+    # there, so a large PDF never sits in memory whole. Exports whose links are
+    # rewritten are always read into memory. Unset => every body is read into memory.
+    spool_threshold: int | None = Field(default=None, gt=0)
     run_interval: int | None = 0
     run_schedule: str | None = None
     # opt-in scheduled-mode health endpoint; no server unless health_port is set
@@ -308,6 +489,114 @@ class UserInput(StrictModel):
                 seen[dest] = entry.name
         return self
 
+    @model_validator(mode="after")
+    def _check_zip_compression(self):
+        """zip picks a codec per member (stored or deflate), so a tar codec choice
+        would be silently ignored. compression.level still sets the deflate level."""
+        if self.output_mode != "zip":
+            return self
+        if self.compression.codec != "gzip":
+            raise ValueError(
+                f"compression.codec {self.compression.codec!r} applies to output_mode "
+                "'tar' only; zip deflates text members and stores the rest")
+        return self
+
+    @model_validator(mode="after")
+    def _check_dedup_mode(self):
+        """Hardlink entries are a tar feature; zip has none and directory output
+        already skips unchanged files."""
+        if self.dedup and self.output_mode != "tar":
+            raise ValueError(
+                f"dedup applies to output_mode 'tar' only, got {self.output_mode!r}")
+        return self
+
+    @model_validator(mode="after")
+    def _check_index_codec(self):
+        """The index needs tar offsets (tar output) and restartable compression: gzip
+        full flushes, or none where offsets are file offsets."""
+        if not self.index:
+            return self
+        if self.output_mode != "tar":
+            raise ValueError(
+                f"index applies to output_mode 'tar' only, got {self.output_mode!r}")
+        if not codecs.get_codec(self.compression.codec).seekable:
+            seekable = " or ".join(c.name for c in codecs.CODECS.values() if c.seekable)
+            raise ValueError(f"index supports compression.codec {seekable}, "
+                             f"got {self.compression.codec!r}")
+        return self
+
+    @field_validator("max_volume_size", "max_inflight_bytes", "spool_threshold",
+                     mode="before")
+    @classmethod
+    def _parse_byte_sizes(cls, value):
+        """Accept a byte count or a size string with a K/M/G/T suffix (powers of 1024)."""
+        return _parse_size(value)
+
+    @model_validator(mode="after")
+    def _check_volume_mode(self):
+        """Volumes are cut between tar members; the seek index describes one archive."""
+        if self.max_volume_size is None:
+            return self
+        if self.output_mode != "tar":
+            raise ValueError(f"max_volume_size applies to output_mode 'tar' only, "
+                             f"got {self.output_mode!r}")
+        if self.index:
+            raise ValueError("max_volume_size cannot be combined with index")
+        return self
+
+    @model_validator(mode="after")
+    def _check_encryption_mode(self):
+        """Encryption wraps the tar codec stream: zip writes its own container, a bare
+        directory tree has no archive, and index offsets would point into plaintext."""
+        if self.encryption is None:
+            return self
+        if self.output_mode == "zip":
+            raise ValueError("encryption applies to output_mode 'tar' (or 'directory' "
+                             "with directory.archive), got 'zip'")
+        if self.output_mode == "directory" and not self.directory.archive:
+            raise ValueError("encryption needs an archive; with output_mode 'directory' "
+                             "set 'directory.archive: true'")
+        if self.index:
+            raise ValueError("encryption cannot be combined with index")
+        return self
+
+    @model_validator(mode="after")
+    def _check_engine(self):
+        """Fail at load time on a missing httpx. The asyncio engine bounds buffered
+        bodies by its request slots; the byte budget blocks threads, not tasks. Its
+        discovery waits on the loop the archive phase runs on, so it cannot feed it
+        (pipeline)."""
+        if self.engine != "asyncio":
+            return self
+        hint = extras.missing_dependency("async")
+        if hint:
+            raise ValueError(hint)
+        if self.max_inflight_bytes is not None:
+            raise ValueError("max_inflight_bytes applies to engine 'threads' only")
+        if self.spool_threshold is not None:
+            raise ValueError("spool_threshold applies to engine 'threads' only")
+        if self.pipeline:
+            raise ValueError("pipeline applies to engine 'threads' only")
+        return self
+
+    @model_validator(mode="after")
+    def _check_pipeline_level(self):
+        """Only page discovery is streamed; books and chapters are exported whole."""
+        if self.pipeline and self.export_level != "pages":
+            raise ValueError(
+                f"pipeline applies to export_level 'pages' only, got {self.export_level!r}")
+        return self
+
+    @model_validator(mode="after")
+    def _check_directory_uploads(self):
+        """object_storage uploads an archive; a bare directory tree has none to send."""
+        if (self.output_mode == "directory" and self.object_storage
+                and not self.directory.archive):
+            raise ValueError(
+                "object_storage needs an archive to upload; with output_mode "
+                "'directory' set 'directory.archive: true'")
+        return self
+
     @model_validator(mode="after")
     def _check_schedule_config(self):
         if self.run_schedule:
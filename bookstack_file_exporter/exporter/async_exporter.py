@@ -0,0 +1,45 @@
+import logging
+
+from bookstack_file_exporter.exporter.exporter import NodeExporter
+from bookstack_file_exporter.exporter.filter import NodeFilter
+from bookstack_file_exporter.common.async_http import AsyncHttpHelper, gather_all
+
+log = logging.getLogger(__name__)
+
+
+class AsyncNodeExporter(NodeExporter):
+    """
+    AsyncNodeExporter builds the same node tree as NodeExporter on the asyncio engine.
+
+    Every detail GET of a level (all shelves, all books, all chapters, ...) is a task,
+    bounded by the client's concurrency slots, instead of one request after another.
+    gather() keeps results in request order, so node dicts come out in the same
+    order as with NodeExporter.
+
+    Args:
+        :api_urls: <dict[str, str]> = map of resource type to base API URL.
+        :http_client: <AsyncHttpHelper> = asyncio http helper for API requests.
+        :node_filter: optional NodeFilter; None => no filtering.
+        :stop: optional threading.Event; a set flag skips every detail GET not yet
+            started, same checkpoint as NodeExporter.
+
+    Returns:
+        AsyncNodeExporter instance to handle building shelve/book/chapter/page relations.
+    """
+    def __init__(self, api_urls: dict[str, str], http_client: AsyncHttpHelper,
+                 node_filter: NodeFilter | None = None, stop=None):
+        super().__init__(api_urls, http_client, node_filter=node_filter, stop=stop)
+
+    def _get_all(self, url: str) -> list[dict]:
+        return self.http_client.run(self.http_client.get_all(url))
+
+    def _fetch_details(self, urls: list[str], updated_at: list[str | None] | None = None):
+        stamps = updated_at or [None] * len(urls)
+        results = self.http_client.run(gather_all(
+            [self.http_client.get_json(url, stamp, stop=self._stop)
+             for url, stamp in zip(urls, stamps)]))
+        # a skipped (stopped) fetch ends the usable prefix: callers zip by position
+        for data in results:
+            if data is None:
+                return
+            yield data
@@ -1,8 +1,8 @@
 import logging
-from typing import Optional
-
-# pylint: disable=import-error
-from requests import Response
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import chain, repeat
+from typing import Iterator, Optional
 
 from bookstack_file_exporter.exporter.node import Node
 from bookstack_file_exporter.exporter.filter import NodeFilter
@@ -18,14 +18,22 @@ class NodeExporter():
 
     Uses Bookstack API to get gather enough information to do so.
 
+    Args:
+        :api_urls: <dict[str, str]> = map of resource type to base API URL.
+        :http_client: <HttpHelper> = http helper for API requests.
+        :node_filter: optional NodeFilter; None => no filtering.
+        :stop: optional threading.Event; a set flag halts the walk at the next node.
+        :workers: <int> = detail GETs in flight at once (export_workers).
+
     Returns:
         NodeExporter instance to handle building shelve/book/chapter/page relations.
     """
     def __init__(self, api_urls: dict[str, str], http_client: HttpHelper,
-                 node_filter: Optional[NodeFilter] = None, stop=None):
+                 node_filter: Optional[NodeFilter] = None, stop=None, workers: int = 1):
         self.api_urls = api_urls
         self.http_client = http_client
         self._node_filter = node_filter
+        self.workers = workers
         # Cooperative-cancel flag (threading.Event). None in one-shot mode so the
         # checks below are no-ops. Scheduled mode injects its shutdown Event so a
         # signal mid-fetch halts the tree walk at the next node boundary instead of
@@ -42,10 +50,9 @@ class NodeExporter():
     def _until_stop(self, items):
         """Yield from items until a shutdown signal is flagged, then stop.
 
-        Wraps each fetch loop's iterable so cancellation lives in one place. This
-        is also the seam a future parallel exporter would attach to: the same
-        boundary that breaks the loop today would stop draining into a thread
-        pool's submit() tomorrow.
+        Wraps each fetch loop's iterable so cancellation lives in one place: the
+        same boundary breaks the sequential loop and stops submitting to the pool
+        in _fetch_pooled.
         """
         for item in items:
             if self._stop_requested():
@@ -72,22 +79,64 @@ class NodeExporter():
         self._excluded_book_ids.update(excluded_book_ids)
         return surviving
 
-    def _get_json_response(self, url: str) -> list[dict[str, str |int]]:
+    def _get_json_response(self, url: str,
+                           updated_at: str | None = None) -> list[dict[str, str |int]]:
         """get http response data in json format"""
-        response: Response = self.http_client.http_get_request(url=url)
-        return response.json()
+        return self.http_client.http_get_json(url, updated_at=updated_at)
+
+    def _fetch_details(self, urls: list[str], updated_at: list[str | None] | None = None):
+        """Detail JSON for each url, in order, stopping early on a shutdown signal.
+
+        The one place discovery fetches node details, so an engine that fetches them
+        concurrently overrides only this (see AsyncNodeExporter). Callers zip the
+        result with their own list, so a stopped fetch simply truncates it.
+        updated_at, parallel to urls, lets the response cache serve unchanged nodes.
+        With workers > 1 the GETs run on a thread pool (see _fetch_pooled).
+        """
+        pairs = self._until_stop(zip(urls, updated_at or repeat(None)))
+        if self.workers > 1 and len(urls) > 1:
+            yield from self._fetch_pooled(pairs)
+            return
+        for url, stamp in pairs:
+            yield self._get_json_response(url, stamp)
+
+    def _fetch_pooled(self, pairs):
+        """_fetch_details on workers threads, results still yielded in url order.
+
+        At most 2 x workers GETs are submitted ahead of the result being yielded, so
+        one slow detail does not idle the pool and a stop leaves little to drain. On
+        a stop, GETs not yet started are cancelled and the yielded prefix ends at the
+        first of them; a GET that raises raises here, in order, as it would
+        sequentially, after the ones still queued are cancelled.
+        """
+        ahead: deque[Future] = deque()
+        with ThreadPoolExecutor(max_workers=self.workers,
+                                thread_name_prefix="discovery") as executor:
+            try:
+                for url, stamp in pairs:
+                    ahead.append(executor.submit(self._get_json_response, url, stamp))
+                    if len(ahead) >= 2 * self.workers:
+                        yield ahead.popleft().result()
+                while ahead:
+                    if self._stop_requested() and ahead[0].cancel():
+                        break  # not started: the yielded prefix ends here
+                    yield ahead.popleft().result()
+            finally:
+                for future in ahead:
+                    future.cancel()
+
+    def _get_all(self, url: str) -> list[dict]:
+        """every item of a paginated list endpoint"""
+        return self.http_client.http_get_all(url)
 
     def _get_all_ids(self, url: str) -> list[int]:
-        return [item['id'] for item in self.http_client.http_get_all(url)]
+        return [item['id'] for item in self._get_all(url)]
 
     def _get_parents(self, base_url: str, parent_ids: list[int],
                       path_prefix: str = "") -> dict[int, Node]:
-        parent_nodes = {}
-        for parent_id in self._until_stop(parent_ids):
-            parent_url = f"{base_url}/{parent_id}"
-            parent_data = self._get_json_response(parent_url)
-            parent_nodes[parent_id] = Node(parent_data, path_prefix=path_prefix)
-        return parent_nodes
+        urls = [f"{base_url}/{parent_id}" for parent_id in parent_ids]
+        return {parent_id: Node(parent_data, path_prefix=path_prefix)
+                for parent_id, parent_data in zip(parent_ids, self._fetch_details(urls))}
 
     def get_chapter_nodes(self, book_nodes: dict[int, Node]) -> dict[int, Node]:
         """build chapter nodes by walking each book's contents.
@@ -96,14 +145,13 @@ class NodeExporter():
         skipped before their detail GET — their pages are also never fetched (cascade).
         """
         base_url = self.api_urls["chapters"]
-        chapter_nodes = {}
-        for book_node in self._until_stop(book_nodes.values()):
-            for child in selector.selectable_children(
-                    book_node.children, "chapters", self._node_filter, node_type="chapter"):
-                chapter_id = child['id']
-                chapter_data = self._get_json_response(f"{base_url}/{chapter_id}")
-                chapter_nodes[chapter_id] = Node(chapter_data, book_node)
-        return chapter_nodes
+        wanted = [(child['id'], book_node) for book_node in book_nodes.values()
+                  for child in selector.selectable_children(
+                      book_node.children, "chapters", self._node_filter, node_type="chapter")]
+        urls = [f"{base_url}/{chapter_id}" for chapter_id, _ in wanted]
+        return {chapter_id: Node(chapter_data, book_node)
+                for (chapter_id, book_node), chapter_data
+                in zip(wanted, self._fetch_details(urls))}
 
     def get_child_nodes(self, resource_type: str, parent_nodes: dict[int, Node],
                         filter_empty: bool = True, node_type: str = "") -> dict[int, Node]:
@@ -114,21 +162,28 @@ class NodeExporter():
     # pylint: disable=too-many-arguments,too-many-positional-arguments
     def _get_children(self, base_url: str, resource_type: str, parent_nodes: dict[int, Node],
                       filter_empty: bool, node_type: str = "") -> dict[int, Node]:
-        child_nodes = {}
-        for _, parent in self._until_stop(parent_nodes.items()):
-            if not parent.children:
+        return dict(self._iter_children(base_url, resource_type, parent_nodes, filter_empty,
+                                        node_type))
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def _iter_children(self, base_url: str, resource_type: str,
+                       parent_nodes: dict[int, Node], filter_empty: bool,
+                       node_type: str = "") -> Iterator[tuple[int, Node]]:
+        """(id, node) of each selected child, as soon as its detail is fetched"""
+        wanted = [(child, parent) for parent in parent_nodes.values() if parent.children
+                  for child in selector.selectable_children(
+                      parent.children, resource_type, self._node_filter, node_type)]
+        urls = [f"{base_url}/{child['id']}" for child, _ in wanted]
+        # Only pages are cached on the updated_at their parent lists: a container's
+        # does not move when its children change, and its detail is that child list.
+        stamps = ([child.get('updated_at') for child, _ in wanted]
+                  if resource_type == "pages" else None)
+        for (child, parent), child_data in zip(wanted, self._fetch_details(urls, stamps)):
+            child_node = Node(child_data, parent)
+            # filter_empty needs the fetched detail (Node.empty), so it stays here.
+            if filter_empty and child_node.empty:
                 continue
-            for child in selector.selectable_children(
-                    parent.children, resource_type, self._node_filter, node_type):
-                child_id = child['id']
-                child_url = f"{base_url}/{child_id}"
-                child_data = self._get_json_response(child_url)
-                child_node = Node(child_data, parent)
-                # filter_empty needs the fetched detail (Node.empty), so it stays here.
-                if filter_empty and child_node.empty:
-                    continue
-                child_nodes[child_id] = child_node
-        return child_nodes
+            yield child['id'], child_node
 
     def get_unassigned_books(self, existing_books: dict[int, Node],
                               path_prefix: str) -> dict[int, Node]:
@@ -140,7 +195,7 @@ class NodeExporter():
           3. When a node_filter is set, the book name must pass the 'books' filter.
         """
         book_url = self.api_urls["books"]
-        all_books: list[dict] = self.http_client.http_get_all(book_url)
+        all_books: list[dict] = self._get_all(book_url)
         unassigned = selector.selectable_unassigned_books(
             all_books, set(existing_books), self._excluded_book_ids, self._node_filter)
         if not unassigned:
@@ -199,3 +254,34 @@ class NodeExporter():
             if page_chapter_nodes:
                 page_nodes.update(page_chapter_nodes)
         return page_nodes
+
+    def iter_pages(self, book_nodes: dict[int, Node]) -> Iterator[Node]:
+        """get_all_pages as a stream (pipeline): each page node as soon as its detail
+        is fetched, so the archive phase can start on it while discovery goes on.
+
+        Chapter details are fetched first: they list the pages each chapter holds. A
+        page id listed more than once (under its book and a chapter, or under two
+        chapters) is held back until every listing is through, then yielded once with
+        the node get_all_pages keeps for it, the last one. Every other page is yielded
+        as soon as it is fetched, books' own pages first. Close the iterator if it is
+        not run to the end.
+        """
+        base_url = self.api_urls["pages"]
+        chapter_nodes = self.get_chapter_nodes(book_nodes)
+        listed = Counter(child['id'] for book in book_nodes.values()
+                         for child in book.children if child.get('type') == "page")
+        listed.update(child['id'] for chapter in chapter_nodes.values()
+                      for child in chapter.children)
+        streams = []
+        if book_nodes:
+            streams.append(self._iter_children(base_url, "pages", book_nodes, True, "page"))
+        if chapter_nodes:
+            streams.append(self._iter_children(base_url, "pages", chapter_nodes, True))
+        # as get_all_pages' dict update: the first position, the last node
+        held: dict[int, Node] = {}
+        for page_id, page_node in chain(*streams):
+            if listed[page_id] > 1:
+                held[page_id] = page_node
+            else:
+                yield page_node
+        yield from held.values()
@@ -35,6 +35,8 @@ class RunStatus:  # pylint: disable=too-many-instance-attributes
     _next_run: datetime | None = None
     _run_count: int = 0
     _failure_count: int = 0
+    _concurrency: int | None = None   # adaptive_workers' current limit, None when off
+    _requests: dict = field(default_factory=dict)   # last run's HttpMetrics snapshot
 
     def mark_running(self) -> None:
         """Transition to running state and record the start timestamp."""
@@ -87,6 +89,16 @@ class RunStatus:  # pylint: disable=too-many-instance-attributes
         with self._lock:
             self._next_run = next_run
 
+    def set_concurrency(self, limit: int) -> None:
+        """Store the adaptive concurrency limit (requests in flight)."""
+        with self._lock:
+            self._concurrency = limit
+
+    def set_requests(self, requests: dict) -> None:
+        """Store the last run's request metrics (HttpMetrics.snapshot())."""
+        with self._lock:
+            self._requests = requests
+
     def _duration_seconds(self) -> int | None:
         if self._started_at is None or self._finished_at is None:
             return None
@@ -108,4 +120,6 @@ class RunStatus:  # pylint: disable=too-many-instance-attributes
                 "next_run": _iso(self._next_run),
                 "run_count": self._run_count,
                 "failure_count": self._failure_count,
+                "concurrency": self._concurrency,
+                "requests": self._requests,
             }
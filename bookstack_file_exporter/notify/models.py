@@ -22,7 +22,8 @@ class UploadOutcome:
 class NotifyResult:
     """What an export run produced, for notifications."""
     status: ExportStatus = ExportStatus.SUCCESS
-    local: str | None = None                            # local .tgz path, None if no archive
+    local: str | None = None                            # local archive path, None if no archive
     uploads: list[UploadOutcome] = field(default_factory=list)  # one per configured target
     removed: list[str] = field(default_factory=list)    # local files clean_up() deleted
     cleanup_error: str | None = None    # str(exception) when local retention pruning failed
+    aborted: str | None = None          # why the run guard cut the export short
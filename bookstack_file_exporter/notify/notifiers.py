@@ -92,6 +92,9 @@ class AppRiseNotify:
                 lines.append(f"Pruned {pruned_count} old local archive(s)")
         if result is not None and result.cleanup_error:
             lines.append(f"Warning: local cleanup failed - {result.cleanup_error}")
+        if result is not None and result.aborted:
+            lines.append("Warning: export cut short, archive is incomplete - "
+                         f"{result.aborted}")
         return "\n".join(lines)
 
     def notify(self, excep: Exception | None = None, result: NotifyResult | None = None):
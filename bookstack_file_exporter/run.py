@@ -2,15 +2,19 @@ import argparse
 import logging
 import signal
 import threading
+from contextlib import closing
 from datetime import datetime, timedelta, timezone
 from typing import Callable
 
 from bookstack_file_exporter.config_helper.config_helper import ConfigNode
 from bookstack_file_exporter.exporter.node import Node
 from bookstack_file_exporter.exporter.exporter import NodeExporter
+from bookstack_file_exporter.exporter.async_exporter import AsyncNodeExporter
 from bookstack_file_exporter.exporter.filter import NodeFilter
 from bookstack_file_exporter.archiver.archiver import Archiver
 from bookstack_file_exporter.common.util import HttpHelper, seconds_until_next_cron
+from bookstack_file_exporter.common.async_http import AsyncHttpHelper
+from bookstack_file_exporter.common.run_guard import Halt, RunAborted, RunGuard
 from bookstack_file_exporter.notify.handler import NotifyHandler
 from bookstack_file_exporter.notify.models import NotifyResult, ExportStatus
 from bookstack_file_exporter.health.status import RunStatus
@@ -43,7 +47,7 @@ def _run_once(config: ConfigNode) -> int:
     A SIGTERM/SIGINT mid-run raises KeyboardInterrupt so the export's finally
     block discards any partial archive before exiting. This matters for ephemeral
     one-shot containers (`docker run --rm`, a k8s Job) where no later run exists
-    to sweep a stranded `.tgz.partial` off the output volume. Raising mid-write is
+    to sweep a stranded `.partial` off the output volume. Raising mid-write is
     safe here because the only local artifacts are the tar/.partial, which
     discard_partial removes (a signal during a remote upload may still leave a
     partial object on the remote — same as any interrupted upload, not specific to
@@ -101,6 +105,8 @@ def _run_scheduled(config: ConfigNode, next_wait: Callable[[], float]) -> int:
 
     status = None
     server = None
+    # http helpers kept warm from one cycle to the next
+    clients = HttpClients()
     if config.user_inputs.health_port:
         status = RunStatus()
         server = start_health_server(
@@ -112,7 +118,7 @@ def _run_scheduled(config: ConfigNode, next_wait: Callable[[], float]) -> int:
         if status:
             status.mark_running()
         try:
-            result = run(config, stop)
+            result = run(config, stop, status, clients)
             if status:
                 if result is not None and result.status is ExportStatus.PARTIAL:
                     status.mark_degraded(result)
@@ -136,16 +142,95 @@ def _run_scheduled(config: ConfigNode, next_wait: Callable[[], float]) -> int:
         log.info("Waiting %s seconds for next run", wait_secs)
         stop.wait(wait_secs)
 
+    clients.close()
     if server:
         server.shutdown()
     log.info("Shutdown complete")
     return 0
 
 
-def run(config: ConfigNode, stop=None):
+class HttpClients:
+    """
+    HttpClients keeps the http helpers of a run for the next one, so a scheduled
+    cycle reuses the last one's open connections (no new DNS lookups, TCP or TLS
+    handshakes) and response cache instead of building them anew.
+
+    Only the http side is kept. The Archiver and its AssetArchiver are built per run:
+    they hold the run's archive path and writer, and the image and attachment lists
+    they fetch are meant to be current, so they are not carried over. The one cache
+    shared between runs is the HttpHelper's response cache (http_config.cache).
+
+    They are rebuilt when the settings they were built from change, and after a
+    run in which a request got no response (connection refused or reset, timeout,
+    DNS failure): the pooled connections, or the address they were opened to, may
+    no longer be good.
+
+    Returns:
+        HttpClients instance; close() it when no run will follow.
+    """
+    def __init__(self):
+        self.http: HttpHelper | None = None
+        # asyncio engine: one event-loop client for discovery and archive (None => threads)
+        self.async_http: AsyncHttpHelper | None = None
+        self._key: str | None = None
+
+    @staticmethod
+    def _key_of(config: ConfigNode) -> str:
+        """the settings the helpers are built from"""
+        inputs = config.user_inputs
+        return repr((config.headers, inputs.http_config, inputs.export_workers,
+                     inputs.adaptive_workers, inputs.engine))
+
+    def acquire(self, config: ConfigNode) -> tuple[HttpHelper, AsyncHttpHelper | None]:
+        """the helpers for a new run: the last run's, reset, or new ones"""
+        key = self._key_of(config)
+        if self.http is not None and key != self._key:
+            log.info("HTTP settings changed; rebuilding HTTP clients")
+            self.close()
+        if self.http is None:
+            self._build(config)
+            self._key = key
+        else:
+            self.http.start_run()
+            if self.async_http is not None:
+                self.async_http.start_run(self.http.metrics, self.http.guard,
+                                          self.http.adaptive)
+        return self.http, self.async_http
+
+    def _build(self, config: ConfigNode):
+        inputs = config.user_inputs
+        self.http = HttpHelper(config.headers, inputs.http_config,
+                               export_workers=inputs.export_workers,
+                               adaptive=inputs.adaptive_workers)
+        if inputs.engine == "asyncio":
+            self.async_http = AsyncHttpHelper(config.headers, inputs.http_config,
+                                              concurrency=inputs.export_workers,
+                                              rate_limiter=self.http.rate_limiter,
+                                              adaptive=self.http.adaptive,
+                                              cache=self.http.cache,
+                                              metrics=self.http.metrics,
+                                              guard=self.http.guard)
+
+    def release(self):
+        """end of a run: keep the helpers, unless a request got no response"""
+        if self.http is not None and self.http.metrics.connection_errors():
+            log.info("Connection errors during the run; HTTP clients will be rebuilt "
+                     "for the next one")
+            self.close()
+
+    def close(self):
+        """close the helpers (idempotent); the next acquire() builds new ones"""
+        if self.async_http is not None:
+            self.async_http.close()
+        if self.http is not None:
+            self.http.close()
+        self.http = self.async_http = None
+
+def run(config: ConfigNode, stop=None, status: RunStatus | None = None,
+        clients: HttpClients | None = None):
     """run export process with error handling and notification support"""
     try:
-        result = exporter(config, stop)
+        result = exporter(config, stop, status, clients)
         if config.user_inputs.notifications:
             notif = NotifyHandler(config.user_inputs.notifications)
             notif.do_notify(result=result)
@@ -161,23 +246,93 @@ def run(config: ConfigNode, stop=None):
         # raise original error instead of notification error
         raise run_err
 
-def exporter(config: ConfigNode, stop=None):
-    """export bookstack nodes and archive locally and/or remotely"""
+def exporter(config: ConfigNode, stop=None, status: RunStatus | None = None,
+             clients: HttpClients | None = None):
+    """export bookstack nodes and archive locally and/or remotely
+
+    status, when the health endpoint is on, is kept told of the adaptive
+    concurrency limit and is given the run's request metrics at the end.
+    clients, in scheduled mode, holds the http helpers kept from the last run;
+    without it the run builds its own and closes them when it is over."""
 
     #### Export Data #####
     # need to implement pagination for apis
     log.info("Beginning run")
 
     ## Helper functions with user provided (or defaults) http config
-    http_client = HttpHelper(config.headers, config.user_inputs.http_config,
-                             export_workers=config.user_inputs.export_workers)
-
+    owned = clients is None
+    if owned:
+        clients = HttpClients()
+    http_client, async_http = clients.acquire(config)
+    if status is not None and http_client.adaptive is not None:
+        http_client.adaptive.on_change = status.set_concurrency
+        status.set_concurrency(http_client.adaptive.limit)
+    try:
+        return _export(config, stop, http_client, async_http)
+    finally:
+        _log_requests(http_client, status)
+        _log_coalescing(http_client, async_http)
+        if http_client.rate_limiter is not None:
+            log.info("Rate limiter: %s", http_client.rate_limiter.summary())
+        if http_client.adaptive is not None:
+            log.info("Adaptive concurrency: %s", http_client.adaptive.summary())
+        if http_client.cache is not None:
+            log.info("HTTP cache: %s", http_client.cache.summary())
+        if owned:
+            clients.close()
+        else:
+            clients.release()
+
+def _log_requests(http_client: HttpHelper, status: RunStatus | None):
+    """log the run's requests per resource class, and hand them to the health status"""
+    lines = http_client.metrics.summary_lines()
+    if lines:
+        log.info("HTTP requests by resource:")
+        for line in lines:
+            log.info("  %s", line)
+    if status is not None:
+        status.set_requests(http_client.metrics.snapshot())
+
+def _log_coalescing(http_client: HttpHelper, async_http: AsyncHttpHelper | None):
+    """log how many JSON GETs joined one already in flight, when any did"""
+    for helper in (http_client, async_http):
+        if helper is not None and helper.single_flight.shared:
+            log.info("Request coalescing: %s", helper.single_flight.summary())
+
+def _halt(stop, guard: RunGuard | None):
+    """the exporter's and archiver's stop flag: the shutdown signal or the run guard"""
+    return Halt(stop, guard) if guard is not None else stop
+
+def _aborted(guard: RunGuard | None) -> str | None:
+    """why the run guard cut the run short, or None"""
+    return guard.reason if guard is not None and guard.tripped else None
+
+def _raise_if_aborted(guard: RunGuard | None):
+    """a run cut short before anything was archived is a failure, not an empty run"""
+    if _aborted(guard):
+        raise RunAborted(f"{guard.reason} before anything was archived")
+
+def _node_exporter(config: ConfigNode, stop, http_client: HttpHelper,
+                   async_http: AsyncHttpHelper | None) -> NodeExporter:
+    """node exporter for the configured engine"""
     ## Build node filter from user config (None when no filters are configured)
     node_filter = NodeFilter(config.user_inputs.filters) if config.user_inputs.filters else None
-
+    if async_http is not None:
+        return AsyncNodeExporter(config.urls, async_http, node_filter=node_filter, stop=stop)
+    return NodeExporter(config.urls, http_client, node_filter=node_filter, stop=stop,
+                        workers=config.user_inputs.export_workers)
+
+def _export(config: ConfigNode, stop, http_client: HttpHelper,
+            async_http: AsyncHttpHelper | None):
+    """discover nodes, archive them and ship the archive (exporter's body)
+
+    A tripped run guard (http_config.deadline / circuit_breaker) stops discovery and
+    the archive phase at their stop checkpoints, like a shutdown signal; unlike one,
+    what was fetched is still archived and shipped, and the run ends PARTIAL."""
     ## Use exporter class to get all the resources (pages, books, etc.) and their relationships
     log.info("Building shelve/book/chapter/page relationships")
-    export_helper = NodeExporter(config.urls, http_client, node_filter=node_filter, stop=stop)
+    export_helper = _node_exporter(config, _halt(stop, http_client.guard), http_client,
+                                   async_http)
     ## shelves
     shelve_nodes: dict[int, Node] = export_helper.get_all_shelves()
     ## books (always needed - basis for all export levels)
@@ -185,20 +340,28 @@ def exporter(config: ConfigNode, stop=None):
                                                               config.unassigned_book_dir)
 
     ## Build archiver before the level branch (shared for all levels)
-    archive: Archiver = Archiver(config, http_client)
+    archive: Archiver = Archiver(config, http_client, async_http=async_http)
 
-    # Inject the cooperative-shutdown flag (None in one-shot mode = no-op).
-    archive.set_stop(stop)
+    # Inject the cooperative-shutdown flag (None in one-shot mode without a run guard
+    # = no-op).
+    archive.set_stop(_halt(stop, http_client.guard))
 
     # create export directory if not exists
     archive.create_export_dir()
 
-    # Remove orphaned .tar/.tgz.partial from prior runs (SIGKILL backstop) before
+    # Remove orphaned .partial files from prior runs (SIGKILL backstop) before
     # this cycle writes anything.
     archive.sweep_orphans()
 
     ## Select nodes by export level
     export_level = config.user_inputs.export_level
+    if export_level == "pages" and config.user_inputs.pipeline:
+        # pages are archived while they are discovered; closing the stream on an
+        # early stop cancels the page fetches still queued
+        log.info("Beginning archive, discovering pages as it goes")
+        with closing(export_helper.iter_pages(book_nodes)) as pages:
+            return _archive(config, stop, http_client, archive,
+                            lambda: archive.stream_bookstack_exports(pages))
     if export_level == "books":
         nodes: dict[int, Node] = book_nodes
     elif export_level == "chapters":
@@ -213,6 +376,9 @@ def exporter(config: ConfigNode, stop=None):
         log.info("Shutdown requested during fetch; skipping archive")
         return None
 
+    # tripped before the archive phase: no request can fetch content any more
+    _raise_if_aborted(http_client.guard)
+
     if not nodes:
         log.warning(
             "No %s data available from given Bookstack instance. Nothing to archive",
@@ -221,9 +387,16 @@ def exporter(config: ConfigNode, stop=None):
         return None
 
     log.info("Beginning archive")
+    return _archive(config, stop, http_client, archive,
+                    lambda: archive.get_bookstack_exports(nodes))
+
+def _archive(config: ConfigNode, stop, http_client: HttpHelper, archive: Archiver,
+             export_nodes: Callable[[], None]):
+    """fetch every node's content (export_nodes), then build and ship the archive"""
+    export_level = config.user_inputs.export_level
     try:
         # get all content for each node
-        archive.get_bookstack_exports(nodes)
+        export_nodes()
 
         # Graceful shutdown requested mid-cycle: drop the partial tar and skip
         # gzip/upload/cleanup so a cancelled cycle never produces an archive.
@@ -234,6 +407,7 @@ def exporter(config: ConfigNode, stop=None):
         # nothing was written to the tar (e.g. every node empty or all fetches failed):
         # skip gzip/upload/cleanup so we don't crash gzipping a non-existent tar.
         if not archive.has_exported_content:
+            _raise_if_aborted(http_client.guard)
             log.warning("No %s content was archived. Nothing to upload", export_level)
             return None
 
@@ -243,6 +417,9 @@ def exporter(config: ConfigNode, stop=None):
         # attempt every remote target, then derive status (raises only when no copy survives)
         outcomes = archive.archive_remote()
         status = archive.resolve_remote_status(outcomes)
+        if _aborted(http_client.guard):
+            # the archive holds what was fetched before the guard tripped
+            status = ExportStatus.PARTIAL
 
         # Local retention pruning is housekeeping: at this point durable copies exist
         # (resolve_remote_status raised otherwise), so a failed local delete downgrades
@@ -258,10 +435,15 @@ def exporter(config: ConfigNode, stop=None):
             status = ExportStatus.PARTIAL
             cleanup_error = str(err)
 
-        log.info("Created file archive: %s.tgz", archive.archive_dir)
+        if len(archive.archive_files) > 1:
+            log.info("Export output: %s (%d volumes)", archive.archive_file,
+                     len(archive.archive_files))
+        else:
+            log.info("Export output: %s", archive.archive_file)
         log.info("Completed run")
         return NotifyResult(status=status, local=archive.archive_file, uploads=outcomes,
-                            removed=removed, cleanup_error=cleanup_error)
+                            removed=removed, cleanup_error=cleanup_error,
+                            aborted=_aborted(http_client.guard))
     finally:
         # Eager cleanup of THIS cycle's partial on every terminal path (stop,
         # exception, one-shot KeyboardInterrupt). No-op on success: the tar is
@@ -13,6 +13,7 @@ from bookstack_file_exporter.archiver.asset_archiver import (
 )
 from bookstack_file_exporter.config_helper.models import HttpConfig
 from bookstack_file_exporter.exporter.node import Node
+from tests.helpers import json_via_request
 
 FIXTURES_DIR = Path(__file__).parent / "fixtures"
 
@@ -48,9 +49,8 @@ def page_detail():
 
 @pytest.fixture
 def mock_http_client():
-    """MagicMock substitute for HttpHelper"""
-    client = MagicMock()
-    return client
+    """MagicMock substitute for HttpHelper (http_get_json reads http_get_request)"""
+    return json_via_request(MagicMock())
 
 
 @pytest.fixture
@@ -140,7 +140,7 @@ def asset_archiver():
         "images": "https://wiki.example.com/api/image-gallery",
         "attachments": "https://wiki.example.com/api/attachments",
     }
-    http_client = MagicMock()
+    http_client = json_via_request(MagicMock())
     return AssetArchiver(urls, http_client)
 
 
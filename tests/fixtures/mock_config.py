@@ -1,12 +1,19 @@
 # pylint: disable=missing-class-docstring,missing-function-docstring
-# pylint: disable=too-many-arguments,too-many-positional-arguments,duplicate-code
+# pylint: disable=too-many-arguments,too-many-positional-arguments,duplicate-code,too-many-locals
 """Shared MagicMock factory for AssetArchiver/PageArchiver config tests."""
 from unittest.mock import MagicMock
 
+from bookstack_file_exporter.config_helper.models import Compression, DirectoryOutput
+
 
 def make_mock_config(*, formats=None, export_images=False, export_attachments=False,
                      export_meta=False, modify_links=False,
-                     export_level="pages", export_workers=1) -> MagicMock:
+                     export_level="pages", export_workers=1,
+                     compression=None, output_mode="tar",
+                     directory_archive=False, directory_prune=False, dedup=False,
+                     manifest=False, index=False,
+                     max_volume_size=None, encryption=None,
+                     max_inflight_bytes=None, spool_threshold=None) -> MagicMock:
     config = MagicMock()
     config.urls = {
         "books": "https://wiki.test.example/api/books",
@@ -22,4 +29,15 @@ def make_mock_config(*, formats=None, export_images=False, export_attachments=Fa
     config.user_inputs.assets.modify_links = modify_links
     config.user_inputs.export_level = export_level
     config.user_inputs.export_workers = export_workers
+    config.user_inputs.compression = compression or Compression()
+    config.user_inputs.output_mode = output_mode
+    config.user_inputs.directory = DirectoryOutput(archive=directory_archive,
+                                                     prune=directory_prune)
+    config.user_inputs.dedup = dedup
+    config.user_inputs.manifest = manifest
+    config.user_inputs.index = index
+    config.user_inputs.max_volume_size = max_volume_size
+    config.user_inputs.encryption = encryption
+    config.user_inputs.max_inflight_bytes = max_inflight_bytes
+    config.user_inputs.spool_threshold = spool_threshold
     return config
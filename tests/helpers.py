@@ -1,10 +1,64 @@
 # pylint: disable=missing-class-docstring,missing-function-docstring
 """Shared test helpers (non-fixture)."""
+import asyncio
+import json
+from types import SimpleNamespace
 from unittest.mock import MagicMock
 
+from bookstack_file_exporter.common.single_flight import SingleFlight
+
 
 def make_response(payload):
     """Build a MagicMock that mimics requests.Response for given json payload."""
     resp = MagicMock()
     resp.json.return_value = payload
     return resp
+
+
+def json_via_request(client):
+    """Point a MagicMock HttpHelper's http_get_json at its http_get_request, as the
+    real helper reads JSON when no response cache is configured, and give it a real
+    single_flight. Returns client."""
+    client.http_get_json.side_effect = (
+        lambda url, updated_at=None: client.http_get_request(url).json())
+    client.single_flight = SingleFlight()
+    return client
+
+
+def guardless_http_helper():
+    """run.HttpHelper class double whose instances have no run guard (deadline and
+    circuit_breaker unset)."""
+    return MagicMock(return_value=MagicMock(guard=None))
+
+
+class FakeAsyncClient:
+    """Async client double: routes map url -> body, status code, exception, or a list
+    of those served one per call."""
+    def __init__(self, routes, delay=0.0):
+        self.routes = routes
+        self.delay = delay
+        self.calls = []
+        self.headers = []
+        self.closed = False
+
+    async def get(self, url, headers=None):
+        self.calls.append(url)
+        self.headers.append(headers or {})
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        route = self.routes.get(url, 404)
+        if isinstance(route, list):
+            route = route.pop(0)
+        if isinstance(route, BaseException):
+            raise route
+        headers = {}
+        if isinstance(route, tuple):
+            route, headers = route
+        if isinstance(route, int):
+            return SimpleNamespace(status_code=route, headers=headers, content=b"")
+        if isinstance(route, (dict, list)):
+            route = json.dumps(route).encode()
+        return SimpleNamespace(status_code=200, headers=headers, content=route)
+
+    async def aclose(self):
+        self.closed = True
@@ -5,8 +5,10 @@ overrides and schema changes are absorbed in one place.
 """
 import pytest
 
-from bookstack_file_exporter.config_helper.models import S3StorageConfig
+from bookstack_file_exporter.common.async_http import AsyncHttpHelper
+from bookstack_file_exporter.config_helper.models import HttpConfig, S3StorageConfig
 from bookstack_file_exporter.config_helper.remote import S3ProviderConfig
+from tests.helpers import FakeAsyncClient
 
 
 @pytest.fixture
@@ -26,3 +28,24 @@ def make_provider(make_storage_entry):  # pylint: disable=redefined-outer-name
     def _make(**overrides):
         return S3ProviderConfig(make_storage_entry(**overrides))
     return _make
+
+
+@pytest.fixture
+def make_async_http():
+    """Factory for an AsyncHttpHelper over a FakeAsyncClient; returns (helper, client).
+
+    kwargs are HttpConfig overrides (backoff_factor defaults to 0). Helpers are
+    closed at teardown.
+    """
+    helpers = []
+
+    def _make(routes, concurrency=2, delay=0.0, **http):
+        client = FakeAsyncClient(routes, delay)
+        config = HttpConfig(**{"backoff_factor": 0, **http})
+        helper = AsyncHttpHelper({}, config, concurrency=concurrency,
+                                 client_factory=lambda: client)
+        helpers.append(helper)
+        return helper, client
+    yield _make
+    for helper in helpers:
+        helper.close()
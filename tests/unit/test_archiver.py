@@ -10,13 +10,14 @@ from unittest.mock import MagicMock
 
 import pytest
 
+from bookstack_file_exporter.archiver import codecs
 from bookstack_file_exporter.archiver.archiver import Archiver, AggregateUploadError
+from bookstack_file_exporter.archiver.sink import SinkStats
 from bookstack_file_exporter.notify.models import ExportStatus, UploadOutcome
 from bookstack_file_exporter.archiver.node_archiver import (
     BookArchiver,
     ChapterArchiver,
     PageArchiver,
-    _FILE_EXTENSION_MAP,
 )
 from tests.fixtures.mock_config import make_mock_config as _make_config
 
@@ -54,7 +55,7 @@ class TestSetStop:
 
 class TestDiscardPartial:
     def test_removes_tar_and_partial_when_present(self, archiver_instance, tmp_path):
-        tar = tmp_path / "bkps_2026.tar"
+        tar = tmp_path / "bkps_2026.tar.partial"
         partial = tmp_path / "bkps_2026.tgz.partial"
         tar.write_bytes(b"x")
         partial.write_bytes(b"y")
@@ -67,7 +68,7 @@ class TestDiscardPartial:
         assert not partial.exists()
 
     def test_logs_each_removed_path(self, archiver_instance, tmp_path, caplog):
-        tar = tmp_path / "bkps_2026.tar"
+        tar = tmp_path / "bkps_2026.tar.partial"
         tar.write_bytes(b"x")
         archiver_instance._archiver.tar_file = str(tar)
         archiver_instance._archiver.archive_file = str(tmp_path / "bkps_2026.tgz")
@@ -91,6 +92,17 @@ class TestDiscardPartial:
         # must not raise (all-empty cycle writes no tar)
         archiver_instance.discard_partial()
 
+    def test_removes_volume_partials(self, archiver_instance, tmp_path):
+        archiver_instance.archive_dir = str(tmp_path / "bkps_2026")
+        archiver_instance._archiver.tar_file = str(tmp_path / "bkps_2026.tar.partial")
+        archiver_instance._archiver.archive_file = str(tmp_path / "bkps_2026.tgz")
+        volumes = [tmp_path / f"bkps_2026.part00{n}.tgz.partial" for n in (1, 2)]
+        for volume in volumes:
+            volume.write_bytes(b"x")
+        assert archiver_instance.has_exported_content
+        archiver_instance.discard_partial()
+        assert not any(volume.exists() for volume in volumes)
+
     def test_does_not_touch_final_tgz(self, archiver_instance, tmp_path):
         final = tmp_path / "bkps_2026.tgz"
         final.write_bytes(b"done")
@@ -103,18 +115,21 @@ class TestDiscardPartial:
 class TestSweepOrphans:
     def test_removes_prior_tar_and_partial_orphans(self, archiver_instance, tmp_path):
         archiver_instance.config.base_dir_name = str(tmp_path / "bkps")
-        archiver_instance._archiver.file_extension_map = _FILE_EXTENSION_MAP
-        orphan_tar = tmp_path / "bkps_2026-01-01.tar"
+        orphan_tar = tmp_path / "bkps_2026-01-01.tar.partial"
         orphan_partial = tmp_path / "bkps_2026-01-01.tgz.partial"
+        orphan_zst = tmp_path / "bkps_2026-01-01.tar.zst.partial"
         keep_tgz = tmp_path / "bkps_2026-01-01.tgz"
-        for f in (orphan_tar, orphan_partial, keep_tgz):
+        keep_tar = tmp_path / "bkps_2026-01-02.tar"  # finished archive under codec 'none'
+        for f in (orphan_tar, orphan_partial, orphan_zst, keep_tgz, keep_tar):
             f.write_bytes(b"x")
 
         archiver_instance.sweep_orphans()
 
         assert not orphan_tar.exists()
         assert not orphan_partial.exists()
+        assert not orphan_zst.exists()
         assert keep_tgz.exists()  # finished archives are not swept
+        assert keep_tar.exists()
 
     def test_sweeps_orphans_across_export_levels(self, mock_config, mock_http_client,
                                                  tmp_path):
@@ -123,7 +138,6 @@ class TestSweepOrphans:
         mock_config.base_dir_name = str(tmp_path / "bkps")
         mock_config.user_inputs.export_level = "books"
         archiver = Archiver(mock_config, mock_http_client, node_archiver=MagicMock())
-        archiver._archiver.file_extension_map = _FILE_EXTENSION_MAP
         pages_partial = tmp_path / "bkps_2026-01-01.tgz.partial"
         books_partial = tmp_path / "bkps_books_2026-01-01.tgz.partial"
         chapters_partial = tmp_path / "bkps_chapters_2026-01-01.tgz.partial"
@@ -152,6 +166,22 @@ class TestHasExportedContent:
         archiver_instance._archiver.tar_file = str(tar_path)
         assert archiver_instance.has_exported_content is True
 
+    @pytest.mark.parametrize("members,expected", [(0, False), (3, True)])
+    def test_directory_mode_uses_written_members(self, archiver_instance, mock_config,
+                                                 members, expected):
+        # the tree outlives the run, so its existence proves nothing about this run
+        mock_config.user_inputs.output_mode = "directory"
+        archiver_instance._archiver.write_stats = SinkStats(members=members)
+        assert archiver_instance.has_exported_content is expected
+
+    def test_true_when_streamed_partial_exists(self, archiver_instance, tmp_path):
+        # compression.streaming writes straight into the .partial; no tar exists
+        partial = tmp_path / "present.tgz.partial"
+        partial.write_bytes(b"data")
+        archiver_instance._archiver.tar_file = str(tmp_path / "absent.tar")
+        archiver_instance._archiver.archive_file = str(tmp_path / "present.tgz")
+        assert archiver_instance.has_exported_content is True
+
 
 class TestLevelBaseDir:
     """Non-default export levels suffix the archive base name (and thus scope keep_last)."""
@@ -221,6 +251,17 @@ class TestBuildArchiver:
         archiver = Archiver(config, mock_http_client)
         assert isinstance(archiver._archiver, PageArchiver)
 
+    @pytest.mark.parametrize("export_level", ["books", "chapters", "pages"])
+    def test_every_level_takes_the_same_user_inputs(self, mock_http_client, export_level):
+        config = _make_config(export_level=export_level, formats=["markdown"],
+                              output_mode="directory", directory_prune=True)
+        config.base_dir_name = "bkps"
+        config.user_inputs.output_path = ""
+        archiver = Archiver(config, mock_http_client)
+        assert archiver._archiver.output_mode == "directory"
+        assert archiver._archiver.prune
+        assert archiver._archiver.output_dir == archiver.base_dir
+
 
 # ---------------------------------------------------------------------------
 # _filter_archives
@@ -379,6 +420,52 @@ def test_get_stale_archives_count_gt_keep_last(
     assert result == ["a.tgz", "b.tgz"]
 
 
+def test_get_stale_archives_counts_every_codec(archiver_instance, mock_config, tmp_path):
+    """keep_last spans codecs: switching codec must not strand older archives."""
+    mock_config.user_inputs.keep_last = 1
+    archiver_instance.base_dir = str(tmp_path / "bkps")
+    names = ["bkps_1.tgz", "bkps_2.tar.zst", "bkps_3.tar.xz", "bkps_4.tar.lz4", "bkps_5.tar"]
+    for name in names:
+        (tmp_path / name).write_bytes(b"x")
+    (tmp_path / "bkps_6.tgz.partial").write_bytes(b"x")  # in-progress, never retained
+
+    result = archiver_instance._get_stale_archives()
+
+    assert len(result) == 4
+    assert {os.path.basename(p) for p in result} <= set(names)
+
+
+def test_clean_up_removes_manifest_sidecar(archiver_instance, mock_config, tmp_path):
+    mock_config.user_inputs.keep_last = -1
+    archiver_instance.base_dir = str(tmp_path / "bkps")
+    (tmp_path / "bkps_1.tgz").write_bytes(b"x")
+    (tmp_path / "bkps_1.tgz.manifest.json").write_bytes(b"{}")
+
+    archiver_instance.clean_up()
+
+    assert not list(tmp_path.iterdir())
+
+
+def test_get_stale_archives_counts_volume_set_once(
+    monkeypatch, archiver_instance, mock_config, tmp_path
+):
+    """keep_last counts backups: the volumes of one run are kept or deleted together."""
+    mock_config.user_inputs.keep_last = 1
+    archiver_instance.base_dir = str(tmp_path / "bkps")
+    old = ["bkps_1.part001.tgz", "bkps_1.part002.tgz"]
+    new = ["bkps_2.part001.tgz", "bkps_2.part002.tgz", "bkps_2.part003.tgz"]
+    for name in old + new:
+        (tmp_path / name).write_bytes(b"x")
+    monkeypatch.setattr(os, "stat", _make_stat_patcher(
+        {str(tmp_path / name): ctime for ctime, name in enumerate(old + new)}))
+    (tmp_path / "bkps_1.tgz.manifest.json").write_bytes(b"{}")
+
+    removed = archiver_instance.clean_up()
+
+    assert sorted(os.path.basename(p) for p in removed) == old
+    assert sorted(p.name for p in tmp_path.iterdir()) == new
+
+
 def test_get_stale_archives_empty_list(
     monkeypatch, archiver_instance, mock_config, patch_scan_archives
 ):
@@ -476,7 +563,6 @@ def test_archive_remote_all_success(archiver_instance, mock_config):
 
     archiver_instance._s3_archiver_cls = MagicMock(side_effect=make_instance)
     archiver_instance._archiver.archive_file = "/local/archive.tgz"
-    archiver_instance._archiver.file_extension_map = {"tgz": ".tgz"}
 
     outcomes = archiver_instance.archive_remote()
 
@@ -484,6 +570,21 @@ def test_archive_remote_all_success(archiver_instance, mock_config):
         ("minio/b", "minio-b/a.tgz", None), ("s3/aws", "s3-aws/a.tgz", None)]
 
 
+def test_archive_remote_uploads_volumes_together(archiver_instance, mock_config):
+    mock_config.object_storage_config = [_provider_entry("s3/aws")]
+    inst = MagicMock()
+    inst.upload_backups.return_value = ["b/a.part001.tgz", "b/a.part002.tgz"]
+    archiver_instance._s3_archiver_cls = MagicMock(return_value=inst)
+    archiver_instance._archiver.archive_files = ["/l/a.part001.tgz", "/l/a.part002.tgz"]
+
+    outcomes = archiver_instance.archive_remote()
+
+    inst.upload_backups.assert_called_once_with(
+        ["/l/a.part001.tgz", "/l/a.part002.tgz"], 4)
+    inst.upload_backup.assert_not_called()
+    assert outcomes[0].dest == "b/a.part001.tgz (+1 more volumes)"
+
+
 def test_archive_remote_one_fails_others_still_attempted(archiver_instance, mock_config):
     """A failing target does not abort the batch; its outcome records the error."""
     mock_config.object_storage_config = [
@@ -499,7 +600,6 @@ def test_archive_remote_one_fails_others_still_attempted(archiver_instance, mock
 
     archiver_instance._s3_archiver_cls = MagicMock(side_effect=make_instance)
     archiver_instance._archiver.archive_file = "/local/archive.tgz"
-    archiver_instance._archiver.file_extension_map = {"tgz": ".tgz"}
 
     outcomes = archiver_instance.archive_remote()
 
@@ -513,7 +613,6 @@ def test_archive_remote_construction_failure_recorded(archiver_instance, mock_co
     mock_config.object_storage_config = [_provider_entry("s3/dr")]
     archiver_instance._s3_archiver_cls = MagicMock(side_effect=ValueError("no such bucket"))
     archiver_instance._archiver.archive_file = "/local/archive.tgz"
-    archiver_instance._archiver.file_extension_map = {"tgz": ".tgz"}
 
     outcomes = archiver_instance.archive_remote()
 
@@ -542,7 +641,6 @@ def test_archive_remote_uploads_run_concurrently(archiver_instance, mock_config)
 
     archiver_instance._s3_archiver_cls = MagicMock(side_effect=make_instance)
     archiver_instance._archiver.archive_file = "/local/archive.tgz"
-    archiver_instance._archiver.file_extension_map = {"tgz": ".tgz"}
 
     outcomes = archiver_instance.archive_remote()
 
@@ -597,7 +695,6 @@ def test_archive_remote_retention_failure_is_warning_not_failure(archiver_instan
     inst.clean_up.side_effect = RuntimeError("delete denied")
     archiver_instance._s3_archiver_cls = MagicMock(return_value=inst)
     archiver_instance._archiver.archive_file = "/local/archive.tgz"
-    archiver_instance._archiver.file_extension_map = {"tgz": ".tgz"}
 
     outcomes = archiver_instance.archive_remote()
 
@@ -606,6 +703,17 @@ def test_archive_remote_retention_failure_is_warning_not_failure(archiver_instan
     assert "delete denied" in outcomes[0].warning
 
 
+def test_archive_remote_retention_matches_every_codec(archiver_instance, mock_config):
+    mock_config.object_storage_config = [_provider_entry("s3/aws")]
+    inst = MagicMock()
+    archiver_instance._s3_archiver_cls = MagicMock(return_value=inst)
+    archiver_instance._archiver.archive_file = "/local/archive.tar.zst"
+
+    archiver_instance.archive_remote()
+
+    inst.clean_up.assert_called_once_with(codecs.ARCHIVE_EXTENSIONS)
+
+
 def test_resolve_status_upload_ok_but_warning_is_partial(archiver_instance):
     out = [UploadOutcome(label="a", dest="a/x.tgz", error=None, warning="prune failed")]
     assert archiver_instance.resolve_remote_status(out) is ExportStatus.PARTIAL
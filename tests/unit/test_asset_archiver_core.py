@@ -2,6 +2,10 @@
 # pylint: disable=redefined-outer-name,protected-access
 """Unit tests for AssetArchiver markdown link-rewrite behavior (Phase 0 + Phase 1)."""
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
 
 import pytest
 
@@ -275,6 +279,30 @@ def test_get_asset_bytes_unknown_type_raises_valueerror(asset_archiver):
         asset_archiver.get_asset_bytes("widgets", "https://wiki.example.com/x")
 
 
+def test_get_asset_bytes_shares_one_download_between_concurrent_callers(asset_archiver):
+    started, release = threading.Event(), threading.Event()
+
+    def _slow(_url, **_kwargs):
+        started.set()
+        release.wait(5)
+        return MagicMock(content=b"png")
+    asset_archiver.http_client.http_get_request.side_effect = _slow
+    flights = asset_archiver.http_client.single_flight
+    url = "https://wiki.example.com/uploads/images/a.png"
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(asset_archiver.get_asset_bytes, "images", url)]
+        started.wait(5)
+        futures += [executor.submit(asset_archiver.get_asset_bytes, "images", url)
+                    for _ in range(2)]
+        while flights.calls < 3:
+            time.sleep(0.001)
+        release.set()
+        results = [future.result() for future in futures]
+    assert results == [b"png"] * 3
+    assert asset_archiver.http_client.http_get_request.call_count == 1
+    assert flights.shared == 2
+
+
 def test_create_attachment_map_skips_external(asset_archiver):
     json_data = [
         {"id": 1, "uploaded_to": 7, "name": "a.pdf", "external": False},
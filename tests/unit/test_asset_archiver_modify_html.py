@@ -9,6 +9,7 @@ from requests.exceptions import HTTPError
 
 from bookstack_file_exporter.archiver.asset_archiver import AssetArchiver, ImageNode
 from bookstack_file_exporter.archiver.node_archiver import PageArchiver
+from bookstack_file_exporter.common.single_flight import SingleFlight
 from bookstack_file_exporter.common.util import HttpHelper
 
 from tests.fixtures.mock_config import make_mock_config
@@ -119,7 +120,7 @@ class TestPhase4PageArchiverDispatch:  # pylint: disable=too-few-public-methods
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"<html><body>content</body></html>",
         ), patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
         ):
             archiver.archive({5: page})
 
@@ -149,7 +150,7 @@ class TestPhase4PageArchiverDispatch:  # pylint: disable=too-few-public-methods
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"<html><body>test</body></html>",
         ), patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
         ):
             archiver.archive({5: page})
 
@@ -184,7 +185,7 @@ class TestPhase4PageArchiverDispatch:  # pylint: disable=too-few-public-methods
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"<html><body>content</body></html>",
         ), patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
         ):
             archiver.archive({5: page})
 
@@ -210,9 +211,11 @@ class TestPhase4PageArchiverDispatch:  # pylint: disable=too-few-public-methods
 
         good_node = MagicMock(spec=ImageNode)
         good_node.id_ = 10
+        good_node.updated_at = None
         good_node.download_url = "https://wiki.example.com/uploads/images/10/good.png"
         bad_node = MagicMock(spec=ImageNode)
         bad_node.id_ = 99
+        bad_node.updated_at = None
         bad_node.download_url = "https://wiki.example.com/uploads/images/99/bad.png"
 
         mock_asset.get_asset_nodes.side_effect = lambda asset_type: (
@@ -233,7 +236,7 @@ class TestPhase4PageArchiverDispatch:  # pylint: disable=too-few-public-methods
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"<html><body>content</body></html>",
         ), patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
         ):
             archiver.archive({5: page})
 
@@ -313,10 +316,11 @@ class TestE2eHtmlRewrite:  # pylint: disable=too-few-public-methods
             "url": self.IMAGE_URL,
         }]
         http_client.http_get_request.return_value.content = b"fake_png_bytes"
+        http_client.single_flight = SingleFlight()
 
         written: dict = {}
 
-        def capture_write(_base_tar_dir: str, file_path: str, data: bytes) -> None:
+        def capture_write(file_path: str, data: bytes, **_kwargs) -> None:
             written[file_path] = data
 
         parent = build_node(id=1, name="my-book", slug="my-book")
@@ -330,7 +334,7 @@ class TestE2eHtmlRewrite:  # pylint: disable=too-few-public-methods
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=self.PAGE_HTML.encode(),
         ), patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar",
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data",
             side_effect=capture_write,
         ):
             archiver.archive({self.PAGE_ID: page})
@@ -0,0 +1,178 @@
+# pylint: disable=missing-class-docstring,missing-function-docstring,redefined-outer-name,protected-access
+"""Unit tests for the asyncio export engine (discovery and archive on one event loop)."""
+import asyncio
+import json
+import tarfile
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from bookstack_file_exporter.archiver.node_archiver import PageArchiver
+from bookstack_file_exporter.exporter.async_exporter import AsyncNodeExporter
+from bookstack_file_exporter.exporter.exporter import NodeExporter
+from tests.fixtures.mock_config import make_mock_config
+from tests.helpers import make_response
+
+_HOST = "https://wiki.test.example"
+_IMAGE_URL = f"{_HOST}/uploads/images/gallery/a.png"
+
+
+def _page(page_id, slug, **extra):
+    return {"id": page_id, "name": slug, "slug": slug, **extra}
+
+
+_TREE = {
+    f"{_HOST}/api/shelves?count=500&offset=0": {"data": [{"id": 1}], "total": 1},
+    f"{_HOST}/api/shelves/1": {"id": 1, "name": "Shelf", "slug": "shelf",
+                               "books": [{"id": 10, "name": "Book", "slug": "book"}]},
+    f"{_HOST}/api/books/10": {"id": 10, "name": "Book", "slug": "book", "contents": [
+        {"id": 100, "type": "page", "name": "p1", "slug": "p1"},
+        {"id": 200, "type": "chapter", "name": "ch", "slug": "ch",
+         "pages": [{"id": 101, "name": "p2", "slug": "p2"}]},
+        {"id": 102, "type": "page", "name": "p3", "slug": "p3"}]},
+    f"{_HOST}/api/books?count=500&offset=0": {
+        "data": [{"id": 10, "name": "Book"}, {"id": 11, "name": "Loose"}], "total": 2},
+    f"{_HOST}/api/books/11": {"id": 11, "name": "Loose", "slug": "loose", "contents": [
+        {"id": 103, "type": "page", "name": "p4", "slug": "p4"}]},
+    f"{_HOST}/api/chapters/200": {"id": 200, "name": "ch", "slug": "ch",
+                                  "pages": [_page(101, "p2")]},
+    **{f"{_HOST}/api/pages/{pid}": _page(pid, slug)
+       for pid, slug in ((100, "p1"), (101, "p2"), (102, "p3"), (103, "p4"))},
+}
+
+
+@pytest.fixture
+def async_http(make_async_http):
+    return lambda routes: make_async_http(routes, concurrency=4, retry_count=0)
+
+
+def _discover(exporter):
+    shelves = exporter.get_all_shelves()
+    books = exporter.get_all_books(shelves, "unassigned")
+    pages = exporter.get_all_pages(books)
+    return books, pages
+
+
+def test_async_discovery_matches_thread_engine(api_urls, async_http, mock_http_client):
+    helper, _ = async_http(dict(_TREE))
+    sync_client = mock_http_client
+    sync_client.http_get_all.side_effect = lambda url: _TREE[f"{url}?count=500&offset=0"]["data"]
+    sync_client.http_get_request.side_effect = lambda url: make_response(_TREE[url])
+
+    expected = _discover(NodeExporter(api_urls, sync_client))
+    actual = _discover(AsyncNodeExporter(api_urls, helper))
+
+    for want, got in zip(expected, actual):
+        # same ids in the same order, same output paths
+        assert list(got) == list(want)
+        assert [n.file_path for n in got.values()] == [n.file_path for n in want.values()]
+    assert list(actual[1]) == [100, 102, 103, 101]
+
+
+def test_async_discovery_stop_skips_detail_fetches(api_urls, async_http):
+    helper, client = async_http(dict(_TREE))
+    stop = threading.Event()
+    stop.set()
+    exporter = AsyncNodeExporter(api_urls, helper, stop=stop)
+    assert not exporter.get_all_shelves()
+    assert client.calls == [f"{_HOST}/api/shelves?count=500&offset=0"]
+
+
+def _archiver(tmp_path, helper, **config):
+    config = make_mock_config(**config)
+    http_client = MagicMock()
+    http_client.http_get_all.return_value = [
+        {"id": 5, "uploaded_to": 2, "url": _IMAGE_URL, "updated_at": "2026-01-01"}]
+    return PageArchiver(str(tmp_path / "bs"), config, http_client,
+                        output_dir=str(tmp_path), async_http=helper)
+
+
+def _members(archiver) -> dict[str, bytes]:
+    archiver.compress_archive()
+    with tarfile.open(archiver.archive_file) as tar:
+        return {m.name: tar.extractfile(m).read() for m in tar.getmembers()}
+
+
+def _pages(build_node, count):
+    parent = build_node(id=1, name="bk", slug="bk")
+    return {i: build_node(id=i, name=f"p{i}", slug=f"p{i}", parent=parent)
+            for i in range(2, 2 + count)}
+
+
+def test_async_archive_writes_assets_and_rewritten_formats(tmp_path, async_http,
+                                                           build_node):
+    pages_url = f"{_HOST}/api/pages"
+    routes = {
+        _IMAGE_URL: b"png-bytes",
+        f"{_HOST}/api/image-gallery/5": {"content": {"markdown": f"![a]({_IMAGE_URL})"}},
+        f"{pages_url}/2/export/markdown": f"![a]({_IMAGE_URL})".encode(),
+        f"{pages_url}/2/export/html": f'<a href="{_IMAGE_URL}"><img src="x"></a>'.encode(),
+        f"{pages_url}/3/export/markdown": b"plain",
+        f"{pages_url}/3/export/html": 500,
+    }
+    helper, client = async_http(routes)
+    archiver = _archiver(tmp_path, helper, formats=["markdown", "html"],
+                         export_images=True, modify_links=True, export_meta=True)
+
+    archiver.archive(_pages(build_node, 2))
+    members = _members(archiver)
+
+    assert members["bs/bk/images/p2/a.png"] == b"png-bytes"
+    assert members["bs/bk/p2.md"] == b"![a](images/p2/a.png)"
+    assert b'href="images/p2/a.png"' in members["bs/bk/p2.html"]
+    assert members["bs/bk/p3.md"] == b"plain"
+    assert "bs/bk/p3.html" not in members  # failed format skipped, node kept
+    assert json.loads(members["bs/bk/p2_meta.json"])["id"] == 2
+    # detail JSON fetched once for both formats (html needs none for images)
+    assert client.calls.count(f"{_HOST}/api/image-gallery/5") == 1
+    assert helper.peak_in_flight <= helper.concurrency
+
+
+def test_async_archive_node_failure_is_isolated(tmp_path, async_http, build_node):
+    pages_url = f"{_HOST}/api/pages"
+    routes = {f"{pages_url}/{i}/export/markdown": f"page {i}".encode() for i in range(2, 6)}
+    routes[f"{pages_url}/4/export/markdown"] = KeyError("malformed")
+    helper, _ = async_http(routes)
+    archiver = _archiver(tmp_path, helper)
+
+    archiver.archive(_pages(build_node, 4))
+
+    assert sorted(_members(archiver)) == ["bs/bk/p2.md", "bs/bk/p3.md", "bs/bk/p5.md"]
+
+
+def test_async_archive_stop_before_run_fetches_nothing(tmp_path, async_http, build_node):
+    helper, client = async_http({})
+    archiver = _archiver(tmp_path, helper, export_images=True)
+    stop = threading.Event()
+    stop.set()
+    archiver._stop = stop
+
+    archiver.archive(_pages(build_node, 5))
+
+    assert not client.calls
+    assert not archiver.write_stats.members
+
+
+def test_async_archive_draws_nodes_no_faster_than_it_exports(tmp_path, async_http,
+                                                             build_node):
+    """At most _POOL_PENDING_PER_WORKER x export_workers node tasks are alive, so a
+    node stream is drawn only that far ahead of the finished nodes."""
+    helper, _ = async_http({})
+    archiver = _archiver(tmp_path, helper, export_workers=2)
+    parent = build_node(id=1, name="bk", slug="bk")
+    done, ahead = [], []
+
+    async def _export(node, *_args):
+        await asyncio.sleep(0.001)
+        done.append(node.id_)
+
+    def _stream():
+        for i in range(2, 42):
+            ahead.append(i - 2 - len(done))
+            yield build_node(id=i, name=f"p{i}", slug=f"p{i}", parent=parent)
+
+    with patch.object(archiver, "_aexport_node", side_effect=_export):
+        archiver.archive_stream(_stream())
+    assert sorted(done) == list(range(2, 42))
+    assert max(ahead) <= 4 * 2
@@ -0,0 +1,176 @@
+# pylint: disable=missing-class-docstring,missing-function-docstring,protected-access
+"""Unit tests for the asyncio engine's HTTP transport."""
+import asyncio
+import threading
+
+import pytest
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import HTTPError, RetryError
+
+from bookstack_file_exporter.common import async_http
+from bookstack_file_exporter.common.async_http import AsyncHttpHelper, gather_all
+from bookstack_file_exporter.common.concurrency import AdaptiveConcurrency
+from bookstack_file_exporter.common.http_cache import HttpCache
+from bookstack_file_exporter.common.rate_limit import RateLimiter
+from bookstack_file_exporter.config_helper.models import HttpConfig
+
+
+def test_get_returns_buffered_response(make_async_http):
+    helper, _ = make_async_http({"u": {"a": 1}})
+    response = helper.run(helper.get("u"))
+    assert response.status_code == 200
+    assert response.json() == {"a": 1}
+
+
+def test_retries_retry_codes_then_succeeds(make_async_http):
+    helper, client = make_async_http({"u": [503, 502, b"ok"]})
+    assert helper.run(helper.get("u")).content == b"ok"
+    assert len(client.calls) == 3
+    assert helper.requests == 3
+
+
+def test_exhausted_retries_raise_retry_error(make_async_http):
+    helper, client = make_async_http({"u": [500, 500, 500]}, retry_count=2)
+    with pytest.raises(RetryError):
+        helper.run(helper.get("u"))
+    assert len(client.calls) == 3
+
+
+def test_other_error_status_raises_http_error_without_retry(make_async_http):
+    helper, client = make_async_http({})
+    with pytest.raises(HTTPError):
+        helper.run(helper.get("missing"))
+    assert client.calls == ["missing"]
+
+
+def test_connection_errors_retry_then_raise(make_async_http):
+    helper, client = make_async_http({"u": [OSError("reset")] * 3}, retry_count=2)
+    with pytest.raises(RequestsConnectionError):
+        helper.run(helper.get("u"))
+    assert len(client.calls) == 3
+
+
+def test_retry_after_is_honored(make_async_http, monkeypatch):
+    helper, _ = make_async_http({"u": [(429, {"Retry-After": "7"}), b"ok"]})
+    waits = []
+    real_sleep = asyncio.sleep
+
+    async def _sleep(seconds):
+        waits.append(seconds)
+        await real_sleep(0)
+    monkeypatch.setattr(async_http.asyncio, "sleep", _sleep)
+    helper.run(helper.request("u"))
+    assert waits == [7.0]
+
+
+def test_backoff_follows_urllib3_schedule():
+    helper = AsyncHttpHelper({}, HttpConfig(backoff_factor=2), client_factory=object)
+    try:
+        assert [helper._backoff(n) for n in (1, 2, 3, 10)] == [0.0, 4.0, 8.0, 120]
+    finally:
+        helper.close()
+
+
+def test_get_all_follows_pagination(make_async_http):
+    routes = {
+        "https://h/api/books?count=2&offset=0": {"data": [{"id": 1}, {"id": 2}], "total": 3},
+        "https://h/api/books?count=2&offset=2": {"data": [{"id": 3}], "total": 3},
+    }
+    helper, _ = make_async_http(routes)
+    assert helper.run(helper.get_all("https://h/api/books", count=2)) == [
+        {"id": 1}, {"id": 2}, {"id": 3}]
+
+
+def test_slots_cap_requests_in_flight(make_async_http):
+    helper, client = make_async_http({f"u{i}": b"x" for i in range(12)}, concurrency=3,
+                                 delay=0.01)
+    helper.run(gather_all([helper.get(f"u{i}") for i in range(12)]))
+    assert len(client.calls) == 12
+    assert helper.peak_in_flight == 3
+
+
+def test_gather_all_cancels_siblings_on_failure(make_async_http):
+    helper, _ = make_async_http({})
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def boom():
+        await asyncio.sleep(0)
+        raise KeyError("bad")
+    with pytest.raises(KeyError):
+        helper.run(gather_all([slow(), boom()]))
+    helper.run(asyncio.sleep(0.01))
+    assert cancelled == [True]
+
+
+def test_close_closes_client_and_is_idempotent(make_async_http):
+    helper, client = make_async_http({"u": b"x"})
+    helper.run(helper.get("u"))
+    helper.close()
+    helper.close()
+    assert client.closed
+
+
+def test_builds_httpx_client():
+    httpx = pytest.importorskip("httpx")
+    helper = AsyncHttpHelper({"Authorization": "Token a:b"}, HttpConfig(), concurrency=4)
+    try:
+        client = helper._build_client()
+        assert isinstance(client, httpx.AsyncClient)
+        assert helper._retry_errors == (httpx.TransportError,)
+        assert client.headers["Authorization"] == "Token a:b"
+        helper.run(client.aclose())
+    finally:
+        helper.close()
+
+
+def test_rate_limiter_paces_every_attempt(make_async_http):
+    helper, _ = make_async_http({"u": [(429, {"Retry-After": "0"}), b"ok"]})
+    limiter = RateLimiter(6000)
+    helper.rate_limiter = limiter
+    helper.run(helper.get("u"))
+    assert limiter.requests == 2
+
+
+def test_adaptive_limit_caps_slots_below_concurrency(make_async_http):
+    helper, _ = make_async_http({f"u{i}": b"x" for i in range(12)}, concurrency=6,
+                                delay=0.01)
+    helper.adaptive = AdaptiveConcurrency(2, floor=2)  # limit held at 2
+    helper.run(gather_all([helper.get(f"u{i}") for i in range(12)]))
+    assert helper.peak_in_flight == 2
+
+
+def test_get_json_cache_hit_takes_no_request(make_async_http, tmp_path):
+    helper, client = make_async_http({"u": {"id": 1}})
+    helper.cache = HttpCache(str(tmp_path / "http.db"), 1 << 20)
+    assert helper.run(helper.get_json("u", "t1")) == {"id": 1}
+    assert helper.run(helper.get_json("u", "t1")) == {"id": 1}
+    assert client.calls == ["u"]
+    helper.cache.close()
+
+
+def test_get_json_sends_validators_and_skips_when_stopped(make_async_http, tmp_path):
+    helper, client = make_async_http({"u": [({"id": 1}, {"ETag": "e1"}), 304]})
+    helper.cache = HttpCache(str(tmp_path / "http.db"), 1 << 20)
+    helper.run(helper.get_json("u"))
+    assert helper.run(helper.get_json("u")) == {"id": 1}
+    assert client.headers == [{}, {"If-None-Match": "e1"}]
+    stop = threading.Event()
+    stop.set()
+    assert helper.run(helper.get_json("u", stop=stop)) is None
+    assert len(client.calls) == 2
+    helper.cache.close()
+
+
+def test_get_json_coalesces_concurrent_calls(make_async_http):
+    helper, client = make_async_http({"u": {"id": 1}}, delay=0.01)
+    results = helper.run(gather_all([helper.get_json("u") for _ in range(3)]))
+    assert results == [{"id": 1}] * 3
+    assert client.calls == ["u"]
+    assert helper.single_flight.shared == 2
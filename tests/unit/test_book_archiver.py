@@ -59,9 +59,9 @@ class TestConstruction:
         archiver = _make_book_archiver(tmp_path)
         assert archiver.archive_file.endswith(".tgz")
 
-    def test_tar_file_ends_with_tar(self, tmp_path):
+    def test_tar_file_ends_with_tar_partial(self, tmp_path):
         archiver = _make_book_archiver(tmp_path)
-        assert archiver.tar_file.endswith(".tar")
+        assert archiver.tar_file.endswith(".tar.partial")
 
     def test_archive_base_path_is_last_segment(self, tmp_path):
         archiver = _make_book_archiver(tmp_path)
@@ -77,7 +77,7 @@ class TestConstruction:
 
 
 # ---------------------------------------------------------------------------
-# 2. N books × N formats → N*M write_tar calls
+# 2. N books × N formats → N*M write_data calls
 # ---------------------------------------------------------------------------
 
 class TestArchiveMultipleBooksAndFormats:
@@ -87,7 +87,7 @@ class TestArchiveMultipleBooksAndFormats:
         (2, ["pdf", "html"], 4),
         (3, ["markdown", "html", "pdf"], 9),
     ])
-    def test_write_tar_call_count(self, tmp_path, n_books, formats, expected_writes):
+    def test_write_data_call_count(self, tmp_path, n_books, formats, expected_writes):
         archiver = _make_book_archiver(tmp_path, formats=formats)
         book_nodes = {
             i: _make_book_node(i, f"book-{i}") for i in range(1, n_books + 1)
@@ -96,10 +96,10 @@ class TestArchiveMultipleBooksAndFormats:
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"book content",
         ), patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
-        ) as mock_write_tar:
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
+        ) as mock_write:
             archiver.archive(book_nodes)
-        assert mock_write_tar.call_count == expected_writes
+        assert mock_write.call_count == expected_writes
 
 
 # ---------------------------------------------------------------------------
@@ -116,7 +116,7 @@ class TestExportUrl:
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"data",
         ) as mock_get_bytes, patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
         ):
             archiver.archive({42: book_node})
 
@@ -135,7 +135,7 @@ class TestHTTPErrorHandling:
         archiver = _make_book_archiver(tmp_path, formats=["pdf", "html"])
         book_node = _make_book_node(10, "test-book")
 
-        def side_effect(url, http_client):  # pylint: disable=unused-argument
+        def side_effect(url, http_client, budget=None, **_):  # pylint: disable=unused-argument
             if "pdf" in url:
                 raise HTTPError("pdf failed")
             return b"html content"
@@ -144,12 +144,12 @@ class TestHTTPErrorHandling:
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             side_effect=side_effect,
         ), patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
-        ) as mock_write_tar:
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
+        ) as mock_write:
             archiver.archive({10: book_node})
 
         # pdf skipped, html written — 1 write
-        assert mock_write_tar.call_count == 1
+        assert mock_write.call_count == 1
 
     def test_all_formats_fail_but_meta_still_written(self, tmp_path):
         """All format fetches fail, but export_meta still writes a meta file to the tar."""
@@ -160,12 +160,12 @@ class TestHTTPErrorHandling:
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             side_effect=HTTPError("pdf failed"),
         ), patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
-        ) as mock_write_tar:
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
+        ) as mock_write:
             archiver.archive({10: book_node})
 
         # pdf skipped, but meta still written → 1 write
-        assert mock_write_tar.call_count == 1
+        assert mock_write.call_count == 1
 
 
 # ---------------------------------------------------------------------------
@@ -183,11 +183,11 @@ class TestExportMeta:
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"book data",
         ), patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
-        ) as mock_write_tar:
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
+        ) as mock_write:
             archiver.archive(book_nodes)
         # 2 books × 1 format + 2 meta files = 4 writes
-        assert mock_write_tar.call_count == 4
+        assert mock_write.call_count == 4
 
     def test_meta_not_written_when_disabled(self, tmp_path):
         archiver = _make_book_archiver(tmp_path, formats=["pdf"], export_meta=False)
@@ -196,11 +196,11 @@ class TestExportMeta:
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"book data",
         ), patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
-        ) as mock_write_tar:
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
+        ) as mock_write:
             archiver.archive(book_nodes)
         # 1 book × 1 format only
-        assert mock_write_tar.call_count == 1
+        assert mock_write.call_count == 1
 
 
 # ---------------------------------------------------------------------------
@@ -217,13 +217,13 @@ class TestEmptyBook:
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"data",
         ) as mock_get_bytes, patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
-        ) as mock_write_tar:
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
+        ) as mock_write:
             archiver.archive({99: empty_book, 100: non_empty_book})
 
         # empty book: no fetch, no write; full book: 1 fetch, 1 write
         assert mock_get_bytes.call_count == 1
-        assert mock_write_tar.call_count == 1
+        assert mock_write.call_count == 1
 
     def test_all_empty_books_no_fetch_no_write(self, tmp_path):
         archiver = _make_book_archiver(tmp_path, formats=["pdf"])
@@ -235,12 +235,12 @@ class TestEmptyBook:
         with patch(
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
         ) as mock_get_bytes, patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
-        ) as mock_write_tar:
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
+        ) as mock_write:
             archiver.archive(empty_books)
 
         assert mock_get_bytes.call_count == 0
-        assert mock_write_tar.call_count == 0
+        assert mock_write.call_count == 0
 
 
 # ---------------------------------------------------------------------------
@@ -253,11 +253,11 @@ class TestEmptyInput:
         with patch(
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
         ) as mock_get_bytes, patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
-        ) as mock_write_tar:
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
+        ) as mock_write:
             archiver.archive({})
         assert mock_get_bytes.call_count == 0
-        assert mock_write_tar.call_count == 0
+        assert mock_write.call_count == 0
 
 
 # ---------------------------------------------------------------------------
@@ -281,8 +281,8 @@ class TestFolderLayout:
         archiver = _make_book_archiver(tmp_path, formats=["markdown"])
         node = _make_book_node(1, "my-book")
         written = {}
-        archiver.write_data = written.__setitem__
-        archiver._get_node_data = lambda url: b"# combined"
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
+        archiver._get_node_data = lambda url, _fmt: b"# combined"
         archiver._archive_level({1: node}, "books", "book")
         assert f"{archiver.archive_base_path}/my-book/my-book.md" in written
 
@@ -290,8 +290,8 @@ class TestFolderLayout:
         archiver = _make_book_archiver(tmp_path, formats=["markdown"], export_meta=True)
         node = _make_book_node(1, "my-book")
         written = {}
-        archiver.write_data = written.__setitem__
-        archiver._get_node_data = lambda url: b"# combined"
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
+        archiver._get_node_data = lambda url, _fmt: b"# combined"
         archiver._archive_level({1: node}, "books", "book")
         assert f"{archiver.archive_base_path}/my-book/my-book_meta.json" in written
 
@@ -349,7 +349,7 @@ class TestAssetDownload:
         archiver.asset_archiver = MagicMock()
         archiver.asset_archiver.get_asset_bytes.return_value = b"PNGDATA"
         written = {}
-        archiver.write_data = written.__setitem__
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
         failed = archiver._archive_node_assets("images", node.file_path, "pg", [img])
         assert failed == set()
         assert f"{archiver.archive_base_path}/bk/images/pg/img.png" in written
@@ -383,8 +383,8 @@ class TestCombinedMarkdownRewrite:
             lambda atype, page_name, data, nodes: data.replace(b"http://x/99", b"images/pg/99.png"))
         archiver.asset_archiver = aa
         written = {}
-        archiver.write_data = written.__setitem__
-        archiver._get_node_data = lambda url: (b"![](http://x/99)" if url.endswith("markdown")
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
+        archiver._get_node_data = lambda url, _fmt: (b"![](http://x/99)" if url.endswith("markdown")
                                                else b"<img src='http://x/99'>")
         archiver._archive_level({1: node}, "books", "book")
         md = written[f"{archiver.archive_base_path}/bk/bk.md"]
@@ -445,8 +445,8 @@ class TestFix4StandaloneAssetDownloadBook:
         )
         archiver.asset_archiver.get_asset_bytes.return_value = b"PNGDATA"
         written = {}
-        archiver.write_data = written.__setitem__
-        archiver._get_node_data = lambda url: b"content"
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
+        archiver._get_node_data = lambda url, _fmt: b"content"
         archiver._archive_level({1: self._book_node()}, "books", "book")
         expected = f"{archiver.archive_base_path}/bk/images/pg/99.png"
         assert expected in written
@@ -461,8 +461,8 @@ class TestFix4StandaloneAssetDownloadBook:
         )
         archiver.asset_archiver.get_asset_bytes.return_value = b"ATTDATA"
         written = {}
-        archiver.write_data = written.__setitem__
-        archiver._get_node_data = lambda url: b"content"
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
+        archiver._get_node_data = lambda url, _fmt: b"content"
         archiver._archive_level({1: self._book_node()}, "books", "book")
         expected = f"{archiver.archive_base_path}/bk/attachments/pg/55.pdf"
         assert expected in written
@@ -477,8 +477,8 @@ class TestFix4StandaloneAssetDownloadBook:
         )
         archiver.asset_archiver.get_asset_bytes.return_value = b"PNGDATA"
         written = {}
-        archiver.write_data = written.__setitem__
-        archiver._get_node_data = lambda url: b"![](http://x/99)"
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
+        archiver._get_node_data = lambda url, _fmt: b"![](http://x/99)"
         archiver._archive_level({1: self._book_node()}, "books", "book")
         md = written[f"{archiver.archive_base_path}/bk/bk.md"]
         assert b"http://x/99" in md
@@ -494,8 +494,8 @@ class TestFix4StandaloneAssetDownloadBook:
         )
         archiver.asset_archiver.get_asset_bytes.return_value = b"PNGDATA"
         written = {}
-        archiver.write_data = written.__setitem__
-        archiver._get_node_data = lambda url: b"content"
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
+        archiver._get_node_data = lambda url, _fmt: b"content"
         archiver._archive_level({1: self._book_node()}, "books", "book")
         written_keys = list(written)
         assert any("images" in k for k in written_keys)
@@ -511,8 +511,8 @@ class TestFix4StandaloneAssetDownloadBook:
         )
         archiver.asset_archiver.get_asset_bytes.return_value = b"ATTDATA"
         written = {}
-        archiver.write_data = written.__setitem__
-        archiver._get_node_data = lambda url: b"content"
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
+        archiver._get_node_data = lambda url, _fmt: b"content"
         archiver._archive_level({1: self._book_node()}, "books", "book")
         written_keys = list(written)
         assert any("attachments" in k for k in written_keys)
@@ -524,8 +524,8 @@ class TestFix4StandaloneAssetDownloadBook:
                                                    export_attachments=False)
         archiver.asset_archiver.get_asset_nodes.return_value = {}
         written = {}
-        archiver.write_data = written.__setitem__
-        archiver._get_node_data = lambda url: b"content"
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
+        archiver._get_node_data = lambda url, _fmt: b"content"
         archiver._archive_level({1: self._book_node()}, "books", "book")
         archiver.asset_archiver.get_asset_bytes.assert_not_called()
 
@@ -545,8 +545,8 @@ class TestFix4InfoNoticeBook:
         import logging  # pylint: disable=import-outside-toplevel
         archiver = _make_book_archiver_with_assets(tmp_path, export_images=True)
         archiver.asset_archiver.get_asset_nodes.return_value = {}
-        archiver.write_data = lambda *a: None
-        archiver._get_node_data = lambda url: b"content"
+        archiver.write_data = lambda *a, **kw: None
+        archiver._get_node_data = lambda url, _fmt: b"content"
         with caplog.at_level(logging.INFO,
                              logger="bookstack_file_exporter.archiver.node_archiver"):
             archiver._archive_level({1: self._book_node()}, "books", "book")
@@ -563,8 +563,8 @@ class TestFix4InfoNoticeBook:
         )
         archiver.asset_archiver.get_asset_bytes.return_value = b"PNGDATA"
         archiver.asset_archiver.update_asset_links.side_effect = lambda *a, **kw: a[2]
-        archiver.write_data = lambda *a: None
-        archiver._get_node_data = lambda url: b"content"
+        archiver.write_data = lambda *a, **kw: None
+        archiver._get_node_data = lambda url, _fmt: b"content"
         with caplog.at_level(logging.INFO,
                              logger="bookstack_file_exporter.archiver.node_archiver"):
             archiver._archive_level({1: self._book_node()}, "books", "book")
@@ -576,8 +576,8 @@ class TestFix4InfoNoticeBook:
         archiver = _make_book_archiver_with_assets(tmp_path, export_images=False,
                                                    export_attachments=False)
         archiver.asset_archiver.get_asset_nodes.return_value = {}
-        archiver.write_data = lambda *a: None
-        archiver._get_node_data = lambda url: b"content"
+        archiver.write_data = lambda *a, **kw: None
+        archiver._get_node_data = lambda url, _fmt: b"content"
         with caplog.at_level(logging.INFO,
                              logger="bookstack_file_exporter.archiver.node_archiver"):
             archiver._archive_level({1: self._book_node()}, "books", "book")
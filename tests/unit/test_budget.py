@@ -0,0 +1,116 @@
+# pylint: disable=missing-function-docstring
+"""Unit tests for the in-flight byte budget shared by export workers and the sink."""
+import threading
+from unittest.mock import MagicMock, PropertyMock
+
+import pytest
+
+from bookstack_file_exporter.archiver.budget import ByteBudget, announced_size, fetch
+
+
+def _response(body: bytes, length=None) -> MagicMock:
+    response = MagicMock()
+    response.headers = {} if length is None else {"Content-Length": str(length)}
+    response.content = body
+    return response
+
+
+def _client(response) -> MagicMock:
+    client = MagicMock()
+    client.http_get_request.return_value = response
+    return client
+
+
+def test_reserve_blocks_until_release():
+    budget = ByteBudget(100)
+    budget.reserve(80)
+    admitted = threading.Event()
+
+    def worker():
+        budget.reserve(40)
+        admitted.set()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert not admitted.wait(0.05)
+    budget.release(budget.hand_off())
+    assert admitted.wait(1)
+    thread.join()
+    assert budget.in_use == 40
+    assert budget.peak == 80
+
+
+def test_oversized_reservation_admitted_when_budget_empty():
+    budget = ByteBudget(10)
+    budget.reserve(50)
+    assert budget.in_use == 50
+    assert budget.held == 50
+
+
+def test_settle_corrects_reservation_without_blocking():
+    budget = ByteBudget(10)
+    budget.reserve(8)
+    budget.settle(8, 30)
+    assert (budget.in_use, budget.held, budget.peak) == (30, 30, 30)
+    budget.settle(30, 5)
+    assert (budget.in_use, budget.held) == (5, 5)
+
+
+def test_hand_off_clears_held_bytes_only_for_calling_thread():
+    budget = ByteBudget(100)
+    budget.reserve(10)
+    other = []
+    thread = threading.Thread(target=lambda: other.append(budget.hand_off()))
+    thread.start()
+    thread.join()
+    assert other == [0]
+    assert budget.hand_off() == 10
+    assert budget.held == 0
+    assert budget.in_use == 10
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ({"Content-Length": "42"}, 42), ({}, 0), ({"Content-Length": "bogus"}, 0)])
+def test_announced_size(headers, expected):
+    response = MagicMock()
+    response.headers = headers
+    assert announced_size(response) == expected
+
+
+def test_fetch_without_budget_is_a_plain_get():
+    response = _response(b"body")
+    client = _client(response)
+    assert fetch(client, "u", None) is response
+    client.http_get_request.assert_called_once_with("u")
+
+
+def test_fetch_streams_and_holds_body_size():
+    budget = ByteBudget(100)
+    # encoded body: announced 4 bytes, decodes to 12
+    client = _client(_response(b"x" * 12, length=4))
+    response = fetch(client, "u", budget)
+    client.http_get_request.assert_called_once_with("u", stream=True)
+    response.close.assert_called_once()
+    assert budget.held == 12
+    assert budget.in_use == 12
+
+
+def test_fetch_releases_stale_held_bytes_first():
+    budget = ByteBudget(100)
+    fetch(_client(_response(b"a" * 30, length=30)), "u", budget)
+    # previous body was never handed to the sink (e.g. filtered out)
+    fetch(_client(_response(b"b" * 20, length=20)), "v", budget)
+    assert budget.held == 20
+    assert budget.in_use == 20
+
+
+def test_fetch_failure_returns_reservation():
+    budget = ByteBudget(100)
+    response = MagicMock()
+    response.headers = {"Content-Length": "50"}
+    type(response).content = PropertyMock(side_effect=OSError("reset"))
+    with pytest.raises(OSError):
+        fetch(_client(response), "u", budget)
+    assert budget.in_use == 0
+    assert budget.held == 0
+    response.close.assert_called_once()
@@ -71,7 +71,7 @@ class TestConstruction:
 
 
 # ---------------------------------------------------------------------------
-# 2. N chapters × N formats → N*M write_tar calls
+# 2. N chapters × N formats → N*M write_data calls
 # ---------------------------------------------------------------------------
 
 class TestArchiveMultipleChaptersAndFormats:
@@ -81,7 +81,7 @@ class TestArchiveMultipleChaptersAndFormats:
         (2, ["pdf", "html"], 4),
         (3, ["markdown", "html", "pdf"], 9),
     ])
-    def test_write_tar_call_count(self, tmp_path, n_chapters, formats, expected_writes):
+    def test_write_data_call_count(self, tmp_path, n_chapters, formats, expected_writes):
         archiver = _make_chapter_archiver(tmp_path, formats=formats)
         book = _make_book_node()
         chapter_nodes = {
@@ -92,10 +92,10 @@ class TestArchiveMultipleChaptersAndFormats:
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"chapter content",
         ), patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
-        ) as mock_write_tar:
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
+        ) as mock_write:
             archiver.archive(chapter_nodes)
-        assert mock_write_tar.call_count == expected_writes
+        assert mock_write.call_count == expected_writes
 
 
 # ---------------------------------------------------------------------------
@@ -113,7 +113,7 @@ class TestExportUrl:
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"data",
         ) as mock_get_bytes, patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
         ):
             archiver.archive({55: chapter_node})
 
@@ -132,7 +132,7 @@ class TestHTTPErrorHandling:
         book = _make_book_node()
         chapter_node = _make_chapter_node(10, "test-chapter", parent=book)
 
-        def side_effect(url, http_client):  # pylint: disable=unused-argument
+        def side_effect(url, http_client, budget=None, **_):  # pylint: disable=unused-argument
             if "pdf" in url:
                 raise HTTPError("pdf failed")
             return b"html content"
@@ -141,11 +141,11 @@ class TestHTTPErrorHandling:
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             side_effect=side_effect,
         ), patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
-        ) as mock_write_tar:
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
+        ) as mock_write:
             archiver.archive({10: chapter_node})
 
-        assert mock_write_tar.call_count == 1
+        assert mock_write.call_count == 1
 
     def test_all_formats_fail_but_meta_still_written(self, tmp_path):
         """All format fetches fail, but export_meta still writes a meta file to the tar."""
@@ -157,12 +157,12 @@ class TestHTTPErrorHandling:
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             side_effect=HTTPError("pdf failed"),
         ), patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
-        ) as mock_write_tar:
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
+        ) as mock_write:
             archiver.archive({10: chapter_node})
 
         # pdf skipped, but meta still written → 1 write
-        assert mock_write_tar.call_count == 1
+        assert mock_write.call_count == 1
 
 
 # ---------------------------------------------------------------------------
@@ -181,11 +181,11 @@ class TestExportMeta:
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"chapter data",
         ), patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
-        ) as mock_write_tar:
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
+        ) as mock_write:
             archiver.archive(chapter_nodes)
         # 2 chapters × 1 format + 2 meta files = 4 writes
-        assert mock_write_tar.call_count == 4
+        assert mock_write.call_count == 4
 
     def test_meta_not_written_when_disabled(self, tmp_path):
         archiver = _make_chapter_archiver(tmp_path, formats=["pdf"], export_meta=False)
@@ -195,10 +195,10 @@ class TestExportMeta:
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"chapter data",
         ), patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
-        ) as mock_write_tar:
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
+        ) as mock_write:
             archiver.archive(chapter_nodes)
-        assert mock_write_tar.call_count == 1
+        assert mock_write.call_count == 1
 
 
 # ---------------------------------------------------------------------------
@@ -216,12 +216,12 @@ class TestEmptyChapter:
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"data",
         ) as mock_get_bytes, patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
-        ) as mock_write_tar:
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
+        ) as mock_write:
             archiver.archive({99: empty_chapter, 100: full_chapter})
 
         assert mock_get_bytes.call_count == 1
-        assert mock_write_tar.call_count == 1
+        assert mock_write.call_count == 1
 
     def test_all_empty_chapters_no_fetch_no_write(self, tmp_path):
         archiver = _make_chapter_archiver(tmp_path, formats=["pdf"])
@@ -234,12 +234,12 @@ class TestEmptyChapter:
         with patch(
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
         ) as mock_get_bytes, patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
-        ) as mock_write_tar:
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
+        ) as mock_write:
             archiver.archive(empty_chapters)
 
         assert mock_get_bytes.call_count == 0
-        assert mock_write_tar.call_count == 0
+        assert mock_write.call_count == 0
 
 
 # ---------------------------------------------------------------------------
@@ -252,11 +252,11 @@ class TestEmptyInput:
         with patch(
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
         ) as mock_get_bytes, patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
-        ) as mock_write_tar:
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
+        ) as mock_write:
             archiver.archive({})
         assert mock_get_bytes.call_count == 0
-        assert mock_write_tar.call_count == 0
+        assert mock_write.call_count == 0
 
 
 
@@ -304,8 +304,8 @@ class TestChapterCombinedMarkdownRewrite:
                 b"http://x/99", b"images/pg/99.png"))
         archiver.asset_archiver = aa
         written = {}
-        archiver.write_data = written.__setitem__
-        archiver._get_node_data = lambda url: b"![](http://x/99)"
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
+        archiver._get_node_data = lambda url, _fmt: b"![](http://x/99)"
         archiver._archive_level({5: node}, "chapters", "chapter")
         md_key = f"{archiver.archive_base_path}/test-book/my-chapter/my-chapter.md"
         assert md_key in written
@@ -364,8 +364,8 @@ class TestFix4StandaloneAssetDownloadChapter:
         )
         archiver.asset_archiver.get_asset_bytes.return_value = b"PNGDATA"
         written = {}
-        archiver.write_data = written.__setitem__
-        archiver._get_node_data = lambda url: b"content"
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
+        archiver._get_node_data = lambda url, _fmt: b"content"
         archiver._archive_level({5: _chapter_node_with_page()}, "chapters", "chapter")
         expected = f"{archiver.archive_base_path}/test-book/my-chapter/images/pg/99.png"
         assert expected in written
@@ -380,8 +380,8 @@ class TestFix4StandaloneAssetDownloadChapter:
         )
         archiver.asset_archiver.get_asset_bytes.return_value = b"ATTDATA"
         written = {}
-        archiver.write_data = written.__setitem__
-        archiver._get_node_data = lambda url: b"content"
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
+        archiver._get_node_data = lambda url, _fmt: b"content"
         archiver._archive_level({5: _chapter_node_with_page()}, "chapters", "chapter")
         expected = f"{archiver.archive_base_path}/test-book/my-chapter/attachments/pg/55.pdf"
         assert expected in written
@@ -396,8 +396,8 @@ class TestFix4StandaloneAssetDownloadChapter:
         )
         archiver.asset_archiver.get_asset_bytes.return_value = b"PNGDATA"
         written = {}
-        archiver.write_data = written.__setitem__
-        archiver._get_node_data = lambda url: b"![](http://x/99)"
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
+        archiver._get_node_data = lambda url, _fmt: b"![](http://x/99)"
         archiver._archive_level({5: _chapter_node_with_page()}, "chapters", "chapter")
         md = written[f"{archiver.archive_base_path}/test-book/my-chapter/my-chapter.md"]
         assert b"http://x/99" in md
@@ -413,8 +413,8 @@ class TestFix4StandaloneAssetDownloadChapter:
         )
         archiver.asset_archiver.get_asset_bytes.return_value = b"PNGDATA"
         written = {}
-        archiver.write_data = written.__setitem__
-        archiver._get_node_data = lambda url: b"content"
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
+        archiver._get_node_data = lambda url, _fmt: b"content"
         archiver._archive_level({5: _chapter_node_with_page()}, "chapters", "chapter")
         assert any("images" in k for k in written)
         assert not any("attachments" in k for k in written)
@@ -429,8 +429,8 @@ class TestFix4StandaloneAssetDownloadChapter:
         )
         archiver.asset_archiver.get_asset_bytes.return_value = b"ATTDATA"
         written = {}
-        archiver.write_data = written.__setitem__
-        archiver._get_node_data = lambda url: b"content"
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
+        archiver._get_node_data = lambda url, _fmt: b"content"
         archiver._archive_level({5: _chapter_node_with_page()}, "chapters", "chapter")
         assert any("attachments" in k for k in written)
         assert not any("images" in k for k in written)
@@ -440,8 +440,8 @@ class TestFix4StandaloneAssetDownloadChapter:
         archiver = _make_chapter_archiver_with_assets(tmp_path, export_images=False,
                                                       export_attachments=False)
         archiver.asset_archiver.get_asset_nodes.return_value = {}
-        archiver.write_data = lambda *a: None
-        archiver._get_node_data = lambda url: b"content"
+        archiver.write_data = lambda *a, **kw: None
+        archiver._get_node_data = lambda url, _fmt: b"content"
         archiver._archive_level({5: _chapter_node_with_page()}, "chapters", "chapter")
         archiver.asset_archiver.get_asset_bytes.assert_not_called()
 
@@ -454,8 +454,8 @@ class TestFix4InfoNoticeChapter:
         import logging  # pylint: disable=import-outside-toplevel
         archiver = _make_chapter_archiver_with_assets(tmp_path, export_images=True)
         archiver.asset_archiver.get_asset_nodes.return_value = {}
-        archiver.write_data = lambda *a: None
-        archiver._get_node_data = lambda url: b"content"
+        archiver.write_data = lambda *a, **kw: None
+        archiver._get_node_data = lambda url, _fmt: b"content"
         with caplog.at_level(logging.INFO,
                              logger="bookstack_file_exporter.archiver.node_archiver"):
             archiver._archive_level({5: _chapter_node_with_page()}, "chapters", "chapter")
@@ -472,8 +472,8 @@ class TestFix4InfoNoticeChapter:
         )
         archiver.asset_archiver.get_asset_bytes.return_value = b"PNGDATA"
         archiver.asset_archiver.update_asset_links.side_effect = lambda *a, **kw: a[2]
-        archiver.write_data = lambda *a: None
-        archiver._get_node_data = lambda url: b"content"
+        archiver.write_data = lambda *a, **kw: None
+        archiver._get_node_data = lambda url, _fmt: b"content"
         with caplog.at_level(logging.INFO,
                              logger="bookstack_file_exporter.archiver.node_archiver"):
             archiver._archive_level({5: _chapter_node_with_page()}, "chapters", "chapter")
@@ -485,8 +485,8 @@ class TestFix4InfoNoticeChapter:
         archiver = _make_chapter_archiver_with_assets(tmp_path, export_images=False,
                                                       export_attachments=False)
         archiver.asset_archiver.get_asset_nodes.return_value = {}
-        archiver.write_data = lambda *a: None
-        archiver._get_node_data = lambda url: b"content"
+        archiver.write_data = lambda *a, **kw: None
+        archiver._get_node_data = lambda url, _fmt: b"content"
         with caplog.at_level(logging.INFO,
                              logger="bookstack_file_exporter.archiver.node_archiver"):
             archiver._archive_level({5: _chapter_node_with_page()}, "chapters", "chapter")
@@ -0,0 +1,73 @@
+# pylint: disable=missing-function-docstring
+"""Unit tests for the archive codec registry and writers."""
+import gzip
+import lzma
+from unittest.mock import patch
+
+import pytest
+
+from bookstack_file_exporter.archiver import codecs
+
+
+def test_extensions_are_unique_per_codec():
+    # one per codec plus output_mode zip, and an encrypted variant per codec
+    assert len(set(codecs.ARCHIVE_EXTENSIONS)) == 2 * len(codecs.CODECS) + 1
+    assert ".tgz.enc" in codecs.ARCHIVE_EXTENSIONS
+
+
+def test_default_codec_keeps_tgz():
+    assert codecs.get_codec(codecs.DEFAULT_CODEC).extension == ".tgz"
+
+
+def test_no_extension_matches_a_partial():
+    # the orphan sweep relies on in-progress names never looking finished
+    assert not any(ext.endswith(codecs.PARTIAL_SUFFIX) for ext in codecs.ARCHIVE_EXTENSIONS)
+
+
+@pytest.mark.parametrize("codec,reader,threads", [
+    ("gzip", gzip.open, 1), ("gzip", gzip.open, 4), ("xz", lzma.open, None)])
+def test_open_writer_round_trip(tmp_path, codec, reader, threads):
+    path = str(tmp_path / "out")
+    with codecs.open_writer(path, codec, level=1, threads=threads) as writer:
+        writer.write(b"payload")
+    with reader(path, "rb") as f:
+        assert f.read() == b"payload"
+
+
+def test_open_writer_none_is_passthrough(tmp_path):
+    path = tmp_path / "out"
+    with codecs.open_writer(str(path), "none") as writer:
+        writer.write(b"payload")
+    assert path.read_bytes() == b"payload"
+
+
+def test_open_writer_zstd_multithreaded(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    path = tmp_path / "out"
+    with codecs.open_writer(str(path), "zstd", threads=2) as writer:
+        writer.write(b"payload" * 1000)
+    with open(path, "rb") as raw:
+        assert zstandard.ZstdDecompressor().stream_reader(raw).read() == b"payload" * 1000
+
+
+def test_close_is_idempotent(tmp_path):
+    writer = codecs.open_writer(str(tmp_path / "out"), "gzip")
+    writer.close()
+    writer.close()
+
+
+@pytest.mark.parametrize("threads,expected", [(3, 3), (1, 1)])
+def test_resolve_threads_explicit(threads, expected):
+    assert codecs.resolve_threads(threads) == expected
+
+
+@pytest.mark.parametrize("threads", [None, 0])
+def test_resolve_threads_auto_is_positive(threads):
+    assert codecs.resolve_threads(threads) >= 1
+
+
+@pytest.mark.parametrize("threads,parallel", [(1, False), (2, True)])
+def test_gzip_threads_pick_writer(tmp_path, threads, parallel):
+    with patch("bookstack_file_exporter.archiver.codecs.ParallelGzipWriter") as mock_pgzip:
+        codecs.open_writer(str(tmp_path / "out"), "gzip", threads=threads).close()
+    assert mock_pgzip.called is parallel
@@ -5,7 +5,8 @@ import json
 import pytest
 from pydantic import ValidationError
 
-from bookstack_file_exporter.common.util import check_var, resolve_env_json
+from bookstack_file_exporter.common.util import (
+    backup_set_name, check_var, oldest_sets_beyond_keep, resolve_env_json)
 
 
 def test_check_var_env_wins_over_default(monkeypatch):
@@ -99,3 +100,19 @@ class TestResolveEnvJson:
         monkeypatch.setenv("MY_URLS", json.dumps([1, 2]))
         with pytest.raises(ValidationError):
             resolve_env_json("MY_URLS", list[str], [])
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("bkps_2026.part001.tgz", "bkps_2026.tgz"),
+    ("bkps_2026.part1234.tar.zst", "bkps_2026.tar.zst"),
+    ("bkps_2026.tgz", "bkps_2026.tgz"),
+    ("bkps_part001.tgz", "bkps_part001.tgz"),
+])
+def test_backup_set_name_strips_volume_marker(name, expected):
+    assert backup_set_name(name) == expected
+
+
+def test_oldest_sets_beyond_keep_returns_whole_sets():
+    ages = {"a.part001.tgz": 1, "a.part002.tgz": 5, "b.tgz": 2, "c.part001.tgz": 3}
+    stale = oldest_sets_beyond_keep(list(ages), name=str, key=ages.get, keep_last=1)
+    assert sorted(stale) == ["a.part001.tgz", "a.part002.tgz", "b.tgz"]
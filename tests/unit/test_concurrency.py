@@ -0,0 +1,111 @@
+# pylint: disable=missing-class-docstring,missing-function-docstring,redefined-outer-name,too-few-public-methods
+"""Unit tests for the AIMD adaptive concurrency limit."""
+import threading
+import time
+
+import pytest
+
+from bookstack_file_exporter.common.concurrency import AdaptiveConcurrency
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def _window(adaptive, clock, latency=0.1, statuses=None):
+    """Complete one judged window (8 requests at the current limit or below)."""
+    statuses = statuses or [200] * max(adaptive.limit, 8)
+    for status in statuses:
+        ticket = adaptive.start()
+        clock.now += latency
+        adaptive.finish(ticket, status)
+
+
+def test_limit_grows_by_one_per_stable_window(clock):
+    adaptive = AdaptiveConcurrency(4, clock=clock)
+    assert adaptive.limit == 1
+    for expected in (2, 3, 4, 4):
+        _window(adaptive, clock)
+        assert adaptive.limit == expected
+    assert adaptive.increases == 3
+    assert adaptive.peak == 4
+
+
+@pytest.mark.parametrize("status", [429, 503, None])
+def test_throttling_or_failure_halves_the_limit(clock, status):
+    adaptive = AdaptiveConcurrency(16, clock=clock)
+    adaptive.limit = 10
+    _window(adaptive, clock, statuses=[200] * 9 + [status])
+    assert adaptive.limit == 5
+    assert adaptive.decreases == 1
+
+
+def test_retries_count_as_congestion(clock):
+    adaptive = AdaptiveConcurrency(16, clock=clock)
+    adaptive.limit = 8
+    adaptive.congestion()
+    _window(adaptive, clock)
+    assert adaptive.limit == 4
+
+
+def test_latency_spike_halves_and_moderate_rise_holds(clock):
+    adaptive = AdaptiveConcurrency(16, clock=clock)
+    adaptive.limit = 8
+    _window(adaptive, clock, latency=0.1)   # baseline 0.1s, grows to 9
+    _window(adaptive, clock, latency=0.18)  # 1.8x: hold
+    assert adaptive.limit == 9
+    _window(adaptive, clock, latency=0.5)   # 5x: congestion
+    assert adaptive.limit == 4
+
+
+def test_floor_is_kept(clock):
+    adaptive = AdaptiveConcurrency(8, clock=clock)
+    _window(adaptive, clock, statuses=[429] * 8)
+    assert adaptive.limit == 1
+
+
+def test_requests_from_an_earlier_limit_are_ignored(clock):
+    adaptive = AdaptiveConcurrency(16, clock=clock)
+    adaptive.limit = 8
+    stale = adaptive.start()
+    _window(adaptive, clock)
+    adaptive.finish(stale, 503)
+    _window(adaptive, clock)
+    assert adaptive.decreases == 0
+
+
+def test_on_change_reports_each_new_limit(clock):
+    adaptive = AdaptiveConcurrency(4, clock=clock)
+    seen = []
+    adaptive.on_change = seen.append
+    _window(adaptive, clock)
+    _window(adaptive, clock, statuses=[429] * 8)
+    assert seen == [2, 1]
+    assert adaptive.summary() == ("ended at 1 of 4 requests in flight (peak 2); "
+                                  "1 increases, 1 decreases")
+
+
+def test_acquire_blocks_at_the_limit():
+    adaptive = AdaptiveConcurrency(4)
+    adaptive.acquire()
+    entered = threading.Event()
+
+    def second():
+        adaptive.acquire()
+        entered.set()
+    thread = threading.Thread(target=second)
+    thread.start()
+    time.sleep(0.05)
+    assert not entered.is_set()
+    adaptive.release(None, None)
+    thread.join(timeout=1)
+    assert entered.is_set()
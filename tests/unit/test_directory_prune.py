@@ -0,0 +1,65 @@
+# pylint: disable=missing-function-docstring,protected-access
+"""Unit tests for directory.prune: output_mode directory removes the files of pages
+no longer exported, and only after a complete export."""
+import threading
+from unittest.mock import MagicMock
+
+from requests.exceptions import HTTPError
+
+from bookstack_file_exporter.archiver.node_archiver import PageArchiver
+from tests.fixtures.mock_config import make_mock_config
+
+
+def _archiver(tmp_path, stamp, prune=True):
+    config = make_mock_config(output_mode="directory", directory_prune=prune)
+    archiver = PageArchiver(str(tmp_path / f"bkps_{stamp}"), config, MagicMock(),
+                            asset_archiver=MagicMock(), output_dir=str(tmp_path / "bkps"))
+    archiver.http_client.http_get_request.return_value.content = b"body"
+    return archiver
+
+
+def _export(archiver, build_node, *slugs):
+    book = build_node(id=1, name="book", slug="book")
+    pages = {n: build_node(id=n, name=slug, slug=slug, parent=book)
+             for n, slug in enumerate(slugs, start=2)}
+    archiver._export_nodes(pages, "pages", {}, {})
+    archiver.compress_archive()
+
+
+def _tree(tmp_path):
+    return sorted(path.name for path in (tmp_path / "bkps" / "book").iterdir())
+
+
+def test_renamed_and_deleted_pages_are_removed(tmp_path, build_node):
+    _export(_archiver(tmp_path, "1"), build_node, "intro", "old-name", "deleted")
+    _export(_archiver(tmp_path, "2"), build_node, "intro", "new-name")
+    assert _tree(tmp_path) == ["intro.md", "new-name.md"]
+
+
+def test_without_prune_the_tree_keeps_stale_files(tmp_path, build_node):
+    _export(_archiver(tmp_path, "1", prune=False), build_node, "intro", "deleted")
+    _export(_archiver(tmp_path, "2", prune=False), build_node, "intro")
+    assert _tree(tmp_path) == ["deleted.md", "intro.md"]
+
+
+def test_a_skipped_page_keeps_the_previous_files(tmp_path, build_node):
+    _export(_archiver(tmp_path, "1"), build_node, "intro", "flaky")
+    second = _archiver(tmp_path, "2")
+    ok = second.http_client.http_get_request.return_value
+    second.http_client.http_get_request.side_effect = [ok, HTTPError("502")]
+    _export(second, build_node, "intro", "flaky")
+    assert not second.export_complete
+    assert _tree(tmp_path) == ["flaky.md", "intro.md"]
+
+
+def test_a_stopped_export_does_not_prune(tmp_path, build_node):
+    _export(_archiver(tmp_path, "1"), build_node, "intro", "other")
+    second = _archiver(tmp_path, "2")
+    stop = threading.Event()
+    second._stop = stop
+    book = build_node(id=1, name="book", slug="book")
+    second._export_nodes({2: build_node(id=2, name="intro", slug="intro", parent=book)},
+                         "pages", {}, {})
+    stop.set()
+    second.compress_archive()
+    assert _tree(tmp_path) == ["intro.md", "other.md"]
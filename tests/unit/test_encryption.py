@@ -0,0 +1,125 @@
+# pylint: disable=missing-function-docstring,protected-access
+"""Unit tests for streaming archive encryption (chunked AES-256-GCM)."""
+import base64
+import io
+import os
+import tarfile
+from unittest.mock import MagicMock
+
+import pytest
+from cryptography.exceptions import InvalidTag
+
+from bookstack_file_exporter.archiver import codecs, encryption
+from bookstack_file_exporter.archiver.encryption import EncryptingWriter, decrypt_stream
+from bookstack_file_exporter.archiver.node_archiver import PageArchiver
+from bookstack_file_exporter.config_helper.models import Encryption
+from tests.fixtures.mock_config import make_mock_config
+
+_KEY = bytes(range(32))
+
+
+def _encrypt(data: bytes, chunk_size: int = 16, writes: int = 3) -> bytes:
+    out = io.BytesIO()
+    out.close = lambda: None  # keep the buffer readable after the writer closes it
+    writer = EncryptingWriter(out, _KEY, chunk_size=chunk_size)
+    step = max(1, len(data) // writes)
+    for start in range(0, len(data), step):
+        writer.write(data[start:start + step])
+    writer.close()
+    return out.getvalue()
+
+
+def _decrypt(blob: bytes, key: bytes = _KEY) -> bytes:
+    out = io.BytesIO()
+    decrypt_stream(io.BytesIO(blob), out, key)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("size", [0, 1, 16, 17, 32, 100])
+def test_round_trip_across_chunk_boundaries(size):
+    data = os.urandom(size)
+    assert _decrypt(_encrypt(data)) == data
+
+
+def test_every_chunk_but_the_last_is_full():
+    blob = _encrypt(b"x" * 40, chunk_size=16)
+    header = encryption._HEADER.size
+    # 40 bytes -> 16 + 16 + 8, each sealed with a 16-byte tag
+    assert len(blob) == header + (16 + 16) * 2 + (8 + 16)
+
+
+def test_truncated_archive_fails():
+    blob = _encrypt(b"y" * 64, chunk_size=16)
+    # dropping the final chunk leaves a valid-looking prefix that must not decrypt
+    with pytest.raises(InvalidTag):
+        _decrypt(blob[:-(16 + 16)])
+
+
+def test_tampered_chunk_or_wrong_key_fails():
+    blob = bytearray(_encrypt(b"z" * 64, chunk_size=16))
+    with pytest.raises(InvalidTag):
+        _decrypt(bytes(blob), key=bytes(32))
+    blob[encryption._HEADER.size + 3] ^= 1
+    with pytest.raises(InvalidTag):
+        _decrypt(bytes(blob))
+
+
+def test_rejects_foreign_file():
+    with pytest.raises(ValueError, match="bad magic"):
+        _decrypt(b"\x1f\x8b" + b"\0" * 40)
+
+
+def test_load_key_errors(monkeypatch):
+    monkeypatch.delenv("BK_KEY", raising=False)
+    with pytest.raises(ValueError, match="not set"):
+        encryption.load_key("BK_KEY")
+    monkeypatch.setenv("BK_KEY", "not base64!")
+    with pytest.raises(ValueError, match="base64"):
+        encryption.load_key("BK_KEY")
+    monkeypatch.setenv("BK_KEY", base64.b64encode(b"short").decode())
+    with pytest.raises(ValueError, match="32 bytes"):
+        encryption.load_key("BK_KEY")
+    monkeypatch.setenv("BK_KEY", encryption.generate_key())
+    assert len(encryption.load_key("BK_KEY")) == 32
+
+
+def test_open_writer_encrypts_compressed_tar(tmp_path):
+    path = str(tmp_path / "a.tgz.enc")
+    with codecs.open_writer(path, "gzip", 1, 1, key=_KEY) as out:
+        with tarfile.open(fileobj=out, mode="w|") as tar:
+            info = tarfile.TarInfo("bk/page.md")
+            info.size = 4
+            tar.addfile(info, io.BytesIO(b"body"))
+    with open(path, "rb") as archive:
+        plain = _decrypt(archive.read())
+    with tarfile.open(fileobj=io.BytesIO(plain), mode="r:gz") as tar:
+        assert tar.extractfile("bk/page.md").read() == b"body"
+
+
+def test_page_archiver_writes_encrypted_archive(tmp_path, monkeypatch, build_node):
+    monkeypatch.setenv("BK_KEY", base64.b64encode(_KEY).decode())
+    config = make_mock_config(encryption=Encryption(key_env="BK_KEY"))
+    archiver = PageArchiver(str(tmp_path / "bookstack-20260514"), config, MagicMock(),
+                            asset_archiver=MagicMock())
+    archiver.http_client.http_get_request.return_value.content = b"secret body"
+    book = build_node(id=1, name="book", slug="book")
+    page = build_node(id=2, name="page", slug="page", parent=book)
+
+    archiver._export_nodes({2: page}, "pages", {}, {})
+    archiver.compress_archive()
+
+    assert archiver.archive_file.endswith(".tgz.enc")
+    # streamed straight into the .partial: no plaintext intermediate tar
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["bookstack-20260514.tgz.enc"]
+    out = tmp_path / "a.tgz"
+    assert encryption.main(["decrypt", archiver.archive_file, "--key-env", "BK_KEY",
+                            "-o", str(out)]) == 0
+    with tarfile.open(out, "r:gz") as tar:
+        assert tar.extractfile("bookstack-20260514/book/page.md").read() == b"secret body"
+
+
+def test_main_keygen_and_missing_key(capsys, monkeypatch):
+    assert encryption.main(["keygen"]) == 0
+    assert len(base64.b64decode(capsys.readouterr().out.strip())) == 32
+    monkeypatch.delenv("BK_KEY", raising=False)
+    assert encryption.main(["decrypt", "x.tgz.enc", "--key-env", "BK_KEY"]) == 1
@@ -0,0 +1,42 @@
+# pylint: disable=missing-function-docstring
+"""Unit tests for the optional dependency checks (common/extras.py)."""
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from bookstack_file_exporter.common import extras
+
+
+def test_installed_finds_without_importing():
+    sys.modules.pop("xml.dom.minidom", None)
+    assert extras.installed("xml.dom.minidom")
+    assert "xml.dom.minidom" not in sys.modules
+
+
+@pytest.mark.parametrize("module", ["no_such_module", "no_such_package.frame"])
+def test_installed_false_for_a_missing_module_or_parent(module):
+    assert not extras.installed(module)
+
+
+def test_missing_dependency_names_the_extra():
+    with patch.object(extras, "installed", return_value=False):
+        assert extras.missing_dependency("zstd") == (
+            "compression codec 'zstd' needs an optional dependency: "
+            "pip install 'bookstack-file-exporter[zstd]'")
+
+
+def test_missing_dependency_none_when_installed():
+    with patch.object(extras, "installed", return_value=True):
+        assert extras.missing_dependency("http2") is None
+
+
+def test_any_alternative_will_do():
+    with patch.object(extras, "installed", side_effect=lambda m: m == "zstandard"):
+        assert extras.missing_dependency("zstd") is None
+
+
+def test_every_module_of_an_extra_is_needed():
+    with patch.object(extras, "installed", side_effect=lambda m: m == "httpx"):
+        assert "[http2]" in extras.missing_dependency("http2")
+        assert extras.missing_dependency("async") is None
@@ -124,6 +124,18 @@ class TestRunStatusSnapshot:
         status.mark_degraded(NotifyResult(status=ExportStatus.PARTIAL, local="/a/b.tgz"))
         assert status.snapshot()["last_run"]["error"] is None
 
+    def test_concurrency_null_until_set(self):
+        status = RunStatus()
+        assert status.snapshot()["concurrency"] is None
+        status.set_concurrency(6)
+        assert status.snapshot()["concurrency"] == 6
+
+    def test_requests_empty_until_a_run_reports_them(self):
+        status = RunStatus()
+        assert not status.snapshot()["requests"]
+        status.set_requests({"detail:pages": {"requests": 3}})
+        assert status.snapshot()["requests"] == {"detail:pages": {"requests": 3}}
+
 
 # ---------------------------------------------------------------------------
 # Health server: real HTTP surface (ephemeral port, real GET)
@@ -0,0 +1,176 @@
+# pylint: disable=missing-class-docstring,missing-function-docstring,protected-access,redefined-outer-name
+"""Unit tests for the HTTP/2 transport adapter behind HttpHelper."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import HTTPError, RetryError
+
+from bookstack_file_exporter.common import extras
+from bookstack_file_exporter.common.http2 import Http2Adapter
+from bookstack_file_exporter.common.util import HttpHelper
+from bookstack_file_exporter.config_helper.models import HttpConfig
+
+URL = "https://wiki.test.example/api/books"
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.reason_phrase = "OK"
+        self.url = URL
+        self._body = body
+        self.closed = False
+
+    def iter_bytes(self, chunk_size):
+        for start in range(0, len(self._body), chunk_size):
+            yield self._body[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    """httpx.Client double: serves the queued responses (or raises the queued
+    exceptions) in order and records each request."""
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+        self.closed = False
+
+    def build_request(self, method, url, headers=None, content=None, timeout=None):
+        return SimpleNamespace(method=method, url=url, headers=headers, content=content,
+                               timeout=timeout)
+
+    def send(self, request, stream=False):
+        assert stream
+        self.requests.append(request)
+        response = self.responses.pop(0)
+        if isinstance(response, BaseException):
+            raise response
+        return response
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def helper(monkeypatch):
+    """HttpHelper with http2 on (dependency check bypassed) over a FakeClient."""
+    monkeypatch.setattr(extras, "missing_dependency", lambda _extra: None)
+
+    def _make(*responses, **http):
+        client = FakeClient(*responses)
+        monkeypatch.setattr(Http2Adapter, "_build_client", lambda self: client)
+        config = HttpConfig(**{"http2": True, "backoff_factor": 0, **http})
+        return HttpHelper({"Authorization": "Token a:b"}, config), client
+    return _make
+
+
+def test_http2_needs_optional_dependency(monkeypatch):
+    monkeypatch.setattr(extras, "missing_dependency", lambda _extra: "pip install it")
+    with pytest.raises(ValidationError, match="pip install it"):
+        HttpConfig(http2=True)
+    assert not HttpConfig().http2
+
+
+def test_session_mounts_http2_adapter(helper):
+    http_helper, _ = helper()
+    assert isinstance(http_helper._session.get_adapter(URL), Http2Adapter)
+    assert isinstance(http_helper._session.get_adapter("http://wiki"), Http2Adapter)
+
+
+def test_get_reads_body_and_sends_helper_headers(helper):
+    http_helper, client = helper(FakeResponse(200, b'{"data": []}',
+                                              {"Content-Type": "application/json"}))
+    response = http_helper.http_get_request(URL, headers={"If-None-Match": '"x"'})
+    assert response.json() == {"data": []}
+    sent = client.requests[0]
+    assert sent.headers["Authorization"] == "Token a:b"
+    assert sent.headers["If-None-Match"] == '"x"'
+    assert sent.timeout == 30
+
+
+def test_stream_leaves_body_unread_until_accessed(helper):
+    body = FakeResponse(200, b"pdf" * 1000)
+    http_helper, _ = helper(body)
+    response = http_helper.http_get_request(URL, stream=True)
+    assert b"".join(response.iter_content(1024)) == b"pdf" * 1000
+    response.close()
+    assert body.closed
+
+
+def test_first_request_is_sent_alone(helper):
+    http_helper, client = helper(*[FakeResponse(200, b"ok") for _ in range(4)])
+    events, lock = [], threading.Lock()
+    send = client.send
+
+    def _send(request, stream=False):
+        with lock:
+            events.append("start")
+        time.sleep(0.02)
+        response = send(request, stream)
+        with lock:
+            events.append("end")
+        return response
+    client.send = _send
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(http_helper.http_get_request, [URL] * 4))
+    assert events[:2] == ["start", "end"]
+    assert events.index("end", 2) > events.index("start", 2) + 1  # then concurrent
+
+
+def test_retry_codes_are_retried_then_succeed(helper):
+    first = FakeResponse(503)
+    http_helper, client = helper(first, FakeResponse(429, headers={"Retry-After": "0"}),
+                                 FakeResponse(200, b"ok"))
+    assert http_helper.http_get_request(URL).content == b"ok"
+    assert len(client.requests) == 3
+    assert first.closed
+    books = http_helper.metrics.snapshot()["list:books"]
+    assert books["retries"] == 2
+    assert books["statuses"] == {"200": 1, "429": 1, "503": 1}
+
+
+def test_exhausted_retries_raise_retry_error(helper):
+    http_helper, _ = helper(*[FakeResponse(503) for _ in range(3)], retry_count=2)
+    with pytest.raises(RetryError):
+        http_helper.http_get_request(URL)
+
+
+def test_connection_errors_retry_then_raise(helper):
+    http_helper, client = helper(OSError("reset"), OSError("reset"), retry_count=1)
+    with pytest.raises(RequestsConnectionError):
+        http_helper.http_get_request(URL)
+    assert len(client.requests) == 2
+
+
+def test_error_status_raises_http_error_without_retry(helper):
+    http_helper, client = helper(FakeResponse(404))
+    with pytest.raises(HTTPError):
+        http_helper.http_get_request(URL)
+    assert len(client.requests) == 1
+
+
+def test_close_closes_client(helper):
+    http_helper, client = helper(FakeResponse(200, b"ok"))
+    http_helper.http_get_request(URL)
+    http_helper.close()
+    assert client.closed
+
+
+def test_builds_httpx_http2_client():
+    httpx = pytest.importorskip("httpx")
+    pytest.importorskip("h2")
+    adapter = Http2Adapter(None, 4, verify=False)
+    client = adapter._build_client()
+    try:
+        assert isinstance(client, httpx.Client)
+        assert adapter._retry_errors == (httpx.TransportError,)
+    finally:
+        client.close()
@@ -0,0 +1,88 @@
+# pylint: disable=missing-class-docstring,missing-function-docstring,redefined-outer-name,protected-access
+"""Unit tests for the on-disk detail response cache."""
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from bookstack_file_exporter.common.http_cache import HttpCache
+
+URL = "https://wiki.test.example/api/pages/1"
+
+
+def _response(body, status=200, **headers):
+    content = json.dumps(body).encode() if isinstance(body, dict) else body
+    return SimpleNamespace(status_code=status, headers=headers, content=content)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    caches = []
+
+    def _make(max_size=1 << 20, path=None):
+        caches.append(HttpCache(str(path or tmp_path / "cache" / "http.db"), max_size))
+        return caches[-1]
+    yield _make
+    for opened in caches:
+        opened.close()
+
+
+def test_matching_updated_at_is_fresh_across_runs(cache, tmp_path):
+    first = cache()
+    assert first.lookup(URL, "t1") is None
+    assert first.store(URL, "t1", _response({"id": 1}), None) == b'{"id": 1}'
+    first.close()
+
+    second = cache(path=tmp_path / "cache" / "http.db")
+    entry = second.lookup(URL, "t1")
+    assert entry.fresh and json.loads(entry.body) == {"id": 1}
+    assert (second.hits, second.misses) == (1, 0)
+
+
+def test_changed_updated_at_is_stale_and_replaced(cache):
+    http_cache = cache()
+    http_cache.store(URL, "t1", _response({"v": 1}), None)
+    entry = http_cache.lookup(URL, "t2")
+    assert not entry.fresh
+    http_cache.store(URL, "t2", _response({"v": 2}), entry)
+    assert json.loads(http_cache.lookup(URL, "t2").body) == {"v": 2}
+    assert http_cache.hits == 1
+
+
+def test_etag_revalidates_and_304_serves_stored_body(cache):
+    http_cache = cache()
+    http_cache.store(URL, None, _response({"v": 1}, ETag='"abc"'), None)
+    entry = http_cache.lookup(URL, None)
+    assert not entry.fresh
+    assert entry.validators == {"If-None-Match": '"abc"'}
+    assert http_cache.store(URL, None, _response(b"", status=304), entry) == b'{"v": 1}'
+    assert http_cache.revalidated == 1
+
+
+def test_unvalidatable_response_is_not_stored(cache):
+    http_cache = cache()
+    http_cache.store(URL, None, _response({"v": 1}), None)
+    assert http_cache.lookup(URL, None) is None
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    http_cache = cache()
+    body = bytes(range(256)) * 8  # incompressible enough to size the bound
+    for i in range(3):
+        http_cache.store(f"{URL}{i}", "t", _response(body), None)
+    http_cache.max_size = http_cache._size - 1
+    http_cache.lookup(f"{URL}0", "t")  # 0 is now more recent than 1
+    http_cache.store(f"{URL}3", "t", _response(b"{}"), None)
+    assert http_cache.lookup(f"{URL}1", "t") is None
+    assert http_cache.lookup(f"{URL}0", "t").fresh
+    assert http_cache.evicted == 1
+    assert http_cache._size <= http_cache.max_size
+
+
+def test_unreadable_file_is_recreated_empty(cache, tmp_path):
+    path = tmp_path / "http.db"
+    path.write_bytes(b"not a database" * 100)
+    http_cache = cache(path=path)
+    assert http_cache.lookup(URL, "t1") is None
+    http_cache.store(URL, "t1", _response({"id": 1}), None)
+    assert http_cache.lookup(URL, "t1").fresh
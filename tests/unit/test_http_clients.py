@@ -0,0 +1,130 @@
+# pylint: disable=missing-class-docstring,missing-function-docstring
+"""Unit tests for keeping the http helpers warm across scheduled runs
+(run.HttpClients, HttpHelper.start_run, AsyncHttpHelper.start_run)."""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+import responses
+
+from bookstack_file_exporter import run
+from bookstack_file_exporter.common.util import HttpHelper
+from bookstack_file_exporter.config_helper.models import HttpConfig
+
+BASE = "https://wiki.test.example/api"
+
+
+def _config(engine="threads", **http):
+    inputs = SimpleNamespace(http_config=HttpConfig(retry_count=0, **http), export_workers=2,
+                             adaptive_workers=False, engine=engine)
+    return SimpleNamespace(headers={"Authorization": "Token a:b"}, user_inputs=inputs)
+
+
+class _KeepAlive(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    ports: list[int] = []
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.ports.append(self.client_address[1])
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *_args):  # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture(name="server_url")
+def fixture_server_url():
+    _KeepAlive.ports = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAlive)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/api/books/1"
+    server.shutdown()
+    server.server_close()
+
+
+def test_next_run_reuses_the_open_connection(server_url):
+    clients, config = run.HttpClients(), _config()
+    for _ in range(2):
+        http, _ = clients.acquire(config)
+        http.http_get_request(server_url)
+        clients.release()
+    assert len(_KeepAlive.ports) == 2
+    assert len(set(_KeepAlive.ports)) == 1  # one TCP connection for both runs
+    clients.close()
+    http, _ = clients.acquire(config)
+    http.http_get_request(server_url)
+    clients.close()
+    assert len(set(_KeepAlive.ports)) == 2  # a rebuilt helper connects anew
+
+
+def test_same_settings_keep_the_helper_and_changed_ones_rebuild_it():
+    clients = run.HttpClients()
+    first, _ = clients.acquire(_config())
+    first.close = MagicMock()
+    assert clients.acquire(_config())[0] is first
+    second, _ = clients.acquire(_config(timeout=60))
+    assert second is not first
+    first.close.assert_called_once()
+    clients.close()
+
+
+def test_connection_errors_rebuild_the_helper_for_the_next_run():
+    clients = run.HttpClients()
+    http, _ = clients.acquire(_config())
+    http.metrics.attempt(f"{BASE}/books", None, retried=False)
+    clients.release()
+    assert clients.http is None
+    assert clients.acquire(_config())[0] is not http
+    clients.close()
+
+
+@responses.activate
+def test_start_run_resets_per_run_state_and_keeps_the_session():
+    helper = HttpHelper({}, HttpConfig(retry_count=0, retry_codes=[503], deadline=3600,
+                                       circuit_breaker={"error_rate": 1, "window": 1},
+                                       requests_per_min=600),
+                        adaptive=True, export_workers=4)
+    responses.get(f"{BASE}/books/1", status=503)
+    with pytest.raises(requests.exceptions.RetryError):
+        helper.http_get_request(f"{BASE}/books/1")
+    session, limiter = helper._session, helper.rate_limiter  # pylint: disable=protected-access
+    old = (helper.metrics, helper.guard, helper.single_flight, helper.adaptive)
+    assert helper.guard.tripped
+    helper.start_run()
+    assert helper._session is session  # pylint: disable=protected-access
+    assert helper.rate_limiter is limiter and limiter.requests == 0
+    assert all(new is not prior for new, prior in zip(
+        (helper.metrics, helper.guard, helper.single_flight, helper.adaptive), old))
+    assert not helper.guard.tripped and not helper.metrics.snapshot()
+    # requests of the new run report to the new run's objects
+    responses.get(f"{BASE}/books/2", body=b"{}")
+    helper.http_get_request(f"{BASE}/books/2")
+    assert helper.metrics.snapshot()["detail:books"]["requests"] == 1
+
+
+def test_async_start_run_shares_the_new_run_objects(make_async_http):
+    helper, _ = make_async_http({"/api/pages/1": [b"ok", b"ok"]})
+    helper.run(helper.get("/api/pages/1"))
+    metrics = MagicMock()
+    helper.start_run(metrics, None, None)
+    assert helper.requests == 0 and helper.peak_in_flight == 0
+    helper.run(helper.get("/api/pages/1"))
+    metrics.observe.assert_called_once()
+
+
+def test_scheduled_exporter_keeps_its_clients_open():
+    clients = MagicMock()
+    http = MagicMock(guard=None, adaptive=None)
+    clients.acquire.return_value = (http, None)
+    with patch.object(run, "_export", return_value=None):
+        run.exporter(_config(), clients=clients)
+    clients.release.assert_called_once()
+    clients.close.assert_not_called()
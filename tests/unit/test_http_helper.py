@@ -1,14 +1,20 @@
 # pylint: disable=missing-class-docstring,missing-function-docstring,protected-access
 """Unit tests for HttpHelper in bookstack_file_exporter.common.util."""
+import json
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlparse
 
 import pytest
 import requests
 import responses
 from responses import matchers
-from requests.adapters import DEFAULT_POOLSIZE
+from requests.adapters import DEFAULT_POOLSIZE, Retry
+from urllib3 import HTTPResponse
 
-from bookstack_file_exporter.common.util import HttpHelper
+from bookstack_file_exporter.common.util import HttpHelper, PacedRetry
 from bookstack_file_exporter.config_helper.models import HttpConfig
 
 BASE = "https://wiki.test.example/api"
@@ -328,3 +334,196 @@ def test_export_workers_defaults_to_one_when_omitted():
     helper = HttpHelper({}, HttpConfig())
     adapter = helper._session.get_adapter("https://example.com")
     assert adapter._pool_maxsize == DEFAULT_POOLSIZE
+
+
+# ---------------------------------------------------------------------------
+# rate limiting (http_config.requests_per_min)
+# ---------------------------------------------------------------------------
+
+def test_rate_limiter_off_by_default():
+    assert HttpHelper({}, HttpConfig()).rate_limiter is None
+
+
+def test_requests_per_min_must_be_positive():
+    with pytest.raises(ValueError, match="requests_per_min"):
+        HttpConfig(requests_per_min=0)
+
+
+def _paced_client(monkeypatch):
+    """HttpHelper with a limiter whose acquire/observe calls are recorded."""
+    client = HttpHelper(headers={}, config=HttpConfig(retry_codes=[429], backoff_factor=0,
+                                                      requests_per_min=6000))
+    calls = []
+    monkeypatch.setattr(client.rate_limiter, "acquire", lambda: calls.append("acquire"))
+    monkeypatch.setattr(client.rate_limiter, "observe",
+                        lambda status, headers: calls.append(status))
+    return client, calls
+
+
+@responses.activate
+def test_rate_limiter_paces_requests_and_sees_responses(monkeypatch):
+    client, calls = _paced_client(monkeypatch)
+    responses.get(f"{BASE}/books", json={"data": []}, status=200)
+    client.http_get_request(f"{BASE}/books")
+    assert calls == ["acquire", 200]
+
+
+def test_retries_go_through_the_rate_limiter(monkeypatch):
+    client, calls = _paced_client(monkeypatch)
+    retry = client._session.get_adapter("https://example.com").max_retries
+    assert isinstance(retry, PacedRetry)
+    # urllib3 copies the Retry on every attempt; the limiter must survive the copy
+    retry = retry.new(total=1)
+    monkeypatch.setattr(Retry, "sleep", lambda self, response=None: None)
+    retry.sleep(HTTPResponse(status=429, headers={"Retry-After": "0"}))
+    assert calls == [429, "acquire"]
+
+
+# ---------------------------------------------------------------------------
+# adaptive concurrency (adaptive_workers)
+# ---------------------------------------------------------------------------
+
+def test_adaptive_off_by_default():
+    assert HttpHelper({}, HttpConfig(), export_workers=8).adaptive is None
+
+
+@responses.activate
+def test_adaptive_gates_requests_and_records_status(monkeypatch):
+    client = HttpHelper({}, _retry_config(retry_count=0), export_workers=8, adaptive=True)
+    assert client.adaptive.ceiling == 8
+    released = []
+    real_release = client.adaptive.release
+    monkeypatch.setattr(client.adaptive, "release",
+                        lambda ticket, status: (released.append(status),
+                                                real_release(ticket, status)))
+    responses.get(f"{BASE}/books", json={"data": []}, status=200)
+    responses.get(f"{BASE}/gone", status=404)
+    client.http_get_request(f"{BASE}/books")
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.http_get_request(f"{BASE}/gone")
+    assert released == [200, 404]
+
+
+@responses.activate
+def test_adaptive_holds_a_streamed_request_until_it_is_closed(monkeypatch):
+    client = HttpHelper({}, _retry_config(retry_count=0), export_workers=8, adaptive=True)
+    released = []
+    real_release = client.adaptive.release
+    monkeypatch.setattr(client.adaptive, "release",
+                        lambda ticket, status: (released.append(status),
+                                                real_release(ticket, status)))
+    responses.get(f"{BASE}/pages/1/export/pdf", body=b"%PDF")
+    responses.get(f"{BASE}/pages/2/export/pdf", status=404)
+    response = client.http_get_request(f"{BASE}/pages/1/export/pdf", stream=True)
+    assert not released
+    assert response.content == b"%PDF"
+    response.close()
+    response.close()
+    assert released == [200]
+    # a failed stream is closed before the error is raised, freeing its place
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.http_get_request(f"{BASE}/pages/2/export/pdf", stream=True)
+    assert released == [200, 404]
+
+
+# ---------------------------------------------------------------------------
+# response cache (http_config.cache)
+# ---------------------------------------------------------------------------
+
+def test_cache_off_by_default():
+    assert HttpHelper({}, HttpConfig()).cache is None
+
+
+def test_cache_max_size_accepts_suffixed_sizes():
+    assert HttpConfig(cache={"path": "c.db", "max_size": "64MiB"}).cache.max_size == 64 << 20
+
+
+@responses.activate
+def test_http_get_json_serves_unchanged_pages_from_cache(tmp_path):
+    config = HttpConfig(retry_count=0, cache={"path": str(tmp_path / "http.db")})
+    responses.get(f"{BASE}/pages/1", json={"id": 1, "html": "<p>v1</p>"})
+    first = HttpHelper({}, config)
+    assert first.http_get_json(f"{BASE}/pages/1", updated_at="t1")["html"] == "<p>v1</p>"
+    first.close()
+
+    # next run: same updated_at served locally, a new one fetched again
+    second = HttpHelper({}, config)
+    assert second.http_get_json(f"{BASE}/pages/1", updated_at="t1")["id"] == 1
+    assert len(responses.calls) == 1
+    second.http_get_json(f"{BASE}/pages/1", updated_at="t2")
+    assert len(responses.calls) == 2
+    second.close()
+
+
+@responses.activate
+def test_http_get_json_revalidates_with_etag(tmp_path):
+    client = HttpHelper({}, HttpConfig(retry_count=0,
+                                       cache={"path": str(tmp_path / "http.db")}))
+    responses.get(f"{BASE}/books/1", json={"id": 1}, headers={"ETag": '"v1"'})
+    responses.get(f"{BASE}/books/1", status=304,
+                  match=[matchers.header_matcher({"If-None-Match": '"v1"'})])
+    assert client.http_get_json(f"{BASE}/books/1") == {"id": 1}
+    assert client.http_get_json(f"{BASE}/books/1") == {"id": 1}
+    assert client.cache.revalidated == 1
+    client.close()
+
+
+@responses.activate
+def test_http_get_json_coalesces_concurrent_calls():
+    client = HttpHelper({}, HttpConfig(retry_count=0), export_workers=4)
+    started = threading.Event()
+    release = threading.Event()
+
+    def _slow(_request):
+        started.set()
+        release.wait(5)
+        return 200, {}, json.dumps({"id": 1})
+    responses.add_callback(responses.GET, f"{BASE}/books/1", callback=_slow)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(client.http_get_json, f"{BASE}/books/1")]
+        started.wait(5)
+        futures += [executor.submit(client.http_get_json, f"{BASE}/books/1")
+                    for _ in range(2)]
+        while client.single_flight.calls < 3:
+            time.sleep(0.001)
+        release.set()
+        results = [future.result() for future in futures]
+    assert results == [{"id": 1}] * 3
+    assert len(responses.calls) == 1
+    assert client.single_flight.shared == 2
+
+
+# ---------------------------------------------------------------------------
+# http_get_all — concurrent pages (export_workers > 1)
+# ---------------------------------------------------------------------------
+
+def _serve_list(total, cap=500):
+    """responses callback serving items 0..total-1 by count/offset, capped like BookStack."""
+    def _callback(request):
+        query = dict(parse_qsl(urlparse(request.url).query))
+        offset, count = int(query["offset"]), min(int(query["count"]), cap)
+        data = [{"id": i} for i in range(offset, min(offset + count, total))]
+        return 200, {}, json.dumps({"data": data, "total": total})
+    return _callback
+
+
+@responses.activate
+def test_http_get_all_fetches_remaining_pages_concurrently_in_order():
+    client = HttpHelper({}, HttpConfig(retry_count=0), export_workers=4)
+    responses.add_callback(responses.GET, f"{BASE}/image-gallery",
+                           callback=_serve_list(2300))
+    result = client.http_get_all(f"{BASE}/image-gallery")
+    assert [item["id"] for item in result] == list(range(2300))
+    offsets = sorted(int(dict(parse_qsl(urlparse(c.request.url).query))["offset"])
+                     for c in responses.calls)
+    # first page, then waves of 4 pages spreading the other 1800 items
+    assert offsets[:5] == [0, 500, 950, 1400, 1850]
+
+
+@responses.activate
+def test_http_get_all_concurrent_respects_server_page_cap():
+    client = HttpHelper({}, HttpConfig(retry_count=0), export_workers=4)
+    responses.add_callback(responses.GET, f"{BASE}/books",
+                           callback=_serve_list(1000, cap=100))
+    result = client.http_get_all(f"{BASE}/books")
+    assert [item["id"] for item in result] == list(range(1000))
@@ -0,0 +1,121 @@
+# pylint: disable=missing-class-docstring,missing-function-docstring
+"""Unit tests for the per-endpoint request metrics (common/http_metrics.py)."""
+import pytest
+import requests
+import responses
+
+from bookstack_file_exporter.common.http_metrics import HttpMetrics, endpoint_class
+from bookstack_file_exporter.common.util import HttpHelper
+from bookstack_file_exporter.config_helper.models import HttpConfig
+
+BASE = "https://wiki.test.example/api"
+
+
+@pytest.mark.parametrize("url, expected", [
+    (f"{BASE}/books?count=500&offset=0", "list:books"),
+    (f"{BASE}/image-gallery", "list:image-gallery"),
+    (f"{BASE}/pages/12", "detail:pages"),
+    (f"{BASE}/shelves/3", "detail:shelves"),
+    (f"{BASE}/image-gallery/7", "detail:image-gallery"),
+    (f"{BASE}/attachments/4", "attachment"),
+    (f"{BASE}/books/2/export/pdf", "export:pdf"),
+    (f"{BASE}/pages/9/export/markdown", "export:markdown"),
+    ("https://wiki.test.example/uploads/images/gallery/2026-01/a.png", "image"),
+    ("https://host/wiki/api/chapters/5", "detail:chapters"),
+    ("/api/pages/1/export/html", "export:html"),
+    (f"{BASE}/audit-log/1/x", "other"),
+])
+def test_endpoint_class(url, expected):
+    assert endpoint_class(url) == expected
+
+
+def test_observe_counts_latency_bytes_and_statuses():
+    metrics = HttpMetrics()
+    for seconds in (0.01, 0.2, 0.3, 4.0):
+        metrics.observe(f"{BASE}/pages/1/export/pdf", seconds, 200, 100)
+    metrics.observe(f"{BASE}/pages/2/export/pdf", 0.02, 404, 10)
+    pdf = metrics.snapshot()["export:pdf"]
+    assert pdf["requests"] == 5
+    assert pdf["failures"] == 1
+    assert pdf["bytes"] == 410
+    assert pdf["statuses"] == {"200": 4, "404": 1}
+    assert pdf["latency_buckets"]["0.05"] == 2
+    assert pdf["latency_buckets"]["0.25"] == 1
+    assert pdf["latency_buckets"]["0.5"] == 1
+    assert pdf["latency_buckets"]["5"] == 1
+    assert pdf["latency_buckets"]["+Inf"] == 0
+    assert pdf["p50_seconds"] == 0.25
+    assert pdf["p95_seconds"] == 4.0
+    assert pdf["max_seconds"] == 4.0
+
+
+def test_attempts_count_retries_and_statuses():
+    metrics = HttpMetrics()
+    metrics.attempt("/api/books", 503, retried=True)
+    metrics.attempt("/api/books", None, retried=True)
+    metrics.attempt("/api/books", 503, retried=False)
+    metrics.observe(f"{BASE}/books", 1.0, None, 0)
+    books = metrics.snapshot()["list:books"]
+    assert books["retries"] == 2
+    assert books["failures"] == 1
+    assert books["statuses"] == {"503": 2, "error": 1}
+
+
+def test_summary_lines_slowest_class_first():
+    metrics = HttpMetrics()
+    metrics.observe(f"{BASE}/pages/1", 0.1, 200, 5)
+    metrics.observe(f"{BASE}/pages/1/export/pdf", 3.0, 200, 50)
+    lines = metrics.summary_lines()
+    assert lines[0].startswith("export:pdf: 1 requests, 50 bytes, 3.00s total")
+    assert lines[1].startswith("detail:pages:")
+    assert lines[1].endswith("statuses 200 x1")
+    assert not HttpMetrics().summary_lines()
+
+
+@responses.activate
+def test_http_helper_records_requests_and_retries():
+    helper = HttpHelper({}, HttpConfig(retry_count=2, backoff_factor=0,
+                                       retry_codes=[503]))
+    responses.get(f"{BASE}/pages/1", status=503)
+    responses.get(f"{BASE}/pages/1", body=b"{}")
+    responses.get(f"{BASE}/pages/1/export/pdf", body=b"pdf" * 10,
+                  headers={"Content-Length": "30"})
+    responses.get(f"{BASE}/books/1", status=404)
+    helper.http_get_request(f"{BASE}/pages/1")
+    helper.http_get_request(f"{BASE}/pages/1/export/pdf", stream=True).close()
+    with pytest.raises(requests.exceptions.HTTPError):
+        helper.http_get_request(f"{BASE}/books/1")
+    snapshot = helper.metrics.snapshot()
+    assert snapshot["detail:pages"]["requests"] == 1
+    assert snapshot["detail:pages"]["retries"] == 1
+    assert snapshot["detail:pages"]["statuses"] == {"200": 1, "503": 1}
+    assert snapshot["detail:pages"]["bytes"] == 2
+    assert snapshot["export:pdf"]["bytes"] == 30
+    assert snapshot["detail:books"]["failures"] == 1
+
+
+@responses.activate
+def test_http_helper_records_exhausted_retries():
+    helper = HttpHelper({}, HttpConfig(retry_count=1, backoff_factor=0,
+                                       retry_codes=[503]))
+    responses.get(f"{BASE}/books", status=503)
+    with pytest.raises(requests.exceptions.RetryError):
+        helper.http_get_request(f"{BASE}/books")
+    books = helper.metrics.snapshot()["list:books"]
+    assert books == {**books, "requests": 1, "failures": 1, "retries": 1,
+                     "statuses": {"503": 2}}
+
+
+def test_async_helper_records_into_shared_metrics(make_async_http):
+    helper, _ = make_async_http({"/api/pages/1": [503, b"ok"],
+                                 "/api/attachments/2": [OSError("reset")] * 2},
+                                retry_count=1)
+    helper.run(helper.get("/api/pages/1"))
+    with pytest.raises(requests.exceptions.ConnectionError):
+        helper.run(helper.get("/api/attachments/2"))
+    snapshot = helper.metrics.snapshot()
+    assert snapshot["detail:pages"]["statuses"] == {"200": 1, "503": 1}
+    assert snapshot["detail:pages"]["retries"] == 1
+    assert snapshot["detail:pages"]["bytes"] == 2
+    assert snapshot["attachment"]["statuses"] == {"error": 2}
+    assert snapshot["attachment"]["failures"] == 1
@@ -0,0 +1,41 @@
+# pylint: disable=missing-function-docstring
+"""Unit tests for the archive content manifest."""
+import hashlib
+import json
+
+from bookstack_file_exporter.archiver import manifest
+from bookstack_file_exporter.archiver.manifest import ManifestEntry, MemberSource
+
+
+def test_build_entry_records_source():
+    digest = hashlib.sha256(b"body").digest()
+    entry = manifest.build_entry("a/page.md", 4, digest,
+                                 MemberSource("pages", 7, "2026-01-02T10:00:00.000000Z"))
+    assert entry == ManifestEntry("a/page.md", 4, digest.hex(), "pages", 7,
+                                  "2026-01-02T10:00:00.000000Z")
+
+
+def test_build_entry_without_source():
+    entry = manifest.build_entry("a/x", 0, hashlib.sha256(b"").digest(), None)
+    assert entry.resource is None and entry.node_id is None
+
+
+def test_manifest_is_sorted_and_independent_of_write_order():
+    first = ManifestEntry("b", 1, "00")
+    second = ManifestEntry("a", 2, "11", "images", 3)
+    data = manifest.manifest_bytes([first, second])
+    assert data == manifest.manifest_bytes([second, first])
+    document = json.loads(data)
+    assert document["version"] == manifest.MANIFEST_VERSION
+    assert [f["path"] for f in document["files"]] == ["a", "b"]
+    assert document["files"][0] == {"path": "a", "size": 2, "sha256": "11",
+                                    "resource": "images", "node_id": 3,
+                                    "updated_at": None}
+
+
+def test_write_sidecar_is_atomic(tmp_path):
+    archive = str(tmp_path / "bkps_1.tgz")
+    path = manifest.write_sidecar(archive, b"{}")
+    assert path == f"{archive}.manifest.json"
+    assert (tmp_path / "bkps_1.tgz.manifest.json").read_bytes() == b"{}"
+    assert not list(tmp_path.glob("*.partial"))
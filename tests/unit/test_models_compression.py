@@ -0,0 +1,161 @@
+# pylint: disable=missing-function-docstring,missing-module-docstring
+from unittest.mock import patch
+
+import pytest
+from pydantic import ValidationError
+
+from bookstack_file_exporter.archiver import encryption
+from bookstack_file_exporter.common import extras
+from bookstack_file_exporter.config_helper.models import UserInput
+
+_BASE = {"host": "https://wiki.example", "formats": ["markdown"]}
+
+
+def test_compression_defaults_to_two_pass():
+    cfg = UserInput(**_BASE)
+    assert cfg.compression.streaming is False
+
+
+def test_compression_defaults_to_gzip_codec_default_level():
+    cfg = UserInput(**_BASE)
+    assert cfg.compression.codec == "gzip"
+    assert cfg.compression.level is None
+
+
+@pytest.mark.parametrize("codec,level", [("gzip", 1), ("xz", 9), ("none", None)])
+def test_compression_accepts_codec_and_level(codec, level):
+    cfg = UserInput(**_BASE, compression={"codec": codec, "level": level})
+    assert cfg.compression.codec == codec
+    assert cfg.compression.level == level
+
+
+def test_compression_rejects_unknown_codec():
+    with pytest.raises(ValidationError):
+        UserInput(**_BASE, compression={"codec": "bzip2"})
+
+
+@pytest.mark.parametrize("codec,level", [("gzip", 10), ("xz", -1), ("zstd", 23)])
+def test_compression_rejects_out_of_range_level(codec, level):
+    with pytest.raises(ValidationError, match="between"):
+        UserInput(**_BASE, compression={"codec": codec, "level": level})
+
+
+def test_compression_none_rejects_level():
+    with pytest.raises(ValidationError, match="does not take a level"):
+        UserInput(**_BASE, compression={"codec": "none", "level": 3})
+
+
+def test_compression_missing_optional_module_fails_at_load():
+    with patch("bookstack_file_exporter.common.extras.installed", return_value=False):
+        with pytest.raises(ValidationError, match=r"pip install .*\[lz4\]"):
+            UserInput(**_BASE, compression={"codec": "lz4"})
+
+
+def test_compression_threads_rejects_negative():
+    with pytest.raises(ValidationError):
+        UserInput(**_BASE, compression={"threads": -1})
+
+
+def test_compression_streaming_opt_in():
+    cfg = UserInput(**_BASE, compression={"streaming": True})
+    assert cfg.compression.streaming is True
+
+
+def test_compression_rejects_unknown_key():
+    with pytest.raises(ValidationError):
+        UserInput(**_BASE, compression={"streamng": True})
+
+
+def test_output_mode_defaults_to_tar():
+    assert UserInput(**_BASE).output_mode == "tar"
+
+
+def test_output_mode_zip_accepts_deflate_level():
+    cfg = UserInput(**_BASE, output_mode="zip", compression={"level": 1})
+    assert cfg.output_mode == "zip"
+
+
+def test_output_mode_zip_rejects_tar_codec():
+    with pytest.raises(ValidationError, match="output_mode 'tar' only"):
+        UserInput(**_BASE, output_mode="zip", compression={"codec": "xz"})
+
+
+def test_output_mode_rejects_unknown():
+    with pytest.raises(ValidationError):
+        UserInput(**_BASE, output_mode="rar")
+
+
+def test_output_mode_directory_defaults_to_no_archive():
+    cfg = UserInput(**_BASE, output_mode="directory")
+    assert cfg.directory.archive is False
+
+
+def test_output_mode_directory_uploads_require_archive():
+    storage = [{"name": "minio", "endpoint": "minio.local:9000", "bucket": "b",
+                "access_key": "a", "secret_key": "s"}]
+    with pytest.raises(ValidationError, match="directory.archive"):
+        UserInput(**_BASE, output_mode="directory", object_storage=storage)
+    cfg = UserInput(**_BASE, output_mode="directory", directory={"archive": True},
+                    object_storage=storage)
+    assert cfg.directory.archive is True
+
+
+def test_dedup_opt_in_for_tar():
+    assert UserInput(**_BASE).dedup is False
+    assert UserInput(**_BASE, dedup=True).dedup is True
+
+
+@pytest.mark.parametrize("mode", ["zip", "directory"])
+def test_dedup_rejected_outside_tar(mode):
+    with pytest.raises(ValidationError, match="dedup applies to output_mode 'tar' only"):
+        UserInput(**_BASE, output_mode=mode, dedup=True)
+
+
+@pytest.mark.parametrize("codec", ["gzip", "none"])
+def test_index_accepts_restartable_codecs(codec):
+    assert UserInput(**_BASE, index=True, compression={"codec": codec}).index is True
+
+
+def test_index_rejects_other_codecs_and_modes():
+    with pytest.raises(ValidationError, match="index supports compression.codec"):
+        UserInput(**_BASE, index=True, compression={"codec": "xz"})
+    with pytest.raises(ValidationError, match="index applies to output_mode 'tar' only"):
+        UserInput(**_BASE, index=True, output_mode="zip")
+
+
+@pytest.mark.parametrize("raw, expected", [
+    (1048576, 1048576), ("500M", 500 * 1024 ** 2), ("2GiB", 2 * 1024 ** 3),
+    ("64 kb", 64 * 1024), ("4096", 4096)])
+def test_max_volume_size_parses_sizes(raw, expected):
+    assert UserInput(**_BASE, max_volume_size=raw).max_volume_size == expected
+
+
+def test_max_volume_size_rejects_bad_values_and_modes():
+    for bad in ("2 parsecs", 0, "0M"):
+        with pytest.raises(ValidationError):
+            UserInput(**_BASE, max_volume_size=bad)
+    with pytest.raises(ValidationError, match="max_volume_size applies to output_mode"):
+        UserInput(**_BASE, output_mode="zip", max_volume_size="1G")
+    with pytest.raises(ValidationError, match="cannot be combined with index"):
+        UserInput(**_BASE, index=True, max_volume_size="1G")
+
+
+def test_encryption_checks_key_and_mode(monkeypatch):
+    monkeypatch.setenv("BK_KEY", encryption.generate_key())
+    cfg = UserInput(**_BASE, encryption={"key_env": "BK_KEY"})
+    assert cfg.encryption.key_env == "BK_KEY"
+    with pytest.raises(ValidationError, match="BK_MISSING is not set"):
+        UserInput(**_BASE, encryption={"key_env": "BK_MISSING"})
+    with pytest.raises(ValidationError, match="got 'zip'"):
+        UserInput(**_BASE, output_mode="zip", encryption={"key_env": "BK_KEY"})
+    with pytest.raises(ValidationError, match="directory.archive"):
+        UserInput(**_BASE, output_mode="directory", encryption={"key_env": "BK_KEY"})
+    with pytest.raises(ValidationError, match="cannot be combined with index"):
+        UserInput(**_BASE, index=True, encryption={"key_env": "BK_KEY"})
+
+
+def test_encryption_reports_missing_dependency(monkeypatch):
+    monkeypatch.setenv("BK_KEY", encryption.generate_key())
+    monkeypatch.setattr(extras, "missing_dependency", lambda _extra: "pip install [encrypt]")
+    with pytest.raises(ValidationError, match=r"\[encrypt\]"):
+        UserInput(**_BASE, encryption={"key_env": "BK_KEY"})
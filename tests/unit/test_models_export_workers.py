@@ -2,6 +2,7 @@
 import pytest
 from pydantic import ValidationError
 
+from bookstack_file_exporter.common import extras
 from bookstack_file_exporter.config_helper.models import UserInput
 
 _BASE = {"host": "https://wiki.example", "formats": ["markdown"]}
@@ -26,3 +27,57 @@ def test_export_workers_rejects_below_one(bad):
 def test_export_workers_accepts_large_value_no_hard_cap():
     cfg = UserInput(**_BASE, export_workers=64)
     assert cfg.export_workers == 64
+
+
+def test_max_inflight_bytes_defaults_to_unbounded():
+    assert UserInput(**_BASE).max_inflight_bytes is None
+
+
+@pytest.mark.parametrize("raw, expected", [("512MiB", 512 * 1024 ** 2), (4096, 4096)])
+def test_max_inflight_bytes_parses_sizes(raw, expected):
+    assert UserInput(**_BASE, max_inflight_bytes=raw).max_inflight_bytes == expected
+
+
+def test_spool_threshold_parses_sizes():
+    assert UserInput(**_BASE).spool_threshold is None
+    assert UserInput(**_BASE, spool_threshold="16MiB").spool_threshold == 16 * 1024 ** 2
+
+
+@pytest.mark.parametrize("bad", [0, "lots"])
+def test_max_inflight_bytes_rejects_bad_values(bad):
+    with pytest.raises(ValidationError):
+        UserInput(**_BASE, max_inflight_bytes=bad)
+
+
+def test_engine_defaults_to_threads():
+    assert UserInput(**_BASE).engine == "threads"
+
+
+def test_engine_asyncio_needs_httpx(monkeypatch):
+    monkeypatch.setattr(extras, "missing_dependency", lambda _extra: "pip install it")
+    with pytest.raises(ValidationError, match="pip install it"):
+        UserInput(**_BASE, engine="asyncio")
+    monkeypatch.setattr(extras, "missing_dependency", lambda _extra: None)
+    assert UserInput(**_BASE, engine="asyncio", export_workers=64).engine == "asyncio"
+
+
+@pytest.mark.parametrize("option", ["max_inflight_bytes", "spool_threshold"])
+def test_engine_asyncio_rejects_thread_memory_options(monkeypatch, option):
+    monkeypatch.setattr(extras, "missing_dependency", lambda _extra: None)
+    with pytest.raises(ValidationError, match="engine 'threads' only"):
+        UserInput(**_BASE, engine="asyncio", **{option: "1G"})
+
+
+def test_pipeline_is_for_the_thread_engine(monkeypatch):
+    assert UserInput(**_BASE).pipeline is False
+    assert UserInput(**_BASE, pipeline=True).pipeline is True
+    monkeypatch.setattr(extras, "missing_dependency", lambda _extra: None)
+    with pytest.raises(ValidationError, match="engine 'threads' only"):
+        UserInput(**_BASE, engine="asyncio", pipeline=True)
+
+
+@pytest.mark.parametrize("level", ["books", "chapters"])
+def test_pipeline_is_for_export_level_pages(level):
+    with pytest.raises(ValidationError, match="export_level 'pages' only"):
+        UserInput(**_BASE, export_level=level, pipeline=True)
+    assert UserInput(**_BASE, export_level=level).export_level == level
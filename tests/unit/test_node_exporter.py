@@ -2,8 +2,10 @@
 """Unit tests for NodeExporter."""
 import logging
 import threading
+import time
 
 import pytest
+from requests.exceptions import HTTPError
 
 from bookstack_file_exporter.exporter.exporter import NodeExporter
 from bookstack_file_exporter.exporter.filter import NodeFilter
@@ -80,6 +82,82 @@ def test_clear_stop_does_not_halt_fetch(api_urls, mock_http_client, shelf_detail
     assert mock_http_client.http_get_request.call_count == 1
 
 
+# ---------------------------------------------------------------------------
+# Pooled discovery (workers > 1): detail GETs run concurrently, results keep
+# request order, and the stop flag still ends the walk at a node boundary.
+# ---------------------------------------------------------------------------
+
+def _book_contents(count):
+    return {"id": 1, "slug": "b", "name": "b",
+            "contents": [{"id": n, "name": f"p{n}", "type": "page"}
+                         for n in range(1, count + 1)]}
+
+
+class _Pages:  # pylint: disable=too-few-public-methods
+    """http_get_request side effect: page n answers after a delay that shrinks with
+    n, so later pages finish first; records the most GETs in flight at once."""
+    def __init__(self, fail=None, on_call=None):
+        self.lock = threading.Lock()
+        self.in_flight = self.peak = 0
+        self.fail = fail
+        self.on_call = on_call
+
+    def __call__(self, url):
+        page_id = int(url.rsplit("/", 1)[1])
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        if self.on_call:
+            self.on_call(page_id)
+        time.sleep(0.02 / page_id)
+        with self.lock:
+            self.in_flight -= 1
+        if page_id == self.fail:
+            raise HTTPError(f"500 for {url}")
+        return make_response({"id": page_id, "slug": f"p{page_id}", "name": f"p{page_id}",
+                              "html": "<p>x</p>"})
+
+
+def test_pooled_fetch_keeps_request_order(api_urls, mock_http_client):
+    pages = _Pages()
+    mock_http_client.http_get_request.side_effect = pages
+    exporter = NodeExporter(api_urls, mock_http_client, workers=4)
+    result = exporter.get_child_nodes("pages", {1: Node(_book_contents(12))},
+                                      node_type="page")
+    assert list(result) == list(range(1, 13))
+    assert pages.peak > 1
+
+
+def test_pooled_fetch_applies_the_filter_before_the_get(api_urls, mock_http_client):
+    mock_http_client.http_get_request.side_effect = _Pages()
+    exporter = NodeExporter(api_urls, mock_http_client, workers=4,
+                            node_filter=_make_filter(pages={"exclude": ["^p2$"]}))
+    result = exporter.get_child_nodes("pages", {1: Node(_book_contents(3))},
+                                      node_type="page")
+    assert list(result) == [1, 3]
+    fetched = [call.args[0] for call in mock_http_client.http_get_request.call_args_list]
+    assert not any(url.endswith("/2") for url in fetched)
+
+
+def test_pooled_fetch_stop_truncates_to_a_prefix(api_urls, mock_http_client):
+    stop = threading.Event()
+    pages = _Pages(on_call=lambda page_id: page_id == 3 and stop.set())
+    mock_http_client.http_get_request.side_effect = pages
+    exporter = NodeExporter(api_urls, mock_http_client, stop=stop, workers=2)
+    result = exporter.get_child_nodes("pages", {1: Node(_book_contents(40))},
+                                      node_type="page")
+    assert list(result) == list(range(1, len(result) + 1))
+    assert mock_http_client.http_get_request.call_count < 10
+
+
+def test_pooled_fetch_error_propagates(api_urls, mock_http_client):
+    mock_http_client.http_get_request.side_effect = _Pages(fail=5)
+    exporter = NodeExporter(api_urls, mock_http_client, workers=3)
+    with pytest.raises(HTTPError, match="500"):
+        exporter.get_child_nodes("pages", {1: Node(_book_contents(20))}, node_type="page")
+    assert mock_http_client.http_get_request.call_count < 20
+
+
 # ---------------------------------------------------------------------------
 # _get_all_ids
 # ---------------------------------------------------------------------------
@@ -887,3 +965,23 @@ def test_no_filter_behavior_unchanged(
     mock_http_client.http_get_request.side_effect = _side_effect
     result = exporter.get_child_nodes("books", {1: shelf_node})
     assert set(result.keys()) == {10, 11}
+
+
+# ── response cache hints ────────────────────────────────────────────────────
+
+def test_page_details_carry_listed_updated_at_for_the_cache(
+    api_urls, mock_http_client, book_detail_mixed, page_detail
+):
+    """Pages are fetched with the updated_at their book lists; containers without."""
+    exporter = NodeExporter(api_urls, mock_http_client)
+    mock_http_client.http_get_request.side_effect = (
+        lambda url: make_response(dict(page_detail, id=int(url.rsplit("/", 1)[1]))))
+    exporter.get_child_nodes("pages", {10: Node(book_detail_mixed)}, node_type="page")
+    stamps = [call.kwargs["updated_at"]
+              for call in mock_http_client.http_get_json.call_args_list]
+    assert stamps == ["2023-01-02T10:00:00.000000Z", "2023-01-02T11:00:00.000000Z"]
+
+    mock_http_client.http_get_json.reset_mock()
+    exporter.get_chapter_nodes({10: Node(book_detail_mixed)})
+    assert all(call.kwargs["updated_at"] is None
+               for call in mock_http_client.http_get_json.call_args_list)
@@ -94,6 +94,15 @@ class TestGetMessageTextSuccessBranch:
         assert "Warning: local cleanup failed - permission denied" in body
         assert "completed with errors" in body
 
+    def test_aborted_shows_incomplete_warning_line(self):
+        notifier = _make_notifier()
+        result = NotifyResult(status=ExportStatus.PARTIAL, local="/data/export.tgz",
+                              aborted="run deadline of 3600s reached")
+        body = notifier._get_message_text(None, result=result)
+        assert ("Warning: export cut short, archive is incomplete - "
+                "run deadline of 3600s reached") in body
+        assert "completed with errors" in body
+
     def test_no_cleanup_error_no_warning_line(self):
         notifier = _make_notifier()
         result = NotifyResult(local="/data/export.tgz", uploads=[], removed=[])
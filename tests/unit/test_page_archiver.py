@@ -2,7 +2,9 @@
 """Happy-path unit tests for PageArchiver."""
 import logging
 import os
+import tarfile
 import threading
+import zipfile
 from concurrent.futures import ThreadPoolExecutor
 from typing import Dict
 from unittest.mock import MagicMock, patch
@@ -12,6 +14,8 @@ from requests.exceptions import HTTPError
 
 from bookstack_file_exporter.archiver.node_archiver import NodeArchiver, PageArchiver
 from bookstack_file_exporter.archiver import util as archiver_util
+from bookstack_file_exporter.archiver.budget import ByteBudget
+from bookstack_file_exporter.config_helper.models import Compression
 from bookstack_file_exporter.exporter.node import Node
 from tests.fixtures.mock_config import make_mock_config as _make_config
 
@@ -76,7 +80,7 @@ class TestCooperativeCancellation:
         page_archiver._stop = ev
         page_archiver._download_node_assets = MagicMock(return_value={})
         # set the flag the moment the first node's data is fetched
-        page_archiver._get_node_data = MagicMock(side_effect=lambda url: ev.set() or b"data")
+        page_archiver._get_node_data = MagicMock(side_effect=lambda url, _fmt: ev.set() or b"data")
         page_archiver._archive_node = MagicMock()
         page_archiver._archive_node_meta = MagicMock()
         page_archiver.export_formats = ["markdown"]
@@ -130,11 +134,19 @@ class TestConstruction:
                                 asset_archiver=MagicMock())
         assert archiver.archive_file == f"{archive_dir}.tgz"
 
-    def test_tar_file_ends_with_tar(self, tmp_path):
+    def test_tar_file_ends_with_tar_partial(self, tmp_path):
         archive_dir = str(tmp_path / "bookstack-20260514")
         archiver = PageArchiver(archive_dir, _make_config(), MagicMock(),
                                 asset_archiver=MagicMock())
-        assert archiver.tar_file == f"{archive_dir}.tar"
+        assert archiver.tar_file == f"{archive_dir}.tar.partial"
+
+    @pytest.mark.parametrize("codec,extension", [
+        ("gzip", ".tgz"), ("zstd", ".tar.zst"), ("xz", ".tar.xz"), ("none", ".tar")])
+    def test_archive_file_follows_codec(self, tmp_path, codec, extension):
+        archive_dir = str(tmp_path / "bookstack-20260514")
+        config = _make_config(compression=Compression(codec=codec))
+        archiver = PageArchiver(archive_dir, config, MagicMock(), asset_archiver=MagicMock())
+        assert archiver.archive_file == f"{archive_dir}{extension}"
 
     def test_archive_base_path_is_last_segment(self, tmp_path):
         archive_dir = str(tmp_path / "bookstack-20260514")
@@ -169,7 +181,7 @@ class TestExportUrl:
         with patch(
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response"
         ) as mock_get_bytes, patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
         ):
             mock_get_bytes.return_value = b"page content"
             archiver.archive({42: page})
@@ -199,68 +211,235 @@ class TestFileExtensionMap:
     def test_zip_extension(self, page_archiver):
         assert page_archiver.file_extension_map["zip"] == ".zip"
 
-    def test_tgz_extension(self, page_archiver):
-        assert page_archiver.file_extension_map["tgz"] == ".tgz"
-
     def test_meta_extension(self, page_archiver):
         assert page_archiver.file_extension_map["meta"] == "_meta.json"
 
 
 # ---------------------------------------------------------------------------
-# 4. gzip_archive delegates to archiver_util.create_gzip
+# 4. compress_archive delegates to archiver_util.compress_file
 # ---------------------------------------------------------------------------
 
-class TestGzipArchive:  # pylint: disable=too-few-public-methods  # test scaffolding stub
-    def test_create_gzip_called_with_tar_and_partial_then_renamed(self, page_archiver):
-        # gzip writes to the .partial path; os.rename promotes it to the final .tgz.
+class TestCompressArchive:  # pylint: disable=too-few-public-methods  # test scaffolding stub
+    def test_compress_file_called_with_tar_and_partial_then_renamed(self, page_archiver):
+        # compression writes to the .partial path; os.rename promotes it to the final .tgz.
         with patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.create_gzip"
-        ) as mock_create_gzip, patch(
+            "bookstack_file_exporter.archiver.node_archiver.archiver_util.compress_file"
+        ) as mock_compress, patch(
             "bookstack_file_exporter.archiver.node_archiver.os.rename"
         ) as mock_rename:
-            page_archiver.gzip_archive()
+            page_archiver.compress_archive()
             partial = f"{page_archiver.archive_file}.partial"
-            mock_create_gzip.assert_called_once_with(page_archiver.tar_file, partial)
+            mock_compress.assert_called_once_with(page_archiver.tar_file, partial,
+                                                  "gzip", None, None,
+                                                  restart_interval=None)
             mock_rename.assert_called_once_with(partial, page_archiver.archive_file)
 
 
-class TestAtomicGzip:  # pylint: disable=too-few-public-methods
-    def test_gzip_writes_via_partial_then_renames(self, page_archiver, tmp_path, monkeypatch):
+class TestAtomicCompress:  # pylint: disable=too-few-public-methods
+    def test_compress_writes_via_partial_then_renames(self, page_archiver, tmp_path,
+                                                      monkeypatch):
 
-        tar = tmp_path / "bkps_2026.tar"
+        tar = tmp_path / "bkps_2026.tar.partial"
         tar.write_bytes(b"tar-bytes")
         page_archiver.tar_file = str(tar)
         page_archiver.archive_file = str(tmp_path / "bkps_2026.tgz")
 
         seen_target = {}
-        real_create_gzip = archiver_util.create_gzip
-        def spy(file_path, gzip_file, remove_old=True):
-            seen_target["gzip_file"] = gzip_file
-            return real_create_gzip(file_path, gzip_file, remove_old)
-        monkeypatch.setattr(archiver_util, "create_gzip", spy)
+        real_compress = archiver_util.compress_file
+        def spy(file_path, out_file, *args, **kwargs):
+            seen_target["out_file"] = out_file
+            return real_compress(file_path, out_file, *args, **kwargs)
+        monkeypatch.setattr(archiver_util, "compress_file", spy)
 
-        page_archiver.gzip_archive()
+        page_archiver.compress_archive()
 
-        # gzip was written to the .partial path, not the final name
-        assert seen_target["gzip_file"].endswith(".tgz.partial")
+        # archive was written to the .partial path, not the final name
+        assert seen_target["out_file"].endswith(".tgz.partial")
         # final archive exists; no partial left behind
         assert os.path.exists(page_archiver.archive_file)
         assert not os.path.exists(page_archiver.archive_file + ".partial")
 
 
-# ---------------------------------------------------------------------------
-# 5. write_data delegates to archiver_util.write_tar
-# ---------------------------------------------------------------------------
+class TestStreamingCompression:
+    """compression.streaming: the sink gzips members straight into the .partial."""
+
+    @pytest.fixture
+    def streaming_archiver(self, tmp_path):
+        config = _make_config(compression=Compression(streaming=True))
+        archive_dir = str(tmp_path / "bookstack-20260514")
+        return PageArchiver(archive_dir, config, MagicMock(), asset_archiver=MagicMock())
+
+    def test_staging_file_is_partial(self, streaming_archiver):
+        assert streaming_archiver.staging_file == f"{streaming_archiver.archive_file}.partial"
+
+    def test_export_writes_compressed_partial_without_intermediate_tar(
+            self, streaming_archiver, build_node):
+        streaming_archiver.http_client.http_get_request.return_value.content = b"body"
+        book = build_node(id=1, name="book", slug="book")
+        page = build_node(id=2, name="page", slug="page", parent=book)
+
+        streaming_archiver._export_nodes({2: page}, "pages", {}, {})
+
+        assert not os.path.exists(streaming_archiver.tar_file)
+        with tarfile.open(streaming_archiver.partial_file, "r:gz") as tar:
+            assert tar.getnames() == ["bookstack-20260514/book/page.md"]
+
+    def test_compress_archive_only_renames(self, streaming_archiver, build_node):
+        streaming_archiver.http_client.http_get_request.return_value.content = b"body"
+        book = build_node(id=1, name="book", slug="book")
+        page = build_node(id=2, name="page", slug="page", parent=book)
+        streaming_archiver._export_nodes({2: page}, "pages", {}, {})
 
-class TestWriteData:  # pylint: disable=too-few-public-methods  # test scaffolding stub
-    def test_write_tar_called_with_correct_args(self, page_archiver):
         with patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
-        ) as mock_write_tar:
-            page_archiver.write_data("some/path/file.md", b"content")
-            mock_write_tar.assert_called_once_with(
-                page_archiver.tar_file, "some/path/file.md", b"content"
-            )
+            "bookstack_file_exporter.archiver.node_archiver.archiver_util.compress_file"
+        ) as mock_compress:
+            streaming_archiver.compress_archive()
+
+        mock_compress.assert_not_called()
+        assert not os.path.exists(streaming_archiver.partial_file)
+        with tarfile.open(streaming_archiver.archive_file, "r:gz") as tar:
+            member = tar.getmember("bookstack-20260514/book/page.md")
+            assert tar.extractfile(member).read() == b"body"
+
+
+class TestZipOutput:
+    """output_mode zip: members go straight into the .zip.partial with a per-member codec."""
+
+    def test_archive_file_is_zip(self, tmp_path):
+        archive_dir = str(tmp_path / "bookstack-20260514")
+        archiver = PageArchiver(archive_dir, _make_config(output_mode="zip"), MagicMock(),
+                                asset_archiver=MagicMock())
+        assert archiver.archive_file == f"{archive_dir}.zip"
+        assert archiver.staging_file == f"{archive_dir}.zip.partial"
+
+    def test_export_round_trip(self, tmp_path, build_node):
+        config = _make_config(formats=["markdown", "pdf"], output_mode="zip")
+        archiver = PageArchiver(str(tmp_path / "bookstack-20260514"), config, MagicMock(),
+                                asset_archiver=MagicMock())
+        archiver.http_client.http_get_request.return_value.content = b"body"
+        book = build_node(id=1, name="book", slug="book")
+        page = build_node(id=2, name="page", slug="page", parent=book)
+
+        archiver._export_nodes({2: page}, "pages", {}, {})
+        archiver.compress_archive()
+
+        assert not os.path.exists(archiver.tar_file)
+        with zipfile.ZipFile(archiver.archive_file) as archive:
+            infos = {i.filename: i.compress_type for i in archive.infolist()}
+            assert archive.read("bookstack-20260514/book/page.md") == b"body"
+        assert infos == {"bookstack-20260514/book/page.md": zipfile.ZIP_DEFLATED,
+                         "bookstack-20260514/book/page.pdf": zipfile.ZIP_STORED}
+
+
+class TestDirectoryOutput:
+    """output_mode directory: a persistent tree, rewritten only where content changed."""
+
+    @staticmethod
+    def _archiver(tmp_path, stamp, directory_archive=False):
+        config = _make_config(output_mode="directory", directory_archive=directory_archive)
+        archiver = PageArchiver(str(tmp_path / f"bkps_{stamp}"), config, MagicMock(),
+                                asset_archiver=MagicMock(),
+                                output_dir=str(tmp_path / "bkps"))
+        archiver.http_client.http_get_request.return_value.content = b"body"
+        return archiver
+
+    @staticmethod
+    def _export(archiver, build_node):
+        book = build_node(id=1, name="book", slug="book")
+        page = build_node(id=2, name="page", slug="page", parent=book)
+        archiver._export_nodes({2: page}, "pages", {}, {})
+        archiver.compress_archive()
+
+    def test_second_run_leaves_unchanged_files_alone(self, tmp_path, build_node):
+        self._export(self._archiver(tmp_path, "1"), build_node)
+        page = tmp_path / "bkps" / "book" / "page.md"
+        assert page.read_bytes() == b"body"
+        os.utime(page, (1, 1))
+
+        second = self._archiver(tmp_path, "2")
+        self._export(second, build_node)
+
+        assert os.stat(page).st_mtime == 1
+        assert second.write_stats.unchanged == 1
+        assert second.archive_file == str(tmp_path / "bkps")
+        assert not list(tmp_path.glob("bkps_*"))  # no archive unless asked for
+
+    def test_optional_archive_packs_tree(self, tmp_path, build_node):
+        archiver = self._archiver(tmp_path, "1", directory_archive=True)
+        self._export(archiver, build_node)
+
+        assert archiver.archive_file == str(tmp_path / "bkps_1.tgz")
+        with tarfile.open(archiver.archive_file, "r:gz") as tar:
+            assert tar.extractfile("bkps_1/book/page.md").read() == b"body"
+        assert (tmp_path / "bkps" / "book" / "page.md").exists()
+
+
+class TestCodecs:
+    """Each codec produces a tar readable by the matching stdlib/tarfile reader."""
+
+    @staticmethod
+    def _export(tmp_path, build_node, compression):
+        config = _make_config(compression=compression)
+        archiver = PageArchiver(str(tmp_path / "bookstack-20260514"), config, MagicMock(),
+                                asset_archiver=MagicMock())
+        archiver.http_client.http_get_request.return_value.content = b"body"
+        book = build_node(id=1, name="book", slug="book")
+        page = build_node(id=2, name="page", slug="page", parent=book)
+        archiver._export_nodes({2: page}, "pages", {}, {})
+        archiver.compress_archive()
+        return archiver
+
+    @pytest.mark.parametrize("streaming", [False, True])
+    @pytest.mark.parametrize("codec,mode", [("xz", "r:xz"), ("none", "r:")])
+    def test_round_trip(self, tmp_path, build_node, codec, mode, streaming):
+        archiver = self._export(tmp_path, build_node,
+                                Compression(codec=codec, streaming=streaming))
+        assert not os.path.exists(archiver.tar_file)
+        assert not os.path.exists(archiver.partial_file)
+        with tarfile.open(archiver.archive_file, mode) as tar:
+            member = tar.getmember("bookstack-20260514/book/page.md")
+            assert tar.extractfile(member).read() == b"body"
+
+    def test_zstd_round_trip(self, tmp_path, build_node):
+        zstandard = pytest.importorskip("zstandard")
+        archiver = self._export(tmp_path, build_node, Compression(codec="zstd", threads=2))
+        with open(archiver.archive_file, "rb") as raw:
+            reader = zstandard.ZstdDecompressor().stream_reader(raw)
+            with tarfile.open(fileobj=reader, mode="r|") as tar:
+                member = tar.next()
+                assert member.name == "bookstack-20260514/book/page.md"
+                assert tar.extractfile(member).read() == b"body"
+
+
+# ---------------------------------------------------------------------------
+# 5. write_data delegates to the open sink; _export_nodes owns the sink lifetime
+# ---------------------------------------------------------------------------
+
+class TestWriteData:
+    def test_sink_write_called_with_correct_args(self, page_archiver):
+        page_archiver._sink = MagicMock()
+        page_archiver.write_data("some/path/file.md", b"content")
+        page_archiver._sink.write.assert_called_once_with("some/path/file.md", b"content",
+                                                         source=None, done=None)
+
+    def test_export_nodes_writes_real_tar_and_records_stats(self, page_archiver, build_node):
+        page_archiver.http_client.http_get_request.return_value.content = b"page body"
+        book = build_node(id=1, name="book", slug="book")
+        page = build_node(id=2, name="page", slug="page", parent=book)
+
+        page_archiver._export_nodes({2: page}, "pages", {}, {})
+
+        with tarfile.open(page_archiver.tar_file) as tar:
+            member = tar.getmember("bookstack-20260514/book/page.md")
+            assert tar.extractfile(member).read() == b"page body"
+        assert page_archiver.write_stats.members == 1
+        assert page_archiver.write_stats.bytes_written == len(b"page body")
+        assert page_archiver._sink is None  # closed with the export
+
+    def test_export_nodes_writes_no_tar_when_nothing_exported(self, page_archiver):
+        page_archiver._export_nodes({}, "pages", {}, {})
+        assert not os.path.exists(page_archiver.tar_file)
+        assert page_archiver.write_stats.members == 0
 
 
 # ---------------------------------------------------------------------------
@@ -291,15 +470,15 @@ class TestArchivePages:
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"page bytes",
         ), patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
-        ) as mock_write_tar:
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
+        ) as mock_write:
             archiver.archive(page_nodes)
 
-        # 2 pages × 1 format = 2 write_tar calls
-        assert mock_write_tar.call_count == 2
+        # 2 pages × 1 format = 2 write_data calls
+        assert mock_write.call_count == 2
 
     def test_archive_respects_multiple_formats(self, tmp_path, build_node):
-        """archive should call write_tar once per page per format."""
+        """archive should call write_data once per page per format."""
         mock_asset = MagicMock()
         config = _make_config(formats=["markdown", "html"], export_images=False,
                                export_attachments=False, export_meta=False)
@@ -316,12 +495,12 @@ class TestArchivePages:
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"content",
         ), patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
-        ) as mock_write_tar:
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
+        ) as mock_write:
             archiver.archive(page_nodes)
 
-        # 1 page × 2 formats = 2 write_tar calls
-        assert mock_write_tar.call_count == 2
+        # 1 page × 2 formats = 2 write_data calls
+        assert mock_write.call_count == 2
 
     def test_failed_page_format_skipped_run_continues(self, tmp_path, build_node):
         """A 403/404 on one page-format export is skipped, not fatal; others still written."""
@@ -336,7 +515,7 @@ class TestArchivePages:
         good = build_node(id=30, name="ok", slug="ok", parent=parent_node)
         forbidden = build_node(id=3, name="secret", slug="secret", parent=parent_node)
 
-        def _byte_response(url, http_client):  # pylint: disable=unused-argument
+        def _byte_response(url, http_client, budget=None, **_):  # pylint: disable=unused-argument
             if "/pages/3/" in url:
                 raise HTTPError("403 Forbidden")
             return b"page bytes"
@@ -345,12 +524,12 @@ class TestArchivePages:
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             side_effect=_byte_response,
         ), patch(
-            "bookstack_file_exporter.archiver.node_archiver.archiver_util.write_tar"
-        ) as mock_write_tar:
+            "bookstack_file_exporter.archiver.node_archiver.NodeArchiver.write_data"
+        ) as mock_write:
             archiver.archive({30: good, 3: forbidden})  # must not raise
 
         # forbidden page skipped, good page written → 1 write
-        assert mock_write_tar.call_count == 1
+        assert mock_write.call_count == 1
 
 
 # ---------------------------------------------------------------------------
@@ -427,7 +606,7 @@ class TestPageOutputPath:
         # page.file_path = "my-book/my-page"
 
         written = {}
-        archiver.write_data = written.__setitem__
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
         with patch(
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"data",
@@ -449,7 +628,7 @@ class TestPageOutputPath:
         page = build_node(id=7, name="my-page", slug="my-page", parent=parent_node)
 
         written = {}
-        archiver.write_data = written.__setitem__
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
         with patch(
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"data",
@@ -488,7 +667,7 @@ class TestPageAssetParentPath:
         archiver.asset_archiver.update_asset_links.side_effect = lambda *a, **kw: a[2]
 
         written = {}
-        archiver.write_data = written.__setitem__
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
         with patch(
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"data",
@@ -529,7 +708,7 @@ class TestModifyLinksFalseStillDownloads:
         archiver.asset_archiver.get_asset_bytes.return_value = b"PNGDATA"
 
         written = {}
-        archiver.write_data = written.__setitem__
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
         with patch(
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"data",
@@ -575,7 +754,7 @@ class TestRewriteOrder:
         archiver.asset_archiver.update_asset_links.side_effect = _track_rewrite
 
         written = {}
-        archiver.write_data = written.__setitem__
+        archiver.write_data = lambda path, data, source=None: written.__setitem__(path, data)
         with patch(
             "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
             return_value=b"data",
@@ -634,7 +813,7 @@ class TestParallelExport:
         collected = []
         lock = threading.Lock()
 
-        def _record(path, data):
+        def _record(path, data, source=None):
             with lock:
                 collected.append(path)
 
@@ -691,6 +870,36 @@ class TestParallelExport:
             archiver.archive(pages)
         mock_pool.assert_called_once_with(max_workers=3)
 
+    def test_parallel_byte_budget_bounds_and_drains(self, tmp_path, build_node):
+        """max_inflight_bytes: buffered bodies never exceed the limit, and every
+        reservation is released by the writer thread by the end of the run."""
+        config = _make_config(formats=["markdown"], export_workers=8,
+                              max_inflight_bytes=250)
+        archiver = PageArchiver(str(tmp_path / "bs"), config, MagicMock(),
+                                asset_archiver=MagicMock())
+        archiver.asset_archiver.get_asset_nodes.return_value = {}
+        response = archiver.http_client.http_get_request.return_value
+        response.content = b"x" * 100
+        response.headers = {"Content-Length": "100"}
+        parent = build_node(id=1, name="bk", slug="bk")
+        pages = {i: build_node(id=i, name=f"p{i}", slug=f"p{i}", parent=parent)
+                 for i in range(2, 22)}
+
+        budgets = []
+        with patch("bookstack_file_exporter.archiver.node_archiver.ByteBudget",
+                   side_effect=lambda limit: budgets.append(ByteBudget(limit))
+                   or budgets[-1]):
+            archiver.archive(pages)
+        archiver.compress_archive()
+
+        assert len(budgets) == 1
+        assert 0 < budgets[0].peak <= 250
+        assert budgets[0].in_use == 0
+        assert archiver._budget is None
+        assert archiver.asset_archiver.budget is None
+        with tarfile.open(archiver.archive_file) as tar:
+            assert len(tar.getnames()) == 20
+
     def test_parallel_node_failure_isolated_run_continues(self, tmp_path, build_node):
         """A worker raising a NON-HTTP error skips that node; others still written."""
         config = _make_config(formats=["markdown"], export_workers=4)
@@ -701,7 +910,7 @@ class TestParallelExport:
         pages = {i: build_node(id=i, name=f"p{i}", slug=f"p{i}", parent=parent)
                  for i in range(2, 7)}  # 5 pages; id 4 will blow up
 
-        def _byte_response(url, http_client):  # pylint: disable=unused-argument
+        def _byte_response(url, http_client, budget=None, **_):  # pylint: disable=unused-argument
             if "/pages/4/" in url:
                 raise KeyError("malformed attachment payload")  # non-HTTP, not swallowed
             return b"data"
@@ -730,7 +939,7 @@ class TestParallelExport:
         pages = {i: build_node(id=i, name=f"p{i}", slug=f"p{i}", parent=parent)
                  for i in range(2, 22)}  # 20 pages
 
-        def _byte_response(url, http_client):  # pylint: disable=unused-argument
+        def _byte_response(url, http_client, budget=None, **_):  # pylint: disable=unused-argument
             ev.set()  # trip the stop flag as soon as any fetch happens
             return b"data"
 
@@ -759,7 +968,7 @@ class TestParallelExport:
 
         fetched = []
 
-        def _byte_response(url, http_client):  # pylint: disable=unused-argument
+        def _byte_response(url, http_client, budget=None, **_):  # pylint: disable=unused-argument
             fetched.append(url)
             return b"data"
 
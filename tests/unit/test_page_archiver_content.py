@@ -0,0 +1,99 @@
+# pylint: disable=missing-class-docstring,missing-function-docstring,protected-access,too-few-public-methods
+"""PageArchiver end-to-end tests for archive content options: dedup, manifest, volumes."""
+import json
+import os
+import tarfile
+from unittest.mock import MagicMock
+
+from bookstack_file_exporter.archiver.node_archiver import PageArchiver
+from bookstack_file_exporter.config_helper.models import Compression
+from tests.fixtures.mock_config import make_mock_config as _make_config
+
+
+class TestDedup:
+    """dedup: an asset repeated across pages is stored once in the archive."""
+
+    def test_repeated_content_becomes_hardlink(self, tmp_path, build_node):
+        config = _make_config(dedup=True, compression=Compression(streaming=True))
+        archiver = PageArchiver(str(tmp_path / "bookstack-20260514"), config, MagicMock(),
+                                asset_archiver=MagicMock())
+        archiver.http_client.http_get_request.return_value.content = b"same body"
+        book = build_node(id=1, name="book", slug="book")
+        pages = {i: build_node(id=i, name=f"p{i}", slug=f"p{i}", parent=book)
+                 for i in (2, 3)}
+
+        archiver._export_nodes(pages, "pages", {}, {})
+        archiver.compress_archive()
+
+        assert archiver.write_stats.duplicates == 1
+        with tarfile.open(archiver.archive_file, "r:gz") as tar:
+            link = tar.getmember("bookstack-20260514/book/p3.md")
+            assert link.linkname == "bookstack-20260514/book/p2.md"
+            assert tar.extractfile(link).read() == b"same body"
+
+
+class TestManifest:
+    """manifest: MANIFEST.json inside the archive plus an identical sidecar."""
+
+    def test_manifest_inside_archive_and_sidecar(self, tmp_path, build_node):
+        config = _make_config(manifest=True, export_meta=True)
+        archiver = PageArchiver(str(tmp_path / "bookstack-20260514"), config, MagicMock(),
+                                asset_archiver=MagicMock())
+        archiver.http_client.http_get_request.return_value.content = b"body"
+        book = build_node(id=1, name="book", slug="book")
+        page = build_node(id=2, name="page", slug="page", parent=book,
+                          updated_at="2026-05-01T00:00:00.000000Z")
+
+        archiver._export_nodes({2: page}, "pages", {}, {})
+        archiver.compress_archive()
+
+        with tarfile.open(archiver.archive_file, "r:gz") as tar:
+            inside = tar.extractfile("bookstack-20260514/MANIFEST.json").read()
+        with open(f"{archiver.archive_file}.manifest.json", "rb") as sidecar:
+            assert sidecar.read() == inside
+        files = json.loads(inside)["files"]
+        assert [f["path"] for f in files] == ["bookstack-20260514/book/page.md",
+                                              "bookstack-20260514/book/page_meta.json"]
+        assert {(f["resource"], f["node_id"], f["updated_at"]) for f in files} == {
+            ("pages", 2, "2026-05-01T00:00:00.000000Z")}
+
+    def test_disabled_by_default(self, tmp_path, build_node):
+        archiver = PageArchiver(str(tmp_path / "bookstack-20260514"), _make_config(),
+                                MagicMock(), asset_archiver=MagicMock())
+        archiver.http_client.http_get_request.return_value.content = b"body"
+        book = build_node(id=1, name="book", slug="book")
+        archiver._export_nodes({2: build_node(id=2, name="p", slug="p", parent=book)},
+                               "pages", {}, {})
+        archiver.compress_archive()
+        assert archiver.manifest_data is None
+        assert not os.path.exists(f"{archiver.archive_file}.manifest.json")
+
+
+class TestVolumes:
+    """max_volume_size: numbered volumes, renamed together, one set-level manifest."""
+
+    def test_export_splits_into_extractable_volumes(self, tmp_path, build_node):
+        config = _make_config(manifest=True, max_volume_size=64 * 1024)
+        archiver = PageArchiver(str(tmp_path / "bookstack-20260514"), config, MagicMock(),
+                                asset_archiver=MagicMock())
+        archiver.http_client.http_get_request.return_value.content = os.urandom(30000)
+        book = build_node(id=1, name="book", slug="book")
+        pages = {i: build_node(id=i, name=f"p{i}", slug=f"p{i}", parent=book)
+                 for i in range(2, 8)}
+
+        archiver._export_nodes(pages, "pages", {}, {})
+        archiver.compress_archive()
+
+        files = archiver.archive_files
+        assert len(files) > 1
+        assert [os.path.basename(f) for f in files[:2]] == [
+            "bookstack-20260514.part001.tgz", "bookstack-20260514.part002.tgz"]
+        names = []
+        for volume in files:
+            with tarfile.open(volume, "r:gz") as tar:
+                names += tar.getnames()
+        assert sorted(names[:-1]) == sorted(
+            f"bookstack-20260514/book/p{i}.md" for i in range(2, 8))
+        assert names[-1] == "bookstack-20260514/MANIFEST.json"
+        assert os.path.exists(f"{archiver.archive_file}.manifest.json")
+        assert not list(tmp_path.glob("*.partial"))
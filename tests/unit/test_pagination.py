@@ -0,0 +1,74 @@
+# pylint: disable=missing-function-docstring
+"""Unit tests for list pagination planning (common/pagination.py)."""
+from bookstack_file_exporter.common.pagination import PageWalk, page_url
+
+
+def _body(start, stop, total):
+    return {"data": [{"id": i} for i in range(start, stop)], "total": total}
+
+
+def _walk(first, workers=4, total=10_000):
+    """Run a PageWalk against an in-memory list of total items."""
+    walk = PageWalk(first, workers)
+    waves = []
+    wave = walk.next_wave()
+    while wave is not None:
+        size, offsets = wave
+        waves.append(wave)
+        walk.add_wave([(_body(off, min(off + size, total), total), 0.0, 0)
+                       for off in offsets])
+        wave = walk.next_wave()
+    return walk, waves
+
+
+def test_page_url_replaces_count_and_offset():
+    assert page_url("https://h/api/books?sort=name&count=1&offset=9", 100, 200) == (
+        "https://h/api/books?sort=name&count=100&offset=200")
+
+
+def test_single_page_needs_no_waves():
+    walk, waves = _walk((_body(0, 3, 3), 0.1, 100))
+    assert not waves
+    assert [item["id"] for item in walk.items] == [0, 1, 2]
+
+
+def test_waves_cover_every_offset_in_order():
+    walk, waves = _walk((_body(0, 500, 10_000), 0.0, 0), workers=4)
+    assert waves[0] == (500, [500, 1000, 1500, 2000])
+    assert [item["id"] for item in walk.items] == list(range(10_000))
+
+
+def test_page_size_never_exceeds_the_servers_cap():
+    # asked for 500, the server capped the first page at 100
+    _, waves = _walk((_body(0, 100, 10_000), 0.0, 0))
+    assert max(size for size, _ in waves) == 100
+
+
+def test_small_remainder_is_spread_over_workers():
+    walk = PageWalk((_body(0, 500, 900), 0.0, 0), workers=4)
+    assert walk.next_wave() == (100, [500, 600, 700, 800])
+
+
+def test_slow_pages_shrink_the_page_size():
+    # 500 items took 10s: 2s pages hold 100 items
+    walk = PageWalk((_body(0, 500, 10_000), 10.0, 0), workers=4)
+    assert walk.page_size() == 100
+
+
+def test_heavy_pages_shrink_the_page_size():
+    # 500 items were 20 MiB: 4 MiB pages hold 100 items
+    walk = PageWalk((_body(0, 500, 10_000), 0.0, 20 * 1024 * 1024), workers=4)
+    assert walk.page_size() == 100
+
+
+def test_page_size_floor():
+    walk = PageWalk((_body(0, 500, 10_000), 600.0, 0), workers=4)
+    assert walk.page_size() == 50
+
+
+def test_empty_page_ends_the_walk():
+    walk = PageWalk((_body(0, 500, 2000), 0.0, 0), workers=2)
+    size, _ = walk.next_wave()
+    walk.add_wave([(_body(500, 500 + size, 2000), 0.0, 0), (_body(0, 0, 2000), 0.0, 0)])
+    assert walk.next_wave() is None
+    assert len(walk.items) == 500 + size
@@ -0,0 +1,78 @@
+# pylint: disable=missing-function-docstring
+"""Unit tests for the parallel (pigz-style) gzip writer."""
+import gzip
+import io
+import os
+import shutil
+import subprocess
+import tarfile
+
+import pytest
+
+from bookstack_file_exporter.archiver.pgzip import BLOCK_SIZE, ParallelGzipWriter
+
+# small blocks so even test-sized inputs span many parallel tasks
+_BLOCK = 4096
+
+
+def _compress(data: bytes, chunk: int = 1000, block_size: int = _BLOCK, **kwargs) -> bytes:
+    buf = io.BytesIO()
+    with ParallelGzipWriter(buf, block_size=block_size, **kwargs) as writer:
+        for i in range(0, len(data), chunk):
+            writer.write(data[i:i + chunk])
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("level", [0, 1, 6, 9])
+def test_round_trips_through_stdlib_gzip(level):
+    data = os.urandom(20_000) + b"repetitive text " * 5_000
+    assert gzip.decompress(_compress(data, level=level, threads=4)) == data
+
+
+def test_empty_input_is_valid_gzip():
+    assert gzip.decompress(_compress(b"", threads=2)) == b""
+
+
+def test_ratio_close_to_single_stream():
+    # the preset dictionary keeps cross-block matches, so block splitting costs little
+    data = b"".join(f"line {i % 500} of a markdown page\n".encode() for i in range(50_000))
+    parallel = len(_compress(data, level=6, threads=4, block_size=BLOCK_SIZE))
+    single = len(gzip.compress(data, 6))
+    assert parallel <= single * 1.02
+
+
+def test_tar_stream_readable_by_tarfile():
+    buf = io.BytesIO()
+    with ParallelGzipWriter(buf, threads=3, block_size=_BLOCK) as writer:
+        with tarfile.open(fileobj=writer, mode="w|") as tar:
+            for i in range(20):
+                payload = f"page {i}\n".encode() * 500
+                info = tarfile.TarInfo(f"book/page{i}.md")
+                info.size = len(payload)
+                tar.addfile(info, io.BytesIO(payload))
+    buf.seek(0)
+    with tarfile.open(fileobj=buf, mode="r:gz") as tar:
+        assert len(tar.getnames()) == 20
+        assert tar.extractfile("book/page7.md").read() == b"page 7\n" * 500
+
+
+@pytest.mark.skipif(shutil.which("gzip") is None, reason="gzip binary not installed")
+def test_gzip_cli_accepts_output(tmp_path):
+    path = tmp_path / "out.gz"
+    path.write_bytes(_compress(os.urandom(50_000), threads=4))
+    assert subprocess.run(["gzip", "-t", str(path)], check=False).returncode == 0
+
+
+def test_does_not_close_fileobj():
+    buf = io.BytesIO()
+    writer = ParallelGzipWriter(buf, threads=2)
+    writer.close()
+    writer.close()  # idempotent
+    assert not buf.closed
+
+
+def test_write_after_close_raises():
+    writer = ParallelGzipWriter(io.BytesIO(), threads=2)
+    writer.close()
+    with pytest.raises(ValueError):
+        writer.write(b"x")
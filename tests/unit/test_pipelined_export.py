@@ -0,0 +1,156 @@
+# pylint: disable=missing-class-docstring,missing-function-docstring,protected-access
+"""Unit tests for the pipelined export (user_inputs.pipeline): NodeExporter.iter_pages,
+PageArchiver.archive_stream and the run.exporter branch that joins them."""
+import os
+import tarfile
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from bookstack_file_exporter import run
+from bookstack_file_exporter.archiver.node_archiver import PageArchiver
+from bookstack_file_exporter.exporter.exporter import NodeExporter
+from bookstack_file_exporter.exporter.node import Node
+from tests.fixtures.mock_config import make_mock_config as _make_config
+from tests.helpers import make_response
+
+
+def _book_with_chapter(*chapter_ids):
+    """book 1: pages 1-3, then chapter 50 (and any chapter_ids)"""
+    contents = [{"id": n, "name": f"p{n}", "type": "page"} for n in (1, 2, 3)]
+    contents += [{"id": c, "name": f"c{c}", "type": "chapter"} for c in (50, *chapter_ids)]
+    return {"id": 1, "slug": "b", "name": "b", "contents": contents}
+
+
+# chapter id -> the page ids it lists
+_CHAPTERS = {50: (4, 5), 60: (2,), 70: (2, 6)}
+
+
+def _detail(url):
+    """http_get_request side effect for the books above"""
+    if "/chapters/" in url:
+        chapter_id = int(url.rsplit("/", 1)[1])
+        return make_response({"id": chapter_id, "slug": f"c{chapter_id}",
+                              "name": f"c{chapter_id}",
+                              "pages": [{"id": n, "name": f"p{n}"}
+                                        for n in _CHAPTERS[chapter_id]]})
+    page_id = int(url.rsplit("/", 1)[1])
+    return make_response({"id": page_id, "slug": f"p{page_id}", "name": f"p{page_id}",
+                          "html": "<p>x</p>"})
+
+
+# ---------------------------------------------------------------------------
+# NodeExporter.iter_pages
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_iter_pages_streams_what_get_all_pages_returns(api_urls, mock_http_client, workers):
+    mock_http_client.http_get_request.side_effect = _detail
+    exporter = NodeExporter(api_urls, mock_http_client, workers=workers)
+    book = {1: Node(_book_with_chapter())}
+    streamed = [node.id_ for node in exporter.iter_pages(book)]
+    assert streamed == list(exporter.get_all_pages(book)) == [1, 2, 3, 4, 5]
+
+
+def test_iter_pages_yields_before_discovery_is_done(api_urls, mock_http_client):
+    mock_http_client.http_get_request.side_effect = _detail
+    exporter = NodeExporter(api_urls, mock_http_client)
+    pages = exporter.iter_pages({1: Node(_book_with_chapter())})
+    assert next(pages).id_ == 1
+    # the chapter detail, then page 1
+    assert mock_http_client.http_get_request.call_count == 2
+    pages.close()
+
+
+@pytest.mark.parametrize("chapters", [(60,), (60, 70)])
+def test_iter_pages_gives_a_page_listed_twice_the_archive_path_of_get_all_pages(
+        api_urls, mock_http_client, chapters):
+    """page 2 sits under its book and under chapter 60 (and 70): the last listing
+    wins in get_all_pages, and so in the stream"""
+    mock_http_client.http_get_request.side_effect = _detail
+    exporter = NodeExporter(api_urls, mock_http_client, workers=2)
+    book = {1: Node(_book_with_chapter(*chapters))}
+    streamed = {node.id_: node.file_path for node in exporter.iter_pages(book)}
+    expected = {page_id: node.file_path
+                for page_id, node in exporter.get_all_pages(book).items()}
+    assert streamed == expected
+    assert streamed[2] == f"b/c{chapters[-1]}/p2"
+
+
+# ---------------------------------------------------------------------------
+# PageArchiver.archive_stream
+# ---------------------------------------------------------------------------
+
+class TestArchiveStream:
+    def test_stream_is_drawn_no_faster_than_the_pool_exports(self, tmp_path, build_node):
+        """A node generator is pulled at most _POOL_PENDING_PER_WORKER x workers (+1,
+        the node being submitted) ahead of the exports that have finished."""
+        config = _make_config(formats=["markdown"], export_workers=2)
+        archiver = PageArchiver(str(tmp_path / "bs"), config, MagicMock(),
+                                asset_archiver=MagicMock())
+        parent = build_node(id=1, name="bk", slug="bk")
+        lock, done, ahead = threading.Lock(), [], []
+
+        def _export(node, *_args):
+            threading.Event().wait(0.002)
+            with lock:
+                done.append(node.id_)
+
+        def _stream():
+            for i in range(2, 42):
+                with lock:
+                    ahead.append(i - 2 - len(done))
+                yield build_node(id=i, name=f"p{i}", slug=f"p{i}", parent=parent)
+
+        with patch.object(archiver, "_export_node", side_effect=_export):
+            archiver._export_nodes(_stream(), "pages", {}, {})
+        assert sorted(done) == list(range(2, 42))
+        assert max(ahead) <= 4 * 2
+
+    def test_archive_stream_writes_every_page(self, tmp_path, build_node):
+        config = _make_config(formats=["markdown"], export_images=False,
+                              export_attachments=False, export_meta=False,
+                              export_workers=3)
+        archiver = PageArchiver(str(tmp_path / "bs"), config, MagicMock(),
+                                asset_archiver=MagicMock())
+        archiver.asset_archiver.get_asset_nodes.return_value = {}
+        parent = build_node(id=1, name="bk", slug="bk")
+        pages = (build_node(id=i, name=f"p{i}", slug=f"p{i}", parent=parent)
+                 for i in range(2, 8))
+        with patch(
+            "bookstack_file_exporter.archiver.node_archiver.archiver_util.get_byte_response",
+            return_value=b"data",
+        ):
+            archiver.archive_stream(pages)
+        archiver.compress_archive()
+        with tarfile.open(archiver.archive_file) as tar:
+            assert sorted(tar.getnames()) == sorted(
+                f"{os.path.basename(archiver.archive_base_path)}/bk/p{i}.md"
+                for i in range(2, 8))
+
+
+# ---------------------------------------------------------------------------
+# run.exporter with pipeline
+# ---------------------------------------------------------------------------
+
+def test_exporter_streams_pages_into_the_archive(monkeypatch):
+    config = MagicMock()
+    config.user_inputs.export_level = "pages"
+    config.user_inputs.pipeline = True
+    config.user_inputs.notifications = None
+    book_nodes = {1: MagicMock()}
+    http = MagicMock(guard=None, adaptive=None)
+    monkeypatch.setattr(run, "HttpHelper", MagicMock(return_value=http))
+    export_helper = MagicMock()
+    export_helper.get_all_books.return_value = book_nodes
+    monkeypatch.setattr(run, "NodeExporter", MagicMock(return_value=export_helper))
+    archive = MagicMock()
+    monkeypatch.setattr(run, "Archiver", MagicMock(return_value=archive))
+    pages = export_helper.iter_pages.return_value
+    run.exporter(config)
+    export_helper.iter_pages.assert_called_once_with(book_nodes)
+    export_helper.get_all_pages.assert_not_called()
+    archive.stream_bookstack_exports.assert_called_once_with(pages)
+    archive.get_bookstack_exports.assert_not_called()
+    pages.close.assert_called_once()
@@ -0,0 +1,76 @@
+# pylint: disable=missing-class-docstring,missing-function-docstring,redefined-outer-name,too-few-public-methods
+"""Unit tests for the shared request rate limiter."""
+import pytest
+
+from bookstack_file_exporter.common.rate_limit import RateLimiter
+
+
+class FakeClock:
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_bucket_bursts_one_second_then_paces(clock):
+    limiter = RateLimiter(120, clock=clock)  # 2/s, burst of 2
+    assert [limiter.reserve() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    assert limiter.requests == 4
+    assert limiter.wait_seconds == 1.5
+
+
+def test_bucket_refills_over_time(clock):
+    limiter = RateLimiter(60, clock=clock)
+    assert limiter.reserve() == 0.0
+    clock.now += 1
+    assert limiter.reserve() == 0.0
+    clock.now += 0.25
+    assert limiter.reserve() == 0.75
+
+
+def test_retry_after_pauses_every_request(clock):
+    limiter = RateLimiter(120, clock=clock)
+    limiter.observe(429, {"Retry-After": "5"})
+    assert limiter.reserve() == 5.0
+    assert limiter.reserve() == 5.5
+
+
+def test_retry_after_on_success_is_ignored(clock):
+    limiter = RateLimiter(120, clock=clock)
+    limiter.observe(200, {"Retry-After": "5"})
+    assert limiter.reserve() == 0.0
+
+
+def test_server_limit_below_configured_rate_lowers_it(clock):
+    limiter = RateLimiter(600, clock=clock)
+    limiter.observe(200, {"X-RateLimit-Limit": "180"})
+    assert limiter.rate == 180
+    limiter.observe(200, {"X-RateLimit-Limit": "900"})
+    assert limiter.rate == 180
+
+
+def test_remaining_caps_tokens(clock):
+    limiter = RateLimiter(600, clock=clock)  # 10/s
+    limiter.observe(200, {"X-RateLimit-Remaining": "1"})
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() == pytest.approx(0.1)
+
+
+@pytest.mark.parametrize("reset", ["1700000030", "30"])  # epoch or seconds
+def test_exhausted_window_pauses_until_reset(clock, reset):
+    limiter = RateLimiter(60, clock=clock, wall_clock=lambda: 1700000000.0)
+    limiter.observe(200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset})
+    assert limiter.reserve() == 30.0
+
+
+def test_summary_reports_pacing(clock):
+    limiter = RateLimiter(60, clock=clock)
+    limiter.reserve()
+    limiter.reserve()
+    assert limiter.summary() == "2 requests paced at up to 60/min; waited 1.00s in total"
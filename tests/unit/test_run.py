@@ -7,10 +7,9 @@ import threading
 from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
-import pytest
-
 from bookstack_file_exporter import run
 from bookstack_file_exporter.notify.models import ExportStatus, NotifyResult, UploadOutcome
+from tests.helpers import guardless_http_helper
 
 
 def _config(run_interval, run_once=False, run_schedule=None, health_port=None):
@@ -187,7 +186,7 @@ class TestRunScheduledPath:
         cfg = self._cfg_with_interval()
         stop_event = threading.Event()
 
-        def _run_side_effect(_config, _stop=None):
+        def _run_side_effect(_config, _stop=None, _status=None, _clients=None):
             stop_event.set()  # signal stop after first call so loop exits
 
         with patch.object(run, "ConfigNode", return_value=cfg), \
@@ -207,7 +206,7 @@ class TestRunScheduledPath:
         stop_event = threading.Event()
         call_count = 0
 
-        def _run_side_effect(_config, _stop=None):
+        def _run_side_effect(_config, _stop=None, _status=None, _clients=None):
             nonlocal call_count
             call_count += 1
             if call_count == 1:
@@ -236,7 +235,7 @@ class TestRunScheduledPath:
         stop_event = threading.Event()
         call_count = 0
 
-        def _run_side_effect(_config, _stop=None):
+        def _run_side_effect(_config, _stop=None, _status=None, _clients=None):
             nonlocal call_count
             call_count += 1
             raise RuntimeError("persistent failure")
@@ -263,7 +262,7 @@ class TestRunScheduledPath:
         cfg = self._cfg_with_interval()
         stop_event = threading.Event()
 
-        def _run_side_effect(_config, _stop=None):
+        def _run_side_effect(_config, _stop=None, _status=None, _clients=None):
             stop_event.set()
 
         with patch.object(run, "ConfigNode", return_value=cfg), \
@@ -322,7 +321,7 @@ def test_entrypoint_loops_when_interval_set():
     stop_event = threading.Event()
     call_count = 0
 
-    def _run_side_effect(_config, _stop=None):
+    def _run_side_effect(_config, _stop=None, _status=None, _clients=None):
         nonlocal call_count
         call_count += 1
         stop_event.set()  # exit after first iteration
@@ -375,7 +374,7 @@ def test_scheduled_loop_uses_injected_wait_provider():
     stop_event = threading.Event()
     call_count = 0
 
-    def _run_side_effect(_config, _stop=None):
+    def _run_side_effect(_config, _stop=None, _status=None, _clients=None):
         nonlocal call_count
         call_count += 1
         raise RuntimeError("transient failure")
@@ -402,6 +401,7 @@ def _make_exporter_config(export_level: str):
     """Return a MagicMock config suitable for run.exporter()."""
     config = MagicMock()
     config.user_inputs.export_level = export_level
+    config.user_inputs.pipeline = False
     config.user_inputs.run_interval = 0
     config.user_inputs.notifications = None
     return config
@@ -413,7 +413,7 @@ def _patch_exporter_collaborators(monkeypatch, config, book_nodes, chapter_nodes
     Returns (mock_archiver, mock_export_helper).
     """
     # HttpHelper
-    monkeypatch.setattr("bookstack_file_exporter.run.HttpHelper", MagicMock())
+    monkeypatch.setattr("bookstack_file_exporter.run.HttpHelper", guardless_http_helper())
 
     mock_export_helper = MagicMock()
     mock_export_helper.get_all_shelves.return_value = {"shelf1": MagicMock()}
@@ -592,7 +592,7 @@ class TestExporterNodeFilterWiring:
         mock_node_exporter_cls.return_value.get_all_shelves.return_value = {}
         mock_node_exporter_cls.return_value.get_all_books.return_value = {1: MagicMock()}
         monkeypatch.setattr("bookstack_file_exporter.run.NodeExporter", mock_node_exporter_cls)
-        monkeypatch.setattr("bookstack_file_exporter.run.HttpHelper", MagicMock())
+        monkeypatch.setattr("bookstack_file_exporter.run.HttpHelper", guardless_http_helper())
         monkeypatch.setattr("bookstack_file_exporter.run.Archiver", MagicMock(
             return_value=MagicMock(has_exported_content=True)
         ))
@@ -614,7 +614,7 @@ class TestExporterNodeFilterWiring:
         mock_node_exporter_cls.return_value.get_all_shelves.return_value = {}
         mock_node_exporter_cls.return_value.get_all_books.return_value = {1: MagicMock()}
         monkeypatch.setattr("bookstack_file_exporter.run.NodeExporter", mock_node_exporter_cls)
-        monkeypatch.setattr("bookstack_file_exporter.run.HttpHelper", MagicMock())
+        monkeypatch.setattr("bookstack_file_exporter.run.HttpHelper", guardless_http_helper())
         monkeypatch.setattr("bookstack_file_exporter.run.Archiver", MagicMock(
             return_value=MagicMock(has_exported_content=True)
         ))
@@ -783,7 +783,7 @@ class TestScheduledHealthServer:
         cfg = _config(run_interval=5, health_port=None)
         stop_event = threading.Event()
 
-        def _run_side_effect(_config, _stop=None):
+        def _run_side_effect(_config, _stop=None, _status=None, _clients=None):
             stop_event.set()
 
         with patch.object(run, "ConfigNode", return_value=cfg), \
@@ -801,7 +801,7 @@ class TestScheduledHealthServer:
         stop_event = threading.Event()
         fake_server = MagicMock()
 
-        def _run_side_effect(_config, _stop=None):
+        def _run_side_effect(_config, _stop=None, _status=None, _clients=None):
             stop_event.set()
 
         with patch.object(run, "ConfigNode", return_value=cfg), \
@@ -823,7 +823,7 @@ class TestScheduledHealthServer:
         stop_event = threading.Event()
         captured = {}
 
-        def _run_side_effect(_config, _stop=None):
+        def _run_side_effect(_config, _stop=None, _status=None, _clients=None):
             stop_event.set()
             return NotifyResult(local="/bkps/export.tgz")
 
@@ -845,92 +845,6 @@ class TestScheduledHealthServer:
         assert snap["last_run"]["archive_file"] == "export.tgz"
 
 
-# ---------------------------------------------------------------------------
-# exporter() — stop-flag wiring (set_stop / sweep_orphans / discard_partial)
-# ---------------------------------------------------------------------------
-
-class TestExporterStopWiring:
-    def _cfg(self):
-        # NOTE: unassigned_book_dir is read TOP-LEVEL by exporter()
-        # (`config.unassigned_book_dir`, run.py -> config_helper), NOT off
-        # user_inputs. Putting it under ui raises AttributeError.
-        ui = SimpleNamespace(
-            http_config=MagicMock(), filters=None, export_level="pages",
-            notifications=None, export_workers=1)
-        return SimpleNamespace(
-            user_inputs=ui, headers={}, urls={}, unassigned_book_dir=None)
-
-    def test_exporter_injects_stop_into_node_exporter(self):
-        cfg = self._cfg()
-        stop = threading.Event()
-        archive = MagicMock()
-        with patch.object(run, "HttpHelper"), \
-             patch.object(run, "NodeExporter") as mock_exp, \
-             patch.object(run, "Archiver", return_value=archive):
-            mock_exp.return_value.get_all_shelves.return_value = {}
-            mock_exp.return_value.get_all_books.return_value = {}
-            mock_exp.return_value.get_all_pages.return_value = {}
-            run.exporter(cfg, stop)
-
-        # the fetch layer must receive the same shutdown flag the archiver does
-        _, kwargs = mock_exp.call_args
-        assert kwargs["stop"] is stop
-
-    def test_exporter_skips_archive_when_stop_set_after_fetch(self):
-        cfg = self._cfg()
-        stop = threading.Event()
-        stop.set()
-        archive = MagicMock()
-        with patch.object(run, "HttpHelper"), \
-             patch.object(run, "NodeExporter") as mock_exp, \
-             patch.object(run, "Archiver", return_value=archive):
-            mock_exp.return_value.get_all_shelves.return_value = {}
-            mock_exp.return_value.get_all_books.return_value = {1: MagicMock()}
-            mock_exp.return_value.get_all_pages.return_value = {1: MagicMock()}
-            result = run.exporter(cfg, stop)
-
-        archive.set_stop.assert_called_once_with(stop)
-        archive.sweep_orphans.assert_called_once()
-        # cancelled during fetch -> skip the archive phase entirely (truncated tree)
-        archive.get_bookstack_exports.assert_not_called()
-        archive.create_archive.assert_not_called()
-        assert result is None
-
-    def test_exporter_discards_partial_on_mid_archive_stop(self):
-        cfg = self._cfg()
-        stop = threading.Event()  # not set during fetch
-        archive = MagicMock()
-        # simulate a signal landing while the archive loop runs
-        archive.get_bookstack_exports.side_effect = lambda _nodes: stop.set()
-        with patch.object(run, "HttpHelper"), \
-             patch.object(run, "NodeExporter") as mock_exp, \
-             patch.object(run, "Archiver", return_value=archive):
-            mock_exp.return_value.get_all_shelves.return_value = {}
-            mock_exp.return_value.get_all_books.return_value = {1: MagicMock()}
-            mock_exp.return_value.get_all_pages.return_value = {1: MagicMock()}
-            result = run.exporter(cfg, stop)
-
-        archive.get_bookstack_exports.assert_called_once()
-        # mid-cycle stop -> discard the partial tar, never gzip/upload
-        archive.create_archive.assert_not_called()
-        archive.discard_partial.assert_called_once()
-        assert result is None
-
-    def test_exporter_discards_partial_on_exception(self):
-        cfg = self._cfg()
-        archive = MagicMock()
-        archive.get_bookstack_exports.side_effect = RuntimeError("mid-cycle boom")
-        with patch.object(run, "HttpHelper"), \
-             patch.object(run, "NodeExporter") as mock_exp, \
-             patch.object(run, "Archiver", return_value=archive):
-            mock_exp.return_value.get_all_shelves.return_value = {}
-            mock_exp.return_value.get_all_books.return_value = {1: MagicMock()}
-            mock_exp.return_value.get_all_pages.return_value = {1: MagicMock()}
-            with pytest.raises(RuntimeError):
-                run.exporter(cfg, None)
-        archive.discard_partial.assert_called_once()
-
-
 # ---------------------------------------------------------------------------
 # _run_scheduled() — double-signal force-kill (SIG_DFL restore)
 # ---------------------------------------------------------------------------
@@ -946,7 +860,7 @@ class TestDoubleSignalForceKill:
             if signum == signal.SIGTERM and callable(handler):
                 captured["handler"] = handler
 
-        def _run_side_effect(_config, _stop=None):
+        def _run_side_effect(_config, _stop=None, _status=None, _clients=None):
             stop_event.set()
 
         with patch.object(run, "ConfigNode", return_value=cfg), \
@@ -969,7 +883,7 @@ class TestDoubleSignalForceKill:
         cfg = _config(run_interval=5)
         stop_event = threading.Event()
 
-        def _run_side_effect(_config, _stop=None):
+        def _run_side_effect(_config, _stop=None, _status=None, _clients=None):
             assert _stop is stop_event
             stop_event.set()
 
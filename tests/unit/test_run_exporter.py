@@ -0,0 +1,113 @@
+# pylint: disable=missing-class-docstring,missing-function-docstring
+"""Unit tests for what run.exporter hands its collaborators: the stop flag (and the
+partial-archive cleanup around it) and the health status."""
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from bookstack_file_exporter import run
+from tests.helpers import guardless_http_helper
+
+
+# ---------------------------------------------------------------------------
+# exporter() — stop-flag wiring (set_stop / sweep_orphans / discard_partial)
+# ---------------------------------------------------------------------------
+
+class TestExporterStopWiring:
+    def _cfg(self):
+        # NOTE: unassigned_book_dir is read TOP-LEVEL by exporter()
+        # (`config.unassigned_book_dir`, run.py -> config_helper), NOT off
+        # user_inputs. Putting it under ui raises AttributeError.
+        ui = SimpleNamespace(
+            http_config=MagicMock(), filters=None, export_level="pages",
+            notifications=None, export_workers=1, engine="threads",
+            adaptive_workers=False, pipeline=False)
+        return SimpleNamespace(
+            user_inputs=ui, headers={}, urls={}, unassigned_book_dir=None)
+
+    def test_exporter_injects_stop_into_node_exporter(self):
+        cfg = self._cfg()
+        stop = threading.Event()
+        archive = MagicMock()
+        with patch.object(run, "HttpHelper", guardless_http_helper()), \
+             patch.object(run, "NodeExporter") as mock_exp, \
+             patch.object(run, "Archiver", return_value=archive):
+            mock_exp.return_value.get_all_shelves.return_value = {}
+            mock_exp.return_value.get_all_books.return_value = {}
+            mock_exp.return_value.get_all_pages.return_value = {}
+            run.exporter(cfg, stop)
+
+        # the fetch layer must receive the same shutdown flag the archiver does
+        _, kwargs = mock_exp.call_args
+        assert kwargs["stop"] is stop
+
+    def test_exporter_reports_adaptive_limit_to_health_status(self):
+        cfg = self._cfg()
+        status = MagicMock()
+        with patch.object(run, "HttpHelper", guardless_http_helper()) as mock_http, \
+             patch.object(run, "NodeExporter") as mock_exp, \
+             patch.object(run, "Archiver"):
+            mock_http.return_value.adaptive.limit = 1
+            mock_exp.return_value.get_all_shelves.return_value = {}
+            mock_exp.return_value.get_all_books.return_value = {}
+            mock_exp.return_value.get_all_pages.return_value = {}
+            run.exporter(cfg, None, status)
+
+        assert mock_http.return_value.adaptive.on_change is status.set_concurrency
+        status.set_concurrency.assert_called_once_with(1)
+
+    def test_exporter_skips_archive_when_stop_set_after_fetch(self):
+        cfg = self._cfg()
+        stop = threading.Event()
+        stop.set()
+        archive = MagicMock()
+        with patch.object(run, "HttpHelper", guardless_http_helper()), \
+             patch.object(run, "NodeExporter") as mock_exp, \
+             patch.object(run, "Archiver", return_value=archive):
+            mock_exp.return_value.get_all_shelves.return_value = {}
+            mock_exp.return_value.get_all_books.return_value = {1: MagicMock()}
+            mock_exp.return_value.get_all_pages.return_value = {1: MagicMock()}
+            result = run.exporter(cfg, stop)
+
+        archive.set_stop.assert_called_once_with(stop)
+        archive.sweep_orphans.assert_called_once()
+        # cancelled during fetch -> skip the archive phase entirely (truncated tree)
+        archive.get_bookstack_exports.assert_not_called()
+        archive.create_archive.assert_not_called()
+        assert result is None
+
+    def test_exporter_discards_partial_on_mid_archive_stop(self):
+        cfg = self._cfg()
+        stop = threading.Event()  # not set during fetch
+        archive = MagicMock()
+        # simulate a signal landing while the archive loop runs
+        archive.get_bookstack_exports.side_effect = lambda _nodes: stop.set()
+        with patch.object(run, "HttpHelper", guardless_http_helper()), \
+             patch.object(run, "NodeExporter") as mock_exp, \
+             patch.object(run, "Archiver", return_value=archive):
+            mock_exp.return_value.get_all_shelves.return_value = {}
+            mock_exp.return_value.get_all_books.return_value = {1: MagicMock()}
+            mock_exp.return_value.get_all_pages.return_value = {1: MagicMock()}
+            result = run.exporter(cfg, stop)
+
+        archive.get_bookstack_exports.assert_called_once()
+        # mid-cycle stop -> discard the partial tar, never gzip/upload
+        archive.create_archive.assert_not_called()
+        archive.discard_partial.assert_called_once()
+        assert result is None
+
+    def test_exporter_discards_partial_on_exception(self):
+        cfg = self._cfg()
+        archive = MagicMock()
+        archive.get_bookstack_exports.side_effect = RuntimeError("mid-cycle boom")
+        with patch.object(run, "HttpHelper", guardless_http_helper()), \
+             patch.object(run, "NodeExporter") as mock_exp, \
+             patch.object(run, "Archiver", return_value=archive):
+            mock_exp.return_value.get_all_shelves.return_value = {}
+            mock_exp.return_value.get_all_books.return_value = {1: MagicMock()}
+            mock_exp.return_value.get_all_pages.return_value = {1: MagicMock()}
+            with pytest.raises(RuntimeError):
+                run.exporter(cfg, None)
+        archive.discard_partial.assert_called_once()
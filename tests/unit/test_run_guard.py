@@ -0,0 +1,172 @@
+# pylint: disable=missing-class-docstring,missing-function-docstring
+"""Unit tests for the run deadline and circuit breaker (common/run_guard.py)."""
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+import responses
+from pydantic import ValidationError
+
+from bookstack_file_exporter import run
+from bookstack_file_exporter.common.run_guard import Halt, RunAborted, RunGuard
+from bookstack_file_exporter.common.util import HttpHelper
+from bookstack_file_exporter.config_helper.models import HttpConfig
+from bookstack_file_exporter.notify.models import ExportStatus
+
+BASE = "https://wiki.test.example/api"
+
+
+def test_deadline_trips_once_passed():
+    now = [100.0]
+    guard = RunGuard(deadline=60, clock=lambda: now[0])
+    assert not guard.tripped
+    now[0] = 159.9
+    assert not guard.is_set()
+    now[0] = 160.0
+    assert guard.tripped
+    assert guard.reason == "run deadline of 60s reached"
+    with pytest.raises(RunAborted, match="not sending /api/books"):
+        guard.check("/api/books")
+
+
+def test_breaker_needs_a_full_window_at_the_error_rate():
+    guard = RunGuard(error_rate=0.5, window=4)
+    for ok in (False, False, False):
+        guard.record(ok)
+    assert not guard.tripped  # window not full yet
+    guard.record(True)
+    assert guard.tripped
+    assert guard.reason == "circuit breaker opened: 3 of the last 4 requests failed"
+
+
+def test_breaker_window_slides_past_old_failures():
+    guard = RunGuard(error_rate=0.75, window=4)
+    for ok in (False, False, True, True, True, False, True, False):
+        guard.record(ok)
+    assert not guard.tripped  # last 4: T, F, T, F
+    guard.record(False)  # last 4: F, T, F, F
+    assert guard.tripped
+
+
+def test_no_breaker_ignores_failures():
+    guard = RunGuard(deadline=3600)
+    for _ in range(100):
+        guard.record(False)
+    assert not guard.tripped
+
+
+def test_run_aborted_is_a_retry_error():
+    assert issubclass(RunAborted, requests.exceptions.RetryError)
+
+
+def test_halt_is_set_when_any_flag_is():
+    stop, guard = threading.Event(), RunGuard(error_rate=1, window=1)
+    halt = Halt(stop, guard, None)
+    assert not halt.is_set()
+    guard.record(False)
+    assert halt.is_set()
+    assert Halt(None).is_set() is False
+
+
+@pytest.mark.parametrize("http", [{"deadline": 0}, {"circuit_breaker": {"error_rate": 0}},
+                                  {"circuit_breaker": {"error_rate": 1.5}},
+                                  {"circuit_breaker": {"window": 0}}])
+def test_config_rejects_out_of_range_values(http):
+    with pytest.raises(ValidationError):
+        HttpConfig(**http)
+
+
+def test_helper_has_no_guard_by_default():
+    assert HttpHelper({}, HttpConfig()).guard is None
+
+
+@responses.activate
+def test_open_breaker_stops_retries_and_fails_later_requests_fast():
+    helper = HttpHelper({}, HttpConfig(retry_count=5, backoff_factor=0, retry_codes=[503],
+                                       circuit_breaker={"error_rate": 1, "window": 2}))
+    responses.get(f"{BASE}/books/1", status=503)
+    with pytest.raises(requests.exceptions.RetryError):
+        helper.http_get_request(f"{BASE}/books/1")
+    # the second failed attempt opened the breaker: no third attempt
+    assert len(responses.calls) == 2
+    assert helper.guard.tripped
+    with pytest.raises(RunAborted):
+        helper.http_get_request(f"{BASE}/books/2")
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_successes_keep_the_breaker_closed():
+    helper = HttpHelper({}, HttpConfig(retry_count=1, backoff_factor=0, retry_codes=[503],
+                                       circuit_breaker={"error_rate": 0.5, "window": 4}))
+    responses.get(f"{BASE}/pages/1", status=503)
+    responses.get(f"{BASE}/pages/1", body=b"{}")
+    responses.get(f"{BASE}/pages/2", status=404)
+    responses.get(f"{BASE}/pages/3", body=b"{}")
+    helper.http_get_request(f"{BASE}/pages/1")
+    with pytest.raises(requests.exceptions.HTTPError):
+        helper.http_get_request(f"{BASE}/pages/2")
+    helper.http_get_request(f"{BASE}/pages/3")
+    assert not helper.guard.tripped
+
+
+def test_async_engine_stops_retrying_once_tripped(make_async_http):
+    helper, client = make_async_http({"/api/pages/1": [503] * 6}, retry_count=5)
+    helper.guard = RunGuard(error_rate=1, window=2)
+    with pytest.raises(requests.exceptions.RetryError):
+        helper.run(helper.get("/api/pages/1"))
+    assert len(client.calls) == 2
+    with pytest.raises(RunAborted):
+        helper.run(helper.get("/api/pages/2"))
+    assert len(client.calls) == 2
+
+
+# ---------------------------------------------------------------------------
+# exporter(): a tripped guard ends the run PARTIAL, or fails it when nothing
+# was archived
+# ---------------------------------------------------------------------------
+
+def _cfg():
+    ui = SimpleNamespace(http_config=MagicMock(), filters=None, export_level="pages",
+                         notifications=None, export_workers=1, engine="threads",
+                         adaptive_workers=False, pipeline=False)
+    return SimpleNamespace(user_inputs=ui, headers={}, urls={}, unassigned_book_dir=None)
+
+
+def _export_with_guard(guard, archive):
+    exporter = MagicMock()
+    exporter.return_value.get_all_shelves.return_value = {}
+    exporter.return_value.get_all_books.return_value = {1: MagicMock()}
+    exporter.return_value.get_all_pages.return_value = {1: MagicMock()}
+    with patch.object(run, "HttpHelper", MagicMock(return_value=MagicMock(guard=guard))), \
+         patch.object(run, "NodeExporter", exporter), \
+         patch.object(run, "Archiver", return_value=archive):
+        result = run.exporter(_cfg())
+    return result, exporter
+
+
+def test_trip_mid_archive_ships_what_was_fetched_as_partial():
+    guard = RunGuard(error_rate=1, window=1)
+    archive = MagicMock(has_exported_content=True, archive_files=["a.tgz"])
+    archive.resolve_remote_status.return_value = ExportStatus.SUCCESS
+    archive.clean_up.return_value = []
+    archive.get_bookstack_exports.side_effect = lambda _nodes: guard.record(False)
+    result, mock_exp = _export_with_guard(guard, archive)
+    archive.create_archive.assert_called_once()
+    assert result.status is ExportStatus.PARTIAL
+    assert result.aborted == "circuit breaker opened: 1 of the last 1 requests failed"
+    # exporter and archiver stop at their checkpoints once the guard trips
+    halt = mock_exp.call_args.kwargs["stop"]
+    assert isinstance(halt, Halt) and halt.is_set()
+    archive.set_stop.assert_called_once()
+
+
+def test_trip_before_archive_fails_the_run():
+    guard = RunGuard(error_rate=1, window=1)
+    guard.record(False)
+    archive = MagicMock()
+    with pytest.raises(RunAborted, match="before anything was archived"):
+        _export_with_guard(guard, archive)
+    archive.get_bookstack_exports.assert_not_called()
@@ -12,6 +12,7 @@ import pytest
 from botocore.exceptions import ClientError, EndpointConnectionError
 from moto import mock_aws
 
+from bookstack_file_exporter.archiver import codecs
 from bookstack_file_exporter.archiver.s3_archiver import S3CompatibleArchiver
 
 
@@ -124,6 +125,18 @@ def test_clean_up_keep_last_zero_deletes_nothing(aws, provider):
     assert len(client.list_objects_v2(Bucket="test-bucket").get("Contents", [])) == 2
 
 
+def test_scan_matches_every_codec_extension(aws, provider):
+    client = boto3.client("s3", region_name="us-east-1")
+    _seed(client, "test-bucket", ["uploads/bookstack_export_1.tgz",
+                                  "uploads/bookstack_export_2.tar.zst",
+                                  "uploads/bookstack_export_3.tar",
+                                  "uploads/bookstack_export_4.txt"])
+    arch = S3CompatibleArchiver(provider(prefix="uploads", keep_last=1))
+    keys = sorted(o["Key"] for o in arch._scan_objects(codecs.ARCHIVE_EXTENSIONS))
+    assert keys == ["uploads/bookstack_export_1.tgz", "uploads/bookstack_export_2.tar.zst",
+                    "uploads/bookstack_export_3.tar"]
+
+
 def test_scan_paginates_beyond_1000(aws, provider):
     client = boto3.client("s3", region_name="us-east-1")
     _seed(client, "test-bucket", [f"bookstack_export_{i:04d}.tgz" for i in range(1001)])
@@ -210,3 +223,41 @@ def test_scan_ignores_lookalike_user_objects(aws, provider):
     arch = S3CompatibleArchiver(provider(prefix="uploads", keep_last=1))
     keys = [o["Key"] for o in arch._scan_objects(".tgz")]
     assert keys == ["uploads/bookstack_export_1.tgz"]
+
+
+def test_clean_up_counts_volume_sets_once(aws, provider):
+    client = boto3.client("s3", region_name="us-east-1")
+    old = [f"uploads/bookstack_export_1.part00{n}.tgz" for n in (1, 2, 3)]
+    new = [f"uploads/bookstack_export_2.part00{n}.tgz" for n in (1, 2)]
+    _seed(client, "test-bucket", old)
+    _seed(client, "test-bucket", new)
+    arch = S3CompatibleArchiver(provider(prefix="uploads", keep_last=2))
+    arch.clean_up(".tgz")
+    assert len(client.list_objects_v2(Bucket="test-bucket")["Contents"]) == 5
+    arch.keep_last = 1
+    with patch.object(arch, "_scan_objects", return_value=[
+            {"Key": k, "LastModified": datetime(2024, 1, 1 + i, tzinfo=timezone.utc)}
+            for i, k in enumerate(old + new)]):
+        stale = arch._get_stale_objects(".tgz")
+    assert sorted(o["Key"] for o in stale) == old
+
+
+def test_upload_backups_sends_every_volume(aws, tmp_path, provider):
+    paths = []
+    for n in (1, 2, 3):
+        volume = tmp_path / f"export.part00{n}.tgz"
+        volume.write_bytes(b"v")
+        paths.append(str(volume))
+    dests = S3CompatibleArchiver(provider()).upload_backups(paths, max_workers=4)
+    assert dests == [f"test-bucket/export.part00{n}.tgz" for n in (1, 2, 3)]
+
+
+def test_scan_matches_encrypted_archives(aws, provider):
+    client = boto3.client("s3", region_name="us-east-1")
+    _seed(client, "test-bucket", ["uploads/bookstack_export_1.tgz.enc",
+                                  "uploads/bookstack_export_2.part001.tar.zst.enc",
+                                  "uploads/bookstack_export_3.enc"])
+    arch = S3CompatibleArchiver(provider(prefix="uploads", keep_last=1))
+    keys = sorted(o["Key"] for o in arch._scan_objects(codecs.ARCHIVE_EXTENSIONS))
+    assert keys == ["uploads/bookstack_export_1.tgz.enc",
+                    "uploads/bookstack_export_2.part001.tar.zst.enc"]
@@ -0,0 +1,133 @@
+# pylint: disable=missing-function-docstring,protected-access
+"""Unit tests for the seekable archive index (restart points + member offsets)."""
+import gzip
+import os
+import random
+import tarfile
+import zlib
+from unittest.mock import MagicMock
+
+import pytest
+
+from bookstack_file_exporter.archiver import codecs, seek_index
+from bookstack_file_exporter.archiver.node_archiver import PageArchiver
+from bookstack_file_exporter.archiver.pgzip import ParallelGzipWriter, RestartableGzipWriter
+from bookstack_file_exporter.archiver.sink import TarSink
+from bookstack_file_exporter.config_helper.models import Compression
+from tests.fixtures.mock_config import make_mock_config
+
+
+def _payload(size: int, seed: int = 0) -> bytes:
+    # compressible but not trivially so: words from a small vocabulary
+    rng = random.Random(seed)
+    words = [b"page", b"book", b"shelf", b"chapter", b"image", b"restore", b"index"]
+    out = bytearray()
+    while len(out) < size:
+        out += rng.choice(words) + b" "
+    return bytes(out[:size])
+
+
+def _assert_restartable(path: str, points: list, data: bytes):
+    with open(path, "rb") as archive:
+        raw = archive.read()
+    for uncompressed, compressed in points:
+        inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+        tail = inflater.decompress(raw[compressed:])
+        assert tail.startswith(data[uncompressed:uncompressed + 1000])
+
+
+def test_restartable_gzip_writer_round_trip_and_points(tmp_path):
+    path = str(tmp_path / "out.gz")
+    data = _payload(300_000)
+    with open(path, "wb") as raw:
+        with RestartableGzipWriter(raw, level=6, interval=64 * 1024) as writer:
+            writer.write(data[:100])
+            writer.write(data[100:])
+        points = writer.restart_points
+    assert gzip.decompress(open(path, "rb").read()) == data  # pylint: disable=consider-using-with
+    assert [u for u, _ in points] == [0, 65536, 131072, 196608, 262144]
+    _assert_restartable(path, points, data)
+
+
+def test_parallel_gzip_restart_blocks(tmp_path):
+    path = str(tmp_path / "out.gz")
+    data = _payload(200_000, seed=1)
+    with open(path, "wb") as raw:
+        with ParallelGzipWriter(raw, level=6, threads=2, block_size=16 * 1024,
+                                restart_every=3) as writer:
+            writer.write(data)
+    with open(path, "rb") as raw:
+        assert gzip.decompress(raw.read()) == data
+    assert [u for u, _ in writer.restart_points] == list(range(0, 200_000, 48 * 1024))
+    _assert_restartable(path, writer.restart_points, data)
+
+
+def test_tar_sink_records_data_offsets(tmp_path):
+    tar_path = str(tmp_path / "a.tar")
+    long_name = "book/" + "x" * 150 + ".md"  # needs an extension header
+    with TarSink(tar_path, index=True, dedup=True) as sink:
+        sink.write("a.md", b"first")
+        sink.write(long_name, b"second member")
+        sink.write("copy.md", b"first")
+    index = {"version": 1, "codec": "none", "restart_points": [],
+             "members": sink.member_index}
+    assert sink.member_index["copy.md"] == {"link": "a.md"}
+    for name, content in (("a.md", b"first"), (long_name, b"second member"),
+                          ("copy.md", b"first")):
+        assert seek_index.read_member(tar_path, name, index) == content
+
+
+@pytest.mark.parametrize("compression", [
+    Compression(threads=1), Compression(threads=2),
+    Compression(threads=1, streaming=True), Compression(threads=2, streaming=True),
+    Compression(codec="none"),
+])
+def test_page_archiver_writes_usable_index(tmp_path, build_node, monkeypatch, compression):
+    # a tiny interval forces many restart points through both gzip writers
+    monkeypatch.setattr(seek_index, "RESTART_INTERVAL", 16 * 1024)
+    config = make_mock_config(index=True, compression=compression)
+    archiver = PageArchiver(str(tmp_path / "bkps_1"), config, MagicMock(),
+                            asset_archiver=MagicMock())
+    bodies = {i: _payload(40_000 + i, seed=i) for i in range(2, 8)}
+    archiver._get_node_data = lambda url, _fmt: bodies[int(url.split("/")[-3])]
+    book = build_node(id=1, name="book", slug="book")
+    pages = {i: build_node(id=i, name=f"p{i}", slug=f"p{i}", parent=book) for i in bodies}
+
+    archiver._export_nodes(pages, "pages", {}, {})
+    archiver.compress_archive()
+
+    index = seek_index.load_index(archiver.archive_file)
+    assert index["codec"] == compression.codec
+    if compression.codec == "gzip":
+        assert len(index["restart_points"]) > 1
+    for i, body in bodies.items():
+        assert seek_index.read_member(archiver.archive_file, f"bkps_1/book/p{i}.md") == body
+    with tarfile.open(archiver.archive_file) as tar:  # still an ordinary archive
+        assert len(tar.getnames()) == len(bodies)
+
+
+def test_no_index_by_default(tmp_path, build_node):
+    archiver = PageArchiver(str(tmp_path / "bkps_1"), make_mock_config(), MagicMock(),
+                            asset_archiver=MagicMock())
+    archiver._get_node_data = lambda url, _fmt: b"body"
+    book = build_node(id=1, name="book", slug="book")
+    archiver._export_nodes({2: build_node(id=2, name="p", slug="p", parent=book)},
+                           "pages", {}, {})
+    archiver.compress_archive()
+    assert not os.path.exists(seek_index.sidecar_path(archiver.archive_file))
+
+
+def test_main_extracts_member(tmp_path, capsysbinary):
+    tar_path = str(tmp_path / "a.tgz")
+    with TarSink(tar_path, index=True,
+                 opener=codecs.writer_factory("gzip", 1, 1, restart_interval=1024)) as sink:
+        sink.write("bk/page.md", b"restored")
+    seek_index.write_sidecar(tar_path, seek_index.index_bytes(
+        "gzip", sink.member_index, sink.restart_points))
+
+    assert seek_index.main([tar_path, "bk/page.md"]) == 0
+    assert capsysbinary.readouterr().out == b"restored"
+    out = tmp_path / "page.md"
+    assert seek_index.main([tar_path, "bk/page.md", "-o", str(out)]) == 0
+    assert out.read_bytes() == b"restored"
+    assert seek_index.main([tar_path, "missing"]) == 1
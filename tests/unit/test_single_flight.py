@@ -0,0 +1,99 @@
+# pylint: disable=missing-class-docstring,missing-function-docstring
+"""Unit tests for single-flight request coalescing."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from bookstack_file_exporter.common.single_flight import AsyncSingleFlight, SingleFlight
+
+
+def _concurrently(flights, key, fn, callers=4):
+    """Start callers threads through flights.do(key, fn); returns them with the
+    lists their results and errors land in."""
+    results, errors = [], []
+
+    def _call():
+        try:
+            results.append(flights.do(key, fn))
+        except ValueError as err:
+            errors.append(err)
+    threads = [threading.Thread(target=_call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_calls_share_one_result():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"id": 1}
+    threads, results, _ = _concurrently(flights, "u", fetch)
+    while flights.calls < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert len(results) == 4 and all(r is results[0] for r in results)
+    assert (flights.calls, flights.shared) == (4, 3)
+
+
+def test_failure_is_shared_and_key_is_freed():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError("boom")
+    threads, _, errors = _concurrently(flights, "u", fail, callers=3)
+    while flights.calls < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 3
+    # nothing in flight any more: the next call runs its own fetch
+    assert flights.do("u", lambda: "again") == "again"
+
+
+def test_async_calls_share_one_task():
+    flights = AsyncSingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"id": 1}
+
+    async def main():
+        return await asyncio.gather(*[flights.do("u", fetch) for _ in range(5)],
+                                    flights.do("v", fetch))
+    results = asyncio.run(main())
+    assert len(calls) == 2
+    assert all(r is results[0] for r in results[:5])
+    assert (flights.calls, flights.shared) == (6, 4)
+
+
+def test_async_cancelled_waiter_leaves_flight_for_the_others():
+    flights = AsyncSingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(flights.do("u", fetch))
+        second = asyncio.ensure_future(flights.do("u", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+    assert asyncio.run(main()) == "done"
@@ -0,0 +1,426 @@
+# pylint: disable=missing-class-docstring,missing-function-docstring,protected-access
+"""Unit tests for the run-scoped archive sink (single writer thread)."""
+import hashlib
+import json
+import os
+import sys
+import tarfile
+import threading
+import zipfile
+from unittest.mock import patch
+
+import pytest
+
+from bookstack_file_exporter.archiver import codecs
+from bookstack_file_exporter.archiver.manifest import MemberSource
+from bookstack_file_exporter.archiver.sink import (
+    DirectorySink, TarSink, VolumeTarSink, ZipSink, prune_tree)
+from bookstack_file_exporter.archiver.spool import Spool
+
+
+def _names(tar_path: str) -> list[str]:
+    with tarfile.open(tar_path, "r") as tar:
+        return tar.getnames()
+
+
+def test_creates_tar_with_member(tmp_path):
+    tar_path = str(tmp_path / "archive.tar")
+    with TarSink(tar_path) as sink:
+        sink.write("hello.txt", b"hello world")
+    assert _names(tar_path) == ["hello.txt"]
+
+
+def test_members_keep_write_order(tmp_path):
+    tar_path = str(tmp_path / "archive.tar")
+    with TarSink(tar_path) as sink:
+        for i in range(5):
+            sink.write(f"file{i}.txt", f"data{i}".encode())
+    assert _names(tar_path) == [f"file{i}.txt" for i in range(5)]
+
+
+def test_correct_content_and_size(tmp_path):
+    tar_path = str(tmp_path / "archive.tar")
+    content = b"exact bytes"
+    with TarSink(tar_path) as sink:
+        sink.write("doc.txt", content)
+    with tarfile.open(tar_path, "r") as tar:
+        member = tar.getmember("doc.txt")
+        assert member.size == len(content)
+        assert tar.extractfile(member).read() == content
+
+
+def test_opener_compresses_members(tmp_path):
+    tar_path = str(tmp_path / "archive.tar.xz")
+    with TarSink(tar_path, opener=codecs.writer_factory("xz", level=1)) as sink:
+        sink.write("doc.txt", b"compressed")
+    with tarfile.open(tar_path, "r:xz") as tar:
+        assert tar.extractfile("doc.txt").read() == b"compressed"
+
+
+def test_no_file_created_when_nothing_written(tmp_path):
+    tar_path = str(tmp_path / "archive.tar")
+    with TarSink(tar_path):
+        pass
+    assert not os.path.exists(tar_path)
+
+
+def test_archive_opened_once_per_run(tmp_path):
+    """The whole point of the sink: one open per run, not one per member."""
+    tar_path = str(tmp_path / "archive.tar")
+    real_open = tarfile.open
+    with patch("bookstack_file_exporter.archiver.sink.tarfile.open",
+               side_effect=real_open) as mock_open:
+        with TarSink(tar_path) as sink:
+            for i in range(20):
+                sink.write(f"f{i}", b"x")
+    assert mock_open.call_count == 1
+    assert len(_names(tar_path)) == 20
+
+
+def test_concurrent_producers_all_present(tmp_path):
+    """Many threads writing at once must all land in one valid tar. A Barrier
+    maximizes overlap; the small queue forces producers to block on the writer."""
+    tar_path = str(tmp_path / "concurrent.tar")
+    n = 50
+    barrier = threading.Barrier(n)
+    with TarSink(tar_path, max_pending=2) as sink:
+        def worker(i):
+            barrier.wait()
+            sink.write(f"file{i}.txt", f"data{i}".encode())
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    assert set(_names(tar_path)) == {f"file{i}.txt" for i in range(n)}
+
+
+def test_stats_count_members_and_bytes(tmp_path):
+    with TarSink(str(tmp_path / "a.tar")) as sink:
+        sink.write("a", b"12345")
+        sink.write("b", b"678")
+    stats = sink.stats
+    assert stats.members == 2
+    assert stats.bytes_written == 8
+    assert stats.write_seconds >= 0
+    assert stats.wait_seconds >= 0
+
+
+def test_writer_error_surfaces_on_close(tmp_path):
+    # parent directory missing -> tarfile.open fails on the writer thread
+    tar_path = str(tmp_path / "missing" / "a.tar")
+    sink = TarSink(tar_path)
+    with pytest.raises(FileNotFoundError):
+        with sink:
+            sink.write("a", b"x")
+
+
+def test_writer_error_surfaces_on_next_write(tmp_path):
+    tar_path = str(tmp_path / "missing" / "a.tar")
+    sink = TarSink(tar_path)
+    with pytest.raises(FileNotFoundError):  # ...and again when the sink closes
+        with sink:
+            sink.write("a", b"x")
+            # wait for the writer to process (and fail on) the first member
+            for _ in range(100):
+                if sink._error is not None:
+                    break
+                threading.Event().wait(0.01)
+            with pytest.raises(FileNotFoundError):
+                sink.write("b", b"y")
+
+
+def test_done_runs_after_member_is_written(tmp_path):
+    tar_path = str(tmp_path / "archive.tar")
+    written = []
+    with TarSink(tar_path) as sink:
+        sink.write("a.txt", b"a", done=lambda: written.append(sink.stats.members))
+    assert written == [1]
+
+
+def test_done_runs_when_writer_has_failed(tmp_path):
+    tar_path = str(tmp_path / "missing" / "a.tar")
+    calls = []
+    with pytest.raises(FileNotFoundError):
+        with TarSink(tar_path) as sink:
+            sink.write("a", b"x", done=lambda: calls.append("a"))
+            for _ in range(100):
+                if sink._error is not None:
+                    break
+                threading.Event().wait(0.01)
+            # rejected members still give their reservation back
+            with pytest.raises(FileNotFoundError):
+                sink.write("b", b"y", done=lambda: calls.append("b"))
+    assert calls == ["a", "b"]
+
+
+def test_exit_during_exception_does_not_mask_original(tmp_path):
+    tar_path = str(tmp_path / "missing" / "a.tar")
+    with pytest.raises(KeyError):
+        with TarSink(tar_path) as sink:
+            sink.write("a", b"x")
+            raise KeyError("original")
+
+
+def test_close_is_idempotent(tmp_path):
+    tar_path = str(tmp_path / "a.tar")
+    sink = TarSink(tar_path)
+    with sink:
+        sink.write("a", b"x")
+    sink.close()
+    assert _names(tar_path) == ["a"]
+
+
+def test_zip_stores_compressed_formats_and_deflates_text(tmp_path):
+    zip_path = str(tmp_path / "archive.zip")
+    with ZipSink(zip_path) as sink:
+        sink.write("book/page.md", b"# heading\n" * 100)
+        sink.write("book/page.pdf", b"%PDF-1.7 ...")
+        sink.write("book/images/page/diagram.PNG", b"\x89PNG...")
+        sink.write("book/page_meta.json", b'{"id": 1}')
+    with zipfile.ZipFile(zip_path) as archive:
+        types = {info.filename: info.compress_type for info in archive.infolist()}
+        assert archive.read("book/page.md") == b"# heading\n" * 100
+        assert archive.testzip() is None
+    assert types == {
+        "book/page.md": zipfile.ZIP_DEFLATED,
+        "book/page.pdf": zipfile.ZIP_STORED,
+        "book/images/page/diagram.PNG": zipfile.ZIP_STORED,
+        "book/page_meta.json": zipfile.ZIP_DEFLATED,
+    }
+
+
+def _spool(data: bytes) -> Spool:
+    spool = Spool()
+    spool.write(data)
+    return spool
+
+
+@pytest.mark.parametrize("name, compress_type", [
+    ("book/page.pdf", zipfile.ZIP_STORED), ("book/page.txt", zipfile.ZIP_DEFLATED)])
+def test_zip_copies_spooled_member(tmp_path, name, compress_type):
+    zip_path = str(tmp_path / "archive.zip")
+    body = os.urandom(3000) * 4
+    spool = _spool(body)
+    with ZipSink(zip_path) as sink:
+        sink.write(name, spool)
+    with zipfile.ZipFile(zip_path) as archive:
+        assert archive.read(name) == body
+        assert archive.getinfo(name).compress_type == compress_type
+        assert archive.testzip() is None
+    assert spool._file.closed  # pylint: disable=protected-access
+
+
+@pytest.mark.skipif(sys.version_info < (3, 13), reason="ZipInfo.compress_level is 3.13+")
+def test_zip_deflates_spooled_member_at_the_configured_level(tmp_path):
+    zip_path = str(tmp_path / "archive.zip")
+    with ZipSink(zip_path, level=0) as sink:
+        sink.write("book/page.txt", _spool(b"a" * 12000))
+    with zipfile.ZipFile(zip_path) as archive:
+        info = archive.getinfo("book/page.txt")
+        # level 0 deflate only wraps the data in stored blocks
+        assert info.compress_size >= info.file_size
+
+
+def test_zip_no_file_created_when_nothing_written(tmp_path):
+    zip_path = str(tmp_path / "archive.zip")
+    with ZipSink(zip_path):
+        pass
+    assert not os.path.exists(zip_path)
+
+
+def test_zip_stats_and_member_order(tmp_path):
+    zip_path = str(tmp_path / "archive.zip")
+    with ZipSink(zip_path, level=1) as sink:
+        for i in range(5):
+            sink.write(f"f{i}.txt", b"abc")
+    assert sink.stats.members == 5
+    with zipfile.ZipFile(zip_path) as archive:
+        assert archive.namelist() == [f"f{i}.txt" for i in range(5)]
+
+
+def test_directory_writes_tree_without_prefix(tmp_path):
+    root = tmp_path / "tree"
+    with DirectorySink(str(root), strip_prefix="bkps_2026-01-01") as sink:
+        sink.write("bkps_2026-01-01/book/page.md", b"v1")
+    assert (root / "book" / "page.md").read_bytes() == b"v1"
+    assert sink.stats.members == 1 and sink.stats.unchanged == 0
+
+
+def test_directory_skips_identical_content(tmp_path):
+    root = tmp_path / "tree"
+    target = root / "book" / "page.md"
+    with DirectorySink(str(root)) as sink:
+        sink.write("book/page.md", b"same")
+    os.utime(target, (1, 1))
+    with DirectorySink(str(root)) as sink:
+        sink.write("book/page.md", b"same")
+    assert os.stat(target).st_mtime == 1  # untouched
+    assert sink.stats.unchanged == 1 and sink.stats.bytes_written == 0
+
+
+def test_directory_rewrites_changed_content_of_same_size(tmp_path):
+    root = tmp_path / "tree"
+    with DirectorySink(str(root)) as sink:
+        sink.write("page.md", b"aaaa")
+    with DirectorySink(str(root)) as sink:
+        sink.write("page.md", b"bbbb")
+    assert (root / "page.md").read_bytes() == b"bbbb"
+    assert sink.stats.unchanged == 0
+    assert not list(root.glob("*.partial"))
+
+
+def test_prune_tree_removes_what_the_run_did_not_write(tmp_path):
+    root = tmp_path / "tree"
+    with DirectorySink(str(root)) as sink:
+        sink.write("book/old.md", b"old")
+        sink.write("gone/page.md", b"gone")
+        sink.write("book/kept.md", b"kept")
+    with DirectorySink(str(root)) as sink:
+        sink.write("book/kept.md", b"kept")
+        sink.write("book/new.md", b"new")
+    assert prune_tree(str(root), sink.members) == 2
+    assert sorted(str(p.relative_to(root)) for p in root.rglob("*")) == [
+        "book", os.path.join("book", "kept.md"), os.path.join("book", "new.md")]
+
+
+def test_spooled_members_match_bytes_members(tmp_path):
+    body = os.urandom(5000)
+    tar_path = str(tmp_path / "archive.tar")
+    with TarSink(tar_path, dedup=True) as sink:
+        sink.write("a.pdf", _spool(body))
+        sink.write("b.pdf", body)
+    with tarfile.open(tar_path) as tar:
+        assert tar.extractfile("a.pdf").read() == body
+        assert tar.getmember("b.pdf").linkname == "a.pdf"
+    root = tmp_path / "tree"
+    with DirectorySink(str(root)) as sink:
+        sink.write("a.pdf", _spool(body))
+    with DirectorySink(str(root)) as sink:
+        sink.write("a.pdf", _spool(body))
+    assert (root / "a.pdf").read_bytes() == body
+    assert sink.stats.unchanged == 1
+
+
+def test_directory_rejects_escaping_member(tmp_path):
+    root = tmp_path / "tree"
+    with pytest.raises(ValueError, match="escapes"):
+        with DirectorySink(str(root)) as sink:
+            sink.write("../outside.md", b"x")
+    assert not (tmp_path / "outside.md").exists()
+
+
+def test_dedup_stores_repeats_as_hardlinks(tmp_path):
+    tar_path = str(tmp_path / "archive.tar")
+    image = b"\x89PNG" + b"x" * 2000
+    with TarSink(tar_path, dedup=True) as sink:
+        sink.write("book/images/a/diagram.png", image)
+        sink.write("book/page.md", b"text")
+        sink.write("book/images/b/diagram.png", image)
+    with tarfile.open(tar_path) as tar:
+        link = tar.getmember("book/images/b/diagram.png")
+        assert link.islnk() and link.linkname == "book/images/a/diagram.png"
+        assert tar.extractfile(link).read() == image
+        tar.extractall(tmp_path / "out", filter="data")
+    assert (tmp_path / "out" / "book" / "images" / "b" / "diagram.png").read_bytes() == image
+    stats = sink.stats
+    assert stats.members == 3 and stats.duplicates == 1
+    assert stats.duplicate_bytes == len(image)
+    assert stats.bytes_written == len(image) + 4
+    assert stats.dedup_ratio == pytest.approx((2 * len(image) + 4) / (len(image) + 4))
+
+
+def test_dedup_off_by_default_and_skips_empty_members(tmp_path):
+    plain, dedup = str(tmp_path / "plain.tar"), str(tmp_path / "dedup.tar")
+    with TarSink(plain) as sink:
+        sink.write("a", b"same")
+        sink.write("b", b"same")
+    assert sink.stats.duplicates == 0 and sink.stats.dedup_ratio == 1.0
+    with TarSink(dedup, dedup=True) as sink:
+        sink.write("a", b"")
+        sink.write("b", b"")
+    with tarfile.open(dedup) as tar:
+        assert not any(member.islnk() for member in tar.getmembers())
+
+
+def test_manifest_is_last_member_and_not_counted(tmp_path):
+    tar_path = str(tmp_path / "archive.tar")
+    with TarSink(tar_path, manifest_name="bk/MANIFEST.json") as sink:
+        sink.write("bk/page.md", b"body", source=MemberSource("pages", 2, "2026-01-01"))
+        sink.write("bk/images/p/a.png", b"png")
+    assert _names(tar_path)[-1] == "bk/MANIFEST.json"
+    assert sink.stats.members == 2
+    with tarfile.open(tar_path) as tar:
+        inside = tar.extractfile("bk/MANIFEST.json").read()
+    assert inside == sink.manifest
+    files = {f["path"]: f for f in json.loads(inside)["files"]}
+    assert files["bk/page.md"] == {
+        "path": "bk/page.md", "size": 4, "sha256": hashlib.sha256(b"body").hexdigest(),
+        "resource": "pages", "node_id": 2, "updated_at": "2026-01-01"}
+    assert files["bk/images/p/a.png"]["node_id"] is None
+
+
+def test_manifest_not_written_for_empty_run(tmp_path):
+    tar_path = str(tmp_path / "archive.tar")
+    with TarSink(tar_path, manifest_name="bk/MANIFEST.json") as sink:
+        pass
+    assert sink.manifest is None
+    assert not os.path.exists(tar_path)
+
+
+def test_manifest_in_directory_uses_tree_paths(tmp_path):
+    root = tmp_path / "tree"
+    with DirectorySink(str(root), strip_prefix="bk_1",
+                       manifest_name="bk_1/MANIFEST.json") as sink:
+        sink.write("bk_1/book/page.md", b"v1")
+    files = json.loads((root / "MANIFEST.json").read_bytes())["files"]
+    assert [f["path"] for f in files] == ["book/page.md"]
+
+
+def _volume_path(tmp_path):
+    return lambda number: str(tmp_path / f"archive.part{number:03d}.tar")
+
+
+def test_volumes_split_between_members_and_extract_alone(tmp_path):
+    limit = 8 * tarfile.RECORDSIZE
+    with VolumeTarSink(_volume_path(tmp_path), limit) as sink:
+        for i in range(12):
+            sink.write(f"bk/f{i}.md", bytes([i]) * 20000)
+    assert len(sink.volumes) > 1
+    assert sink.volumes[0].endswith("archive.part001.tar")
+    names = []
+    for volume in sink.volumes:
+        assert os.path.getsize(volume) <= limit
+        with tarfile.open(volume) as tar:
+            for member in tar.getmembers():
+                index = int(member.name[len("bk/f"):-len(".md")])
+                assert tar.extractfile(member).read() == bytes([index]) * 20000
+                names.append(member.name)
+    assert names == [f"bk/f{i}.md" for i in range(12)]
+    assert sink.stats.members == 12
+
+
+def test_oversized_member_gets_its_own_volume(tmp_path):
+    with VolumeTarSink(_volume_path(tmp_path), 4 * tarfile.RECORDSIZE) as sink:
+        sink.write("small", b"x")
+        sink.write("big", os.urandom(100_000))
+        sink.write("after", b"y")
+    assert [_names(volume) for volume in sink.volumes] == [["small"], ["big"], ["after"]]
+
+
+def test_volume_dedup_never_links_across_volumes(tmp_path):
+    body = os.urandom(15000)
+    with VolumeTarSink(_volume_path(tmp_path), 8 * tarfile.RECORDSIZE, dedup=True) as sink:
+        for i in range(8):
+            sink.write(f"img{i}.png", body)
+            sink.write(f"fill{i}", os.urandom(20000))
+    for volume in sink.volumes:
+        with tarfile.open(volume) as tar:
+            local = set()
+            for member in tar.getmembers():
+                assert not member.islnk() or member.linkname in local
+                local.add(member.name)
+    # repeats inside a volume still link; the first copy in each new volume does not
+    assert len(sink.volumes) > 1
+    assert 0 < sink.stats.duplicates < 7
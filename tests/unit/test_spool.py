@@ -0,0 +1,122 @@
+# pylint: disable=missing-function-docstring,duplicate-code,protected-access
+"""Unit tests for streaming large export/asset bodies to a temp file."""
+import hashlib
+import tarfile
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from bookstack_file_exporter.archiver.budget import ByteBudget
+from bookstack_file_exporter.archiver.node_archiver import PageArchiver
+from bookstack_file_exporter.archiver.spool import (
+    Spool, body_digest, body_reader, body_size, fetch_body)
+from tests.fixtures.mock_config import make_mock_config
+
+
+def _response(chunks: list[bytes], length=None) -> MagicMock:
+    response = MagicMock()
+    response.headers = {} if length is None else {"Content-Length": str(length)}
+    response.content = b"".join(chunks)
+    response.iter_content.return_value = iter(chunks)
+    return response
+
+
+def _client(response) -> MagicMock:
+    client = MagicMock()
+    client.http_get_request.return_value = response
+    return client
+
+
+def _read(body) -> bytes:
+    return body_reader(body).read()
+
+
+def test_no_threshold_reads_body_into_memory():
+    client = _client(_response([b"abc"], length=3))
+    assert fetch_body(client, "u", None, None) == b"abc"
+    client.http_get_request.assert_called_once_with("u")
+
+
+def test_small_body_is_bytes_and_counted_in_budget():
+    response = _response([b"ab", b"c"], length=3)
+    budget = ByteBudget(100)
+    assert fetch_body(_client(response), "u", budget, 10) == b"abc"
+    assert (budget.in_use, budget.held) == (3, 3)
+    response.close.assert_called_once()
+
+
+def test_announced_large_body_is_spooled_without_budget():
+    response = _response([b"x" * 6, b"y" * 6], length=12)
+    budget = ByteBudget(100)
+    body = fetch_body(_client(response), "u", budget, 10)
+    try:
+        assert isinstance(body, Spool)
+        assert body_size(body) == 12
+        assert _read(body) == b"x" * 6 + b"y" * 6
+        assert budget.in_use == 0
+    finally:
+        body.close()
+
+
+def test_unannounced_body_rolls_over_to_spool_past_threshold():
+    chunks = [b"a" * 4, b"b" * 4, b"c" * 4]
+    budget = ByteBudget(100)
+    body = fetch_body(_client(_response(chunks)), "u", budget, 10)
+    try:
+        assert isinstance(body, Spool)
+        assert _read(body) == b"".join(chunks)
+        assert body_digest(body) == hashlib.sha256(b"".join(chunks)).digest()
+        assert (budget.in_use, budget.held) == (0, 0)
+    finally:
+        body.close()
+
+
+def test_failed_read_returns_reserved_budget():
+    response = _response([], length=5)
+    response.iter_content.side_effect = OSError("reset")
+    budget = ByteBudget(100)
+    with pytest.raises(OSError):
+        fetch_body(_client(response), "u", budget, 10)
+    assert budget.in_use == 0
+    response.close.assert_called_once()
+
+
+def test_page_archiver_spools_formats_that_are_not_rewritten(tmp_path, build_node):
+    """pdf bodies above spool_threshold reach the tar through a temp file; markdown
+    whose links are rewritten is still read into memory."""
+    config = make_mock_config(formats=["markdown", "pdf"], export_images=True,
+                              modify_links=True, spool_threshold=10)
+    archiver = PageArchiver(str(tmp_path / "bs"), config, MagicMock(),
+                            asset_archiver=MagicMock())
+    archiver.asset_archiver.get_asset_nodes.return_value = {}
+    response = archiver.http_client.http_get_request.return_value
+    response.content = b"x" * 100
+    response.headers = {"Content-Length": "100"}
+    response.iter_content.side_effect = lambda size: iter([b"x" * 100])
+    parent = build_node(id=1, name="bk", slug="bk")
+    pages = {2: build_node(id=2, name="p2", slug="p2", parent=parent)}
+
+    archiver.archive(pages)
+    archiver.compress_archive()
+
+    assert archiver.asset_archiver.spool_threshold == 10
+    streamed = [c for c in archiver.http_client.http_get_request.call_args_list
+                if c.kwargs.get("stream")]
+    assert [c.args[0].rsplit("/", 1)[-1] for c in streamed] == ["pdf"]
+    with tarfile.open(archiver.archive_file) as tar:
+        assert tar.extractfile(f"{archiver.archive_base_path}/bk/p2.pdf").read() \
+            == b"x" * 100
+
+
+def test_spool_choice_follows_the_export_format(tmp_path):
+    """the format comes from the caller, not the url (which may carry a query)"""
+    config = make_mock_config(formats=["markdown", "pdf"], export_images=True,
+                              modify_links=True, spool_threshold=10)
+    archiver = PageArchiver(str(tmp_path / "bs"), config, MagicMock(),
+                            asset_archiver=MagicMock())
+    with patch("bookstack_file_exporter.archiver.node_archiver.archiver_util"
+               ".get_byte_response") as get_byte_response:
+        for fmt in ("markdown", "pdf"):
+            archiver._get_node_data(f"https://wiki/api/pages/2/export/{fmt}?v=1", fmt)
+    assert [c.kwargs["spool_threshold"] for c in get_byte_response.call_args_list] \
+        == [None, 10]